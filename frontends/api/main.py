@@ -80,6 +80,7 @@ from stegasoo import (
     generate_channel_key,
     generate_credentials,
     get_channel_status,
+    get_governor,
     has_argon2,
     has_dct_support,
     set_channel_key,
@@ -89,6 +90,7 @@ from stegasoo import (
 )
 from stegasoo.constants import (
     DEFAULT_PASSPHRASE_WORDS,
+    FORMAT_VERSION,
     MAX_PASSPHRASE_WORDS,
     MAX_PIN_LENGTH,
     MIN_PASSPHRASE_WORDS,
@@ -420,6 +422,8 @@ class StatusResponse(BaseModel):
     dct_features: dict | None = Field(default=None, description="DCT mode features (v3.0.1+)")
     # Channel key status (v4.0.0)
     channel: dict | None = Field(default=None, description="Channel key status (v4.0.0)")
+    # Memory governor budget and wait metrics (v4.3.0)
+    resources: dict | None = Field(default=None, description="Memory governor stats (v4.3.0)")
     breaking_changes: dict = Field(description="v4.0.0 breaking changes")
 
 
@@ -579,9 +583,10 @@ async def root():
         available_modes=available_modes,
         dct_features=dct_features,
         channel=channel_info,
+        resources=get_governor().stats().to_dict(),
         breaking_changes={
             "v4_channel_key": "Messages encoded with channel key require same key to decode",
-            "format_version": 5,
+            "format_version": FORMAT_VERSION,
             "backward_compatible": False,
             "v3_notes": {
                 "date_removed": "No date_str parameter needed - encode/decode anytime",
@@ -15,7 +15,8 @@ ARCHITECTURE OVERVIEW
     │   Routes (/encode, /decode, /api/*)                                  │
     │       │                                                              │
     │       ├── auth.py           # Session management, user accounts      │
-    │       ├── temp_storage.py   # File-based temp storage with expiry    │
+    │       ├── temp_storage.py   # Indexed temp files, expiry and quotas  │
+    │       ├── job_queue.py      # Shared SQLite job queue (all workers)  │
     │       ├── subprocess_stego.py  # Isolated encode/decode workers      │
     │       └── ssl_utils.py      # Self-signed cert generation            │
     │                                                                      │
@@ -40,11 +41,10 @@ KEY PATTERNS
    If the subprocess crashes, we catch it and return an error gracefully.
 
 2. ASYNC JOBS WITH PROGRESS
-   Encoding large images can take 30+ seconds. We use ThreadPoolExecutor
-   to run jobs in background threads with progress reporting:
+   Encoding large images can take 30+ seconds. Jobs go into a shared
+   SQLite queue and consumer threads run them in the background:
 
-       job_id = generate_job_id()
-       _executor.submit(_run_encode_job, job_id, params)
+       job_id = jobs.submit("encode", params, job_id=generate_job_id())
        # Client polls /api/encode/progress/<job_id> for updates
 
 3. CONTEXT PROCESSORS
@@ -74,14 +74,15 @@ CHANGES in v3.2.0:
 - Simplified user experience for asynchronous communications
 """
 
+import functools
 import io
+import json
 import mimetypes
 import os
 import secrets
 import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import temp_storage
@@ -126,6 +127,7 @@ from auth import (
 )
 from flask import (
     Flask,
+    Response,
     flash,
     jsonify,
     redirect,
@@ -239,12 +241,10 @@ except ImportError:
 #
 # The subprocess_stego module handles all the pickling/unpickling of data.
 
+from job_queue import JobConsumer, JobError, JobQueue
 from subprocess_stego import (
     SubprocessStego,
-    cleanup_progress_file,
     generate_job_id,
-    get_progress_file_path,
-    read_progress,
 )
 
 from stegasoo.qr_utils import (
@@ -256,8 +256,14 @@ from stegasoo.qr_utils import (
     is_compressed,
 )
 
-# Initialize subprocess wrapper (worker script must be in same directory)
-subprocess_stego = SubprocessStego(timeout=180)  # 3 minute timeout for large images
+# Initialize subprocess wrapper (worker script must be in same directory).
+# Workers are pooled and reused - STEGASOO_WORKER_POOL_SIZE=0 goes back to
+# spawning a fresh process per request.
+subprocess_stego = SubprocessStego(
+    timeout=180,  # 3 minute timeout for large images
+    pool_size=int(os.environ.get("STEGASOO_WORKER_POOL_SIZE", "2")),
+    max_jobs=int(os.environ.get("STEGASOO_WORKER_MAX_JOBS", "100")),
+)
 
 
 # ============================================================================
@@ -333,45 +339,63 @@ init_auth(app)
 #     GET /api/download/abc ────────>  Download result
 #                            <──────  Encoded image
 #
-# Why ThreadPoolExecutor instead of Celery/Redis?
+# Why SQLite instead of Celery/Redis?
 # - This runs on a Raspberry Pi with 1GB RAM
-# - We don't need distributed workers
-# - Keep it simple - threads are fine for 2 concurrent jobs
+# - We don't need distributed workers, just agreement between the Gunicorn
+#   processes on one box - a WAL-mode SQLite file does that with no daemon
+#
+# Jobs go into job_queue.JobQueue in the instance directory, so a status
+# poll can land on any Gunicorn worker and still find the job. Consumer
+# threads (here, and/or in a dedicated `python job_runner.py` process) claim
+# jobs and hand the real work to the pooled stego workers.
 #
-# The thread pool is limited to 2 workers because:
+# Concurrency is limited to 2 running jobs across ALL processes because:
 # - Each encode loads the full image into memory
 # - Too many concurrent jobs = OOM on the Pi
+#
+# Environment:
+#   STEGASOO_JOB_CONCURRENCY  global running-job limit (default 2)
+#   STEGASOO_JOB_CONSUMERS    consumer threads per web process (default 2;
+#                             0 if job_runner.py does all the consuming)
+
+jobs = JobQueue(
+    _instance_path / "jobs.db",
+    concurrency=int(os.environ.get("STEGASOO_JOB_CONCURRENCY", "2")),
+)
 
-_executor = ThreadPoolExecutor(max_workers=2)
+_job_consumer: JobConsumer | None = None
+_job_consumer_pid: int | None = None
+_job_consumer_lock = threading.Lock()
 
-# Job storage: job_id -> {status, result, error, file_id, created, ...}
-# We use a dict with a lock because threads access it concurrently
-_jobs = {}
-_jobs_lock = threading.Lock()
 
+def _get_job(job_id: str) -> dict | None:
+    """Job status from the shared queue - works from any web process."""
+    return jobs.get(job_id)
 
-def _store_job(job_id: str, data: dict) -> None:
-    """Thread-safe job storage."""
-    with _jobs_lock:
-        _jobs[job_id] = data
 
+def start_job_consumer(threads: int | None = None) -> JobConsumer | None:
+    """
+    Start this process's job consumer threads (once per process).
 
-def _get_job(job_id: str) -> dict | None:
-    """Thread-safe job retrieval."""
-    with _jobs_lock:
-        return _jobs.get(job_id)
+    Called lazily from before_request so forked Gunicorn workers each get
+    their own threads, and directly by job_runner.py.
+    """
+    global _job_consumer, _job_consumer_pid
+    if threads is None:
+        threads = int(os.environ.get("STEGASOO_JOB_CONSUMERS", "2"))
+    if threads <= 0 or _job_consumer_pid == os.getpid():
+        return _job_consumer
+    with _job_consumer_lock:
+        if _job_consumer_pid != os.getpid():
+            _job_consumer = JobConsumer(jobs, JOB_HANDLERS, threads=threads).start()
+            _job_consumer_pid = os.getpid()
+    return _job_consumer
 
 
-def _cleanup_old_jobs(max_age_seconds: int = 3600) -> None:
-    """Remove jobs older than max_age_seconds."""
-    now = time.time()
-    with _jobs_lock:
-        to_remove = [
-            jid for jid, data in _jobs.items() if now - data.get("created", 0) > max_age_seconds
-        ]
-        for jid in to_remove:
-            cleanup_progress_file(jid)
-            del _jobs[jid]
+@app.before_request
+def ensure_job_consumer():
+    """Make sure someone in this process is working the job queue."""
+    start_job_consumer()
 
 
 @app.before_request
@@ -396,6 +420,13 @@ def require_setup():
 TEMP_FILES: dict[str, dict] = {}  # Not used - see temp_storage.py
 THUMBNAIL_FILES: dict[str, bytes] = {}  # Not used - see temp_storage.py
 
+# Temp storage (v4.3.0): results expire TEMP_FILE_EXPIRY after they're saved,
+# and each user may hold STEGASOO_TEMP_QUOTA_MB of them at once (0 = no limit)
+temp_storage.init(
+    ttl=TEMP_FILE_EXPIRY,
+    quota_bytes=int(os.environ.get("STEGASOO_TEMP_QUOTA_MB", "256")) * 1024 * 1024,
+)
+
 
 # ============================================================================
 # TEMPLATE CONTEXT PROCESSOR
@@ -521,10 +552,11 @@ def resolve_channel_key_form(channel_key_value: str) -> str:
         return "auto"
 
 
-def generate_thumbnail(image_data: bytes, size: tuple = THUMBNAIL_SIZE) -> bytes:
-    """Generate thumbnail from image data."""
+def generate_thumbnail(image_data: bytes | str, size: tuple = THUMBNAIL_SIZE) -> bytes:
+    """Generate thumbnail from image data (or the path of an image file)."""
     try:
-        with Image.open(io.BytesIO(image_data)) as img:
+        source = io.BytesIO(image_data) if isinstance(image_data, bytes) else image_data
+        with Image.open(source) as img:
             # Convert to RGB if necessary (handle grayscale too)
             if img.mode in ("RGBA", "LA", "P"):
                 # Create white background for transparent images
@@ -553,7 +585,13 @@ def generate_thumbnail(image_data: bytes, size: tuple = THUMBNAIL_SIZE) -> bytes
 
 def cleanup_temp_files():
     """Remove expired temporary files."""
-    temp_storage.cleanup_expired(TEMP_FILE_EXPIRY)
+    temp_storage.cleanup_expired()
+
+
+def _storage_owner() -> str | None:
+    """Temp storage owner for the current request (whose quota files count against)."""
+    user = get_current_user()
+    return str(user.id) if user else None
 
 
 def allowed_image(filename: str) -> bool:
@@ -714,7 +752,7 @@ def generate():
                         "filename": "rsa_key.pem",
                         "type": "rsa_key",
                         "compress": qr_needs_compression,
-                    })
+                    }, owner=_storage_owner())
 
             # v3.2.0: Single passphrase instead of daily phrases
             return render_template(
@@ -1006,108 +1044,82 @@ def api_check_fit():
 # ============================================================================
 
 
-def _run_encode_job(job_id: str, encode_params: dict) -> None:
-    """Background thread function for async encode."""
-    progress_file = get_progress_file_path(job_id)
+def _run_encode_job(job_id: str, encode_params: dict) -> dict:
+    """Job handler for async encode - returns the fields status polls see."""
+    # The worker writes the stego image straight into temp storage
+    file_id = secrets.token_urlsafe(16)
+    owner = encode_params.get("owner")
+    output_path = temp_storage.reserve(file_id, owner)
+
+    # Run encode, streaming progress into the job queue
+    if encode_params.get("file_data"):
+        encode_result = subprocess_stego.encode(
+            carrier_data=encode_params["carrier_data"],
+            reference_data=encode_params["ref_data"],
+            file_data=encode_params["file_data"],
+            file_name=encode_params["file_name"],
+            file_mime=encode_params["file_mime"],
+            passphrase=encode_params["passphrase"],
+            pin=encode_params.get("pin"),
+            rsa_key_data=encode_params.get("rsa_key_data"),
+            rsa_password=encode_params.get("key_password"),
+            embed_mode=encode_params["embed_mode"],
+            dct_output_format=encode_params.get("dct_output_format", "png"),
+            dct_color_mode=encode_params.get("dct_color_mode", "color"),
+            channel_key=encode_params.get("channel_key"),
+            progress_callback=functools.partial(jobs.publish_progress, job_id),
+            output_path=output_path,
+        )
+    else:
+        encode_result = subprocess_stego.encode(
+            carrier_data=encode_params["carrier_data"],
+            reference_data=encode_params["ref_data"],
+            message=encode_params["message"],
+            passphrase=encode_params["passphrase"],
+            pin=encode_params.get("pin"),
+            rsa_key_data=encode_params.get("rsa_key_data"),
+            rsa_password=encode_params.get("key_password"),
+            embed_mode=encode_params["embed_mode"],
+            dct_output_format=encode_params.get("dct_output_format", "png"),
+            dct_color_mode=encode_params.get("dct_color_mode", "color"),
+            channel_key=encode_params.get("channel_key"),
+            progress_callback=functools.partial(jobs.publish_progress, job_id),
+            output_path=output_path,
+        )
 
-    try:
-        _store_job(job_id, {"status": "running", "created": time.time()})
-
-        # Run encode with progress file
-        if encode_params.get("file_data"):
-            encode_result = subprocess_stego.encode(
-                carrier_data=encode_params["carrier_data"],
-                reference_data=encode_params["ref_data"],
-                file_data=encode_params["file_data"],
-                file_name=encode_params["file_name"],
-                file_mime=encode_params["file_mime"],
-                passphrase=encode_params["passphrase"],
-                pin=encode_params.get("pin"),
-                rsa_key_data=encode_params.get("rsa_key_data"),
-                rsa_password=encode_params.get("key_password"),
-                embed_mode=encode_params["embed_mode"],
-                dct_output_format=encode_params.get("dct_output_format", "png"),
-                dct_color_mode=encode_params.get("dct_color_mode", "color"),
-                channel_key=encode_params.get("channel_key"),
-                progress_file=progress_file,
-            )
-        else:
-            encode_result = subprocess_stego.encode(
-                carrier_data=encode_params["carrier_data"],
-                reference_data=encode_params["ref_data"],
-                message=encode_params["message"],
-                passphrase=encode_params["passphrase"],
-                pin=encode_params.get("pin"),
-                rsa_key_data=encode_params.get("rsa_key_data"),
-                rsa_password=encode_params.get("key_password"),
-                embed_mode=encode_params["embed_mode"],
-                dct_output_format=encode_params.get("dct_output_format", "png"),
-                dct_color_mode=encode_params.get("dct_color_mode", "color"),
-                channel_key=encode_params.get("channel_key"),
-                progress_file=progress_file,
-            )
+    if not encode_result.success:
+        raise JobError(encode_result.error or "Encoding failed", encode_result.error_type)
 
-        if not encode_result.success:
-            _store_job(
-                job_id,
-                {
-                    "status": "error",
-                    "error": encode_result.error or "Encoding failed",
-                    "created": time.time(),
-                },
-            )
-            return
+    # Determine output format
+    embed_mode = encode_params["embed_mode"]
+    dct_output_format = encode_params.get("dct_output_format", "png")
+    dct_color_mode = encode_params.get("dct_color_mode", "color")
 
-        # Determine output format
-        embed_mode = encode_params["embed_mode"]
-        dct_output_format = encode_params.get("dct_output_format", "png")
-        dct_color_mode = encode_params.get("dct_color_mode", "color")
+    if embed_mode == "dct" and dct_output_format == "jpeg":
+        output_ext = ".jpg"
+        output_mime = "image/jpeg"
+    else:
+        output_ext = ".png"
+        output_mime = "image/png"
 
-        if embed_mode == "dct" and dct_output_format == "jpeg":
-            output_ext = ".jpg"
-            output_mime = "image/jpeg"
-        else:
-            output_ext = ".png"
-            output_mime = "image/png"
-
-        filename = encode_result.filename
-        if not filename:
-            filename = generate_filename("stego", output_ext)
-        elif embed_mode == "dct" and dct_output_format == "jpeg" and filename.endswith(".png"):
-            filename = filename[:-4] + ".jpg"
-
-        # Store result
-        file_id = secrets.token_urlsafe(16)
-        temp_storage.save_temp_file(file_id, encode_result.stego_data, {
-            "filename": filename,
-            "embed_mode": embed_mode,
-            "output_format": dct_output_format if embed_mode == "dct" else "png",
-            "color_mode": dct_color_mode if embed_mode == "dct" else None,
-            "mime_type": output_mime,
-            "channel_mode": encode_result.channel_mode,
-            "channel_fingerprint": encode_result.channel_fingerprint,
-        })
-
-        _store_job(
-            job_id,
-            {
-                "status": "complete",
-                "file_id": file_id,
-                "created": time.time(),
-            },
-        )
+    filename = encode_result.filename
+    if not filename:
+        filename = generate_filename("stego", output_ext)
+    elif embed_mode == "dct" and dct_output_format == "jpeg" and filename.endswith(".png"):
+        filename = filename[:-4] + ".jpg"
 
-    except Exception as e:
-        _store_job(
-            job_id,
-            {
-                "status": "error",
-                "error": str(e),
-                "created": time.time(),
-            },
-        )
-    finally:
-        cleanup_progress_file(job_id)
+    # Store result (the data file is already in place)
+    temp_storage.save_temp_metadata(file_id, {
+        "filename": filename,
+        "embed_mode": embed_mode,
+        "output_format": dct_output_format if embed_mode == "dct" else "png",
+        "color_mode": dct_color_mode if embed_mode == "dct" else None,
+        "mime_type": output_mime,
+        "channel_mode": encode_result.channel_mode,
+        "channel_fingerprint": encode_result.channel_fingerprint,
+    }, owner=owner)
+
+    return {"file_id": file_id}
 
 
 @app.route("/encode", methods=["GET", "POST"])
@@ -1283,6 +1295,7 @@ def encode_page():
                 "dct_output_format": dct_output_format if embed_mode == "dct" else "png",
                 "dct_color_mode": dct_color_mode if embed_mode == "dct" else "color",
                 "channel_key": channel_key,
+                "owner": _storage_owner(),
             }
 
             if payload_type == "file" and payload_file and payload_file.filename:
@@ -1294,12 +1307,13 @@ def encode_page():
 
             # ASYNC MODE: Start background job and return JSON
             if is_async:
-                job_id = generate_job_id()
-                _store_job(job_id, {"status": "pending", "created": time.time()})
-                _executor.submit(_run_encode_job, job_id, encode_params)
+                job_id = jobs.submit("encode", encode_params, job_id=generate_job_id())
                 return jsonify({"job_id": job_id, "status": "pending"})
 
             # SYNC MODE: Run inline (original behavior)
+            # The worker writes the stego image straight into temp storage
+            file_id = secrets.token_urlsafe(16)
+            output_path = temp_storage.reserve(file_id, encode_params["owner"])
             if payload_type == "file" and payload_file and payload_file.filename:
                 encode_result = subprocess_stego.encode(
                     carrier_data=carrier_data,
@@ -1315,6 +1329,7 @@ def encode_page():
                     dct_output_format=dct_output_format if embed_mode == "dct" else "png",
                     dct_color_mode=dct_color_mode if embed_mode == "dct" else "color",
                     channel_key=channel_key,
+                    output_path=output_path,
                 )
             else:
                 encode_result = subprocess_stego.encode(
@@ -1329,6 +1344,7 @@ def encode_page():
                     dct_output_format=dct_output_format if embed_mode == "dct" else "png",
                     dct_color_mode=dct_color_mode if embed_mode == "dct" else "color",
                     channel_key=channel_key,
+                    output_path=output_path,
                 )
 
             # Check for subprocess errors
@@ -1353,10 +1369,9 @@ def encode_page():
             elif embed_mode == "dct" and dct_output_format == "jpeg" and filename.endswith(".png"):
                 filename = filename[:-4] + ".jpg"
 
-            # Store temporarily
-            file_id = secrets.token_urlsafe(16)
+            # Store temporarily (the data file is already in place)
             cleanup_temp_files()
-            temp_storage.save_temp_file(file_id, encode_result.stego_data, {
+            temp_storage.save_temp_metadata(file_id, {
                 "filename": filename,
                 "embed_mode": embed_mode,
                 "output_format": dct_output_format if embed_mode == "dct" else "png",
@@ -1365,12 +1380,14 @@ def encode_page():
                 # Channel info (v4.0.0)
                 "channel_mode": encode_result.channel_mode,
                 "channel_fingerprint": encode_result.channel_fingerprint,
-            })
+            }, owner=encode_params["owner"])
 
             return redirect(url_for("encode_result", file_id=file_id))
 
         except CapacityError as e:
             return _error_response(str(e))
+        except temp_storage.QuotaExceededError as e:
+            return _error_response(str(e))
         except StegasooError as e:
             return _error_response(str(e))
         except Exception as e:
@@ -1405,12 +1422,7 @@ def encode_status(job_id):
 @app.route("/encode/progress/<job_id>")
 @login_required
 def encode_progress(job_id):
-    """Get the progress of an async encode job."""
-    progress = read_progress(job_id)
-    if progress:
-        return jsonify(progress)
-
-    # No progress file yet - check job status
+    """Get the progress of an async encode job (SSE clients use /jobs/<id>/events)."""
     job = _get_job(job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
@@ -1422,20 +1434,24 @@ def encode_progress(job_id):
     elif job["status"] == "pending":
         return jsonify({"percent": 0, "phase": "starting"})
 
-    # Running but no progress file yet
+    progress = jobs.progress(job_id)
+    if progress:
+        return jsonify(progress)
+
+    # Running but nothing reported yet
     return jsonify({"percent": 0, "phase": "initializing"})
 
 
 @app.route("/encode/result/<file_id>")
 @login_required
 def encode_result(file_id):
-    file_info = temp_storage.get_temp_file(file_id)
+    file_info = temp_storage.get_temp_file_info(file_id)
     if not file_info:
         flash("File expired or not found. Please encode again.", "error")
         return redirect(url_for("encode_page"))
 
     # Generate thumbnail
-    thumbnail_data = generate_thumbnail(file_info["data"])
+    thumbnail_data = generate_thumbnail(file_info["path"])
     thumbnail_id = None
 
     if thumbnail_data:
@@ -1472,7 +1488,7 @@ def encode_thumbnail(thumb_id):
 @app.route("/encode/download/<file_id>")
 @login_required
 def encode_download(file_id):
-    file_info = temp_storage.get_temp_file(file_id)
+    file_info = temp_storage.get_temp_file_info(file_id)
     if not file_info:
         flash("File expired or not found.", "error")
         return redirect(url_for("encode_page"))
@@ -1480,10 +1496,11 @@ def encode_download(file_id):
     mime_type = file_info.get("mime_type", "image/png")
 
     return send_file(
-        io.BytesIO(file_info["data"]),
+        file_info["path"],
         mimetype=mime_type,
         as_attachment=True,
         download_name=file_info["filename"],
+        conditional=True,  # Range requests and ETag revalidation
     )
 
 
@@ -1491,17 +1508,18 @@ def encode_download(file_id):
 @login_required
 def encode_file_route(file_id):
     """Serve file for Web Share API."""
-    file_info = temp_storage.get_temp_file(file_id)
+    file_info = temp_storage.get_temp_file_info(file_id)
     if not file_info:
         return "Not found", 404
 
     mime_type = file_info.get("mime_type", "image/png")
 
     return send_file(
-        io.BytesIO(file_info["data"]),
+        file_info["path"],
         mimetype=mime_type,
         as_attachment=False,
         download_name=file_info["filename"],
+        conditional=True,  # Range requests and ETag revalidation
     )
 
 
@@ -1523,80 +1541,58 @@ def encode_cleanup(file_id):
 # ============================================================================
 
 
-def _run_decode_job(job_id: str, decode_params: dict) -> None:
-    """Background thread function for async decode."""
-    progress_file = get_progress_file_path(job_id)
+def _run_decode_job(job_id: str, decode_params: dict) -> dict:
+    """Job handler for async decode - returns the fields status polls see."""
+    # If the payload is a file, the worker writes it straight into temp storage
+    file_id = secrets.token_urlsafe(16)
+
+    # Run decode, streaming progress into the job queue
+    decode_result = subprocess_stego.decode(
+        stego_data=decode_params["stego_data"],
+        reference_data=decode_params["ref_data"],
+        passphrase=decode_params["passphrase"],
+        pin=decode_params.get("pin"),
+        rsa_key_data=decode_params.get("rsa_key_data"),
+        rsa_password=decode_params.get("rsa_password"),
+        embed_mode=decode_params.get("embed_mode", "auto"),
+        channel_key=decode_params.get("channel_key"),
+        progress_callback=functools.partial(jobs.publish_progress, job_id),
+        # Written only for file payloads. Reserved without an owner so a text
+        # decode isn't refused at the quota; the quota applies once a file
+        # turns up, and the row makes sure a file nobody registers expires
+        output_path=temp_storage.reserve(file_id),
+    )
 
-    try:
-        _store_job(job_id, {"status": "running", "created": time.time()})
-
-        # Run decode with progress file
-        decode_result = subprocess_stego.decode(
-            stego_data=decode_params["stego_data"],
-            reference_data=decode_params["ref_data"],
-            passphrase=decode_params["passphrase"],
-            pin=decode_params.get("pin"),
-            rsa_key_data=decode_params.get("rsa_key_data"),
-            rsa_password=decode_params.get("rsa_password"),
-            embed_mode=decode_params.get("embed_mode", "auto"),
-            channel_key=decode_params.get("channel_key"),
-            progress_file=progress_file,
-        )
+    if not decode_result.success:
+        temp_storage.delete_temp_file(file_id)  # A file payload may have been half-written
+        raise JobError(decode_result.error or "Decoding failed", decode_result.error_type)
 
-        if not decode_result.success:
-            _store_job(
-                job_id,
-                {
-                    "status": "error",
-                    "error": decode_result.error or "Decoding failed",
-                    "error_type": decode_result.error_type,
-                    "created": time.time(),
-                },
-            )
-            return
+    # Store result based on type
+    if decode_result.is_file:
+        filename = decode_result.filename or "decoded_file"
+        temp_storage.save_temp_metadata(file_id, {
+            "filename": filename,
+            "mime_type": decode_result.mime_type,
+        }, owner=decode_params.get("owner"))
+        return {
+            "file_id": file_id,
+            "is_file": True,
+            "filename": filename,
+            "file_size": decode_result.file_size,
+            "mime_type": decode_result.mime_type,
+        }
+    temp_storage.delete_temp_file(file_id)  # Text: nothing was written
+    return {
+        "is_file": False,
+        "message": decode_result.message,
+    }
 
-        # Store result based on type
-        if decode_result.is_file:
-            file_id = secrets.token_urlsafe(16)
-            filename = decode_result.filename or "decoded_file"
-            temp_storage.save_temp_file(file_id, decode_result.file_data, {
-                "filename": filename,
-                "mime_type": decode_result.mime_type,
-            })
-            _store_job(
-                job_id,
-                {
-                    "status": "complete",
-                    "file_id": file_id,
-                    "is_file": True,
-                    "filename": filename,
-                    "file_size": len(decode_result.file_data),
-                    "mime_type": decode_result.mime_type,
-                    "created": time.time(),
-                },
-            )
-        else:
-            _store_job(
-                job_id,
-                {
-                    "status": "complete",
-                    "is_file": False,
-                    "message": decode_result.message,
-                    "created": time.time(),
-                },
-            )
 
-    except Exception as e:
-        _store_job(
-            job_id,
-            {
-                "status": "error",
-                "error": str(e),
-                "created": time.time(),
-            },
-        )
-    finally:
-        cleanup_progress_file(job_id)
+# Job kind -> handler, for the queue consumers
+JOB_HANDLERS = {
+    "encode": _run_encode_job,
+    "decode": _run_decode_job,
+}
 
 
 @app.route("/decode", methods=["GET", "POST"])
@@ -1702,18 +1698,18 @@ def decode_page():
                 "rsa_password": key_password,
                 "embed_mode": embed_mode,
                 "channel_key": channel_key,
+                "owner": _storage_owner(),
             }
 
             # ASYNC MODE: Start background job and return JSON
             if is_async:
-                job_id = generate_job_id()
-                _store_job(job_id, {"status": "pending", "created": time.time()})
-                _executor.submit(_run_decode_job, job_id, decode_params)
+                job_id = jobs.submit("decode", decode_params, job_id=generate_job_id())
                 return jsonify({"job_id": job_id, "status": "pending"})
 
             # SYNC MODE: Run inline (original behavior)
             # v4.0.0: Include channel_key parameter
             # Use subprocess-isolated decode to prevent crashes
+            file_id = secrets.token_urlsafe(16)
             decode_result = subprocess_stego.decode(
                 stego_data=stego_data,
                 reference_data=ref_data,
@@ -1723,10 +1719,13 @@ def decode_page():
                 rsa_password=key_password,
                 embed_mode=embed_mode,
                 channel_key=channel_key,  # v4.0.0
+                # Written only for file payloads (quota applies once one is)
+                output_path=temp_storage.reserve(file_id),
             )
 
             # Check for subprocess errors
             if not decode_result.success:
+                temp_storage.delete_temp_file(file_id)
                 error_msg = decode_result.error or "Decoding failed"
                 # Check for channel key related errors
                 if "channel key" in error_msg.lower():
@@ -1737,27 +1736,27 @@ def decode_page():
                 raise StegasooError(error_msg)
 
             if decode_result.is_file:
-                # File content - store temporarily for download
-                file_id = secrets.token_urlsafe(16)
+                # File content - the worker already wrote it to temp storage
                 cleanup_temp_files()
 
                 filename = decode_result.filename or "decoded_file"
-                temp_storage.save_temp_file(file_id, decode_result.file_data, {
+                temp_storage.save_temp_metadata(file_id, {
                     "filename": filename,
                     "mime_type": decode_result.mime_type,
-                })
+                }, owner=decode_params["owner"])
 
                 return render_template(
                     "decode.html",
                     decoded_file=True,
                     file_id=file_id,
                     filename=filename,
-                    file_size=format_size(len(decode_result.file_data)),
+                    file_size=format_size(decode_result.file_size),
                     mime_type=decode_result.mime_type,
                     has_qrcode_read=HAS_QRCODE_READ,
                 )
             else:
-                # Text content
+                # Text content - drop the unused reservation
+                temp_storage.delete_temp_file(file_id)
                 return render_template(
                     "decode.html",
                     decoded_message=decode_result.message,
@@ -1788,7 +1787,7 @@ def decode_page():
                 "warning",
             )
             return render_template("decode.html", has_qrcode_read=HAS_QRCODE_READ)
-        except StegasooError as e:
+        except (StegasooError, temp_storage.QuotaExceededError) as e:
             flash(str(e), "error")
             return render_template("decode.html", has_qrcode_read=HAS_QRCODE_READ)
         except Exception as e:
@@ -1802,7 +1801,7 @@ def decode_page():
 @login_required
 def decode_download(file_id):
     """Download decoded file."""
-    file_info = temp_storage.get_temp_file(file_id)
+    file_info = temp_storage.get_temp_file_info(file_id)
     if not file_info:
         flash("File expired or not found.", "error")
         return redirect(url_for("decode_page"))
@@ -1810,10 +1809,11 @@ def decode_download(file_id):
     mime_type = file_info.get("mime_type", "application/octet-stream")
 
     return send_file(
-        io.BytesIO(file_info["data"]),
+        file_info["path"],
         mimetype=mime_type,
         as_attachment=True,
         download_name=file_info["filename"],
+        conditional=True,  # Range requests and ETag revalidation
     )
 
 
@@ -1851,12 +1851,7 @@ def decode_status(job_id):
 @app.route("/decode/progress/<job_id>")
 @login_required
 def decode_progress(job_id):
-    """Get the progress of an async decode job."""
-    progress = read_progress(job_id)
-    if progress:
-        return jsonify(progress)
-
-    # No progress file yet - check job status
+    """Get the progress of an async decode job (SSE clients use /jobs/<id>/events)."""
     job = _get_job(job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
@@ -1868,7 +1863,11 @@ def decode_progress(job_id):
     elif job["status"] == "pending":
         return jsonify({"percent": 0, "phase": "starting"})
 
-    # Running but no progress file yet
+    progress = jobs.progress(job_id)
+    if progress:
+        return jsonify(progress)
+
+    # Running but nothing reported yet
     return jsonify({"percent": 5, "phase": "reading"})
 
 
@@ -1876,7 +1875,8 @@ def decode_progress(job_id):
 @login_required
 def decode_result(job_id):
     """Get the result page for an async decode job."""
-    job = _get_job(job_id)
+    # The decoded message is shown once, then wiped from jobs.db
+    job = jobs.take_result(job_id, ("message",))
     if not job:
         flash("Job not found or expired.", "error")
         return redirect(url_for("decode_page"))
@@ -1885,6 +1885,10 @@ def decode_result(job_id):
         flash("Decode not complete.", "error")
         return redirect(url_for("decode_page"))
 
+    if not job.get("is_file") and "message" not in job:
+        flash("That message has already been shown. Decode the image again to see it.", "error")
+        return redirect(url_for("decode_page"))
+
     if job.get("is_file"):
         return render_template(
             "decode.html",
@@ -1903,6 +1907,72 @@ def decode_result(job_id):
         )
 
 
+# ============================================================================
+# JOB PROGRESS STREAM (v4.3.0)
+# ============================================================================
+
+# Longest a single event stream stays open; EventSource reconnects by itself.
+# Each open stream holds one of Gunicorn's request threads (gthread: 2 workers
+# x 4 threads in docker-entrypoint.sh), so keep this short - a few watching
+# tabs mustn't starve page loads. Reconnecting costs one cheap request.
+SSE_MAX_DURATION = 30
+
+# Send a comment this often so proxies don't close an idle stream
+SSE_KEEPALIVE = 10
+
+# What the final "done" event carries - enough to report an error or
+# redirect to the result, never the result itself
+SSE_DONE_FIELDS = ("status", "progress", "error", "error_type", "file_id")
+
+
+def _sse(data: dict, event: str | None = None) -> str:
+    """Format one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.route("/jobs/<job_id>/events")
+@login_required
+def job_events(job_id):
+    """
+    Stream an async job's progress as server-sent events.
+
+    Replaces polling /encode/progress and /decode/progress: the browser
+    holds one connection open and gets a message only when the job's
+    progress actually changes, then a final "done" event carrying
+    the finished job's status, error details and (for files) file_id.
+    """
+    if not _get_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        yield "retry: 2000\n\n"
+        seen = None
+        deadline = time.monotonic() + SSE_MAX_DURATION
+        while time.monotonic() < deadline:
+            snapshot = jobs.watch(job_id, seen, SSE_KEEPALIVE)
+            if snapshot is None:
+                yield _sse({"status": "error", "error": "Job not found"}, "done")
+                return
+            if snapshot["status"] in ("complete", "error"):
+                job = _get_job(job_id) or {"status": snapshot["status"]}
+                # Not the whole row: a decoded message must only leave via
+                # /decode/result, not linger in proxy or devtools logs
+                yield _sse({k: job[k] for k in SSE_DONE_FIELDS if k in job}, "done")
+                return
+            if snapshot["progress"] is not None and snapshot["progress"] != seen:
+                seen = snapshot["progress"]
+                yield _sse(seen)
+            else:
+                yield ": keepalive\n\n"
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/about")
 def about():
     from stegasoo.channel import get_channel_status
@@ -2026,8 +2096,6 @@ def api_tools_exif_update():
     # Get updates from form data
     updates_json = request.form.get("updates", "{}")
     try:
-        import json
-
         updates = json.loads(updates_json)
     except json.JSONDecodeError:
         return jsonify({"success": False, "error": "Invalid updates JSON"}), 400
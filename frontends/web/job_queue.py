@@ -0,0 +1,625 @@
+"""
+Stegasoo Job Queue (v4.3.0)
+
+Async encode/decode jobs used to live in a dict inside whichever Gunicorn
+worker took the POST. Polls that landed on the other worker got "Job not
+found", and each process ran its own 2-thread executor, so the real limit
+was 2 x workers with nothing global.
+
+This queue lives in SQLite (WAL mode) in the Flask instance directory,
+next to the auth database, so every process on the box sees the same jobs:
+
+    pending ──claim()──> running ──complete()──> complete
+       ^                    │   └────fail()────> error
+       └── lease expired ───┘   (retried until MAX_ATTEMPTS, then error)
+
+- Priorities: higher runs first, ties go oldest-first
+- Leases: a claimed job belongs to its consumer until lease_expires; the
+  consumer heartbeats while it works. If the process dies, the lease runs
+  out and someone else picks the job up
+- Concurrency: claim() refuses to start a job while `concurrency` jobs are
+  already running - across every process, not per process
+- Progress: consumers publish_progress() as the worker streams it; watch()
+  blocks until something changes, for the SSE endpoint
+
+Job inputs are stored as a worker_protocol frame (images as raw bytes) and
+include passphrases and PINs, so they're wiped the moment a job finishes.
+Results that are secrets too (a decoded message) are wiped once shown - see
+take_result(). secure_delete is on, the database is created 0600, and
+purge() truncates the WAL so deleted inputs don't linger in it.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+from worker_protocol import file_reader, pack_frame, read_frame
+
+# Defaults (all overridable per queue)
+DEFAULT_CONCURRENCY = 2  # Matches the old 2-thread executor - it's a Pi
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_RESULT_TTL = 3600.0  # Finished jobs are forgotten after an hour
+MAX_ATTEMPTS = 2  # A job whose consumer died twice isn't getting luckier
+
+# How long an idle consumer sleeps between claim attempts
+POLL_INTERVAL = 0.25
+
+# Progress from a running job is written to the database at most this often
+# (watchers in the same process see every update straight from memory), and
+# watchers in other processes re-read it this often
+PROGRESS_STORE_INTERVAL = 0.5
+PROGRESS_POLL_INTERVAL = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    priority      INTEGER NOT NULL DEFAULT 0,
+    created       REAL NOT NULL,
+    updated       REAL NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    inputs        BLOB,
+    result        TEXT,
+    error         TEXT,
+    error_type    TEXT,
+    progress      TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created);
+CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated);
+"""
+
+
+class JobError(Exception):
+    """An expected job failure - the message is shown to the user as-is."""
+
+    def __init__(self, message: str, error_type: str | None = None):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _pack_inputs(inputs: dict) -> bytes:
+    return b"".join(pack_frame(inputs))
+
+
+def _unpack_inputs(blob: bytes) -> dict:
+    return read_frame(file_reader(io.BytesIO(blob)))
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by every process using the same file.
+
+    Connections are per thread (and per process - a forked child opens its
+    own), so one JobQueue can be used from request handlers and consumer
+    threads alike.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        result_ttl: float = DEFAULT_RESULT_TTL,
+    ):
+        """
+        Args:
+            db_path: SQLite file (created if missing)
+            concurrency: Jobs allowed to run at once, across all processes
+            lease_seconds: How long a claim lasts without a heartbeat
+            result_ttl: Seconds finished jobs are kept for status polling
+        """
+        self.db_path = Path(db_path)
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        # Wakes this process's consumers on submit, so local jobs don't wait
+        # out a poll interval (other processes' jobs are found by polling)
+        self._submitted = threading.Event()
+        # Live progress of jobs running in this process:
+        # job_id -> (progress dict, monotonic time it was last stored)
+        self._live: dict[str, tuple[dict, float]] = {}
+        self._live_changed = threading.Condition()
+        # Jobs whose lease this process lost while still running them - their
+        # handler's progress no longer describes the job, so it's dropped
+        self._abandoned: set[str] = set()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.db_path.exists():
+            # Inputs hold passphrases - nobody else gets to read this file
+            os.close(os.open(self.db_path, os.O_CREAT | os.O_WRONLY, 0o600))
+        db = self._db()
+        db.executescript(_SCHEMA)
+        self._migrate(db)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            # isolation_level=None: we issue BEGIN ourselves where it matters
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA secure_delete=ON")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _migrate(self, db: sqlite3.Connection) -> None:
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(jobs)")}
+        if "progress" not in columns:
+            db.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+
+    # -------------------------------------------------------------------------
+    # Producer side
+    # -------------------------------------------------------------------------
+
+    def submit(
+        self,
+        kind: str,
+        inputs: dict,
+        priority: int = 0,
+        job_id: str | None = None,
+    ) -> str:
+        """
+        Queue a job.
+
+        Args:
+            kind: Handler name ('encode', 'decode', ...)
+            inputs: Handler arguments; bytes values are stored raw
+            priority: Higher runs first
+            job_id: Use this id instead of generating one
+
+        Returns:
+            The job id
+        """
+        job_id = job_id or uuid.uuid4().hex[:16]
+        now = time.time()
+        self._db().execute(
+            "INSERT INTO jobs (id, kind, priority, created, updated, inputs)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, priority, now, now, _pack_inputs(inputs)),
+        )
+        self._submitted.set()
+        return job_id
+
+    def wait_for_work(self, timeout: float) -> None:
+        """Sleep until a job is submitted in this process, or timeout."""
+        if self._submitted.wait(timeout):
+            self._submitted.clear()
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        A job's status, in the shape the web endpoints use.
+
+        Returns:
+            {"status", "created", "kind", ...result fields...} plus "error"
+            and "error_type" for failed jobs, or None if unknown/purged
+        """
+        row = (
+            self._db()
+            .execute(
+                "SELECT kind, status, created, result, error, error_type FROM jobs WHERE id = ?",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        job = json.loads(row["result"]) if row["result"] else {}
+        job.update(status=row["status"], created=row["created"], kind=row["kind"])
+        if row["status"] == "error":
+            job["error"] = row["error"]
+            job["error_type"] = row["error_type"]
+        return job
+
+    def take_result(self, job_id: str, fields: tuple[str, ...]) -> dict | None:
+        """
+        A job's status, like get(), wiping some result fields as it's read.
+
+        For results meant to be shown once: a decoded message shouldn't sit
+        in jobs.db until purge(). Whoever takes it first gets the fields;
+        later calls see the job without them.
+
+        Args:
+            job_id: Job to read
+            fields: Result fields to remove from the database
+
+        Returns:
+            The job as it was before the wipe, or None if unknown/purged
+        """
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            job = self.get(job_id)
+            if job is not None and any(field in job for field in fields):
+                row = db.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                result = json.loads(row["result"])
+                for field in fields:
+                    result.pop(field, None)
+                db.execute("UPDATE jobs SET result = ? WHERE id = ?", (json.dumps(result), job_id))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return job
+
+    # -------------------------------------------------------------------------
+    # Consumer side
+    # -------------------------------------------------------------------------
+
+    def claim(self, owner: str, kinds: list[str] | None = None) -> tuple[str, str, dict] | None:
+        """
+        Lease the next runnable job, if the concurrency limit allows one.
+
+        Also re-queues jobs whose lease ran out (their consumer died).
+
+        Args:
+            owner: Consumer id, recorded on the lease
+            kinds: Only claim these job kinds (default: any)
+
+        Returns:
+            (job_id, kind, inputs), or None if nothing can start right now
+        """
+        db = self._db()
+        now = time.time()
+
+        # Idle consumers call this several times a second. Check with a plain
+        # read first - no write lock, no contention - whether there's work
+        work = db.execute(
+            "SELECT 1 FROM jobs WHERE status = 'pending'"
+            " OR (status = 'running' AND lease_expires < ?) LIMIT 1",
+            (now,),
+        ).fetchone()
+        if work is None:
+            return None
+
+        # IMMEDIATE takes the write lock up front, so two consumers can't
+        # both see "1 running, limit 2" and both start one
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_leases(db, now)
+
+            (running,) = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()
+            if running >= self.concurrency:
+                db.execute("COMMIT")
+                return None
+
+            query = "SELECT id, kind, inputs FROM jobs WHERE status = 'pending'"
+            args: list = []
+            if kinds:
+                query += f" AND kind IN ({','.join('?' * len(kinds))})"
+                args.extend(kinds)
+            query += " ORDER BY priority DESC, created LIMIT 1"
+            row = db.execute(query, args).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?,"
+                " lease_expires = ?, updated = ? WHERE id = ?",
+                (owner, now + self.lease_seconds, now, row["id"]),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        with self._live_changed:
+            self._abandoned.discard(row["id"])
+        return row["id"], row["kind"], _unpack_inputs(row["inputs"])
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute(
+            "UPDATE jobs SET status = 'error', error = 'Job worker stopped responding',"
+            " error_type = 'WorkerLost', inputs = NULL, lease_owner = NULL, updated = ?"
+            " WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+            (now, now, MAX_ATTEMPTS),
+        )
+        db.execute(
+            "UPDATE jobs SET status = 'pending', lease_owner = NULL, updated = ?"
+            " WHERE status = 'running' AND lease_expires < ?",
+            (now, now),
+        )
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Extend a lease. False if the job is no longer ours."""
+        cursor = self._db().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?"
+            " AND status = 'running'",
+            (time.time() + self.lease_seconds, job_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    def abandon(self, job_id: str) -> None:
+        """
+        Stop reporting a job this process lost the lease on.
+
+        Its handler may still be running and publishing progress, but the
+        job has been re-queued or failed - watchers here should see that,
+        from the database, rather than the orphan's progress.
+        """
+        with self._live_changed:
+            self._abandoned.add(job_id)
+            self._live.pop(job_id, None)
+            self._live_changed.notify_all()
+
+    def complete(self, job_id: str, owner: str, result: dict) -> None:
+        """Mark a job done and drop its inputs."""
+        self._finish(job_id, owner, "complete", result=json.dumps(result))
+
+    def fail(self, job_id: str, owner: str, error: str, error_type: str | None = None) -> None:
+        """Mark a job failed and drop its inputs."""
+        self._finish(job_id, owner, "error", error=error, error_type=error_type)
+
+    def _finish(self, job_id: str, owner: str, status: str, **fields) -> None:
+        # Database first: a watcher that loses the live entry must find the
+        # final status there, not the last (possibly older) stored progress
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, error_type = ?, inputs = NULL,"
+            " lease_owner = NULL, lease_expires = NULL, updated = ?"
+            " WHERE id = ? AND lease_owner = ?",
+            (
+                status,
+                fields.get("result"),
+                fields.get("error"),
+                fields.get("error_type"),
+                time.time(),
+                job_id,
+                owner,
+            ),
+        )
+        if cursor.rowcount != 1:
+            return  # Lease lost - the job's new owner reports on it now
+        with self._live_changed:
+            self._live.pop(job_id, None)
+            self._live_changed.notify_all()
+
+    # -------------------------------------------------------------------------
+    # Progress
+    # -------------------------------------------------------------------------
+
+    def publish_progress(self, job_id: str, progress: dict) -> None:
+        """
+        Record a running job's progress.
+
+        Watchers in this process are woken immediately. The database copy,
+        which is what other processes see, is refreshed at most every
+        PROGRESS_STORE_INTERVAL - the worker already throttles, this just
+        keeps SQLite writes down when several jobs run at once.
+        """
+        now = time.monotonic()
+        with self._live_changed:
+            if job_id in self._abandoned:
+                return
+            _, stored = self._live.get(job_id, (None, float("-inf")))
+            store = now - stored >= PROGRESS_STORE_INTERVAL
+            self._live[job_id] = (progress, now if store else stored)
+            self._live_changed.notify_all()
+        if store:
+            self._db().execute(
+                "UPDATE jobs SET progress = ? WHERE id = ? AND status = 'running'",
+                (json.dumps(progress), job_id),
+            )
+
+    def progress(self, job_id: str) -> dict | None:
+        """Latest known progress for a job, or None."""
+        with self._live_changed:
+            live = self._live.get(job_id)
+        if live is not None:
+            return live[0]
+        row = self._db().execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row["progress"]) if row and row["progress"] else None
+
+    def watch(self, job_id: str, seen: dict | None, timeout: float) -> dict | None:
+        """
+        Wait until a job's progress differs from `seen`, it finishes, or timeout.
+
+        Jobs running in this process wake the caller on every update; for
+        jobs elsewhere the database is re-read every PROGRESS_POLL_INTERVAL.
+
+        Args:
+            job_id: Job to watch
+            seen: The progress dict the caller already has (None at first)
+            timeout: Longest to wait, in seconds
+
+        Returns:
+            {"status": ..., "progress": ...} snapshot, or None if the job
+            doesn't exist
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            with self._live_changed:
+                live = self._live.get(job_id)
+                if live is not None and live[0] == seen and remaining > 0:
+                    self._live_changed.wait(remaining)
+                    live = self._live.get(job_id)
+            if live is not None:
+                return {"status": "running", "progress": live[0]}
+
+            row = (
+                self._db()
+                .execute("SELECT status, progress FROM jobs WHERE id = ?", (job_id,))
+                .fetchone()
+            )
+            if row is None:
+                return None
+            snapshot = {
+                "status": row["status"],
+                "progress": json.loads(row["progress"]) if row["progress"] else None,
+            }
+            remaining = deadline - time.monotonic()
+            if (
+                snapshot["status"] not in ("pending", "running")
+                or snapshot["progress"] != seen
+                or remaining <= 0
+            ):
+                return snapshot
+            # A job in this process may start publishing meanwhile - wake for that
+            with self._live_changed:
+                if job_id not in self._live:
+                    self._live_changed.wait(min(PROGRESS_POLL_INTERVAL, remaining))
+
+    # -------------------------------------------------------------------------
+    # Housekeeping
+    # -------------------------------------------------------------------------
+
+    def purge(self) -> int:
+        """
+        Forget finished jobs older than result_ttl.
+
+        Returns:
+            Number of jobs removed
+        """
+        db = self._db()
+        cursor = db.execute(
+            "DELETE FROM jobs WHERE status IN ('complete', 'error') AND updated < ?",
+            (time.time() - self.result_ttl,),
+        )
+        # Fold the WAL back in and truncate it - wiped inputs and results
+        # shouldn't survive as stale pages there
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Job counts by status, plus the concurrency limit."""
+        rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: count for status, count in rows}
+        return {
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "complete": counts.get("complete", 0),
+            "error": counts.get("error", 0),
+            "concurrency": self.concurrency,
+        }
+
+
+# =============================================================================
+# CONSUMERS
+# =============================================================================
+
+
+class JobConsumer:
+    """
+    Threads that claim jobs from a JobQueue and run them.
+
+    The threads only coordinate - the handlers hand the heavy lifting to the
+    persistent stego worker processes (subprocess_stego.WorkerPool), so a
+    crash in native code still can't take a consumer down with it.
+
+    Run consumers inside the web processes, in a dedicated process
+    (job_runner.py), or both: the queue's concurrency limit holds either way.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: dict[str, Callable[[str, dict], dict]],
+        threads: int = 1,
+        purge_interval: float = 300.0,
+    ):
+        """
+        Args:
+            queue: Queue to consume
+            handlers: kind -> handler(job_id, inputs) returning the result
+                dict; raise JobError (or anything) to fail the job
+            threads: Jobs this consumer may run at once
+            purge_interval: Seconds between purge() runs
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = threads
+        self.purge_interval = purge_interval
+        self._stop = threading.Event()
+        self._workers: list[threading.Thread] = []
+        self._last_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+    def start(self) -> "JobConsumer":
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._loop, name=f"stegasoo-jobs-{i}", daemon=True)
+            thread.start()
+            self._workers.append(thread)
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming new jobs and wait for running ones to finish."""
+        self._stop.set()
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def _loop(self) -> None:
+        owner = f"{os.getpid()}:{threading.current_thread().name}"
+        kinds = list(self.handlers)
+        while not self._stop.is_set():
+            self._maybe_purge()
+            try:
+                claimed = self.queue.claim(owner, kinds)
+            except sqlite3.Error:
+                claimed = None  # Locked or briefly unavailable - try again shortly
+            if claimed is None:
+                self.queue.wait_for_work(POLL_INTERVAL)
+                continue
+            self.run_one(owner, *claimed)
+
+    def run_one(self, owner: str, job_id: str, kind: str, inputs: dict) -> None:
+        """Run a claimed job, heartbeating its lease until it's done."""
+        done = threading.Event()
+
+        def keep_alive():
+            interval = self.queue.lease_seconds / 3
+            while not done.wait(interval):
+                try:
+                    ours = self.queue.heartbeat(job_id, owner)
+                except sqlite3.Error:
+                    # Locked or briefly unavailable - there's time for a few
+                    # more tries before the lease actually runs out
+                    interval = min(1.0, self.queue.lease_seconds / 10)
+                    continue
+                interval = self.queue.lease_seconds / 3
+                if not ours:
+                    # Expired and re-queued (or failed) under us. The handler
+                    # can't be stopped, but its result will be ignored and
+                    # its progress mustn't be shown as the job's
+                    self.queue.abandon(job_id)
+                    return
+
+        heartbeat = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handlers[kind](job_id, inputs)
+        except JobError as e:
+            self.queue.fail(job_id, owner, str(e), e.error_type)
+        except Exception as e:
+            self.queue.fail(job_id, owner, str(e), type(e).__name__)
+        else:
+            self.queue.complete(job_id, owner, result or {})
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        with self._purge_lock:
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        try:
+            self.queue.purge()
+        except sqlite3.Error:
+            pass  # Next time
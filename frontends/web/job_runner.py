@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Stegasoo Job Runner (v4.3.0)
+
+A dedicated consumer for the web UI's job queue (job_queue.py). Runs the
+same encode/decode handlers as the web processes, without serving HTTP.
+
+Web processes start their own consumer threads by default. To move all job
+dispatch here instead, start the web app with STEGASOO_JOB_CONSUMERS=0 and
+run this alongside it (same instance directory, same machine):
+
+    STEGASOO_JOB_CONSUMERS=0 gunicorn app:app &
+    python job_runner.py --threads 2
+
+The queue's STEGASOO_JOB_CONCURRENCY limit applies across all of them, so
+running both kinds of consumer at once is fine too.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Importing the app must not start its request-driven consumer threads -
+# this process decides how many consumers it runs
+os.environ.setdefault("STEGASOO_JOB_CONSUMERS", "0")
+
+from app import jobs, start_job_consumer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Stegasoo web jobs")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=jobs.concurrency,
+        help="Jobs this runner may work on at once (default: the global limit)",
+    )
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    consumer = start_job_consumer(args.threads)
+    print(f"Job runner {os.getpid()}: {args.threads} thread(s), queue {jobs.db_path}")
+
+    stop.wait()
+    print("Stopping - finishing running jobs...")
+    consumer.stop()
+
+
+if __name__ == "__main__":
+    main()
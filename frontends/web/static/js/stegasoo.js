@@ -975,54 +975,92 @@ const Stegasoo = {
     },
 
     /**
-     * Poll encode progress until complete
+     * Follow a job until it finishes (v4.3.0)
+     *
+     * Listens on /jobs/<id>/events, which pushes progress only when it
+     * changes. If the stream can't be used at all, falls back to polling
+     * the status and progress endpoints every 500ms like before.
      * @param {string} jobId - The job ID
+     * @param {string} kind - 'encode' or 'decode' (for the polling fallback)
+     * @param {Function} onProgress - Called with each {percent, phase} update
+     * @returns {Promise<Object>} The finished job ({status, error, error_type, file_id})
      */
-    async pollEncodeProgress(jobId) {
-        const progressBar = document.getElementById('progressBar');
-        const progressText = document.getElementById('progressText');
-        const phaseText = document.getElementById('progressPhase');
+    watchJob(jobId, kind, onProgress) {
+        const poll = (resolve, reject) => {
+            const tick = async () => {
+                try {
+                    const statusResponse = await fetch(`/${kind}/status/${jobId}`);
+                    const statusData = await statusResponse.json();
+
+                    if (!statusData.status) {
+                        resolve({ status: 'error', error: statusData.error || 'Job not found' });
+                        return;
+                    }
+                    if (statusData.status === 'complete' || statusData.status === 'error') {
+                        resolve(statusData);
+                        return;
+                    }
 
-        const poll = async () => {
-            try {
-                // Check status first
-                const statusResponse = await fetch(`/encode/status/${jobId}`);
-                const statusData = await statusResponse.json();
-
-                if (statusData.status === 'complete') {
-                    // Done - redirect to result
-                    this.updateProgress(100, 'Complete!');
-                    setTimeout(() => {
-                        window.location.href = `/encode/result/${statusData.file_id}`;
-                    }, 500);
-                    return;
+                    const progressResponse = await fetch(`/${kind}/progress/${jobId}`);
+                    onProgress(await progressResponse.json());
+                    setTimeout(tick, 500);
+                } catch (error) {
+                    reject(error);
                 }
+            };
+            tick();
+        };
 
-                if (statusData.status === 'error') {
-                    throw new Error(statusData.error || 'Encode failed');
-                }
+        return new Promise((resolve, reject) => {
+            if (!window.EventSource) {
+                poll(resolve, reject);
+                return;
+            }
 
-                // Get progress
-                const progressResponse = await fetch(`/encode/progress/${jobId}`);
-                const progressData = await progressResponse.json();
+            const source = new EventSource(`/jobs/${jobId}/events`);
+            source.onmessage = (event) => onProgress(JSON.parse(event.data));
+            source.addEventListener('done', (event) => {
+                source.close();
+                resolve(JSON.parse(event.data));
+            });
+            source.onerror = () => {
+                // CONNECTING means the browser is already reconnecting (the
+                // server ends long streams on purpose) - only give up on CLOSED
+                if (source.readyState === EventSource.CLOSED) {
+                    poll(resolve, reject);
+                }
+            };
+        });
+    },
 
-                const percent = progressData.percent || 0;
-                const phase = progressData.phase || 'processing';
+    /**
+     * Follow encode progress until complete
+     * @param {string} jobId - The job ID
+     */
+    async pollEncodeProgress(jobId) {
+        try {
+            const job = await this.watchJob(jobId, 'encode', (progress) => {
+                const phase = progress.phase || 'processing';
 
                 // Use indeterminate mode for initializing/starting phases
                 const isIndeterminate = (phase === 'initializing' || phase === 'starting');
-                this.updateProgress(percent, this.formatPhase(phase), isIndeterminate);
-
-                // Continue polling
-                setTimeout(poll, 500);
+                this.updateProgress(progress.percent || 0, this.formatPhase(phase), isIndeterminate);
+            });
 
-            } catch (error) {
-                this.hideProgressModal();
-                alert('Encode failed: ' + error.message);
+            if (job.status !== 'complete') {
+                throw new Error(job.error || 'Encode failed');
             }
-        };
 
-        await poll();
+            // Done - redirect to result
+            this.updateProgress(100, 'Complete!');
+            setTimeout(() => {
+                window.location.href = `/encode/result/${job.file_id}`;
+            }, 500);
+
+        } catch (error) {
+            this.hideProgressModal();
+            alert('Encode failed: ' + error.message);
+        }
     },
 
     /**
@@ -1183,58 +1221,41 @@ const Stegasoo = {
     },
 
     /**
-     * Poll decode progress until complete
+     * Follow decode progress until complete
      * @param {string} jobId - The job ID
      */
     async pollDecodeProgress(jobId) {
-        const poll = async () => {
-            try {
-                // Check status first
-                const statusResponse = await fetch(`/decode/status/${jobId}`);
-                const statusData = await statusResponse.json();
-
-                if (statusData.status === 'complete') {
-                    // Done - redirect to result page
-                    this.updateProgress(100, 'Complete!');
-                    setTimeout(() => {
-                        window.location.href = `/decode/result/${jobId}`;
-                    }, 500);
-                    return;
-                }
-
-                if (statusData.status === 'error') {
-                    // Handle specific error types
-                    const errorType = statusData.error_type;
-                    let errorMsg = statusData.error || 'Decode failed';
-
-                    if (errorType === 'DecryptionError' || errorMsg.toLowerCase().includes('decrypt')) {
-                        errorMsg = 'Wrong credentials. Double-check your reference photo, passphrase, PIN, and channel key.';
-                    }
-
-                    throw new Error(errorMsg);
-                }
-
-                // Get progress
-                const progressResponse = await fetch(`/decode/progress/${jobId}`);
-                const progressData = await progressResponse.json();
-
-                const percent = progressData.percent || 0;
-                const phase = progressData.phase || 'processing';
+        try {
+            const job = await this.watchJob(jobId, 'decode', (progress) => {
+                const phase = progress.phase || 'processing';
 
                 // Use indeterminate mode for initializing/starting/loading phases
                 const isIndeterminate = (phase === 'initializing' || phase === 'starting' || phase === 'loading');
-                this.updateProgress(percent, this.formatDecodePhase(phase), isIndeterminate);
+                this.updateProgress(progress.percent || 0, this.formatDecodePhase(phase), isIndeterminate);
+            });
 
-                // Continue polling
-                setTimeout(poll, 500);
+            if (job.status !== 'complete') {
+                // Handle specific error types
+                const errorType = job.error_type;
+                let errorMsg = job.error || 'Decode failed';
 
-            } catch (error) {
-                this.hideProgressModal();
-                alert(error.message);
+                if (errorType === 'DecryptionError' || errorMsg.toLowerCase().includes('decrypt')) {
+                    errorMsg = 'Wrong credentials. Double-check your reference photo, passphrase, PIN, and channel key.';
+                }
+
+                throw new Error(errorMsg);
             }
-        };
 
-        await poll();
+            // Done - redirect to result page
+            this.updateProgress(100, 'Complete!');
+            setTimeout(() => {
+                window.location.href = `/decode/result/${jobId}`;
+            }, 500);
+
+        } catch (error) {
+            this.hideProgressModal();
+            alert(error.message);
+        }
     },
 
     /**
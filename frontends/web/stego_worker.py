@@ -5,21 +5,36 @@ Stegasoo Subprocess Worker (v4.0.0)
 This script runs in a subprocess and handles encode/decode operations.
 If it crashes due to jpeglib/scipy issues, the parent Flask process survives.
 
+CHANGES in v4.3.0:
+- Pooled mode (--serve): one long-lived process handles many requests,
+  so imports are paid once instead of per request
+- Progress can stream back to the parent as frames instead of going
+  through a file in /tmp ("stream_progress": true)
+- --serve speaks worker_protocol binary frames: images travel as raw bytes
+  rather than base64 in JSON, and results can be written straight to an
+  output_path (the temp storage directory) with only metadata coming back
+- Decode in "auto" channel mode also tries public mode in the same run
+  (trial decode) instead of failing with a hint to resubmit
+
 CHANGES in v4.0.0:
 - Added channel_key support for encode/decode operations
 - New channel_status operation
 
-Communication is via JSON over stdin/stdout:
-- Input: JSON object with operation parameters
-- Output: JSON object with results or error
+Communication is over stdin/stdout:
+- Pooled (--serve): worker_protocol frames, one per request and reply
+- One-shot: a JSON object in, a JSON object out; binary fields are
+  base64 under "<name>_b64" keys (carrier_b64, stego_b64, ...)
 
 Usage:
     echo '{"operation": "encode", ...}' | python stego_worker.py
+    python stego_worker.py --serve    # pooled, see subprocess_stego.WorkerPool
 """
 
 import base64
 import json
+import os
 import sys
+import threading
 import traceback
 from pathlib import Path
 
@@ -71,24 +86,97 @@ def _get_channel_info(resolved_key):
     return "public", None
 
 
+# Protocol stream while in --serve mode; progress updates are sent on it.
+# Library threads (auto mode races LSB against DCT) report progress too, so
+# every frame goes out under the lock - two writers would interleave bytes.
+_protocol = None
+_protocol_lock = threading.Lock()
+
+# The request being handled in --serve mode's progress sender, if any
+_request_progress = None
+
+
+def _write_protocol_frame(message: dict) -> None:
+    """Write one frame on the protocol stream without tearing another."""
+    from worker_protocol import write_frame
+
+    with _protocol_lock:
+        write_frame(_protocol, message)
+
+
+class _PipeProgress:
+    """
+    Sends one request's progress up the pipe, until that request is answered.
+
+    A thread the library didn't wait for may still report after the reply
+    has gone out; those updates are dropped rather than arriving as stray
+    frames ahead of the next request's reply.
+    """
+
+    def __init__(self):
+        self.open = True
+
+    def __call__(self, progress: dict) -> None:
+        from worker_protocol import write_frame
+
+        with _protocol_lock:
+            if self.open:
+                write_frame(_protocol, {"event": "progress", "progress": progress})
+
+    def close(self) -> None:
+        with _protocol_lock:
+            self.open = False
+
+
+def _progress_target(params: dict):
+    """
+    Where this request's progress should go.
+
+    With "stream_progress" (pooled mode) updates go straight back up the
+    pipe - no files in /tmp, no polling. Otherwise fall back to the old
+    progress_file path, if any.
+    """
+    if params.get("stream_progress") and _request_progress is not None:
+        return _request_progress
+    return params.get("progress_file")
+
+
+def _output(data: bytes, output_path: str | None, name: str) -> dict:
+    """
+    Hand a result back: written to output_path if the caller gave one, else
+    inline as a raw segment named `name`.
+
+    Writing it ourselves means a 30 MB stego image goes to the temp storage
+    directory once, instead of across the pipe and then to disk from Flask.
+    The write is temp-file-and-rename so a reader never sees half an image.
+    """
+    if not output_path:
+        return {name: data, f"{name}_size": len(data)}
+
+    path = Path(output_path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return {"output_path": str(path), f"{name}_size": len(data)}
+
+
 def encode_operation(params: dict) -> dict:
     """Handle encode operation."""
     from stegasoo import FilePayload, encode
 
-    # Decode base64 inputs
-    carrier_data = base64.b64decode(params["carrier_b64"])
-    reference_data = base64.b64decode(params["reference_b64"])
+    carrier_data = params["carrier"]
+    reference_data = params["reference"]
 
     # Optional RSA key
-    rsa_key_data = None
-    if params.get("rsa_key_b64"):
-        rsa_key_data = base64.b64decode(params["rsa_key_b64"])
+    rsa_key_data = params.get("rsa_key") or None
 
     # Determine payload type
-    if params.get("file_b64"):
-        file_data = base64.b64decode(params["file_b64"])
+    if params.get("file"):
         payload = FilePayload(
-            data=file_data,
+            data=bytes(params["file"]),
             filename=params.get("file_name", "file"),
             mime_type=params.get("file_mime", "application/octet-stream"),
         )
@@ -111,7 +199,7 @@ def encode_operation(params: dict) -> dict:
         dct_output_format=params.get("dct_output_format", "png"),
         dct_color_mode=params.get("dct_color_mode", "color"),
         channel_key=resolved_channel_key,  # v4.0.0
-        progress_file=params.get("progress_file"),  # v4.1.2
+        progress_file=_progress_target(params),  # v4.1.2, streamed in v4.3.0
     )
 
     # Build stats dict if available
@@ -128,7 +216,7 @@ def encode_operation(params: dict) -> dict:
 
     return {
         "success": True,
-        "stego_b64": base64.b64encode(result.stego_image).decode("ascii"),
+        **_output(result.stego_image, params.get("output_path"), "stego"),
         "filename": getattr(result, "filename", None),
         "stats": stats,
         "channel_mode": channel_mode,
@@ -136,41 +224,35 @@ def encode_operation(params: dict) -> dict:
     }
 
 
-def _write_decode_progress(progress_file: str | None, percent: int, phase: str) -> None:
-    """Write decode progress to file."""
-    if not progress_file:
-        return
-    try:
-        import json
-        with open(progress_file, "w") as f:
-            json.dump({"percent": percent, "phase": phase}, f)
-    except Exception:
-        pass  # Best effort
-
-
 def decode_operation(params: dict) -> dict:
     """Handle decode operation."""
     from stegasoo import decode
+    from stegasoo.progress import as_progress_reporter
 
-    progress_file = params.get("progress_file")
+    # One reporter for our own updates and the library's, so they share a throttle
+    progress = as_progress_reporter(_progress_target(params))
 
     # Progress: starting
-    _write_decode_progress(progress_file, 5, "reading")
+    if progress:
+        progress(5, 100, "reading")
 
-    # Decode base64 inputs
-    stego_data = base64.b64decode(params["stego_b64"])
-    reference_data = base64.b64decode(params["reference_b64"])
+    stego_data = params["stego"]
+    reference_data = params["reference"]
 
-    _write_decode_progress(progress_file, 15, "reading")
+    if progress:
+        progress(15, 100, "reading")
 
     # Optional RSA key
-    rsa_key_data = None
-    if params.get("rsa_key_b64"):
-        rsa_key_data = base64.b64decode(params["rsa_key_b64"])
+    rsa_key_data = params.get("rsa_key") or None
 
     # Resolve channel key (v4.0.0)
     resolved_channel_key = _resolve_channel_key(params.get("channel_key", "auto"))
 
+    # v4.3.0: In auto mode the user often doesn't know whether the message was
+    # sent public or private - try both in one pass (duplicates collapse)
+    if resolved_channel_key is None:
+        resolved_channel_key = [None, ""]
+
     # Library handles progress internally via progress_file parameter
     # Call decode with correct parameter names
     result = decode(
@@ -182,7 +264,7 @@ def decode_operation(params: dict) -> dict:
         rsa_password=params.get("rsa_password"),
         embed_mode=params.get("embed_mode", "auto"),
         channel_key=resolved_channel_key,  # v4.0.0
-        progress_file=progress_file,  # v4.2.0: pass through for real-time progress
+        progress_file=progress,  # v4.2.0: pass through for real-time progress
     )
     # Library writes 100% "complete" - no need for worker to write again
 
@@ -190,7 +272,7 @@ def decode_operation(params: dict) -> dict:
         return {
             "success": True,
             "is_file": True,
-            "file_b64": base64.b64encode(result.file_data).decode("ascii"),
+            **_output(result.file_data, params.get("output_path"), "file"),
             "filename": result.filename,
             "mime_type": result.mime_type,
         }
@@ -206,8 +288,7 @@ def compare_operation(params: dict) -> dict:
     """Handle compare_modes operation."""
     from stegasoo import compare_modes
 
-    carrier_data = base64.b64decode(params["carrier_b64"])
-    result = compare_modes(carrier_data)
+    result = compare_modes(params["carrier"])
 
     return {
         "success": True,
@@ -219,11 +300,9 @@ def capacity_check_operation(params: dict) -> dict:
     """Handle will_fit_by_mode operation."""
     from stegasoo import will_fit_by_mode
 
-    carrier_data = base64.b64decode(params["carrier_b64"])
-
     result = will_fit_by_mode(
         payload=params["payload_size"],
-        carrier_image=carrier_data,
+        carrier_image=params["carrier"],
         embed_mode=params.get("embed_mode", "lsb"),
     )
 
@@ -252,8 +331,128 @@ def channel_status_operation(params: dict) -> dict:
     }
 
 
+def ping_operation(params: dict) -> dict:
+    """Liveness check for pooled workers - cheap, and tells the pool who answered."""
+    return {"success": True, "pid": os.getpid()}
+
+
+# Operation name -> handler. The one-shot main() and the pooled serve() loop
+# share this table, so a new operation only has to be registered once.
+OPERATIONS = {
+    "encode": encode_operation,
+    "decode": decode_operation,
+    "compare": compare_operation,
+    "capacity": capacity_check_operation,
+    "channel_status": channel_status_operation,
+    "ping": ping_operation,
+}
+
+
+def handle(params: dict) -> dict:
+    """Run one request and turn any exception into an error dict."""
+    try:
+        operation = params.get("operation")
+        handler = OPERATIONS.get(operation)
+        if handler is None:
+            return {"success": False, "error": f"Unknown operation: {operation}"}
+        return handler(params)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc(),
+        }
+
+
+def _preload() -> None:
+    """
+    Pay the import bill once, before the first job arrives.
+
+    PIL, numpy, scipy, jpeglib, cryptography and argon2 together take
+    0.5-2 s to import on a Pi. A one-shot worker paid that on every request;
+    a pooled worker pays it here, while nobody is waiting.
+    """
+    import stegasoo  # noqa: F401
+
+    try:
+        import stegasoo.dct_steganography  # noqa: F401
+    except ImportError:
+        pass  # scipy/jpeglib missing - DCT requests will report it themselves
+
+
+def serve() -> None:
+    """
+    Pooled mode - handle requests until stdin closes.
+
+    Requests and replies are worker_protocol frames, strictly alternating -
+    except that a request may be answered by any number of
+    {"event": "progress"} frames before its reply.
+    The parent (subprocess_stego.WorkerPool) owns timeouts - if a job runs
+    too long it kills us, so there's no cancellation logic here.
+    """
+    from worker_protocol import ProtocolError, file_reader, read_frame
+
+    # Keep the protocol pipe to ourselves. Anything a library prints would
+    # otherwise land in the middle of a frame, so fd 1 becomes stderr and
+    # the real stdout gets a private descriptor.
+    global _protocol, _request_progress
+    _protocol = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    _preload()
+
+    read_into = file_reader(sys.stdin.buffer)
+    while True:
+        try:
+            params = read_frame(read_into)
+        except EOFError:
+            return  # Parent closed the pipe - time to go
+        except ProtocolError as e:
+            # Can't find the next frame boundary - report and bail out
+            _write_protocol_frame({"success": False, "error": f"Protocol error: {e}"})
+            return
+
+        _request_progress = _PipeProgress()
+        try:
+            reply = handle(params)
+        finally:
+            # Closed before the reply, under the same lock, so nothing from
+            # this request can follow it
+            _request_progress.close()
+            _request_progress = None
+        _write_protocol_frame(reply)
+
+
+def _from_json(params: dict) -> dict:
+    """One-shot JSON requests carry binary fields as base64 under `<name>_b64`."""
+    decoded = {}
+    for key, value in params.items():
+        if key.endswith("_b64"):
+            decoded[key[:-4]] = base64.b64decode(value)
+        else:
+            decoded[key] = value
+    return decoded
+
+
+def _to_json(output: dict) -> dict:
+    """Inverse of _from_json for the reply."""
+    encoded = {}
+    for key, value in output.items():
+        if isinstance(value, (bytes, bytearray)):
+            encoded[f"{key}_b64"] = base64.b64encode(value).decode("ascii")
+        else:
+            encoded[key] = value
+    return encoded
+
+
 def main():
     """Main entry point - read JSON from stdin, write JSON to stdout."""
+    if "--serve" in sys.argv[1:]:
+        serve()
+        return
+
     try:
         # Read all input
         input_text = sys.stdin.read()
@@ -261,34 +460,13 @@ def main():
         if not input_text.strip():
             output = {"success": False, "error": "No input provided"}
         else:
-            params = json.loads(input_text)
-            operation = params.get("operation")
-
-            if operation == "encode":
-                output = encode_operation(params)
-            elif operation == "decode":
-                output = decode_operation(params)
-            elif operation == "compare":
-                output = compare_operation(params)
-            elif operation == "capacity":
-                output = capacity_check_operation(params)
-            elif operation == "channel_status":
-                output = channel_status_operation(params)
-            else:
-                output = {"success": False, "error": f"Unknown operation: {operation}"}
+            output = handle(_from_json(json.loads(input_text)))
 
     except json.JSONDecodeError as e:
         output = {"success": False, "error": f"Invalid JSON: {e}"}
-    except Exception as e:
-        output = {
-            "success": False,
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "traceback": traceback.format_exc(),
-        }
 
     # Write output as JSON
-    print(json.dumps(output), flush=True)
+    print(json.dumps(_to_json(output)), flush=True)
 
 
 if __name__ == "__main__":
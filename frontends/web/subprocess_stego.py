@@ -4,6 +4,19 @@ Subprocess Steganography Wrapper (v4.0.0)
 Runs stegasoo operations in isolated subprocesses to prevent crashes
 from taking down the Flask server.
 
+CHANGES in v4.3.0:
+- Persistent worker pool: a few long-lived stego_worker.py processes handle
+  requests over pipes instead of a fresh interpreter per request. Crash
+  isolation is unchanged - a dead or hung worker is killed and replaced.
+  Workers are recycled after WORKER_MAX_JOBS requests or WORKER_MAX_RSS_MB.
+  pool_size=0 restores the old spawn-per-request behaviour.
+- Binary IPC (worker_protocol.py): images cross the pipe as raw bytes
+  instead of base64 inside JSON. encode()/decode() take an output_path so
+  the worker writes the result straight into temp storage and only
+  metadata comes back.
+- Streamed progress: pass progress_callback and the worker sends progress
+  frames up the pipe ahead of its reply - no progress files, no polling.
+
 CHANGES in v4.0.0:
 - Added channel_key parameter to encode() and decode() methods
 - Channel keys enable deployment/group isolation
@@ -43,22 +56,38 @@ Usage:
     result = stego.compare_modes(carrier_bytes)
 """
 
-import base64
+import atexit
 import json
+import os
+import queue
+import select
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 import uuid
+from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from worker_protocol import ProtocolError, pack_frame, read_frame
+
 # Default timeout for operations (seconds)
 DEFAULT_TIMEOUT = 120
 
 # Path to worker script - adjust if needed
 WORKER_SCRIPT = Path(__file__).parent / "stego_worker.py"
 
+# Worker pool defaults. Each pooled worker holds PIL/numpy/scipy in memory
+# (~100 MB on a Pi), so keep the pool small - it matches the two job threads
+# in app.py.
+DEFAULT_POOL_SIZE = 2
+WORKER_MAX_JOBS = 100  # Recycle after this many requests...
+WORKER_MAX_RSS_MB = 512  # ...or once resident memory grows past this
+WORKER_RESPAWN_SECONDS = 1.0  # How often a pool short of workers retries starting them
+
 
 @dataclass
 class EncodeResult:
@@ -71,6 +100,9 @@ class EncodeResult:
     # Channel info (v4.0.0)
     channel_mode: str | None = None
     channel_fingerprint: str | None = None
+    # Set instead of stego_data when encode() was given an output_path (v4.3.0)
+    output_path: str | None = None
+    stego_size: int = 0
     error: str | None = None
     error_type: str | None = None
 
@@ -85,6 +117,9 @@ class DecodeResult:
     file_data: bytes | None = None
     filename: str | None = None
     mime_type: str | None = None
+    # Set instead of file_data when decode() was given an output_path (v4.3.0)
+    output_path: str | None = None
+    file_size: int = 0
     error: str | None = None
     error_type: str | None = None
 
@@ -128,12 +163,397 @@ class ChannelStatusResult:
     error: str | None = None
 
 
+# =============================================================================
+# Persistent Worker Pool (v4.3.0)
+# =============================================================================
+#
+# Spawning `python stego_worker.py` per request means re-importing PIL,
+# numpy, scipy, jpeglib, cryptography and argon2 every time - 0.5-2 s on a
+# Pi before any real work starts. The pool keeps a few workers running in
+# `--serve` mode and talks to them over their stdin/stdout pipes:
+#
+#     Flask thread ──[frame: header + carrier + reference]──>  worker
+#                  <──[frame: header (+ stego, or just output_path)]──
+#
+# Frames are defined in worker_protocol.py. Bytes in the request dict are
+# sent as raw segments - written from the caller's buffer, read into one
+# exactly-sized buffer on the far side - so nothing is base64'd or copied
+# into a JSON string.
+#
+# Crash isolation is the whole point of running out-of-process, so it stays:
+# - A worker that dies mid-job fails that job and is replaced
+# - A job that runs past its timeout gets its worker killed (SIGKILL), the
+#   same as subprocess.run(timeout=...) did
+# - Workers are retired after WORKER_MAX_JOBS jobs or once their RSS passes
+#   WORKER_MAX_RSS_MB, so slow leaks in native code can't accumulate
+
+
+class _WorkerGoneError(Exception):
+    """The worker closed its pipe (crashed or exited)."""
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """Resident set size of a process, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    """One long-lived stego_worker.py --serve process."""
+
+    def __init__(self, python: str, worker_path: Path):
+        self.proc = subprocess.Popen(
+            [python, str(worker_path), "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # Inherit - worker tracebacks end up in the Flask log
+            cwd=str(worker_path.parent),
+        )
+        self.jobs = 0
+        # Non-blocking so a hung worker can't wedge us past the deadline
+        os.set_blocking(self.proc.stdin.fileno(), False)
+        os.set_blocking(self.proc.stdout.fileno(), False)
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _write_all(self, data: bytes, deadline: float) -> None:
+        fd = self.proc.stdin.fileno()
+        view = memoryview(data)
+        while view:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            _, writable, _ = select.select([], [fd], [], remaining)
+            if not writable:
+                continue
+            try:
+                written = os.write(fd, view)
+            except BlockingIOError:
+                continue
+            except (BrokenPipeError, ConnectionResetError):
+                raise _WorkerGoneError from None
+            view = view[written:]
+
+    def _read_into(self, view: memoryview, deadline: float) -> None:
+        """Fill view from the worker's stdout, straight into the caller's buffer."""
+        fd = self.proc.stdout.fileno()
+        filled = 0
+        while filled < len(view):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            try:
+                count = os.readv(fd, [view[filled:]])
+            except BlockingIOError:
+                continue
+            if not count:
+                raise _WorkerGoneError
+            filled += count
+
+    def request(
+        self,
+        params: dict[str, Any],
+        deadline: float,
+        timeout: float,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Send one request and wait for its reply.
+
+        Never raises - failures come back as error dicts, in the same shape
+        the one-shot path returns. A worker that timed out or crashed is
+        dead afterwards; the pool notices and replaces it.
+
+        Args:
+            params: Worker request (bytes values travel as raw frame segments)
+            deadline: time.monotonic() value to give up at
+            timeout: The caller's timeout, for the error message
+            on_progress: Called with each progress update the worker streams
+                back before its reply
+        """
+        self.jobs += 1
+
+        def read_into(view: memoryview) -> None:
+            self._read_into(view, deadline)
+
+        try:
+            for piece in pack_frame(params):
+                self._write_all(piece, deadline)
+            while True:
+                reply = read_frame(read_into)
+                if reply.get("event") != "progress":
+                    return reply
+                if on_progress is not None:
+                    try:
+                        on_progress(reply["progress"])
+                    except Exception:
+                        pass  # A broken progress consumer mustn't fail the job
+        except TimeoutError:
+            self.kill()
+            return {
+                "success": False,
+                "error": f"Operation timed out after {timeout} seconds",
+                "error_type": "TimeoutError",
+            }
+        except (_WorkerGoneError, EOFError):
+            self.kill()
+            return {
+                "success": False,
+                "error": f"Worker crashed (exit code {self.proc.returncode})",
+            }
+        except ProtocolError as e:
+            self.kill()  # Out of step with the protocol - don't trust it again
+            return {
+                "success": False,
+                "error": f"Invalid reply from worker: {e}",
+            }
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+        self._close_pipes()
+
+    def close(self, grace: float = 2.0) -> None:
+        """Ask the worker to exit (EOF on stdin), killing it if it won't."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self._close_pipes()
+
+    def _close_pipes(self) -> None:
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class WorkerPool:
+    """
+    A fixed number of persistent stego workers, handed out one job at a time.
+
+    Workers start on first use rather than at construction, so a pool built
+    at import time in a preloading Gunicorn master isn't inherited half-alive
+    by the forked web workers - each process starts its own.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        python_executable: str | None = None,
+        worker_path: Path | None = None,
+        max_jobs: int = WORKER_MAX_JOBS,
+        max_rss_mb: int | None = WORKER_MAX_RSS_MB,
+    ):
+        """
+        Args:
+            size: Number of worker processes
+            python_executable: Interpreter for the workers (default: current)
+            worker_path: Path to stego_worker.py (default: same directory)
+            max_jobs: Requests a worker serves before it's replaced
+            max_rss_mb: Resident memory ceiling per worker, None for no limit
+        """
+        if size < 1:
+            raise ValueError("WorkerPool needs at least one worker")
+        self.size = size
+        self.python = python_executable or sys.executable
+        self.worker_path = worker_path or WORKER_SCRIPT
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: set[_Worker] = set()
+        self._lock = threading.Lock()
+        self._owner_pid: int | None = None
+        self._closed = False
+        self.restarts = 0
+        # Slots whose worker failed to start (fork/exec hit EAGAIN, ENOMEM,
+        # EMFILE...) - run() keeps retrying them rather than the pool quietly
+        # shrinking to nothing
+        self._missing = 0
+        self._spawn_error: str | None = None
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self.python, self.worker_path)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _fill_slot(self) -> None:
+        """Start a worker for an empty slot, or note the slot for a later retry."""
+        try:
+            worker = self._spawn()
+        except OSError as e:
+            with self._lock:
+                self._missing += 1
+                self._spawn_error = str(e)
+            return
+        self._spawn_error = None
+        self._idle.put(worker)
+
+    def _refill(self) -> None:
+        """Retry the slots whose worker couldn't be started."""
+        with self._lock:
+            missing, self._missing = self._missing, 0
+        for _ in range(missing):
+            self._fill_slot()
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.close()
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._owner_pid == pid:
+            return
+        with self._lock:
+            if self._owner_pid == pid:
+                return
+            # Fresh pool, or we're a forked child holding the parent's pipes.
+            # Those workers belong to the parent; just forget about them.
+            self._idle = queue.Queue()
+            self._workers = set()
+            self._owner_pid = pid
+            self._closed = False
+            self._missing = 0
+        for _ in range(self.size):
+            self._fill_slot()
+        atexit.register(self.shutdown)
+
+    def _should_recycle(self, worker: _Worker) -> bool:
+        if not worker.alive():
+            return True
+        if self.max_jobs and worker.jobs >= self.max_jobs:
+            return True
+        if self.max_rss_bytes:
+            rss = _rss_bytes(worker.pid)
+            if rss is not None and rss > self.max_rss_bytes:
+                return True
+        return False
+
+    def _release(self, worker: _Worker) -> None:
+        """Return a worker to the pool, swapping it for a new one if it's spent."""
+        if self._closed:
+            self._retire(worker)
+            return
+        if self._should_recycle(worker):
+            self._retire(worker, kill=not worker.alive())
+            self.restarts += 1
+            self._fill_slot()
+            return
+        self._idle.put(worker)
+
+    def run(
+        self,
+        params: dict[str, Any],
+        timeout: float,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run one request on the next free worker.
+
+        Args:
+            params: Worker request (same dict the one-shot worker takes)
+            timeout: Seconds for the job itself; waiting for a free worker
+                counts against it too
+            on_progress: Receives streamed progress updates, if requested
+
+        Returns:
+            Result dict from the worker, or an error dict
+        """
+        if self._closed and self._owner_pid == os.getpid():
+            return {"success": False, "error": "Worker pool is shut down"}
+        self._ensure_started()
+        deadline = time.monotonic() + timeout
+
+        while True:
+            self._refill()
+            remaining = deadline - time.monotonic()
+            try:
+                # Wake up now and then to retry workers that failed to start
+                worker = self._idle.get(timeout=max(0.0, min(remaining, WORKER_RESPAWN_SECONDS)))
+            except queue.Empty:
+                if time.monotonic() < deadline:
+                    continue
+                error = f"No worker became free within {timeout} seconds"
+                if self._spawn_error:
+                    error += f" (couldn't start one: {self._spawn_error})"
+                return {
+                    "success": False,
+                    "error": error,
+                    "error_type": "TimeoutError",
+                }
+            if worker.alive():
+                break
+            # Died while idle (OOM killer, say) - replace it and try again
+            self._retire(worker, kill=True)
+            self.restarts += 1
+            self._fill_slot()
+
+        try:
+            return worker.request(params, deadline, timeout, on_progress)
+        finally:
+            self._release(worker)
+
+    def stats(self) -> dict[str, Any]:
+        """Pool size, live worker pids, replacements so far and slots with no worker."""
+        with self._lock:
+            workers = list(self._workers)
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "pids": [w.pid for w in workers if w.alive()],
+            "restarts": self.restarts,
+            "missing": self._missing,
+        }
+
+    def shutdown(self) -> None:
+        """Stop every worker. Safe to call more than once."""
+        if self._owner_pid != os.getpid():
+            return  # Not our workers (inherited across a fork)
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for worker in workers:
+            self._retire(worker)
+
+
 class SubprocessStego:
     """
     Subprocess-isolated steganography operations.
 
     All operations run in a separate Python process. If jpeglib or scipy
     crashes, only the subprocess dies - Flask keeps running.
+
+    By default those processes come from a persistent WorkerPool; pass
+    pool_size=0 to spawn a fresh one per request instead.
     """
 
     def __init__(
@@ -141,6 +561,9 @@ class SubprocessStego:
         worker_path: Path | None = None,
         python_executable: str | None = None,
         timeout: int = DEFAULT_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_jobs: int = WORKER_MAX_JOBS,
+        max_rss_mb: int | None = WORKER_MAX_RSS_MB,
     ):
         """
         Initialize subprocess wrapper.
@@ -149,6 +572,9 @@ class SubprocessStego:
             worker_path: Path to stego_worker.py (default: same directory)
             python_executable: Python interpreter to use (default: same as current)
             timeout: Default timeout in seconds
+            pool_size: Persistent workers to keep (0 = new process per request)
+            max_jobs: Requests a pooled worker serves before it's replaced
+            max_rss_mb: Pooled worker memory ceiling, None for no limit
         """
         self.worker_path = worker_path or WORKER_SCRIPT
         self.python = python_executable or sys.executable
@@ -157,65 +583,69 @@ class SubprocessStego:
         if not self.worker_path.exists():
             raise FileNotFoundError(f"Worker script not found: {self.worker_path}")
 
-    def _run_worker(self, params: dict[str, Any], timeout: int | None = None) -> dict[str, Any]:
+        self.pool = (
+            WorkerPool(pool_size, self.python, self.worker_path, max_jobs, max_rss_mb)
+            if pool_size > 0
+            else None
+        )
+
+    def close(self) -> None:
+        """Stop pooled workers (also happens automatically at exit)."""
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _run_worker(
+        self,
+        params: dict[str, Any],
+        timeout: int | None = None,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict[str, Any]:
         """
-        Run the worker subprocess with given parameters.
+        Run a worker request, pooled or one-shot.
 
         Args:
-            params: Dictionary of parameters (will be JSON-encoded)
+            params: Dictionary of parameters (bytes values travel raw)
             timeout: Operation timeout in seconds
+            on_progress: Have the worker stream progress updates to this
 
         Returns:
             Dictionary with results from worker
         """
         timeout = timeout or self.timeout
-        input_json = json.dumps(params)
+        if on_progress is not None:
+            params["stream_progress"] = True
+        if self.pool is not None:
+            return self.pool.run(params, timeout, on_progress)
+        return self._run_once(params, timeout, on_progress)
 
-        try:
-            result = subprocess.run(
-                [self.python, str(self.worker_path)],
-                input=input_json,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=str(self.worker_path.parent),
-            )
-
-            if result.returncode != 0:
-                # Worker crashed
-                return {
-                    "success": False,
-                    "error": f"Worker crashed (exit code {result.returncode})",
-                    "stderr": result.stderr,
-                }
+    def _run_once(
+        self,
+        params: dict[str, Any],
+        timeout: int,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run the request in a fresh worker process that exits afterwards.
 
-            if not result.stdout.strip():
-                return {
-                    "success": False,
-                    "error": "Worker returned empty output",
-                    "stderr": result.stderr,
-                }
+        Same process and protocol as a pooled worker, just used once - so the
+        timeout and crash handling are identical too.
 
-            return json.loads(result.stdout)
+        Args:
+            params: Dictionary of parameters
+            timeout: Operation timeout in seconds
+            on_progress: Receives streamed progress updates
 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": f"Operation timed out after {timeout} seconds",
-                "error_type": "TimeoutError",
-            }
-        except json.JSONDecodeError as e:
-            return {
-                "success": False,
-                "error": f"Invalid JSON from worker: {e}",
-                "raw_output": result.stdout if "result" in dir() else None,
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "error_type": type(e).__name__,
-            }
+        Returns:
+            Dictionary with results from worker
+        """
+        try:
+            worker = _Worker(self.python, self.worker_path)
+        except OSError as e:
+            return {"success": False, "error": str(e), "error_type": type(e).__name__}
+        try:
+            return worker.request(params, time.monotonic() + timeout, timeout, on_progress)
+        finally:
+            worker.close()
 
     def encode(
         self,
@@ -237,6 +667,8 @@ class SubprocessStego:
         timeout: int | None = None,
         # Progress file (v4.1.2)
         progress_file: str | None = None,
+        output_path: str | Path | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
     ) -> EncodeResult:
         """
         Encode a message or file into an image.
@@ -257,14 +689,18 @@ class SubprocessStego:
             dct_color_mode: 'grayscale' or 'color' (for DCT mode)
             channel_key: 'auto' (server config), 'none' (public), or explicit key (v4.0.0)
             timeout: Operation timeout in seconds
+            output_path: Have the worker write the stego image here instead of
+                sending it back (e.g. a temp storage data path)
+            progress_callback: Receives progress dicts ({"percent", "phase",
+                ...}) streamed from the worker - replaces progress_file
 
         Returns:
-            EncodeResult with stego_data and extension on success
+            EncodeResult with stego_data (or output_path) and extension on success
         """
         params = {
             "operation": "encode",
-            "carrier_b64": base64.b64encode(carrier_data).decode("ascii"),
-            "reference_b64": base64.b64encode(reference_data).decode("ascii"),
+            "carrier": carrier_data,
+            "reference": reference_data,
             "message": message,
             "passphrase": passphrase,
             "pin": pin,
@@ -273,23 +709,26 @@ class SubprocessStego:
             "dct_color_mode": dct_color_mode,
             "channel_key": channel_key,  # v4.0.0
             "progress_file": progress_file,  # v4.1.2
+            "output_path": str(output_path) if output_path else None,
         }
 
         if file_data:
-            params["file_b64"] = base64.b64encode(file_data).decode("ascii")
+            params["file"] = file_data
             params["file_name"] = file_name
             params["file_mime"] = file_mime
 
         if rsa_key_data:
-            params["rsa_key_b64"] = base64.b64encode(rsa_key_data).decode("ascii")
+            params["rsa_key"] = rsa_key_data
             params["rsa_password"] = rsa_password
 
-        result = self._run_worker(params, timeout)
+        result = self._run_worker(params, timeout, progress_callback)
 
         if result.get("success"):
             return EncodeResult(
                 success=True,
-                stego_data=base64.b64decode(result["stego_b64"]),
+                stego_data=result.get("stego"),
+                output_path=result.get("output_path"),
+                stego_size=result.get("stego_size", 0),
                 filename=result.get("filename"),
                 stats=result.get("stats"),
                 channel_mode=result.get("channel_mode"),
@@ -316,6 +755,8 @@ class SubprocessStego:
         timeout: int | None = None,
         # Progress tracking (v4.1.5)
         progress_file: str | None = None,
+        output_path: str | Path | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
     ) -> DecodeResult:
         """
         Decode a message or file from a stego image.
@@ -331,33 +772,39 @@ class SubprocessStego:
             channel_key: 'auto' (server config), 'none' (public), or explicit key (v4.0.0)
             timeout: Operation timeout in seconds
             progress_file: Path to write progress updates (v4.1.5)
+            output_path: If the payload turns out to be a file, have the worker
+                write it here instead of sending it back
+            progress_callback: Receives progress dicts streamed from the worker
 
         Returns:
-            DecodeResult with message or file_data on success
+            DecodeResult with message or file_data (or output_path) on success
         """
         params = {
             "operation": "decode",
-            "stego_b64": base64.b64encode(stego_data).decode("ascii"),
-            "reference_b64": base64.b64encode(reference_data).decode("ascii"),
+            "stego": stego_data,
+            "reference": reference_data,
             "passphrase": passphrase,
             "pin": pin,
             "embed_mode": embed_mode,
             "channel_key": channel_key,  # v4.0.0
             "progress_file": progress_file,  # v4.1.5
+            "output_path": str(output_path) if output_path else None,
         }
 
         if rsa_key_data:
-            params["rsa_key_b64"] = base64.b64encode(rsa_key_data).decode("ascii")
+            params["rsa_key"] = rsa_key_data
             params["rsa_password"] = rsa_password
 
-        result = self._run_worker(params, timeout)
+        result = self._run_worker(params, timeout, progress_callback)
 
         if result.get("success"):
             if result.get("is_file"):
                 return DecodeResult(
                     success=True,
                     is_file=True,
-                    file_data=base64.b64decode(result["file_b64"]),
+                    file_data=result.get("file"),
+                    output_path=result.get("output_path"),
+                    file_size=result.get("file_size", 0),
                     filename=result.get("filename"),
                     mime_type=result.get("mime_type"),
                 )
@@ -391,7 +838,7 @@ class SubprocessStego:
         """
         params = {
             "operation": "compare",
-            "carrier_b64": base64.b64encode(carrier_data).decode("ascii"),
+            "carrier": carrier_data,
         }
 
         result = self._run_worker(params, timeout)
@@ -432,7 +879,7 @@ class SubprocessStego:
         """
         params = {
             "operation": "capacity",
-            "carrier_b64": base64.b64encode(carrier_data).decode("ascii"),
+            "carrier": carrier_data,
             "payload_size": payload_size,
             "embed_mode": embed_mode,
         }
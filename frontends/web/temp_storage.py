@@ -7,50 +7,177 @@ and survives service restarts within the expiry window.
 
 Files are stored in a temp directory with:
 - {file_id}.data - The actual file data
-- {file_id}.json - Metadata (filename, timestamp, mime_type, etc.)
+- index.db - SQLite index: id, path, size, expiry, owner, metadata
+
+CHANGES in v4.3.0:
+- The index replaces one {file_id}.json per file. cleanup_expired() used to
+  glob and JSON-parse every metadata file on every call, under a lock that
+  also blocked every save; now it asks the index for rows past their expiry
+  (indexed), so it costs O(expired), not O(stored).
+- No global lock: data is written to a temp name and renamed into place, and
+  SQLite (WAL mode) sorts out concurrent index updates between processes.
+- Downloads stream: get_temp_file_info() returns the data's path for
+  send_file() (sendfile, Range and ETag for free) instead of the bytes.
+- Per-owner quota: each user's live files are capped at quota_bytes.
+- reserve() claims an id in the index before a worker writes the file, so
+  a result nobody registered still expires instead of lingering forever.
+  Writers that may produce nothing (a decode that finds text) reserve
+  without an owner, so they only count against the quota if a file appears,
+  and delete_temp_file() the reservation when none does.
+- The first process to create the index sweeps out the old *.json sidecars
+  and their data - the index knows nothing about them, so nothing else would.
 
 IMPORTANT: This module ONLY manages files in the temp_files/ directory.
 It does NOT touch instance/ (auth database) or any other directories.
 """
 
 import json
+import os
+import secrets
+import sqlite3
+import threading
 import time
 from pathlib import Path
-from threading import Lock
 
 # Default temp directory (can be overridden)
 DEFAULT_TEMP_DIR = Path(__file__).parent / "temp_files"
 
-# Lock for thread-safe operations
-_lock = Lock()
+# Seconds a file lives after it's saved (app.py passes TEMP_FILE_EXPIRY)
+DEFAULT_TTL = 600.0
+
+# Bytes of live temp files each owner may hold (0 = unlimited)
+DEFAULT_QUOTA_BYTES = 256 * 1024 * 1024
+
+# The index lives next to the files it describes
+_INDEX_NAME = "index.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id       TEXT PRIMARY KEY,
+    path     TEXT NOT NULL,
+    size     INTEGER NOT NULL DEFAULT 0,
+    created  REAL NOT NULL,
+    expires  REAL NOT NULL,
+    owner    TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS files_expires ON files (expires);
+CREATE INDEX IF NOT EXISTS files_owner ON files (owner, expires);
+"""
 
-# Module-level temp directory (set on init)
+# Module-level settings (set on init)
 _temp_dir: Path = DEFAULT_TEMP_DIR
+_ttl: float = DEFAULT_TTL
+_quota_bytes: int = DEFAULT_QUOTA_BYTES
+
+# Index connections are per thread (and per process - forks open their own)
+_local = threading.local()
+
 
+class QuotaExceededError(Exception):
+    """Saving this file would put its owner over their temp storage quota."""
+
+
+def init(
+    temp_dir: Path | str | None = None,
+    ttl: float | None = None,
+    quota_bytes: int | None = None,
+):
+    """
+    Initialize temp storage. Settings left as None keep their current value.
 
-def init(temp_dir: Path | str | None = None):
-    """Initialize temp storage with optional custom directory."""
-    global _temp_dir
-    _temp_dir = Path(temp_dir) if temp_dir else DEFAULT_TEMP_DIR
+    Args:
+        temp_dir: Directory for files and the index
+        ttl: Seconds a file lives after it's saved
+        quota_bytes: Per-owner limit on live temp files (0 = unlimited)
+    """
+    global _temp_dir, _ttl, _quota_bytes
+    if temp_dir is not None:
+        _temp_dir = Path(temp_dir)
+    if ttl is not None:
+        _ttl = ttl
+    if quota_bytes is not None:
+        _quota_bytes = quota_bytes
     _temp_dir.mkdir(parents=True, exist_ok=True)
 
 
+def _db() -> sqlite3.Connection:
+    """This thread's index connection (opened, and the schema made, on first use)."""
+    index_path = _temp_dir / _INDEX_NAME
+    db = getattr(_local, "db", None)
+    if db is None or _local.pid != os.getpid() or _local.path != index_path:
+        _temp_dir.mkdir(parents=True, exist_ok=True)
+        new_index = not index_path.exists()
+        # isolation_level=None: we issue BEGIN ourselves where it matters
+        db = sqlite3.connect(index_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        if new_index:
+            _sweep_legacy_files()
+        _local.db = db
+        _local.pid = os.getpid()
+        _local.path = index_path
+    return db
+
+
+def _sweep_legacy_files() -> int:
+    """
+    Delete files saved the pre-index way ({file_id}.json next to its .data).
+
+    Runs once, when the index is created. Two processes racing to do it is
+    harmless - current files never have a .json sidecar.
+    """
+    deleted = 0
+    for sidecar in _temp_dir.glob("*.json"):
+        _data_path(sidecar.stem).unlink(missing_ok=True)
+        sidecar.unlink(missing_ok=True)
+        deleted += 1
+    return deleted
+
+
 def _data_path(file_id: str) -> Path:
     """Get path for file data."""
     return _temp_dir / f"{file_id}.data"
 
 
-def _meta_path(file_id: str) -> Path:
-    """Get path for file metadata."""
-    return _temp_dir / f"{file_id}.json"
-
-
 def _thumb_path(thumb_id: str) -> Path:
     """Get path for thumbnail data."""
     return _temp_dir / f"{thumb_id}.thumb"
 
 
-def save_temp_file(file_id: str, data: bytes, metadata: dict) -> None:
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write to a private temp name, then rename - readers see all or nothing."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _usage(db: sqlite3.Connection, owner: str, now: float, exclude: str = "") -> int:
+    """Bytes of live files an owner holds (optionally not counting one id)."""
+    row = db.execute(
+        "SELECT COALESCE(SUM(size), 0) FROM files WHERE owner = ? AND expires > ? AND id != ?",
+        (owner, now, exclude),
+    ).fetchone()
+    return row[0]
+
+
+def _quota_message(used: int, size: int) -> str:
+    mb = 1024 * 1024
+    return (
+        f"Temp storage quota exceeded ({used / mb:.1f} MB in use, {size / mb:.1f} MB more"
+        f" requested, limit {_quota_bytes / mb:.0f} MB). Download or clear earlier"
+        " results, or wait for them to expire."
+    )
+
+
+def save_temp_file(file_id: str, data: bytes, metadata: dict, owner: str | None = None) -> None:
     """
     Save a temp file with its metadata.
 
@@ -58,71 +185,189 @@ def save_temp_file(file_id: str, data: bytes, metadata: dict) -> None:
         file_id: Unique identifier for the file
         data: File contents as bytes
         metadata: Dict with filename, mime_type, timestamp, etc.
+        owner: Whose quota the file counts against (None = nobody's)
+
+    Raises:
+        QuotaExceededError: The owner has no room for it (nothing is kept)
+    """
+    _atomic_write(_data_path(file_id), data)
+    save_temp_metadata(file_id, metadata, owner)
+
+
+def data_path(file_id: str) -> Path:
+    """
+    Where a temp file's data lives, for writers that produce it themselves.
+
+    Nothing is recorded, so a file written here that is never registered
+    with save_temp_metadata() is never cleaned up either - hand writers a
+    reserve()d path instead.
+    """
+    return _data_path(file_id)
+
+
+def reserve(file_id: str, owner: str | None = None) -> Path:
+    """
+    Claim a temp file's id before a writer produces it.
+
+    The stego worker writes results straight to the returned path; the
+    file becomes visible to get_temp_file() once save_temp_metadata() has
+    been called for it. Until then the id is reserved in the index, so
+    cleanup_expired() removes the data even if that call never comes.
+
+    A writer that may produce nothing (a decode only writes file payloads)
+    reserves without an owner - save_temp_metadata() applies the quota
+    with the real size - and deletes the reservation if no file appears.
+
+    Raises:
+        QuotaExceededError: The owner is already at their quota - checked
+            here so a doomed encode doesn't run first
+    """
+    now = time.time()
+    db = _db()
+    if owner is not None and _quota_bytes:
+        used = _usage(db, owner, now)
+        if used >= _quota_bytes:
+            raise QuotaExceededError(_quota_message(used, 0))
+
+    path = _data_path(file_id)
+    db.execute(
+        "INSERT OR IGNORE INTO files (id, path, created, expires, owner) VALUES (?, ?, ?, ?, ?)",
+        (file_id, str(path), now, now + _ttl, owner),
+    )
+    return path
+
+
+def save_temp_metadata(file_id: str, metadata: dict, owner: str | None = None) -> None:
+    """
+    Save metadata for a temp file whose data is already at data_path().
+
+    Checks the owner's quota with the file's actual size, so a reserve()d
+    slot and a plain data_path() write are treated alike.
+
+    Args:
+        file_id: Unique identifier for the file
+        metadata: Dict with filename, mime_type, timestamp, etc.
+        owner: Whose quota the file counts against (None = nobody's)
+
+    Raises:
+        QuotaExceededError: The owner has no room for it (the data is deleted)
     """
-    init()  # Ensure directory exists
+    # Add timestamp if not present
+    if "timestamp" not in metadata:
+        metadata["timestamp"] = time.time()
 
-    with _lock:
-        # Add timestamp if not present
-        if "timestamp" not in metadata:
-            metadata["timestamp"] = time.time()
+    path = _data_path(file_id)
+    try:
+        size = path.stat().st_size
+    except OSError:
+        size = 0
 
-        # Write data file
-        _data_path(file_id).write_bytes(data)
+    now = time.time()
+    db = _db()
+    # IMMEDIATE: the quota check and the insert must not interleave with
+    # another save by the same owner
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        used = 0
+        if owner is not None and _quota_bytes:
+            used = _usage(db, owner, now, exclude=file_id)
+        over_quota = bool(owner is not None and _quota_bytes and used + size > _quota_bytes)
+
+        if over_quota:
+            db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        else:
+            db.execute(
+                "INSERT OR REPLACE INTO files (id, path, size, created, expires, owner, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_id,
+                    str(path),
+                    size,
+                    metadata["timestamp"],
+                    metadata["timestamp"] + _ttl,
+                    owner,
+                    json.dumps(metadata),
+                ),
+            )
+        db.execute("COMMIT")
+    except BaseException:
+        # Anything (not just sqlite3.Error) must end the transaction, or
+        # this thread's connection is left holding the write lock
+        db.execute("ROLLBACK")
+        raise
+
+    if over_quota:
+        path.unlink(missing_ok=True)
+        raise QuotaExceededError(_quota_message(used, size))
+
+
+def get_temp_file_info(file_id: str) -> dict | None:
+    """
+    Get a temp file's metadata and where its data is, without reading it.
+
+    For downloads: hand 'path' to send_file() and let the server stream it.
+
+    Returns:
+        Dict with 'path', 'size' and all metadata fields, or None if not
+        found (or expired).
+    """
+    row = (
+        _db()
+        .execute(
+            "SELECT path, size, metadata FROM files"
+            " WHERE id = ? AND metadata IS NOT NULL AND expires > ?",
+            (file_id, time.time()),
+        )
+        .fetchone()
+    )
+    if row is None or not os.path.exists(row["path"]):
+        return None
 
-        # Write metadata
-        _meta_path(file_id).write_text(json.dumps(metadata))
+    try:
+        metadata = json.loads(row["metadata"])
+    except json.JSONDecodeError:
+        return None
+    return {"path": row["path"], "size": row["size"], **metadata}
 
 
 def get_temp_file(file_id: str) -> dict | None:
     """
     Get a temp file and its metadata.
 
+    Reads the whole file into memory - use get_temp_file_info() for downloads.
+
     Returns:
         Dict with 'data' (bytes) and all metadata fields, or None if not found.
     """
-    init()
-
-    data_file = _data_path(file_id)
-    meta_file = _meta_path(file_id)
-
-    if not data_file.exists() or not meta_file.exists():
+    info = get_temp_file_info(file_id)
+    if info is None:
         return None
 
     try:
-        data = data_file.read_bytes()
-        metadata = json.loads(meta_file.read_text())
-        return {"data": data, **metadata}
-    except (OSError, json.JSONDecodeError):
+        data = Path(info["path"]).read_bytes()
+    except OSError:
         return None
+    return {"data": data, **info}
 
 
 def has_temp_file(file_id: str) -> bool:
     """Check if a temp file exists."""
-    init()
-    return _data_path(file_id).exists() and _meta_path(file_id).exists()
+    return get_temp_file_info(file_id) is not None
 
 
 def delete_temp_file(file_id: str) -> None:
     """Delete a temp file and its metadata."""
-    init()
-
-    with _lock:
-        _data_path(file_id).unlink(missing_ok=True)
-        _meta_path(file_id).unlink(missing_ok=True)
+    _db().execute("DELETE FROM files WHERE id = ?", (file_id,))
+    _data_path(file_id).unlink(missing_ok=True)
 
 
 def save_thumbnail(thumb_id: str, data: bytes) -> None:
     """Save a thumbnail."""
-    init()
-
-    with _lock:
-        _thumb_path(thumb_id).write_bytes(data)
+    _atomic_write(_thumb_path(thumb_id), data)
 
 
 def get_thumbnail(thumb_id: str) -> bytes | None:
     """Get thumbnail data."""
-    init()
-
     thumb_file = _thumb_path(thumb_id)
     if not thumb_file.exists():
         return None
@@ -135,47 +380,34 @@ def get_thumbnail(thumb_id: str) -> bytes | None:
 
 def delete_thumbnail(thumb_id: str) -> None:
     """Delete a thumbnail."""
-    init()
+    _thumb_path(thumb_id).unlink(missing_ok=True)
 
-    with _lock:
-        _thumb_path(thumb_id).unlink(missing_ok=True)
 
-
-def cleanup_expired(max_age_seconds: float) -> int:
+def cleanup_expired() -> int:
     """
-    Delete expired temp files.
+    Delete expired temp files (and their thumbnails).
 
-    Args:
-        max_age_seconds: Maximum age in seconds before expiry
+    Only rows past their expiry are touched, found through the expiry
+    index - cheap enough to call on every save.
 
     Returns:
         Number of files deleted
     """
-    init()
-
+    db = _db()
     now = time.time()
-    deleted = 0
+    expired = db.execute("SELECT id, path FROM files WHERE expires <= ?", (now,)).fetchall()
+    if not expired:
+        return 0
 
-    with _lock:
-        # Find all metadata files
-        for meta_file in _temp_dir.glob("*.json"):
-            try:
-                metadata = json.loads(meta_file.read_text())
-                timestamp = metadata.get("timestamp", 0)
-
-                if now - timestamp > max_age_seconds:
-                    file_id = meta_file.stem
-                    _data_path(file_id).unlink(missing_ok=True)
-                    meta_file.unlink(missing_ok=True)
-                    # Also delete thumbnail if exists
-                    _thumb_path(f"{file_id}_thumb").unlink(missing_ok=True)
-                    deleted += 1
-            except (OSError, json.JSONDecodeError):
-                # Remove corrupted files
-                meta_file.unlink(missing_ok=True)
-                deleted += 1
+    for row in expired:
+        Path(row["path"]).unlink(missing_ok=True)
+        _thumb_path(f"{row['id']}_thumb").unlink(missing_ok=True)
 
-    return deleted
+    db.executemany(
+        "DELETE FROM files WHERE id = ? AND expires <= ?",
+        [(row["id"], now) for row in expired],
+    )
+    return len(expired)
 
 
 def cleanup_all() -> int:
@@ -187,26 +419,31 @@ def cleanup_all() -> int:
     """
     init()
 
-    deleted = 0
+    _db().execute("DELETE FROM files")
 
-    with _lock:
-        for f in _temp_dir.iterdir():
-            if f.is_file():
-                f.unlink(missing_ok=True)
-                deleted += 1
+    deleted = 0
+    for f in _temp_dir.iterdir():
+        if f.is_file() and not f.name.startswith(_INDEX_NAME):
+            f.unlink(missing_ok=True)
+            deleted += 1
 
     return deleted
 
 
 def get_stats() -> dict:
     """Get temp storage statistics."""
-    init()
-
-    files = list(_temp_dir.glob("*.data"))
-    total_size = sum(f.stat().st_size for f in files if f.exists())
+    row = (
+        _db()
+        .execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files"
+            " WHERE metadata IS NOT NULL AND expires > ?",
+            (time.time(),),
+        )
+        .fetchone()
+    )
 
     return {
-        "file_count": len(files),
-        "total_size_bytes": total_size,
+        "file_count": row[0],
+        "total_size_bytes": row[1],
         "temp_dir": str(_temp_dir),
     }
@@ -0,0 +1,132 @@
+"""
+Stegasoo Worker Protocol (v4.3.0)
+
+Binary framing for the pipe between Flask (subprocess_stego.py) and the
+stego workers (stego_worker.py --serve).
+
+The first version of that pipe was JSON with every image base64-encoded
+inside it. A 30 MB carrier became 40 MB of text, then got copied into a
+JSON string, out of it, and decoded back to bytes on the far side - several
+full copies per direction, on a Pi. Frames keep the metadata as JSON but
+send the bulky stuff as raw bytes next to it:
+
+    ┌──────┬──────┬────────────────────┬───────────┬───────────┬───
+    │ SGW1 │ hlen │ header (JSON)      │ segment 1 │ segment 2 │ ...
+    └──────┴──────┴────────────────────┴───────────┴───────────┴───
+      4 B    4 B    hlen bytes           raw bytes, in header order
+
+The header is the message dict minus its bytes-valued entries, plus
+"segments": [[name, length], ...] saying what follows. On the way back in,
+each segment is read straight into a buffer of exactly its size and put
+back under its name - so a message dict round-trips as-is, bytes included.
+"""
+
+import json
+import struct
+from collections.abc import Callable
+
+MAGIC = b"SGW1"
+
+# Magic + big-endian header length
+_PREFIX = struct.Struct(">4sI")
+
+# Headers are metadata only; anything this big is a desynced pipe
+MAX_HEADER_SIZE = 1024 * 1024
+
+# Bytes-like values travel as segments, everything else as JSON
+_BINARY = (bytes, bytearray, memoryview)
+
+
+class ProtocolError(Exception):
+    """The other end sent something that isn't a frame."""
+
+
+def pack_frame(message: dict) -> list:
+    """
+    Turn a message dict into the pieces of one frame.
+
+    The pieces are returned separately rather than joined, so a 30 MB
+    segment goes to the pipe as a view of the caller's buffer instead of
+    being copied into one big bytes object first.
+
+    Args:
+        message: Dict of JSON-able values and bytes-like values
+
+    Returns:
+        List of buffers to write in order (prefix+header, then segments)
+    """
+    header = {}
+    segments = []
+    for name, value in message.items():
+        if isinstance(value, _BINARY):
+            view = memoryview(value).cast("B")
+            segments.append((name, view))
+        else:
+            header[name] = value
+    header["segments"] = [[name, view.nbytes] for name, view in segments]
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    return [_PREFIX.pack(MAGIC, len(header_bytes)) + header_bytes] + [v for _, v in segments]
+
+
+def read_frame(read_into: Callable[[memoryview], None]) -> dict:
+    """
+    Read one frame and rebuild the message dict.
+
+    Args:
+        read_into: Fills the given buffer completely, or raises EOFError
+            (the transport - blocking file, non-blocking pipe with a
+            deadline - is the caller's business)
+
+    Returns:
+        Message dict; segments come back as bytearrays
+
+    Raises:
+        EOFError: Stream ended before a frame started (or mid-frame)
+        ProtocolError: Bad magic, oversized or malformed header
+    """
+    prefix = bytearray(_PREFIX.size)
+    read_into(memoryview(prefix))
+    magic, header_size = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ProtocolError(f"Bad frame magic: {bytes(magic)!r}")
+    if header_size > MAX_HEADER_SIZE:
+        raise ProtocolError(f"Frame header too large: {header_size} bytes")
+
+    header_bytes = bytearray(header_size)
+    read_into(memoryview(header_bytes))
+    try:
+        message = json.loads(header_bytes)
+        segments = [(str(name), int(size)) for name, size in message.pop("segments")]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ProtocolError(f"Malformed frame header: {e}") from None
+    if any(size < 0 for _, size in segments):
+        raise ProtocolError("Malformed frame header: negative segment length")
+
+    for name, size in segments:
+        buffer = bytearray(size)
+        if size:
+            read_into(memoryview(buffer))
+        message[name] = buffer
+    return message
+
+
+def file_reader(stream) -> Callable[[memoryview], None]:
+    """read_into() for a blocking binary file object (the worker's stdin)."""
+
+    def read_into(view: memoryview) -> None:
+        filled = 0
+        while filled < len(view):
+            count = stream.readinto(view[filled:])
+            if not count:
+                raise EOFError
+            filled += count
+
+    return read_into
+
+
+def write_frame(stream, message: dict) -> None:
+    """Write one frame to a blocking binary file object and flush it."""
+    for piece in pack_frame(message):
+        stream.write(piece)
+    stream.flush()
@@ -10,6 +10,12 @@ Changes in v4.0.0:
 __version__ = "4.2.1"
 
 # Core functionality
+# Carrier analysis cache (v4.3.0)
+from .analysis_cache import AnalysisCache, configure_analysis_cache, get_analysis_cache_stats
+
+# Carrier library (v4.3.0)
+from .carriers import CarrierLibrary, CarrierRecord
+
 # Channel key management (v4.0.0)
 from .channel import (
     clear_channel_key,
@@ -22,10 +28,34 @@ from .channel import (
     validate_channel_key,
 )
 
+# Payload compression (v4.3.0: applied by encode())
+from .compression import (
+    CompressionAlgorithm,
+    CompressionEstimate,
+    estimate_compression,
+    get_available_algorithms,
+)
+
 # Crypto functions
-from .crypto import get_active_channel_key, get_channel_fingerprint, has_argon2
-from .decode import decode, decode_file, decode_text
-from .encode import encode
+from .crypto import (
+    decrypt_stream,
+    encrypt_stream,
+    get_active_channel_key,
+    get_channel_fingerprint,
+    has_argon2,
+)
+from .decode import (
+    TrialAttempt,
+    decode,
+    decode_file,
+    decode_many,
+    decode_text,
+    trial_decode,
+)
+
+# Channel compression dictionaries (v4.3.0)
+from .dictionaries import list_dictionaries, save_dictionary, train_dictionary
+from .encode import encode, encode_many, encode_prepared, prepare_encode
 
 # Credential generation
 from .generate import (
@@ -37,12 +67,33 @@ from .generate import (
     load_rsa_key,
 )
 
+# Resource governor (v4.3.0)
+from .governor import (
+    GovernorStats,
+    ResourceGovernor,
+    configure_governor,
+    get_governor,
+)
+
 # Image utilities
+from .image_context import ImageProbe, clear_probe_cache, get_probe_cache_stats, probe_image
 from .image_utils import (
     compare_capacity,
     get_image_info,
 )
 
+# KDF profiles (v4.3.0)
+from .kdf import (
+    KDFParams,
+    calibrate_kdf,
+    get_active_kdf_params,
+    get_kdf_profile,
+    set_kdf_profile,
+)
+
+# Progress reporting (v4.3.0)
+from .progress import ProgressReporter
+
 # Steganography functions
 from .steganography import (
     calculate_capacity_by_mode,
@@ -92,12 +143,14 @@ from .constants import (
     EMBED_MODE_DCT,
     EMBED_MODE_LSB,
     FORMAT_VERSION,
+    KDF_PROFILES,
     LOSSLESS_FORMATS,
     MAX_FILE_PAYLOAD_SIZE,
     MAX_IMAGE_PIXELS,
     MAX_MESSAGE_SIZE,
     MAX_PASSPHRASE_WORDS,
     MAX_PIN_LENGTH,
+    MAX_STREAM_PAYLOAD_SIZE,
     MIN_IMAGE_PIXELS,
     MIN_PASSPHRASE_WORDS,
     MIN_PIN_LENGTH,
@@ -124,7 +177,9 @@ from .exceptions import (
     NoDataFoundError,
     PinValidationError,
     ReedSolomonError,
+    ResourceLimitError,
     SecurityFactorError,
+    ShardError,
     SteganographyError,
     StegasooError,
     ValidationError,
@@ -139,6 +194,7 @@ from .models import (
     FilePayload,
     GenerateResult,
     ImageInfo,
+    PreparedPayload,
     ValidationResult,
 )
 from .validation import (
@@ -164,6 +220,12 @@ __all__ = [
     "decode",
     "decode_file",
     "decode_text",
+    "trial_decode",
+    "TrialAttempt",
+    "prepare_encode",
+    "encode_prepared",
+    "encode_many",
+    "decode_many",
     # Generation
     "generate_pin",
     "generate_passphrase",
@@ -182,13 +244,47 @@ __all__ = [
     "format_channel_key",
     "get_active_channel_key",
     "get_channel_fingerprint",
+    # Carrier library
+    "CarrierLibrary",
+    "CarrierRecord",
+    # Carrier analysis cache
+    "AnalysisCache",
+    "configure_analysis_cache",
+    "get_analysis_cache_stats",
     # Image utilities
     "get_image_info",
     "compare_capacity",
+    "ImageProbe",
+    "probe_image",
+    "get_probe_cache_stats",
+    "clear_probe_cache",
     # Utilities
     "generate_filename",
     # Crypto
     "has_argon2",
+    "encrypt_stream",
+    "decrypt_stream",
+    # Compression
+    "CompressionAlgorithm",
+    "CompressionEstimate",
+    "estimate_compression",
+    "get_available_algorithms",
+    "train_dictionary",
+    "save_dictionary",
+    "list_dictionaries",
+    # KDF profiles
+    "KDFParams",
+    "calibrate_kdf",
+    "get_active_kdf_params",
+    "get_kdf_profile",
+    "set_kdf_profile",
+    # Resource governor
+    "ResourceGovernor",
+    "GovernorStats",
+    "configure_governor",
+    "get_governor",
+    # Progress reporting
+    "ProgressReporter",
     # Steganography
     "has_dct_support",
     "calculate_capacity_by_mode",
@@ -219,6 +315,7 @@ __all__ = [
     "EncodeResult",
     "DecodeResult",
     "FilePayload",
+    "PreparedPayload",
     "Credentials",
     "ValidationResult",
     # Exceptions
@@ -242,10 +339,13 @@ __all__ = [
     "InvalidHeaderError",
     "InvalidMagicBytesError",
     "ReedSolomonError",
+    "ResourceLimitError",
     "NoDataFoundError",
     "ModeMismatchError",
+    "ShardError",
     # Constants
     "FORMAT_VERSION",
+    "KDF_PROFILES",
     "MIN_PASSPHRASE_WORDS",
     "RECOMMENDED_PASSPHRASE_WORDS",
     "DEFAULT_PASSPHRASE_WORDS",
@@ -257,6 +357,7 @@ __all__ = [
     "MAX_MESSAGE_SIZE",
     "MAX_PAYLOAD_SIZE",
     "MAX_FILE_PAYLOAD_SIZE",
+    "MAX_STREAM_PAYLOAD_SIZE",
     "MIN_IMAGE_PIXELS",
     "MAX_IMAGE_PIXELS",
     "SUPPORTED_IMAGE_FORMATS",
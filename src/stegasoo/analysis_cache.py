@@ -0,0 +1,274 @@
+"""
+Stegasoo Carrier Analysis Cache (v4.3.0)
+
+A house carrier gets used over and over - the same few photos, a new message
+each time. Every DCT embed still starts from scratch: decode the PNG/JPEG,
+convert to float, split into Y/Cb/Cr, run an 8x8 DCT over the blocks. For a
+12 MP photo that's most of a second before the first bit moves, and none of
+it depends on the message.
+
+This cache keeps that work on disk, keyed by the SHA-256 of the carrier file:
+
+    <cache dir>/<content hash>/
+        rgb.npy         H x W x 3 uint8 pixels (as decoded, EXIF not applied)
+        y.npy           luminance plane, float32
+        cb.npy, cr.npy  chroma planes, float32
+        gray.npy        PIL 'L' conversion, float32 (grayscale mode)
+        dct-y-o1.npy    blocked DCT of the padded, oriented plane:
+                        (blocks_y, blocks_x, 8, 8) float32, one per orientation
+
+Arrays are written with np.save and read back with mmap_mode="r", so a warm
+embed maps the files and only touches the pages for the blocks it uses. Each
+array is computed the first time somebody asks for it - a grayscale embed
+never writes chroma planes.
+
+Only embedding uses it. A stego image is a one-off - caching it on every
+extract would fill the cache with entries nobody reads again, evicting the
+carriers that do get reused.
+
+It's opt-in. Nothing is cached unless STEGASOO_ANALYSIS_CACHE_DIR is set or
+configure_analysis_cache() is called. The cache holds decoded carrier pixels
+in the clear, so point it somewhere as private as the carriers themselves.
+
+Size is bounded by ANALYSIS_CACHE_MAX_BYTES (or the max_bytes you pass).
+Reading an entry bumps its directory mtime; when a write pushes the total
+over the limit, whole entries go oldest-first. Files are written to a temp
+name and renamed, so concurrent processes sharing a directory only ever see
+complete arrays - and on POSIX an evicted file stays readable for anyone
+who already has it mapped.
+"""
+
+import os
+import shutil
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .constants import ANALYSIS_CACHE_MAX_BYTES
+from .debug import debug
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Environment variable that turns the cache on
+ANALYSIS_CACHE_ENV_VAR = "STEGASOO_ANALYSIS_CACHE_DIR"
+
+ARRAY_SUFFIX = ".npy"
+
+
+class AnalysisCache:
+    """
+    Size-bounded on-disk cache of carrier arrays.
+
+    Safe to share between threads, and between processes pointing at the
+    same directory.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = ANALYSIS_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_dir(self, key: bytes) -> Path:
+        return self.directory / key.hex()
+
+    def load(self, key: bytes, name: str) -> "np.ndarray | None":
+        """
+        Memory-map a cached array, or None if it isn't there.
+
+        Args:
+            key: Carrier content hash (ImageContext.content_hash)
+            name: Array name within the entry ('y', 'dct-y-o1', ...)
+
+        Returns:
+            Read-only memory-mapped array, or None
+        """
+        import numpy as np
+
+        entry = self._entry_dir(key)
+        path = entry / f"{name}{ARRAY_SUFFIX}"
+        try:
+            array: np.ndarray = np.load(path, mmap_mode="r", allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            # Truncated or foreign file - drop it and let the caller recompute
+            debug.print(f"Discarding unreadable cache file {path}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(entry)  # LRU bookkeeping
+        except OSError:
+            pass
+        return array
+
+    def store(self, key: bytes, name: str, array: "np.ndarray") -> "np.ndarray":
+        """
+        Write an array into the cache and return the memory-mapped copy.
+
+        Falls back to returning the array itself if the write fails (full
+        disk, read-only directory) - the cache never breaks an embed.
+        """
+        import numpy as np
+
+        entry = self._entry_dir(key)
+        path = entry / f"{name}{ARRAY_SUFFIX}"
+        tmp = entry / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            debug.print(f"Analysis cache write failed ({path}): {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return array
+
+        self._evict(keep=entry)
+        mapped = self.load(key, name)
+        return array if mapped is None else mapped
+
+    def get_or_compute(
+        self, key: bytes, name: str, compute: Callable[[], "np.ndarray"]
+    ) -> "np.ndarray":
+        """
+        The cached array if there is one, else compute(), stored and mapped.
+        """
+        array = self.load(key, name)
+        with self._lock:
+            if array is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if array is not None:
+            return array
+        return self.store(key, name, compute())
+
+    # -------------------------------------------------------------------------
+    # Size management
+    # -------------------------------------------------------------------------
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """(mtime, size, path) for every entry directory."""
+        entries: list[tuple[float, int, Path]] = []
+        try:
+            children = list(self.directory.iterdir())
+        except OSError:
+            return entries
+        for child in children:
+            try:
+                if not child.is_dir():
+                    continue
+                size = sum(f.stat().st_size for f in child.iterdir())
+                entries.append((child.stat().st_mtime, size, child))
+            except OSError:
+                continue  # Evicted under us by another process
+        return entries
+
+    def size_bytes(self) -> int:
+        """Total bytes on disk."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep: Path | None = None) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        # Oldest first, and never the entry we're in the middle of writing
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+            debug.print(f"Evicted analysis cache entry {path.name[:12]}")
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current disk usage."""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": str(self.directory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# =============================================================================
+# PROCESS-WIDE CACHE
+# =============================================================================
+
+_configured: AnalysisCache | None = None
+_explicit = False  # configure_analysis_cache() was called - even with None
+_env_cache: AnalysisCache | None = None
+_config_lock = threading.Lock()
+
+
+def configure_analysis_cache(
+    directory: str | Path | None,
+    max_bytes: int = ANALYSIS_CACHE_MAX_BYTES,
+) -> AnalysisCache | None:
+    """
+    Turn the carrier analysis cache on (or off, with directory=None).
+
+    Overrides STEGASOO_ANALYSIS_CACHE_DIR for this process.
+
+    Args:
+        directory: Where to keep cached arrays, or None to disable
+        max_bytes: Disk budget; least recently used carriers go first
+
+    Returns:
+        The active cache, or None
+    """
+    global _configured, _explicit
+    with _config_lock:
+        _explicit = True
+        _configured = AnalysisCache(directory, max_bytes) if directory is not None else None
+        return _configured
+
+
+def get_analysis_cache() -> AnalysisCache | None:
+    """The active cache: configured explicitly, else from the environment."""
+    global _env_cache
+    if _explicit:
+        return _configured
+
+    directory = os.environ.get(ANALYSIS_CACHE_ENV_VAR, "").strip()
+    if not directory:
+        return None
+    with _config_lock:
+        if _env_cache is None or _env_cache.directory != Path(directory):
+            _env_cache = AnalysisCache(directory)
+        return _env_cache
+
+
+def get_analysis_cache_stats() -> dict | None:
+    """Stats for the active cache, or None when caching is off."""
+    cache = get_analysis_cache()
+    return cache.stats() if cache is not None else None
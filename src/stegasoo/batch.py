@@ -1,24 +1,77 @@
 """
-Stegasoo Batch Processing Module (v3.2.0)
+Stegasoo Batch Processing Module (v4.3.0)
 
 Enables encoding/decoding multiple files in a single operation.
 Supports parallel processing, progress tracking, and detailed reporting.
 
+Changes in v4.3.0:
+- backend="process" runs items in a ProcessPoolExecutor. The LSB loops and
+  the jpegio coefficient loops are pure Python and hold the GIL, so threads
+  barely beat a single worker there. Credentials go to each worker once (pool
+  initializer), not with every item, and results stream back as they finish.
+- backend="auto" (default) picks processes for LSB and DCT/JPEG work and
+  threads for DCT/PNG, where scipy drops the GIL anyway
+- batch_encode takes embed_mode and dct_output_format
+- shared_payload=True encrypts once and only embeds per carrier (one Argon2
+  run for the whole batch instead of one per image). Opt-in: every output
+  then carries the same salt and ciphertext.
+- Streaming pipeline: discovery -> read-ahead -> compute -> write. Images are
+  found lazily, only max_in_flight items exist at once, and every finished
+  item is appended to an optional JSONL manifest straight away. resume=True
+  skips items the manifest already records as successful, so a crash 80k
+  images into a 100k batch costs the in-flight handful, not the lot.
+- Cost-aware scheduling: each carrier's header is probed as it's read and
+  turned into a predicted time and memory cost (pixels x mode x KDF). The
+  scheduler starts the most expensive item in its look-ahead window first,
+  so one 50 MP straggler doesn't start last and finish alone, and only while
+  the in-flight memory estimates fit under memory_budget. Predicted vs actual
+  seconds land in the manifest and the summary, for tuning the model.
+- batch_capacity_check reads headers only, checks images on a thread pool
+  and remembers results per (path, mtime, size). It reports DCT capacity
+  too, and exact=True adds the native JPEG capacity from the coefficients.
+  iter_capacity_check yields results as they're ready.
+
 Changes in v3.2.0:
 - BatchCredentials: renamed day_phrase → passphrase, removed date_str
 - Updated all credential handling to use v3.2.0 API
 """
 
+import bisect
+import itertools
 import json
+import os
+import queue
 import threading
 import time
-from collections.abc import Callable, Iterator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 
-from .constants import ALLOWED_IMAGE_EXTENSIONS, LOSSLESS_FORMATS
+from .constants import (
+    ALLOWED_IMAGE_EXTENSIONS,
+    BATCH_BACKEND_AUTO,
+    BATCH_BACKEND_PROCESS,
+    BATCH_BACKEND_THREAD,
+    BATCH_BACKENDS,
+    BATCH_DEFAULT_WORKERS,
+    BATCH_IN_FLIGHT_PER_WORKER,
+    BATCH_SCHEDULE_WINDOW_PER_WORKER,
+    CAPACITY_CHECK_CACHE_SIZE,
+    EMBED_MODE_DCT,
+    EMBED_MODE_LSB,
+    LOSSLESS_FORMATS,
+    MAX_IMAGE_PIXELS,
+)
 
 
 class BatchStatus(Enum):
@@ -44,6 +97,11 @@ class BatchItem:
     input_size: int = 0
     output_size: int = 0
     message: str = ""
+    # Scheduler's estimates from the header probe (None if it couldn't probe)
+    predicted_seconds: float | None = None
+    predicted_bytes: int = 0
+    # Carrier bytes from the read-ahead stage (dropped once processed)
+    input_data: bytes | None = field(default=None, repr=False)
 
     @property
     def duration(self) -> float | None:
@@ -60,6 +118,8 @@ class BatchItem:
             "status": self.status.value,
             "error": self.error,
             "duration_seconds": self.duration,
+            "predicted_seconds": self.predicted_seconds,
+            "predicted_bytes": self.predicted_bytes,
             "input_size": self.input_size,
             "output_size": self.output_size,
             "message": self.message,
@@ -124,7 +184,12 @@ class BatchCredentials:
 
 @dataclass
 class BatchResult:
-    """Summary of a batch operation."""
+    """
+    Summary of a batch operation.
+
+    items are in completion order, and empty when the batch was run with
+    keep_items=False (use the manifest instead).
+    """
 
     operation: str
     total: int = 0
@@ -134,6 +199,9 @@ class BatchResult:
     start_time: float = field(default_factory=time.time)
     end_time: float | None = None
     items: list[BatchItem] = field(default_factory=list)
+    # Summed over successful items that had a prediction
+    predicted_seconds: float = 0.0
+    actual_seconds: float = 0.0
 
     @property
     def duration(self) -> float | None:
@@ -142,6 +210,13 @@ class BatchResult:
             return self.end_time - self.start_time
         return None
 
+    @property
+    def prediction_ratio(self) -> float | None:
+        """Actual / predicted item seconds. >1 means the cost model is optimistic."""
+        if self.predicted_seconds:
+            return self.actual_seconds / self.predicted_seconds
+        return None
+
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
         return {
@@ -152,6 +227,9 @@ class BatchResult:
                 "failed": self.failed,
                 "skipped": self.skipped,
                 "duration_seconds": self.duration,
+                "predicted_seconds": self.predicted_seconds,
+                "actual_seconds": self.actual_seconds,
+                "prediction_ratio": self.prediction_ratio,
             },
             "items": [item.to_dict() for item in self.items],
         }
@@ -165,12 +243,106 @@ class BatchResult:
 ProgressCallback = Callable[[int, int, BatchItem], None]
 
 
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+
+def _manifest_key(path: str | Path, manifest: str | Path) -> str:
+    """
+    How a manifest entry names its input: relative to the manifest's directory.
+
+    input_path is kept as the caller wrote it, which for a relative input
+    only means something from the directory the run was started in. The key
+    doesn't depend on that, so a resume started somewhere else - or after
+    moving the manifest along with its images - still finds the same files.
+    """
+    resolved = Path(path).resolve()
+    try:
+        return Path(os.path.relpath(resolved, Path(manifest).resolve().parent)).as_posix()
+    except ValueError:  # Different drive (Windows) - no relative path exists
+        return str(resolved)
+
+
+def _read_manifest_successes(manifest: str | Path) -> set[str]:
+    """Resolved paths of the inputs an earlier run of this manifest finished."""
+    base = Path(manifest).resolve().parent
+    done = set()
+    try:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from a crash
+                if record.get("status") != BatchStatus.SUCCESS.value:
+                    continue
+                if "key" in record:
+                    done.add(str((base / record["key"]).resolve()))
+                else:  # Written before keys - all we have is the caller's path
+                    done.add(str(Path(record["input_path"]).resolve()))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _ends_mid_line(manifest: str | Path) -> bool:
+    try:
+        with open(manifest, "rb") as f:
+            f.seek(0, 2)
+            if not f.tell():
+                return False
+            f.seek(-1, 2)
+            return f.read(1) != b"\n"
+    except OSError:
+        return False
+
+
+def _item_bytes(item: BatchItem) -> bytes:
+    """The item's carrier bytes - prefetched if possible, else read now."""
+    if item.input_data is not None:
+        return item.input_data
+    return item.input_path.read_bytes()
+
+
+# =============================================================================
+# PROCESS BACKEND WORKERS
+# =============================================================================
+# Module-level so they pickle. Each worker process gets the credentials and
+# job options exactly once, from the pool initializer; after that only the
+# BatchItem goes back and forth.
+
+_worker_state: dict = {}
+
+
+def _init_process_worker(
+    processor_cls: type, creds: "BatchCredentials", options: dict, budget_bytes: int
+) -> None:
+    """Pool initializer - runs once in each worker process."""
+    from .governor import get_governor
+
+    # The parent's memory budget is split between the workers, not multiplied
+    get_governor().set_budget(budget_bytes)
+
+    _worker_state["processor"] = processor_cls(max_workers=1, backend=BATCH_BACKEND_THREAD)
+    _worker_state["creds"] = creds
+    _worker_state["options"] = options
+
+
+def _run_in_worker(operation: str, item: BatchItem) -> BatchItem:
+    """Process one item in a worker, using the state from the initializer."""
+    processor: BatchProcessor = _worker_state["processor"]
+    return processor._process_item(
+        operation, item, _worker_state["creds"], _worker_state["options"]
+    )
+
+
 class BatchProcessor:
     """
     Handles batch encoding/decoding operations (v3.2.0).
 
     Usage:
-        processor = BatchProcessor(max_workers=4)
+        processor = BatchProcessor(max_workers=4)  # backend="auto"
 
         # Batch encode with BatchCredentials
         creds = BatchCredentials(
@@ -203,14 +375,43 @@ class BatchProcessor:
         )
     """
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(
+        self,
+        max_workers: int = BATCH_DEFAULT_WORKERS,
+        backend: str = BATCH_BACKEND_AUTO,
+        max_in_flight: int | None = None,
+        memory_budget: int | None = None,
+        schedule_window: int | None = None,
+    ):
         """
         Initialize batch processor.
 
         Args:
             max_workers: Maximum parallel workers (default 4)
+            backend: 'thread', 'process', or 'auto' to choose per batch
+                (processes for LSB and DCT/JPEG, threads for DCT/PNG)
+            max_in_flight: Items submitted but not yet finished, which
+                bounds memory on huge batches (default: 2 per worker)
+            memory_budget: Bytes the in-flight items' estimated working sets
+                may add up to (default: the governor budget; 0 = no limit).
+                One item always runs, however big.
+            schedule_window: Items read ahead and ranked by predicted cost
+                before the most expensive is started (default: 4 per worker)
+
+        Raises:
+            ValueError: Unknown backend
         """
+        if backend not in BATCH_BACKENDS:
+            raise ValueError(
+                f"Invalid backend: {backend}. Choose from {', '.join(sorted(BATCH_BACKENDS))}"
+            )
         self.max_workers = max_workers
+        self.backend = backend
+        self.max_in_flight = max_in_flight or max_workers * BATCH_IN_FLIGHT_PER_WORKER
+        self.memory_budget = memory_budget
+        self.schedule_window = schedule_window or max(
+            max_workers * BATCH_SCHEDULE_WINDOW_PER_WORKER, self.max_in_flight
+        )
         self._lock = threading.Lock()
 
     def find_images(
@@ -276,6 +477,12 @@ class BatchProcessor:
         recursive: bool = False,
         progress_callback: ProgressCallback | None = None,
         encode_func: Callable = None,
+        embed_mode: str = EMBED_MODE_LSB,
+        dct_output_format: str = "png",
+        shared_payload: bool = False,
+        manifest: str | Path | None = None,
+        resume: bool = False,
+        keep_items: bool = True,
     ) -> BatchResult:
         """
         Encode message into multiple images.
@@ -290,10 +497,26 @@ class BatchProcessor:
             compress: Enable compression
             recursive: Search directories recursively
             progress_callback: Called for each item: callback(current, total, item)
-            encode_func: Custom encode function (for integration)
+            encode_func: Custom encode function (for integration, thread backend only)
+            embed_mode: 'lsb' or 'dct'
+            dct_output_format: 'png' or 'jpeg' (DCT mode only)
+            shared_payload: Encrypt once and embed the same ciphertext in
+                every image. Much faster (the KDF runs once, not per image),
+                but the outputs are linkable - anyone holding two can tell
+                they hide the same message. Ignored with encode_func.
+            manifest: JSONL file; one line per finished item, written as
+                it finishes
+            resume: Skip images the manifest already lists as successful
+                (and append to it rather than starting over)
+            keep_items: Keep every BatchItem in the result. Turn off for
+                huge batches and read the manifest instead.
 
         Returns:
             BatchResult with operation summary
+
+        Raises:
+            ValidationError: With shared_payload, if the message or
+                credentials are invalid (nothing could succeed)
         """
         if message is None and file_payload is None:
             raise ValueError("Either message or file_payload must be provided")
@@ -301,67 +524,51 @@ class BatchProcessor:
         # Normalize credentials to BatchCredentials
         creds = self._normalize_credentials(credentials)
 
-        result = BatchResult(operation="encode")
-        image_paths = list(self.find_images(images, recursive))
-        result.total = len(image_paths)
-
         if output_dir:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Prepare batch items
-        for img_path in image_paths:
-            if output_dir:
-                out_path = output_dir / f"{img_path.stem}{output_suffix}.png"
-            else:
-                out_path = img_path.parent / f"{img_path.stem}{output_suffix}.png"
+        jpeg_output = embed_mode == EMBED_MODE_DCT and dct_output_format == "jpeg"
+        extension = "jpg" if jpeg_output else "png"
 
-            item = BatchItem(
+        def make_item(img_path: Path) -> BatchItem:
+            out_dir = output_dir or img_path.parent
+            return BatchItem(
                 input_path=img_path,
-                output_path=out_path,
-                input_size=img_path.stat().st_size if img_path.exists() else 0,
+                output_path=out_dir / f"{img_path.stem}{output_suffix}.{extension}",
             )
-            result.items.append(item)
-
-        # Process items
-        def process_encode(item: BatchItem) -> BatchItem:
-            item.status = BatchStatus.PROCESSING
-            item.start_time = time.time()
 
-            try:
-                if encode_func:
-                    # Use provided encode function
-                    encode_func(
-                        image_path=item.input_path,
-                        output_path=item.output_path,
-                        message=message,
-                        file_payload=file_payload,
-                        credentials=creds.to_dict(),
-                        compress=compress,
-                    )
-                else:
-                    # Use stegasoo encode
-                    self._do_encode(item, message, file_payload, creds, compress)
+        options = {
+            "message": message,
+            "file_payload": file_payload,
+            "compress": compress,
+            "embed_mode": embed_mode,
+            "dct_output_format": dct_output_format,
+            "encode_func": encode_func,
+            "prepared": None,
+        }
 
-                item.status = BatchStatus.SUCCESS
-                item.output_size = (
-                    item.output_path.stat().st_size
-                    if item.output_path and item.output_path.exists()
-                    else 0
+        paths = self.find_images(images, recursive)
+        if shared_payload and not encode_func:
+            # Peek before paying for Argon2 - an empty batch encrypts nothing
+            first = next(paths, None)
+            if first is not None:
+                paths = itertools.chain([first], paths)
+                options["prepared"] = self._prepare_shared_payload(
+                    message, file_payload, creds, compress
                 )
-                item.message = f"Encoded to {item.output_path.name}"
-
-            except Exception as e:
-                item.status = BatchStatus.FAILED
-                item.error = str(e)
 
-            item.end_time = time.time()
-            return item
-
-        # Execute with thread pool
-        self._execute_batch(result, process_encode, progress_callback)
-
-        return result
+        return self._run_pipeline(
+            "encode",
+            paths,
+            make_item,
+            creds,
+            options,
+            progress_callback,
+            manifest,
+            resume,
+            keep_items,
+        )
 
     def batch_decode(
         self,
@@ -371,6 +578,9 @@ class BatchProcessor:
         recursive: bool = False,
         progress_callback: ProgressCallback | None = None,
         decode_func: Callable = None,
+        manifest: str | Path | None = None,
+        resume: bool = False,
+        keep_items: bool = True,
     ) -> BatchResult:
         """
         Decode messages from multiple images.
@@ -382,6 +592,9 @@ class BatchProcessor:
             recursive: Search directories recursively
             progress_callback: Called for each item: callback(current, total, item)
             decode_func: Custom decode function (for integration)
+            manifest: JSONL results file (see batch_encode)
+            resume: Skip images the manifest lists as successful
+            keep_items: Keep every BatchItem in the result
 
         Returns:
             BatchResult with decoded messages in item.message fields
@@ -389,83 +602,521 @@ class BatchProcessor:
         # Normalize credentials to BatchCredentials
         creds = self._normalize_credentials(credentials)
 
-        result = BatchResult(operation="decode")
-        image_paths = list(self.find_images(images, recursive))
-        result.total = len(image_paths)
-
         if output_dir:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Prepare batch items
-        for img_path in image_paths:
-            item = BatchItem(
-                input_path=img_path,
-                output_path=output_dir,
-                input_size=img_path.stat().st_size if img_path.exists() else 0,
-            )
-            result.items.append(item)
+        def make_item(img_path: Path) -> BatchItem:
+            return BatchItem(input_path=img_path, output_path=output_dir)
+
+        options = {"decode_func": decode_func}
+        return self._run_pipeline(
+            "decode",
+            self.find_images(images, recursive),
+            make_item,
+            creds,
+            options,
+            progress_callback,
+            manifest,
+            resume,
+            keep_items,
+        )
 
-        # Process items
-        def process_decode(item: BatchItem) -> BatchItem:
-            item.status = BatchStatus.PROCESSING
-            item.start_time = time.time()
+    def _process_item(
+        self,
+        operation: str,
+        item: BatchItem,
+        creds: BatchCredentials,
+        options: dict,
+    ) -> BatchItem:
+        """Encode or decode one item. Same code on threads and in worker processes."""
+        item.status = BatchStatus.PROCESSING
+        item.start_time = time.time()
 
-            try:
-                if decode_func:
-                    # Use provided decode function
-                    decoded = decode_func(
+        try:
+            if operation == "encode":
+                if options.get("encode_func"):
+                    # Use provided encode function
+                    options["encode_func"](
                         image_path=item.input_path,
-                        output_dir=item.output_path,
+                        output_path=item.output_path,
+                        message=options["message"],
+                        file_payload=options["file_payload"],
                         credentials=creds.to_dict(),
+                        compress=options["compress"],
                     )
-                    item.message = (
-                        decoded.get("message", "") if isinstance(decoded, dict) else str(decoded)
+                elif options.get("prepared"):
+                    # Shared payload - embedding only
+                    self._do_encode_prepared(
+                        item,
+                        options["prepared"],
+                        options["embed_mode"],
+                        options["dct_output_format"],
                     )
                 else:
-                    # Use stegasoo decode
-                    item.message = self._do_decode(item, creds)
+                    # Use stegasoo encode
+                    self._do_encode(
+                        item,
+                        options["message"],
+                        options["file_payload"],
+                        creds,
+                        options["compress"],
+                        embed_mode=options["embed_mode"],
+                        dct_output_format=options["dct_output_format"],
+                    )
 
-                item.status = BatchStatus.SUCCESS
+                item.output_size = (
+                    item.output_path.stat().st_size
+                    if item.output_path and item.output_path.exists()
+                    else 0
+                )
+                item.message = f"Encoded to {item.output_path.name}"
 
-            except Exception as e:
-                item.status = BatchStatus.FAILED
-                item.error = str(e)
+            elif options.get("decode_func"):
+                # Use provided decode function
+                decoded = options["decode_func"](
+                    image_path=item.input_path,
+                    output_dir=item.output_path,
+                    credentials=creds.to_dict(),
+                )
+                item.message = (
+                    decoded.get("message", "") if isinstance(decoded, dict) else str(decoded)
+                )
+            else:
+                # Use stegasoo decode
+                item.message = self._do_decode(item, creds)
 
-            item.end_time = time.time()
-            return item
+            item.status = BatchStatus.SUCCESS
+
+        except Exception as e:
+            item.status = BatchStatus.FAILED
+            item.error = str(e)
+
+        item.end_time = time.time()
+        item.input_data = None  # Don't ship the carrier back from a worker
+        return item
+
+    def _resolve_backend(self, total: int | None, options: dict) -> str:
+        """Pick the executor for a batch."""
+        custom = options.get("encode_func") or options.get("decode_func")
+        if custom:
+            # Integration callbacks are usually closures - they don't pickle
+            if self.backend == BATCH_BACKEND_PROCESS:
+                raise ValueError("Custom encode/decode functions need the thread backend")
+            return BATCH_BACKEND_THREAD
+
+        if self.backend != BATCH_BACKEND_AUTO:
+            return self.backend
+
+        if self.max_workers <= 1 or (total is not None and total <= 1):
+            return BATCH_BACKEND_THREAD  # Nothing to parallelize
+
+        # scipy's DCT releases the GIL, so threads already scale for DCT/PNG
+        # and skip the worker start-up. LSB and jpegio are Python loops.
+        if options.get("embed_mode") == EMBED_MODE_DCT and options["dct_output_format"] != "jpeg":
+            return BATCH_BACKEND_THREAD
+        return BATCH_BACKEND_PROCESS
+
+    def _estimate_cost(self, operation: str, item: BatchItem, options: dict) -> None:
+        """
+        Fill in the item's predicted seconds and peak bytes.
+
+        Header-only: probe_image reads dimensions without decoding pixels.
+        """
+        from .governor import (
+            estimate_image_cost,
+            estimate_image_seconds,
+            estimate_kdf_cost,
+            estimate_kdf_seconds,
+        )
+        from .image_context import probe_image
+        from .kdf import get_active_kdf_params
+
+        if item.input_data is None:
+            return  # Not read ahead - nothing to probe
+        try:
+            probe = probe_image(item.input_data)
+        except Exception:
+            return  # Not an image - it'll fail fast in compute, unscheduled
+
+        if operation == "encode":
+            mode, fmt = options["embed_mode"], options["dct_output_format"]
+        elif probe.format == "JPEG":
+            mode, fmt = EMBED_MODE_DCT, "jpeg"  # Only DCT survives JPEG
+        else:
+            mode, fmt = "auto", None
+
+        seconds = estimate_image_seconds(probe.width, probe.height, mode, fmt)
+        memory = estimate_image_cost(probe.width, probe.height, mode, fmt)
+
+        if not options.get("prepared"):
+            # Key derivation runs before the embed, so peaks don't add up
+            kdf = get_active_kdf_params()
+            seconds += estimate_kdf_seconds(kdf)
+            memory = max(memory, estimate_kdf_cost(kdf))
+
+        item.predicted_seconds = seconds
+        item.predicted_bytes = memory
+
+    # -------------------------------------------------------------------------
+    # Streaming pipeline: discovery -> read-ahead -> compute -> write
+    # -------------------------------------------------------------------------
+
+    def _run_pipeline(
+        self,
+        operation: str,
+        paths: Iterable[Path],
+        make_item: Callable[[Path], BatchItem],
+        creds: BatchCredentials,
+        options: dict,
+        progress_callback: ProgressCallback | None,
+        manifest: str | Path | None,
+        resume: bool,
+        keep_items: bool,
+    ) -> BatchResult:
+        """Run a batch through the pipeline and collect the summary."""
+        if resume and not manifest:
+            raise ValueError("resume needs a manifest to resume from")
+
+        result = BatchResult(operation=operation)
+        done = _read_manifest_successes(manifest) if resume and manifest else set()
+
+        manifest_file = None
+        if manifest:
+            Path(manifest).parent.mkdir(parents=True, exist_ok=True)
+            manifest_file = open(manifest, "a" if resume else "w", encoding="utf-8")
+            if resume and _ends_mid_line(manifest):
+                manifest_file.write("\n")  # Don't glue our first record to a torn one
+
+        # Custom callbacks get a path and read it themselves
+        read_ahead = not (options.get("encode_func") or options.get("decode_func"))
+
+        # Peek far enough to know whether there's anything to parallelize
+        paths = iter(paths)
+        head = list(itertools.islice(paths, 2))
+        backend = self._resolve_backend(len(head) if len(head) < 2 else None, options)
+        paths = itertools.chain(head, paths)
+
+        # The pool has to exist before the reader thread does: forking a
+        # process that has other threads running can deadlock the child
+        executor = self._make_executor(backend, creds, options)
 
-        # Execute with thread pool
-        self._execute_batch(result, process_decode, progress_callback)
+        memory_budget = self.memory_budget
+        if memory_budget is None:
+            from .governor import get_governor
+
+            memory_budget = get_governor().budget_bytes
+
+        def estimate(item: BatchItem) -> None:
+            self._estimate_cost(operation, item, options)
+
+        def respawn():
+            return self._make_executor(backend, creds, options, respawn=True)
+
+        discovered = threading.Event()
+        items = self._read_ahead(paths, make_item, done, result, read_ahead, discovered, estimate)
+        try:
+            with executor:
+                self._execute_batch(
+                    result,
+                    items,
+                    executor,
+                    backend,
+                    operation,
+                    creds,
+                    options,
+                    progress_callback,
+                    manifest_file,
+                    keep_items,
+                    discovered,
+                    memory_budget,
+                    respawn if backend == BATCH_BACKEND_PROCESS else None,
+                )
+        finally:
+            items.close()  # Stops the reader thread if we bailed out early
+            if manifest_file:
+                manifest_file.close()
 
         return result
 
+    def _make_executor(
+        self, backend: str, creds: BatchCredentials, options: dict, respawn: bool = False
+    ):
+        """
+        Thread pool, or a process pool with its workers already started.
+
+        respawn replaces a pool that broke mid-batch. The reader thread is
+        running by then, so its workers are spawned rather than forked.
+        """
+        if backend != BATCH_BACKEND_PROCESS:
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+
+        import multiprocessing
+
+        from .governor import get_governor
+
+        budget = get_governor().budget_bytes
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn") if respawn else None,
+            initializer=_init_process_worker,
+            initargs=(
+                type(self),
+                creds,
+                options,
+                budget // self.max_workers if budget else 0,
+            ),
+        )
+        # First submit launches the workers (all of them, with fork)
+        executor.submit(int).result()
+        return executor
+
+    def _read_ahead(
+        self,
+        paths: Iterable[Path],
+        make_item: Callable[[Path], BatchItem],
+        skip: set[str],
+        result: BatchResult,
+        read_data: bool,
+        discovered: threading.Event,
+        estimate: Callable[[BatchItem], None] | None = None,
+    ) -> Generator[BatchItem, None, None]:
+        """
+        Discovery and read-ahead stages.
+
+        A reader thread walks the inputs and loads the next few carriers while
+        the pool is busy with the current ones. The queue is bounded, so the
+        reader never gets more than max_workers items ahead. result.total
+        counts what has been found so far, and is final once `discovered`
+        is set. `estimate` prices each loaded item for the scheduler, off the
+        main thread.
+        """
+        items: queue.Queue = queue.Queue(maxsize=max(self.max_workers, 1))
+        stop = threading.Event()
+        finished = object()
+
+        def put(entry) -> bool:
+            while not stop.is_set():
+                try:
+                    items.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader() -> None:
+            try:
+                for path in paths:
+                    with self._lock:
+                        result.total += 1
+                    if skip and str(Path(path).resolve()) in skip:
+                        with self._lock:
+                            result.skipped += 1
+                        continue
+
+                    item = make_item(path)
+                    try:
+                        if read_data:
+                            item.input_data = path.read_bytes()
+                            item.input_size = len(item.input_data)
+                            if estimate:
+                                estimate(item)
+                        else:
+                            item.input_size = path.stat().st_size
+                    except OSError as e:
+                        item.status = BatchStatus.FAILED
+                        item.error = str(e)
+
+                    if not put(item):
+                        return
+                discovered.set()
+                put(finished)
+            except Exception as e:  # Surface discovery errors in the caller
+                put(e)
+
+        thread = threading.Thread(target=reader, name="stegasoo-batch-reader", daemon=True)
+        thread.start()
+        try:
+            while True:
+                entry = items.get()
+                if entry is finished:
+                    break
+                if isinstance(entry, Exception):
+                    raise entry
+                yield entry
+        finally:
+            stop.set()
+            thread.join()
+
     def _execute_batch(
         self,
         result: BatchResult,
-        process_func: Callable[[BatchItem], BatchItem],
+        items: Iterable[BatchItem],
+        executor,
+        backend: str,
+        operation: str,
+        creds: BatchCredentials,
+        options: dict,
         progress_callback: ProgressCallback | None = None,
+        manifest_file=None,
+        keep_items: bool = True,
+        discovered: threading.Event | None = None,
+        memory_budget: int = 0,
+        respawn: Callable[[], ProcessPoolExecutor] | None = None,
     ) -> None:
-        """Execute batch processing with thread pool."""
+        """
+        Schedule, compute and write stages.
+
+        Up to schedule_window read items wait in a list ranked by predicted
+        seconds. The most expensive one whose predicted_bytes still fit under
+        memory_budget (alongside everything in flight) starts next - the
+        classic longest-processing-time-first rule, which keeps a few huge
+        carriers from becoming the tail of the batch. At most max_in_flight
+        items are submitted at once, and with nothing in flight the top item
+        always starts, so an oversized carrier waits its turn but never
+        starves.
+
+        Finished items are counted, written to the manifest and passed to
+        the progress callback in completion order. The callback's total is 0
+        while images are still being discovered.
+
+        An item whose future raises (say its result won't unpickle) is
+        recorded as FAILED. If a worker process dies, the pool is rebuilt
+        with respawn and the items that hadn't finished go back in the queue.
+        An item caught in a second crash fails instead, so a carrier that
+        reliably kills its worker can't stall the batch.
+        """
         completed = 0
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(process_func, item): item for item in result.items}
+        def finish(item: BatchItem) -> None:
+            nonlocal completed
+            completed += 1
+            item.input_data = None
+
+            with self._lock:
+                if item.status == BatchStatus.SUCCESS:
+                    result.succeeded += 1
+                elif item.status == BatchStatus.FAILED:
+                    result.failed += 1
+                elif item.status == BatchStatus.SKIPPED:
+                    result.skipped += 1
+
+                if item.status == BatchStatus.SUCCESS and item.predicted_seconds:
+                    result.predicted_seconds += item.predicted_seconds
+                    result.actual_seconds += item.duration or 0.0
+
+            if keep_items:
+                result.items.append(item)
+
+            if manifest_file:
+                record = {
+                    "operation": operation,
+                    "key": _manifest_key(item.input_path, manifest_file.name),
+                    **item.to_dict(),
+                }
+                manifest_file.write(json.dumps(record) + "\n")
+                manifest_file.flush()
 
-            for future in as_completed(futures):
-                item = future.result()
-                completed += 1
+            if progress_callback:
+                still_finding = discovered is not None and not discovered.is_set()
+                total = 0 if still_finding else result.total - result.skipped
+                progress_callback(completed, total, item)
 
-                with self._lock:
-                    if item.status == BatchStatus.SUCCESS:
-                        result.succeeded += 1
-                    elif item.status == BatchStatus.FAILED:
-                        result.failed += 1
-                    elif item.status == BatchStatus.SKIPPED:
-                        result.skipped += 1
+        def submit(item: BatchItem):
+            if backend == BATCH_BACKEND_PROCESS:
+                return executor.submit(_run_in_worker, operation, item)
+            return executor.submit(self._process_item, operation, item, creds, options)
 
-                if progress_callback:
-                    progress_callback(completed, result.total, item)
+        def rank(item: BatchItem) -> float:
+            return -(item.predicted_seconds or 0.0)
+
+        def fail(item: BatchItem, error: str) -> None:
+            item.status = BatchStatus.FAILED
+            item.error = error
+            item.end_time = time.time()
+            finish(item)
+
+        items = iter(items)
+        exhausted = False
+        pending: list[BatchItem] = []  # Most expensive first
+        in_flight: dict[Future, BatchItem] = {}
+        in_flight_bytes = 0
+        crashed: set[int] = set()  # id()s of items already resubmitted once
+        respawned: list = []
+
+        def next_to_start() -> BatchItem | None:
+            """Most expensive pending item that fits in the remaining budget."""
+            if not in_flight or not memory_budget:
+                return pending.pop(0) if pending else None
+            for index, candidate in enumerate(pending):
+                if in_flight_bytes + candidate.predicted_bytes <= memory_budget:
+                    return pending.pop(index)
+            return None
+
+        try:
+            while True:
+                # Top up the look-ahead window
+                while not exhausted and len(pending) < self.schedule_window:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    elif item.status == BatchStatus.FAILED:
+                        finish(item)  # Couldn't even read it
+                    else:
+                        bisect.insort(pending, item, key=rank)
+
+                while len(in_flight) < self.max_in_flight:
+                    item = next_to_start()
+                    if item is None:
+                        break
+                    in_flight[submit(item)] = item
+                    in_flight_bytes += item.predicted_bytes
+
+                if not in_flight:
+                    break  # Nothing pending, nothing running, nothing left to read
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    item = in_flight.pop(future)
+                    in_flight_bytes -= item.predicted_bytes
+                    try:
+                        finish(future.result())
+                    except BrokenProcessPool:
+                        broken = True
+                        in_flight[future] = item  # Sorted out with the rest below
+                        in_flight_bytes += item.predicted_bytes
+                    except Exception as e:
+                        fail(item, f"Worker error: {e}")
+
+                if not broken:
+                    continue
+
+                # Every future on a broken pool fails. Keep the ones that
+                # finished first, requeue the rest on a fresh pool.
+                wait(in_flight)
+                for future, item in in_flight.items():
+                    error = future.exception()
+                    if error is None:
+                        finish(future.result())
+                    elif not isinstance(error, BrokenProcessPool):
+                        fail(item, f"Worker error: {error}")
+                    elif respawn is None or id(item) in crashed:
+                        fail(item, "Worker process died (out of memory?)")
+                    else:
+                        crashed.add(id(item))
+                        item.status = BatchStatus.PENDING
+                        bisect.insort(pending, item, key=rank)
+                in_flight.clear()
+                in_flight_bytes = 0
+
+                if respawn is not None:
+                    executor.shutdown(wait=False)
+                    executor = respawn()
+                    respawned.append(executor)
+        finally:
+            for pool in respawned:
+                pool.shutdown(wait=True, cancel_futures=True)
 
         result.end_time = time.time()
 
@@ -476,18 +1127,21 @@ class BatchProcessor:
         file_payload: Path | None,
         creds: BatchCredentials,
         compress: bool,
+        embed_mode: str = EMBED_MODE_LSB,
+        dct_output_format: str = "png",
     ) -> None:
         """
         Perform actual encoding using stegasoo.encode.
 
-        Override this method to customize encoding behavior.
+        Override this method to customize encoding behavior. With the process
+        backend it runs in a worker, on an instance of the same class.
         """
         try:
             from .encode import encode
             from .models import FilePayload
 
-            # Read carrier image
-            carrier_image = item.input_path.read_bytes()
+            # Read carrier image (already loaded by the read-ahead stage)
+            carrier_image = _item_bytes(item)
 
             if file_payload:
                 # Encode file
@@ -500,6 +1154,9 @@ class BatchProcessor:
                     pin=creds.pin,
                     rsa_key_data=creds.rsa_key_data,
                     rsa_password=creds.rsa_password,
+                    compression=compress,
+                    embed_mode=embed_mode,
+                    dct_output_format=dct_output_format,
                 )
             else:
                 # Encode text message
@@ -511,6 +1168,9 @@ class BatchProcessor:
                     pin=creds.pin,
                     rsa_key_data=creds.rsa_key_data,
                     rsa_password=creds.rsa_password,
+                    compression=compress,
+                    embed_mode=embed_mode,
+                    dct_output_format=dct_output_format,
                 )
 
             # Write output
@@ -521,6 +1181,53 @@ class BatchProcessor:
             # Fallback to mock if stegasoo.encode not available
             self._mock_encode(item, message, creds, compress)
 
+    def _prepare_shared_payload(
+        self,
+        message: str | None,
+        file_payload: Path | None,
+        creds: BatchCredentials,
+        compress: bool,
+    ):
+        """Encrypt the batch payload once (see batch_encode's shared_payload)."""
+        from .encode import prepare_encode
+        from .models import FilePayload
+
+        payload: str | FilePayload
+        if file_payload:
+            payload = FilePayload.from_file(str(file_payload))
+        elif message is not None:
+            payload = message
+        else:  # batch_encode checks this up front
+            raise ValueError("Either message or file_payload must be provided")
+        return prepare_encode(
+            payload,
+            creds.reference_photo,
+            creds.passphrase,
+            pin=creds.pin,
+            rsa_key_data=creds.rsa_key_data,
+            rsa_password=creds.rsa_password,
+            compression=compress,
+        )
+
+    def _do_encode_prepared(
+        self,
+        item: BatchItem,
+        prepared,
+        embed_mode: str = EMBED_MODE_LSB,
+        dct_output_format: str = "png",
+    ) -> None:
+        """Embed a prepared payload - no key derivation per item."""
+        from .encode import encode_prepared
+
+        result = encode_prepared(
+            prepared,
+            _item_bytes(item),
+            embed_mode=embed_mode,
+            dct_output_format=dct_output_format,
+        )
+        if item.output_path:
+            item.output_path.write_bytes(result.stego_image)
+
     def _do_decode(
         self,
         item: BatchItem,
@@ -534,8 +1241,8 @@ class BatchProcessor:
         try:
             from .decode import decode
 
-            # Read stego image
-            stego_image = item.input_path.read_bytes()
+            # Read stego image (already loaded by the read-ahead stage)
+            stego_image = _item_bytes(item)
 
             result = decode(
                 stego_image=stego_image,
@@ -577,76 +1284,158 @@ class BatchProcessor:
         return "[Decoded message would appear here]"
 
 
+# =============================================================================
+# CAPACITY CHECK
+# =============================================================================
+# Header-only and parallel: PIL learns the size from the first few KB, so a
+# folder on a slow share is mostly waiting on I/O, which threads overlap.
+# Results are remembered per (path, mtime, size), so checking the same folder
+# again in one process only opens what changed.
+
+_capacity_cache: OrderedDict[tuple, dict] = OrderedDict()
+_capacity_cache_lock = threading.Lock()
+
+
+def clear_capacity_check_cache() -> None:
+    """Forget remembered capacity check results."""
+    with _capacity_cache_lock:
+        _capacity_cache.clear()
+
+
+def _check_capacity(path: Path, exact: bool) -> dict:
+    """Capacity of one image. Runs in the check pool."""
+    from .image_context import probe_image_file
+    from .steganography import calculate_capacity, has_dct_support
+
+    try:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size, exact)
+        with _capacity_cache_lock:
+            cached = _capacity_cache.get(key)
+            if cached is not None:
+                _capacity_cache.move_to_end(key)
+                return dict(cached)
+
+        probe = probe_image_file(path)
+
+        dct_capacity = None
+        jpegio_capacity = None
+        if has_dct_support():
+            from .dct_steganography import HAS_JPEGIO, calculate_dct_capacity
+
+            dct_capacity = calculate_dct_capacity(probe).usable_capacity_bytes
+
+            # The native JPEG capacity depends on the coefficients, not just
+            # the size - exact, but it means reading the whole file
+            if exact and HAS_JPEGIO and probe.format == "JPEG":
+                from .dct_steganography import calculate_jpegio_capacity
+                from .governor import estimate_image_cost, reserve
+
+                cost = estimate_image_cost(probe.width, probe.height, EMBED_MODE_DCT, "jpeg")
+                with reserve(cost, "capacity"):
+                    jpegio_capacity = calculate_jpegio_capacity(path.read_bytes())
+
+        capacity = calculate_capacity(probe)
+        result = {
+            "path": str(path),
+            "dimensions": f"{probe.width}x{probe.height}",
+            "pixels": probe.num_pixels,
+            "format": probe.format,
+            "mode": probe.mode,
+            "capacity_bytes": capacity,
+            "capacity_kb": capacity // 1024,
+            "dct_capacity_bytes": dct_capacity,
+            "jpegio_capacity_bytes": jpegio_capacity,
+            "valid": probe.num_pixels <= MAX_IMAGE_PIXELS and probe.format in LOSSLESS_FORMATS,
+            "warnings": _get_image_warnings(probe),
+        }
+    except Exception as e:
+        return {"path": str(path), "error": str(e), "valid": False}
+
+    with _capacity_cache_lock:
+        _capacity_cache[key] = result
+        while len(_capacity_cache) > CAPACITY_CHECK_CACHE_SIZE:
+            _capacity_cache.popitem(last=False)
+    return dict(result)
+
+
+def _iter_capacity(
+    images: list[str | Path], recursive: bool, exact: bool, max_workers: int
+) -> Iterator[tuple[int, dict]]:
+    """(discovery index, result) pairs, as each check finishes."""
+    paths = BatchProcessor().find_images(images, recursive)
+    limit = max(max_workers, 1) * BATCH_IN_FLIGHT_PER_WORKER
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        in_flight: dict[Future, int] = {}  # future -> discovery index
+        for index, path in enumerate(paths):
+            if len(in_flight) >= limit:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield in_flight.pop(future), future.result()
+            in_flight[executor.submit(_check_capacity, path, exact)] = index
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield in_flight.pop(future), future.result()
+
+
+def iter_capacity_check(
+    images: list[str | Path],
+    recursive: bool = False,
+    exact: bool = False,
+    max_workers: int = BATCH_DEFAULT_WORKERS,
+) -> Iterator[dict]:
+    """
+    Check capacity of multiple images, yielding each result as it's ready.
+
+    Same arguments and result dicts as batch_capacity_check, but in
+    completion order - for showing a big folder as it's being checked.
+    """
+    for _, result in _iter_capacity(images, recursive, exact, max_workers):
+        yield result
+
+
 def batch_capacity_check(
     images: list[str | Path],
     recursive: bool = False,
+    exact: bool = False,
+    max_workers: int = BATCH_DEFAULT_WORKERS,
 ) -> list[dict]:
     """
     Check capacity of multiple images without encoding.
 
+    Only image headers are read. DCT capacity is the size-based figure for
+    PNG output; the native JPEG path's capacity depends on the picture, so
+    it's only worked out (from the coefficients) when exact=True.
+
     Args:
         images: List of image paths or directories
         recursive: Search directories recursively
+        exact: Also compute jpegio_capacity_bytes for JPEGs (reads the file)
+        max_workers: Images checked in parallel
 
     Returns:
-        List of dicts with path, dimensions, and estimated capacity
+        List of dicts with path, dimensions, and capacity per mode
+        (capacity_bytes is LSB), in discovery order
     """
-    from PIL import Image
-
-    from .constants import MAX_IMAGE_PIXELS
+    results = sorted(_iter_capacity(images, recursive, exact, max_workers), key=lambda r: r[0])
+    return [result for _, result in results]
 
-    processor = BatchProcessor()
-    results = []
-
-    for img_path in processor.find_images(images, recursive):
-        try:
-            with Image.open(img_path) as img:
-                width, height = img.size
-                pixels = width * height
-
-                # Estimate: 3 bits per pixel (RGB LSB), minus header overhead
-                capacity_bits = pixels * 3
-                capacity_bytes = (capacity_bits // 8) - 100  # Header overhead
-
-                results.append(
-                    {
-                        "path": str(img_path),
-                        "dimensions": f"{width}x{height}",
-                        "pixels": pixels,
-                        "format": img.format,
-                        "mode": img.mode,
-                        "capacity_bytes": max(0, capacity_bytes),
-                        "capacity_kb": max(0, capacity_bytes // 1024),
-                        "valid": pixels <= MAX_IMAGE_PIXELS and img.format in LOSSLESS_FORMATS,
-                        "warnings": _get_image_warnings(img, img_path),
-                    }
-                )
-        except Exception as e:
-            results.append(
-                {
-                    "path": str(img_path),
-                    "error": str(e),
-                    "valid": False,
-                }
-            )
-
-    return results
-
-
-def _get_image_warnings(img, path: Path) -> list[str]:
-    """Generate warnings for an image."""
-    from .constants import LOSSLESS_FORMATS, MAX_IMAGE_PIXELS
 
+def _get_image_warnings(probe) -> list[str]:
+    """Generate warnings for an image (from its ImageProbe)."""
     warnings = []
 
-    if img.format not in LOSSLESS_FORMATS:
-        warnings.append(f"Lossy format ({img.format}) - quality will degrade on re-save")
+    if probe.format not in LOSSLESS_FORMATS:
+        warnings.append(f"Lossy format ({probe.format}) - quality will degrade on re-save")
 
-    if img.size[0] * img.size[1] > MAX_IMAGE_PIXELS:
+    if probe.num_pixels > MAX_IMAGE_PIXELS:
         warnings.append(f"Image exceeds {MAX_IMAGE_PIXELS:,} pixel limit")
 
-    if img.mode not in ("RGB", "RGBA"):
-        warnings.append(f"Non-RGB mode ({img.mode}) - will be converted")
+    if probe.mode not in ("RGB", "RGBA"):
+        warnings.append(f"Non-RGB mode ({probe.mode}) - will be converted")
 
     return warnings
 
@@ -665,6 +1454,11 @@ def print_batch_result(result: BatchResult, verbose: bool = False) -> None:
     print(f"Skipped:   {result.skipped}")
     if result.duration:
         print(f"Duration:  {result.duration:.2f}s")
+    if result.prediction_ratio is not None:
+        print(
+            f"Predicted: {result.predicted_seconds:.1f}s of work, "
+            f"took {result.actual_seconds:.1f}s (x{result.prediction_ratio:.2f})"
+        )
 
     if verbose or result.failed > 0:
         print(f"\n{'─'*60}")
@@ -0,0 +1,465 @@
+"""
+Stegasoo Carrier Library (v4.3.0)
+
+Operators keep folders of thousands of carrier photos and used to pick one by
+trial and error: try to encode, "payload too large", try a bigger one. And
+batch_capacity_check re-opened every image on every run just to print a
+table.
+
+The carrier library is an SQLite index of those folders:
+
+    library = CarrierLibrary()            # ~/.stegasoo/carriers.db
+    library.scan(["~/carriers"])          # incremental, parallel
+    best = library.pick(payload_size=40_000, mode="dct")
+
+Each row holds the path, a BLAKE2b content hash, the header facts and the
+capacity for every embedding path:
+
+    lsb_capacity      calculate_capacity() at 1 bit/channel
+    dct_capacity      calculate_dct_capacity() - scipy DCT, PNG output
+    jpegio_capacity   calculate_jpegio_capacity() - native JPEG output. This
+                      one depends on image content, so it needs the JPEG
+                      coefficients; working it out once here is the point
+
+Scans are incremental: files whose mtime and size match the index are
+skipped, and a changed path whose content hash is already known (a copy, a
+move) reuses the stored capacities. Only new images get opened, in a thread
+pool, under the resource governor's memory budget.
+
+pick() is a single indexed query - no image is opened at selection time.
+
+Location (first match wins):
+    1. db_path argument
+    2. STEGASOO_CARRIER_DB environment variable
+    3. ~/.stegasoo/carriers.db
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .constants import (
+    BATCH_DEFAULT_WORKERS,
+    EMBED_MODE_DCT,
+    EMBED_MODE_LSB,
+    MAX_IMAGE_PIXELS,
+)
+from .debug import debug
+from .governor import estimate_image_cost, reserve
+from .image_context import ImageContext
+
+CARRIER_DB_ENV_VAR = "STEGASOO_CARRIER_DB"
+DEFAULT_CARRIER_DB = Path.home() / ".stegasoo" / "carriers.db"
+
+# Bump when a capacity formula changes - old indexes are rebuilt
+CARRIER_INDEX_VERSION = 1
+
+# Worst-case crypto framing for a payload (see crypto.encrypt_message): the
+# payload-type prefix plus random padding of up to 319 bytes, rounded up to a
+# 256-byte boundary
+_MAX_PADDING = 319
+_PADDING_BLOCK = 256
+_TEXT_PREFIX_SIZE = 1  # [type:1] - files add name and MIME (see crypto._split_payload)
+
+PICK_STRATEGIES = ("smallest", "fastest")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS carriers (
+        path TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        mtime REAL NOT NULL,
+        file_size INTEGER NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL,
+        format TEXT,
+        mode TEXT,
+        lsb_capacity INTEGER NOT NULL,
+        dct_capacity INTEGER,
+        jpegio_capacity INTEGER,
+        indexed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_carriers_hash ON carriers(content_hash);
+    CREATE INDEX IF NOT EXISTS idx_carriers_lsb ON carriers(lsb_capacity);
+    CREATE INDEX IF NOT EXISTS idx_carriers_dct ON carriers(dct_capacity);
+    CREATE INDEX IF NOT EXISTS idx_carriers_jpegio ON carriers(jpegio_capacity);
+"""
+
+_COLUMNS = (
+    "path",
+    "content_hash",
+    "mtime",
+    "file_size",
+    "width",
+    "height",
+    "format",
+    "mode",
+    "lsb_capacity",
+    "dct_capacity",
+    "jpegio_capacity",
+    "indexed_at",
+)
+
+
+# =============================================================================
+# RECORDS
+# =============================================================================
+
+
+@dataclass
+class CarrierRecord:
+    """One indexed carrier image."""
+
+    path: str
+    content_hash: str
+    mtime: float
+    file_size: int
+    width: int
+    height: int
+    format: str | None
+    mode: str | None
+    lsb_capacity: int
+    dct_capacity: int | None  # None without scipy
+    jpegio_capacity: int | None  # None without jpeglib
+    indexed_at: float
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    def capacity(self, mode: str = EMBED_MODE_LSB, dct_output_format: str = "png") -> int | None:
+        """Capacity in bytes for an embedding path, None if unknown."""
+        if mode == EMBED_MODE_DCT:
+            return self.jpegio_capacity if dct_output_format == "jpeg" else self.dct_capacity
+        return self.lsb_capacity
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["pixels"] = self.pixels
+        return result
+
+
+@dataclass
+class ScanStats:
+    """What a scan did."""
+
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    reused: int = 0  # Changed path, known content - capacities copied
+    removed: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def worst_case_encrypted_size(payload_size: int, prefix_size: int = _TEXT_PREFIX_SIZE) -> int:
+    """
+    Largest the encrypted blob for a payload of this size can be.
+
+    The picker uses this rather than will_fit's average-case estimate - a
+    carrier it picks should never bounce on the random padding.
+
+    Args:
+        payload_size: Payload bytes before encryption
+        prefix_size: The payload-type prefix encryption puts in front: 1 for
+            text, 5 + filename + MIME type bytes for a file
+
+    Returns:
+        Encrypted bytes, crypto header included
+    """
+    from .steganography import HEADER_OVERHEAD
+
+    # The prefix is padded along with the payload, so it can tip the total
+    # over a block boundary
+    packed = payload_size + prefix_size
+    padded = -(-(packed + _MAX_PADDING) // _PADDING_BLOCK) * _PADDING_BLOCK
+    return padded + HEADER_OVERHEAD
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _measure(path: Path, data: bytes, content_hash: str, mtime: float) -> CarrierRecord:
+    """Open one image and work out every capacity. Runs in the scan pool."""
+    from .steganography import calculate_capacity, has_dct_support
+
+    ctx = ImageContext(data)
+    width, height = ctx.size
+
+    dct_capacity = None
+    jpegio_capacity = None
+    if has_dct_support():
+        from .dct_steganography import HAS_JPEGIO, calculate_dct_capacity
+
+        dct_capacity = calculate_dct_capacity(ctx).usable_capacity_bytes
+        if HAS_JPEGIO:
+            from .dct_steganography import calculate_jpegio_capacity
+
+            with reserve(estimate_image_cost(width, height, EMBED_MODE_DCT, "jpeg"), "index"):
+                jpegio_capacity = calculate_jpegio_capacity(ctx)
+
+    return CarrierRecord(
+        path=str(path),
+        content_hash=content_hash,
+        mtime=mtime,
+        file_size=len(data),
+        width=width,
+        height=height,
+        format=ctx.format,
+        mode=ctx.mode,
+        lsb_capacity=calculate_capacity(ctx, 1),
+        dct_capacity=dct_capacity,
+        jpegio_capacity=jpegio_capacity,
+        indexed_at=time.time(),
+    )
+
+
+# =============================================================================
+# LIBRARY
+# =============================================================================
+
+
+class CarrierLibrary:
+    """
+    SQLite-backed index of carrier images.
+
+    Safe to share between threads; one connection, serialized by a lock.
+    """
+
+    def __init__(self, db_path: str | Path | None = None):
+        if db_path is None:
+            db_path = os.environ.get(CARRIER_DB_ENV_VAR) or DEFAULT_CARRIER_DB
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock, self._db:
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version != CARRIER_INDEX_VERSION:
+                # Capacity formulas changed (or brand new file) - start over
+                if version:
+                    debug.print(f"Carrier index v{version} is stale, rebuilding")
+                self._db.execute("DROP TABLE IF EXISTS carriers")
+                self._db.execute(f"PRAGMA user_version = {CARRIER_INDEX_VERSION}")
+            self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "CarrierLibrary":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM carriers").fetchone()[0])
+
+    # -------------------------------------------------------------------------
+    # Scanning
+    # -------------------------------------------------------------------------
+
+    def scan(
+        self,
+        paths: list[str | Path],
+        recursive: bool = True,
+        workers: int = BATCH_DEFAULT_WORKERS,
+        prune: bool = True,
+    ) -> ScanStats:
+        """
+        Bring the index up to date with some files and folders.
+
+        Args:
+            paths: Image files and/or directories
+            recursive: Descend into subdirectories
+            workers: Images measured in parallel
+            prune: Drop index entries under the scanned folders whose files
+                are gone
+
+        Returns:
+            ScanStats
+        """
+        from .batch import BatchProcessor
+
+        start = time.monotonic()
+        stats = ScanStats()
+
+        files = sorted({p.resolve() for p in BatchProcessor().find_images(paths, recursive)})
+        with self._lock:
+            known = {
+                row["path"]: (row["mtime"], row["file_size"])
+                for row in self._db.execute("SELECT path, mtime, file_size FROM carriers")
+            }
+
+        pending = []
+        for path in files:
+            try:
+                st = path.stat()
+            except OSError as e:
+                stats.failed += 1
+                stats.errors.append((str(path), str(e)))
+                continue
+            if known.get(str(path)) == (st.st_mtime, st.st_size):
+                stats.unchanged += 1
+            else:
+                pending.append((path, st.st_mtime))
+
+        records = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(self._index_one, path, mtime): path for path, mtime in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    record, reused = future.result()
+                except Exception as e:
+                    stats.failed += 1
+                    stats.errors.append((str(path), str(e)))
+                    debug.print(f"Carrier index: skipping {path}: {e}")
+                    continue
+                records.append(record)
+                stats.reused += reused
+                if str(path) in known:
+                    stats.updated += 1
+                else:
+                    stats.added += 1
+
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO carriers ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(getattr(r, c) for c in _COLUMNS) for r in records],
+            )
+            if prune:
+                stats.removed = self._prune(paths, {str(p) for p in files}, known)
+
+        stats.seconds = time.monotonic() - start
+        debug.print(
+            f"Carrier scan: +{stats.added} ~{stats.updated} ={stats.unchanged} "
+            f"-{stats.removed} !{stats.failed} in {stats.seconds:.2f}s"
+        )
+        return stats
+
+    def _index_one(self, path: Path, mtime: float) -> tuple[CarrierRecord, bool]:
+        data = path.read_bytes()
+        content_hash = _content_hash(data)
+
+        # Same bytes already indexed under another path (or before an edit
+        # that changed nothing) - copy the capacities, skip the decode
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM carriers WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+        if row is not None:
+            known = CarrierRecord(**dict(row))
+            known.path, known.mtime, known.indexed_at = str(path), mtime, time.time()
+            return known, True
+
+        return _measure(path, data, content_hash, mtime), False
+
+    def _prune(self, roots: list[str | Path], found: set[str], known: dict) -> int:
+        """Delete rows under the scanned roots that weren't found. Lock held."""
+        prefixes = []
+        for root in roots:
+            root = Path(root).resolve()
+            if root.is_dir():
+                prefixes.append(str(root) + os.sep)
+            else:
+                prefixes.append(str(root))
+
+        stale = [
+            (path,)
+            for path in known
+            if path not in found and any(path == p or path.startswith(p) for p in prefixes)
+        ]
+        self._db.executemany("DELETE FROM carriers WHERE path = ?", stale)
+        return len(stale)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def get(self, path: str | Path) -> CarrierRecord | None:
+        """The index entry for one file, if it has one."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM carriers WHERE path = ?", (str(Path(path).resolve()),)
+            ).fetchone()
+        return CarrierRecord(**dict(row)) if row else None
+
+    def all(self) -> list[CarrierRecord]:
+        """Every indexed carrier, by path."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM carriers ORDER BY path").fetchall()
+        return [CarrierRecord(**dict(row)) for row in rows]
+
+    def pick(
+        self,
+        payload_size: int,
+        mode: str = EMBED_MODE_LSB,
+        dct_output_format: str = "png",
+        strategy: str = "smallest",
+        limit: int = 1,
+        prefix_size: int = _TEXT_PREFIX_SIZE,
+    ) -> list[CarrierRecord]:
+        """
+        Carriers that will hold a payload, best first.
+
+        Args:
+            payload_size: Payload bytes before encryption
+            mode: 'lsb' or 'dct'
+            dct_output_format: 'png' (scipy DCT) or 'jpeg' (native JPEG)
+            strategy: 'smallest' - tightest fit (least spare capacity), or
+                'fastest' - least work to embed (fewest pixels)
+            limit: How many to return
+            prefix_size: Payload-type prefix (see worst_case_encrypted_size)
+
+        Returns:
+            Matching records (empty if nothing fits)
+        """
+        from .steganography import HEADER_OVERHEAD
+
+        if strategy not in PICK_STRATEGIES:
+            raise ValueError(f"strategy must be one of {PICK_STRATEGIES}, got {strategy!r}")
+        if mode not in (EMBED_MODE_LSB, EMBED_MODE_DCT):
+            raise ValueError(f"mode must be 'lsb' or 'dct', got {mode!r}")
+        if dct_output_format not in ("png", "jpeg"):
+            raise ValueError(
+                f"dct_output_format must be 'png' or 'jpeg', got {dct_output_format!r}"
+            )
+
+        column = {
+            (EMBED_MODE_LSB, "png"): "lsb_capacity",
+            (EMBED_MODE_LSB, "jpeg"): "lsb_capacity",
+            (EMBED_MODE_DCT, "png"): "dct_capacity",
+            (EMBED_MODE_DCT, "jpeg"): "jpegio_capacity",
+        }[(mode, dct_output_format)]
+        order = f"{column} ASC" if strategy == "smallest" else "width * height ASC, file_size ASC"
+
+        needed = worst_case_encrypted_size(payload_size, prefix_size)
+        if column == "lsb_capacity":
+            # calculate_capacity has already taken the crypto header (and the
+            # LSB length prefix) off; the DCT capacities hold the whole blob
+            needed -= HEADER_OVERHEAD
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM carriers WHERE {column} >= ? AND width * height <= ? "
+                f"ORDER BY {order}, path LIMIT ?",
+                (needed, MAX_IMAGE_PIXELS, limit),
+            ).fetchall()
+        return [CarrierRecord(**dict(row)) for row in rows]
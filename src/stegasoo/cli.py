@@ -27,7 +27,8 @@ Click's @group decorator creates a hierarchy of commands:
     │   ├── capacity
     │   ├── strip
     │   ├── peek
-    │   └── exif
+    │   ├── exif
+    │   └── kdf
     └── admin/                   <- Administration group
         ├── recover
         └── generate-key
@@ -77,16 +78,19 @@ import click
 
 from .batch import (
     BatchProcessor,
-    batch_capacity_check,
+    iter_capacity_check,
     print_batch_result,
 )
 from .constants import (
     DEFAULT_PASSPHRASE_WORDS,  # v3.2.0: renamed from DEFAULT_PHRASE_WORDS
     DEFAULT_PIN_LENGTH,
+    DICTIONARY_DEFAULT_SIZE,
     MAX_FILE_PAYLOAD_SIZE,
     MAX_MESSAGE_SIZE,
+    MAX_STREAM_PAYLOAD_SIZE,
     __version__,
 )
+from .exceptions import StegasooError
 
 # Click context settings - these apply to all commands
 # help_option_names lets users use either -h or --help
@@ -195,6 +199,7 @@ def encode(
 
     from .encode import encode as stegasoo_encode
     from .encode import encode_file as stegasoo_encode_file
+    from .steganography import ENCRYPTION_OVERHEAD
 
     if not message and not file_payload:
         raise click.UsageError("Either --message or --file is required")
@@ -210,7 +215,7 @@ def encode(
     # Get image capacity
     with Image.open(carrier) as img:
         width, height = img.size
-        capacity_bytes = (width * height * 3 // 8) - 69  # v3.2.0: corrected overhead
+        capacity_bytes = (width * height * 3 // 8) - ENCRYPTION_OVERHEAD
 
     if dry_run:
         result = {
@@ -433,6 +438,18 @@ def decode(ctx, image, reference, passphrase, pin, output):
 # 4. PARALLEL PROCESSING
 #    --jobs/-j controls worker count. Default is 4 for good balance between
 #    speed and memory usage. Each worker loads images into memory.
+#    --backend picks threads or processes; "auto" uses processes for the
+#    GIL-bound modes (LSB, DCT/JPEG) so -j actually scales with cores.
+#
+# 5. RESUMABLE RUNS
+#    --manifest results.jsonl writes one JSON line per image as it finishes.
+#    Re-run the same command with --resume and the images already marked
+#    successful are skipped - handy when 100k images meet one power cut.
+#
+# 6. SCHEDULING
+#    Each image's header is probed to guess how long and how much memory it
+#    will take. Biggest jobs start first (so they don't finish last, alone),
+#    and --memory-budget caps the guessed working set running at once.
 
 
 @cli.group()
@@ -443,6 +460,12 @@ def batch():
 
 @batch.command("encode")
 @click.argument("images", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--reference",
+    required=True,
+    type=click.Path(exists=True),
+    help="Reference photo (shared secret)",
+)
 @click.option("-m", "--message", help="Message to encode in all images")
 @click.option(
     "-f", "--file", "file_payload", type=click.Path(exists=True), help="File to embed in all images"
@@ -460,12 +483,48 @@ def batch():
 )
 @click.option("--pin", prompt=True, hide_input=True, confirmation_prompt=True, help="PIN code")
 @click.option("-r", "--recursive", is_flag=True, help="Search directories recursively")
+@click.option(
+    "--mode",
+    "embed_mode",
+    type=click.Choice(["lsb", "dct"]),
+    default="lsb",
+    help="Embedding mode (default: lsb)",
+)
+@click.option(
+    "--dct-format",
+    type=click.Choice(["png", "jpeg"]),
+    default="png",
+    help="DCT output format (default: png)",
+)
 @click.option("-j", "--jobs", default=4, help="Parallel workers (default: 4)")
+@click.option(
+    "--backend",
+    type=click.Choice(["auto", "thread", "process"]),
+    default="auto",
+    help="Worker type (default: auto - processes for LSB and DCT/JPEG)",
+)
+@click.option(
+    "--shared-payload",
+    is_flag=True,
+    help="Encrypt once for all images (much faster; outputs share one ciphertext)",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(dir_okay=False),
+    help="Write per-image results to this JSONL file as they finish",
+)
+@click.option("--resume", is_flag=True, help="Skip images the manifest lists as done")
+@click.option(
+    "--memory-budget",
+    type=click.IntRange(min=0),
+    help="MB of estimated working set in flight at once (default: auto, 0 = no limit)",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Show detailed output")
 @click.pass_context
 def batch_encode(
     ctx,
     images,
+    reference,
     message,
     file_payload,
     output_dir,
@@ -473,7 +532,14 @@ def batch_encode(
     passphrase,
     pin,
     recursive,
+    embed_mode,
+    dct_format,
     jobs,
+    backend,
+    shared_payload,
+    manifest,
+    resume,
+    memory_budget,
     verbose,
 ):
     """
@@ -481,34 +547,63 @@ def batch_encode(
 
     Examples:
 
-        stegasoo batch encode *.png -m "Secret" --passphrase --pin
+        stegasoo batch encode *.png --reference ref.jpg -m "Secret" --passphrase --pin
+
+        stegasoo batch encode ./photos/ -r --reference ref.jpg -o ./encoded/ -j 8
 
-        stegasoo batch encode ./photos/ -r -o ./encoded/
+    --shared-payload runs the key derivation once for the whole batch instead
+    of once per image. The catch: every output carries the same ciphertext,
+    so someone holding two of them can tell they hide the same message.
     """
     if not message and not file_payload:
         raise click.UsageError("Either --message or --file is required")
+    if resume and not manifest:
+        raise click.UsageError("--resume needs --manifest")
 
-    processor = BatchProcessor(max_workers=jobs)
+    processor = BatchProcessor(
+        max_workers=jobs,
+        backend=backend,
+        memory_budget=memory_budget * 1024 * 1024 if memory_budget is not None else None,
+    )
 
     # Progress callback
     def progress(current, total, item):
         if not ctx.obj.get("json"):
             status = "✓" if item.status.value == "success" else "✗"
-            click.echo(f"[{current}/{total}] {status} {item.input_path.name}")
+            click.echo(f"[{current}/{total or '?'}] {status} {item.input_path.name}")
 
     # v3.2.0: Use 'passphrase' key instead of 'phrase'
-    credentials = {"passphrase": passphrase, "pin": pin}
+    credentials = {
+        "reference_photo": Path(reference).read_bytes(),
+        "passphrase": passphrase,
+        "pin": pin,
+    }
 
-    result = processor.batch_encode(
-        images=list(images),
-        message=message,
-        file_payload=Path(file_payload) if file_payload else None,
-        output_dir=Path(output_dir) if output_dir else None,
-        output_suffix=suffix,
-        credentials=credentials,
-        recursive=recursive,
-        progress_callback=progress if not ctx.obj.get("json") else None,
-    )
+    try:
+        result = processor.batch_encode(
+            images=list(images),
+            message=message,
+            file_payload=Path(file_payload) if file_payload else None,
+            output_dir=Path(output_dir) if output_dir else None,
+            output_suffix=suffix,
+            credentials=credentials,
+            recursive=recursive,
+            progress_callback=progress if not ctx.obj.get("json") else None,
+            embed_mode=embed_mode,
+            dct_output_format=dct_format,
+            shared_payload=shared_payload,
+            manifest=manifest,
+            resume=resume,
+            # With a manifest the per-image results live there, not in memory
+            keep_items=not manifest,
+        )
+    except (StegasooError, ValueError) as e:
+        # Shared payload: bad message/credentials fail the whole batch up front
+        if ctx.obj.get("json"):
+            click.echo(json.dumps({"status": "error", "error": str(e)}, indent=2))
+        else:
+            click.echo(f"✗ Batch encoding failed: {e}", err=True)
+        raise SystemExit(1)
 
     if ctx.obj.get("json"):
         click.echo(result.to_json())
@@ -518,33 +613,81 @@ def batch_encode(
 
 @batch.command("decode")
 @click.argument("images", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--reference",
+    required=True,
+    type=click.Path(exists=True),
+    help="Reference photo (shared secret)",
+)
 @click.option("-o", "--output-dir", type=click.Path(), help="Output directory for file payloads")
 @click.option("--passphrase", prompt=True, hide_input=True, help="Passphrase")
 @click.option("--pin", prompt=True, hide_input=True, help="PIN code")
 @click.option("-r", "--recursive", is_flag=True, help="Search directories recursively")
 @click.option("-j", "--jobs", default=4, help="Parallel workers (default: 4)")
+@click.option(
+    "--backend",
+    type=click.Choice(["auto", "thread", "process"]),
+    default="auto",
+    help="Worker type (default: auto)",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(dir_okay=False),
+    help="Write per-image results to this JSONL file as they finish",
+)
+@click.option("--resume", is_flag=True, help="Skip images the manifest lists as done")
+@click.option(
+    "--memory-budget",
+    type=click.IntRange(min=0),
+    help="MB of estimated working set in flight at once (default: auto, 0 = no limit)",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Show detailed output")
 @click.pass_context
-def batch_decode(ctx, images, output_dir, passphrase, pin, recursive, jobs, verbose):
+def batch_decode(
+    ctx,
+    images,
+    reference,
+    output_dir,
+    passphrase,
+    pin,
+    recursive,
+    jobs,
+    backend,
+    manifest,
+    resume,
+    memory_budget,
+    verbose,
+):
     """
     Decode messages from multiple images.
 
     Examples:
 
-        stegasoo batch decode encoded*.png --passphrase --pin
+        stegasoo batch decode encoded*.png --reference ref.jpg --passphrase --pin
 
-        stegasoo batch decode ./encoded/ -r -o ./extracted/
+        stegasoo batch decode ./encoded/ -r --reference ref.jpg -o ./extracted/
     """
-    processor = BatchProcessor(max_workers=jobs)
+    if resume and not manifest:
+        raise click.UsageError("--resume needs --manifest")
+
+    processor = BatchProcessor(
+        max_workers=jobs,
+        backend=backend,
+        memory_budget=memory_budget * 1024 * 1024 if memory_budget is not None else None,
+    )
 
     # Progress callback
     def progress(current, total, item):
         if not ctx.obj.get("json"):
             status = "✓" if item.status.value == "success" else "✗"
-            click.echo(f"[{current}/{total}] {status} {item.input_path.name}")
+            click.echo(f"[{current}/{total or '?'}] {status} {item.input_path.name}")
 
     # v3.2.0: Use 'passphrase' key instead of 'phrase'
-    credentials = {"passphrase": passphrase, "pin": pin}
+    credentials = {
+        "reference_photo": Path(reference).read_bytes(),
+        "passphrase": passphrase,
+        "pin": pin,
+    }
 
     result = processor.batch_decode(
         images=list(images),
@@ -552,6 +695,9 @@ def batch_decode(ctx, images, output_dir, passphrase, pin, recursive, jobs, verb
         credentials=credentials,
         recursive=recursive,
         progress_callback=progress if not ctx.obj.get("json") else None,
+        manifest=manifest,
+        resume=resume,
+        keep_items=not manifest,
     )
 
     if ctx.obj.get("json"):
@@ -563,21 +709,35 @@ def batch_decode(ctx, images, output_dir, passphrase, pin, recursive, jobs, verb
 @batch.command("check")
 @click.argument("images", nargs=-1, required=True, type=click.Path(exists=True))
 @click.option("-r", "--recursive", is_flag=True, help="Search directories recursively")
+@click.option(
+    "--exact",
+    is_flag=True,
+    help="Also work out native JPEG (dct + jpeg) capacity from the coefficients (slower)",
+)
+@click.option("-j", "--jobs", default=4, help="Parallel workers (default: 4)")
 @click.pass_context
-def batch_check(ctx, images, recursive):
+def batch_check(ctx, images, recursive, exact, jobs):
     """
     Check capacity of multiple images.
 
+    Only headers are read, several images at a time, and rows are printed
+    as each image is checked (so the order can differ from the input).
+
     Examples:
 
         stegasoo batch check *.png
 
-        stegasoo batch check ./photos/ -r
+        stegasoo batch check ./photos/ -r -j 16
     """
-    results = batch_capacity_check(list(images), recursive)
+    results = iter_capacity_check(list(images), recursive, exact=exact, max_workers=jobs)
 
     if ctx.obj.get("json"):
-        click.echo(json.dumps(results, indent=2))
+        # Still one JSON array, just written an element at a time
+        click.echo("[", nl=False)
+        for index, item in enumerate(results):
+            element = json.dumps(item, indent=2).replace("\n", "\n  ")
+            click.echo(f"{',' if index else ''}\n  {element}", nl=False)
+        click.echo("\n]")
     else:
         click.echo(f"{'Image':<40} {'Size':<12} {'Capacity':<12} {'Status'}")
         click.echo("─" * 80)
@@ -799,6 +959,7 @@ def info(ctx, full):
         "limits": {
             "max_message_bytes": MAX_MESSAGE_SIZE,
             "max_file_payload_bytes": MAX_FILE_PAYLOAD_SIZE,
+            "max_stream_payload_bytes": MAX_STREAM_PAYLOAD_SIZE,
         },
         "system": {
             "cpu_mhz": cpu_freq,
@@ -874,6 +1035,8 @@ def channel(ctx):
         stegasoo channel qr
 
         stegasoo channel qr -o channel-key.png
+
+        stegasoo channel train-dictionary old-messages/ --save
     """
     pass
 
@@ -1131,6 +1294,206 @@ def channel_clear(ctx, project, user):
             click.echo("No channel key files found")
 
 
+@channel.command("train-dictionary")
+@click.argument("corpus", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--lines", is_flag=True, help="Treat each line of the corpus files as a separate message"
+)
+@click.option(
+    "--size",
+    default=DICTIONARY_DEFAULT_SIZE,
+    show_default=True,
+    help="Maximum dictionary size in bytes",
+)
+@click.option("--save", is_flag=True, help="Install to project config (./config/dictionaries)")
+@click.option("--save-user", is_flag=True, help="Install to user config (~/.stegasoo/)")
+@click.option("-o", "--output", type=click.Path(), help="Write the dictionary to this file")
+@click.pass_context
+def channel_train_dictionary(ctx, corpus, lines, size, save, save_user, output):
+    """
+    Train a zstd dictionary from example messages.
+
+    Short messages barely compress on their own; with a dictionary trained
+    on what the channel usually sends they shrink a lot. Everyone on the
+    channel needs the same dictionary file to decode.
+
+    --save / --save-user install it for the configured channel key (or for
+    public mode if there isn't one); give both to install it in both places.
+
+    CORPUS is files and/or directories (searched recursively), one message
+    per file unless --lines is given.
+
+    Examples:
+
+        stegasoo channel train-dictionary old-messages/ --save
+
+        stegasoo channel train-dictionary chat.log --lines -o channel.zdict
+    """
+    from .dictionaries import dictionary_id, save_dictionary, train_dictionary
+
+    samples = []
+    for entry in corpus:
+        path = Path(entry)
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            data = file.read_bytes()
+            samples.extend(data.splitlines() if lines else [data])
+
+    try:
+        dictionary = train_dictionary(samples, size)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+
+    saved = []
+    if output:
+        Path(output).write_bytes(dictionary)
+        saved.append(Path(output))
+    if save:
+        saved.append(save_dictionary(dictionary, "project"))
+    if save_user:
+        saved.append(save_dictionary(dictionary, "user"))
+
+    if ctx.obj.get("json"):
+        click.echo(
+            json.dumps(
+                {
+                    "dictionary_id": f"{dictionary_id(dictionary):08x}",
+                    "size": len(dictionary),
+                    "samples": len(samples),
+                    "saved_to": [str(p) for p in saved],
+                },
+                indent=2,
+            )
+        )
+    else:
+        click.echo(
+            f"Trained dictionary {dictionary_id(dictionary):08x} "
+            f"({len(dictionary):,} bytes) from {len(samples):,} samples"
+        )
+        for path in saved:
+            click.echo(f"Saved to: {path}")
+        if not saved:
+            click.echo("Nothing saved - use --save, --save-user or -o")
+
+
+# =============================================================================
+# CARRIER LIBRARY COMMANDS (v4.3.0)
+# =============================================================================
+#
+# `carriers scan` indexes folders of carrier photos into SQLite (capacities
+# for every embedding path, worked out once). `carriers pick` then answers
+# "which photo should I use for this payload?" straight from the index.
+
+
+@cli.group()
+@click.option(
+    "--db",
+    "db_path",
+    type=click.Path(),
+    help="Index database (default: $STEGASOO_CARRIER_DB or ~/.stegasoo/carriers.db)",
+)
+@click.pass_context
+def carriers(ctx, db_path):
+    """
+    Index carrier images and pick one that fits.
+
+    Examples:
+
+        stegasoo carriers scan ~/carriers
+
+        stegasoo carriers pick --payload-size 40000 --mode dct
+    """
+    ctx.obj["carrier_db"] = db_path
+
+
+@carriers.command("scan")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--no-recursive", is_flag=True, help="Don't descend into subdirectories")
+@click.option("-j", "--jobs", default=4, help="Parallel workers (default: 4)")
+@click.pass_context
+def carriers_scan(ctx, paths, no_recursive, jobs):
+    """
+    Add or refresh carriers in the index.
+
+    Unchanged files (same mtime and size) are skipped, so re-running on a
+    big folder is quick. Entries for deleted files are dropped.
+
+    Examples:
+
+        stegasoo carriers scan ~/carriers
+
+        stegasoo carriers scan new-photos/ -j 8
+    """
+    from .carriers import CarrierLibrary
+
+    with CarrierLibrary(ctx.obj.get("carrier_db")) as library:
+        stats = library.scan(list(paths), recursive=not no_recursive, workers=jobs)
+        total = len(library)
+
+    if ctx.obj.get("json"):
+        click.echo(json.dumps({**stats.to_dict(), "total": total}, indent=2))
+    else:
+        click.echo(
+            f"Indexed {stats.added} new, {stats.updated} changed, "
+            f"{stats.unchanged} unchanged, {stats.removed} removed "
+            f"({stats.seconds:.1f}s) - {total:,} carriers in library"
+        )
+        for path, error in stats.errors:
+            click.echo(f"  ⚠ {path}: {error}", err=True)
+
+
+@carriers.command("pick")
+@click.option("--payload-size", type=int, required=True, help="Payload size in bytes")
+@click.option(
+    "--mode", type=click.Choice(["lsb", "dct"]), default="lsb", help="Embedding mode (default: lsb)"
+)
+@click.option(
+    "--dct-format",
+    type=click.Choice(["png", "jpeg"]),
+    default="png",
+    help="DCT output format (default: png)",
+)
+@click.option(
+    "--strategy",
+    type=click.Choice(["smallest", "fastest"]),
+    default="smallest",
+    help="smallest = tightest fit, fastest = fewest pixels (default: smallest)",
+)
+@click.option("-n", "--count", default=1, help="Number of carriers to list (default: 1)")
+@click.pass_context
+def carriers_pick(ctx, payload_size, mode, dct_format, strategy, count):
+    """
+    Pick an indexed carrier that will hold a payload.
+
+    Nothing is decoded - the answer comes from the index. Capacity is
+    checked against the worst-case encrypted size, so a picked carrier
+    won't bounce on random padding.
+
+    Examples:
+
+        stegasoo carriers pick --payload-size 40000 --mode dct
+
+        stegasoo carriers pick --payload-size 2000000 --strategy fastest -n 5
+    """
+    from .carriers import CarrierLibrary
+
+    with CarrierLibrary(ctx.obj.get("carrier_db")) as library:
+        picks = library.pick(payload_size, mode, dct_format, strategy, count)
+
+    if ctx.obj.get("json"):
+        click.echo(json.dumps([p.to_dict() for p in picks], indent=2))
+        return
+
+    if not picks:
+        click.echo(f"No indexed carrier holds {payload_size:,} bytes in {mode} mode", err=True)
+        raise SystemExit(1)
+
+    for record in picks:
+        capacity = record.capacity(mode, dct_format)
+        click.echo(f"{record.path}  ({record.width}x{record.height}, {capacity:,} bytes)")
+
+
 # =============================================================================
 # TOOLS COMMANDS
 # =============================================================================
@@ -1510,6 +1873,83 @@ def tools_convert(image, fmt, quality, output):
     click.echo(f"Converted to: {output}")
 
 
+@tools.command("kdf")
+@click.option("--calibrate", is_flag=True, help="Measure this machine and suggest a custom profile")
+@click.option(
+    "--target-ms", type=int, default=1000, help="Calibration target latency (default: 1000)"
+)
+@click.option("--max-memory-mb", type=int, help="Calibration memory ceiling (default: 256)")
+@click.option("--json", "as_json", is_flag=True, help="Output as JSON")
+def tools_kdf(calibrate, target_ms, max_memory_mb, as_json):
+    """Show KDF profiles, or calibrate a custom one.
+
+    The profile only affects encoding - every image records its own KDF
+    cost, so decoders never need to be told.
+
+    Examples:
+
+        stegasoo tools kdf
+        stegasoo tools kdf --calibrate --target-ms 500
+        STEGASOO_KDF_PROFILE=pi-low stegasoo encode ...
+    """
+    from .constants import KDF_PBKDF2_SHA512, KDF_PROFILES
+    from .kdf import (
+        KDF_MEMORY_MB_ENV_VAR,
+        KDF_PARALLELISM_ENV_VAR,
+        KDF_PROFILE_ENV_VAR,
+        KDF_TIME_COST_ENV_VAR,
+        _time_kdf,
+        calibrate_kdf,
+        get_active_kdf_params,
+        get_kdf_profile,
+    )
+
+    if calibrate:
+        params = calibrate_kdf(target_ms=target_ms, max_memory_mb=max_memory_mb)
+        measured_ms = round(_time_kdf(params) * 1000)
+
+        if as_json:
+            click.echo(json.dumps({**params.to_dict(), "measured_ms": measured_ms}, indent=2))
+            return
+
+        click.echo(f"\n  Calibrated: {params.describe()} ({measured_ms} ms)")
+        if params.algorithm == KDF_PBKDF2_SHA512:
+            # The custom profile is Argon2-only; these numbers don't fit it
+            click.echo("\n  argon2-cffi is not installed, so encoding uses the PBKDF2")
+            click.echo("  fallback. Its cost can't be set through the custom profile.")
+            click.echo()
+            return
+
+        click.echo("\n  To use it:")
+        click.echo(f"    export {KDF_PROFILE_ENV_VAR}=custom")
+        click.echo(f"    export {KDF_TIME_COST_ENV_VAR}={params.time_cost}")
+        click.echo(f"    export {KDF_MEMORY_MB_ENV_VAR}={params.memory_cost // 1024}")
+        click.echo(f"    export {KDF_PARALLELISM_ENV_VAR}={params.parallelism}")
+        click.echo()
+        return
+
+    active = get_active_kdf_params()
+    profiles = [get_kdf_profile(name) for name in KDF_PROFILES]
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {"active": active.to_dict(), "profiles": [p.to_dict() for p in profiles]},
+                indent=2,
+            )
+        )
+        return
+
+    click.echo("\n  KDF Profiles")
+    click.echo(f"  {'─' * 45}")
+    for params in profiles:
+        marker = "*" if params.name == active.name else " "
+        click.echo(f"  {marker} {params.name:<10} {params.describe()}")
+    if active.name not in KDF_PROFILES:
+        click.echo(f"  * {active.name:<10} {active.describe()}")
+    click.echo()
+
+
 # =============================================================================
 # ADMIN COMMANDS (Web UI administration)
 # =============================================================================
@@ -3,11 +3,37 @@ Stegasoo Compression Module
 
 Provides transparent compression/decompression for payloads before encryption.
 Supports multiple algorithms with automatic detection on decompression.
+
+v4.3.0: Actually used now - encrypt_message compresses before encrypting
+(FLAG_COMPRESSED in the crypto header). decompress() takes a max_size so a
+hostile header can't make us inflate gigabytes.
+
+v4.3.0: estimate_compression() samples blocks of the payload instead of
+compressing all of it, skips data that's already compressed (JPEG, ZIP, MP4)
+and picks the highest zstd level that fits a latency budget. ZSTD level 19
+on a multi-MB payload is seconds on a Pi - for a couple of percent.
+
+v4.3.0: ZSTD_DICT compresses with a trained dictionary. Its header carries
+the dictionary ID after the original size:
+    MAGIC (4) + ALGORITHM (1) + ORIGINAL_SIZE (4) + DICT_ID (4) + DATA
 """
 
+import math
 import struct
+import time
 import zlib
+from collections.abc import Sequence
+from dataclasses import dataclass
 from enum import IntEnum
+from functools import lru_cache
+
+from .constants import (
+    COMPRESSION_ENTROPY_THRESHOLD,
+    COMPRESSION_INCOMPRESSIBLE_RATIO,
+    COMPRESSION_SAMPLE_BLOCK_SIZE,
+    COMPRESSION_SAMPLE_BLOCKS,
+    COMPRESSION_TIME_BUDGET_MS,
+)
 
 # Optional LZ4 support (faster, slightly worse ratio)
 try:
@@ -33,6 +59,7 @@ class CompressionAlgorithm(IntEnum):
     ZLIB = 1
     LZ4 = 2
     ZSTD = 3  # v4.2.0: Best ratio, fast compression
+    ZSTD_DICT = 4  # v4.3.0: ZSTD with a trained dictionary (see dictionaries.py)
 
 
 # Magic bytes for compressed payloads
@@ -44,6 +71,20 @@ MIN_COMPRESS_SIZE = 64
 # Compression level for zlib (1-9, higher = better ratio but slower)
 ZLIB_LEVEL = 6
 
+# Default zstd level when nobody asked for a latency budget
+ZSTD_LEVEL = 19
+
+# Levels the estimator may pick from, cheapest first. LZ4 frames have a level
+# too, but the fast default is the whole point of LZ4.
+ESTIMATOR_LEVELS = {
+    CompressionAlgorithm.ZLIB: (1, 3, ZLIB_LEVEL, 9),
+    CompressionAlgorithm.LZ4: (0,),
+    CompressionAlgorithm.ZSTD: (1, 3, 6, 9, 12, 15, ZSTD_LEVEL),
+}
+
+# ~95% bound on the mean of the sampled block ratios (normal approximation)
+_CONFIDENCE_Z = 1.96
+
 
 class CompressionError(Exception):
     """Raised when compression/decompression fails."""
@@ -51,7 +92,12 @@ class CompressionError(Exception):
     pass
 
 
-def compress(data: bytes, algorithm: CompressionAlgorithm = CompressionAlgorithm.ZLIB) -> bytes:
+def compress(
+    data: bytes,
+    algorithm: CompressionAlgorithm = CompressionAlgorithm.ZLIB,
+    level: int | None = None,
+    dictionary: bytes | None = None,
+) -> bytes:
     """
     Compress data with specified algorithm.
 
@@ -60,77 +106,149 @@ def compress(data: bytes, algorithm: CompressionAlgorithm = CompressionAlgorithm
     Args:
         data: Raw bytes to compress
         algorithm: Compression algorithm to use
+        level: Algorithm-specific level (None = ZLIB_LEVEL / ZSTD_LEVEL).
+            The level isn't stored - decompression doesn't need it.
+        dictionary: Trained dictionary for ZSTD_DICT (without one, ZSTD_DICT
+            falls back to plain ZSTD)
 
     Returns:
         Compressed data with header, or original data if compression didn't help
     """
-    if len(data) < MIN_COMPRESS_SIZE:
+    packed = compress_parts((data,), algorithm, level, dictionary)
+    return _wrap_uncompressed(data) if packed is None else packed
+
+
+def compress_parts(
+    parts: Sequence[bytes | bytearray | memoryview],
+    algorithm: CompressionAlgorithm = CompressionAlgorithm.ZLIB,
+    level: int | None = None,
+    dictionary: bytes | None = None,
+) -> bytes | None:
+    """
+    Compress the concatenation of parts, without ever building it.
+
+    encrypt_message has a few bytes of type/filename prefix in front of a
+    multi-MB body. Gluing them together just to compress the result costs
+    a full copy of the body; feeding the parts to a streaming compressor
+    one after the other costs nothing.
+
+    Args:
+        parts: Byte strings, compressed as if joined
+        algorithm, level, dictionary: As for compress()
+
+    Returns:
+        Compressed data with header, or None where compress() would fall
+        back to the uncompressed wrapper (too small, NONE, didn't shrink)
+    """
+    size = sum(len(part) for part in parts)
+    if size < MIN_COMPRESS_SIZE:
         # Too small to benefit from compression
-        return _wrap_uncompressed(data)
+        return None
 
     if algorithm == CompressionAlgorithm.NONE:
-        return _wrap_uncompressed(data)
+        return None
 
-    elif algorithm == CompressionAlgorithm.ZLIB:
-        compressed = zlib.compress(data, level=ZLIB_LEVEL)
+    if algorithm == CompressionAlgorithm.ZSTD_DICT:
+        if dictionary is not None and HAS_ZSTD:
+            return _compress_with_dictionary(parts, size, level, dictionary)
+        algorithm = CompressionAlgorithm.ZSTD
 
-    elif algorithm == CompressionAlgorithm.LZ4:
-        if not HAS_LZ4:
-            # Fall back to zlib if LZ4 not available
-            compressed = zlib.compress(data, level=ZLIB_LEVEL)
-            algorithm = CompressionAlgorithm.ZLIB
-        else:
-            compressed = lz4.frame.compress(data)
-
-    elif algorithm == CompressionAlgorithm.ZSTD:
-        if not HAS_ZSTD:
-            # Fall back to zlib if ZSTD not available
-            compressed = zlib.compress(data, level=ZLIB_LEVEL)
-            algorithm = CompressionAlgorithm.ZLIB
-        else:
-            cctx = zstd.ZstdCompressor(level=19)  # High compression level
-            compressed = cctx.compress(data)
-    else:
+    if algorithm not in ESTIMATOR_LEVELS:
         raise CompressionError(f"Unknown compression algorithm: {algorithm}")
 
+    if _resolve_algorithm(algorithm) != algorithm:
+        # Fall back to zlib (at its own level) if LZ4/ZSTD isn't installed
+        algorithm, level = CompressionAlgorithm.ZLIB, None
+    chunks = _compress_stream(parts, size, algorithm, level)
+
     # Only use compression if it actually reduced size
-    if len(compressed) >= len(data):
-        return _wrap_uncompressed(data)
+    if sum(len(chunk) for chunk in chunks) >= size:
+        return None
 
     # Build header: MAGIC + algorithm + original_size + compressed_data
-    header = COMPRESSION_MAGIC + struct.pack("<BI", algorithm, len(data))
-    return header + compressed
-
-
-def decompress(data: bytes) -> bytes:
+    header = COMPRESSION_MAGIC + struct.pack("<BI", algorithm, size)
+    return b"".join([header, *chunks])
+
+
+def _compress_with_dictionary(
+    parts: Sequence[bytes | bytearray | memoryview],
+    size: int,
+    level: int | None,
+    dictionary: bytes,
+) -> bytes | None:
+    """ZSTD_DICT payload, or None if it didn't help."""
+    zdict = _zstd_dictionary(dictionary)
+    # Our header already has the size and dictionary ID - don't repeat them
+    # in the frame, every byte counts on a 200-byte message
+    cctx = zstd.ZstdCompressor(
+        level=ZSTD_LEVEL if level is None else level,
+        dict_data=zdict,
+        write_content_size=False,
+        write_dict_id=False,
+    )
+    cobj = cctx.compressobj(size=size)
+    chunks = [cobj.compress(part) for part in parts]
+    chunks.append(cobj.flush())
+
+    header = COMPRESSION_MAGIC + struct.pack(
+        "<BII", CompressionAlgorithm.ZSTD_DICT, size, zdict.dict_id()
+    )
+    if len(header) + sum(len(chunk) for chunk in chunks) >= size + 9:
+        return None
+    return b"".join([header, *chunks])
+
+
+def decompress(
+    data: bytes | bytearray | memoryview, max_size: int | None = None
+) -> bytes | bytearray | memoryview:
     """
     Decompress data, auto-detecting algorithm from header.
 
+    Any bytes-like object works. A memoryview is read in place - the
+    compressed body is never copied out before inflating it - and an
+    uncompressed (NONE) payload comes back as a view of it.
+
     Args:
         data: Potentially compressed data
+        max_size: Refuse to produce more than this many bytes (decompression
+            bomb guard). Checked against the header before inflating, and
+            the decompressors are capped so a lying header doesn't help.
 
     Returns:
         Decompressed data (or original if not compressed)
+
+    Raises:
+        CompressionError: Corrupt data, missing library or dictionary, or
+            over max_size
     """
     # Check for compression magic
-    if not data.startswith(COMPRESSION_MAGIC):
+    if bytes(data[: len(COMPRESSION_MAGIC)]) != COMPRESSION_MAGIC:
         # Not compressed by us, return as-is
         return data
 
     if len(data) < 9:  # MAGIC(4) + ALGO(1) + SIZE(4)
         raise CompressionError("Truncated compression header")
 
-    # Parse header
-    algorithm = CompressionAlgorithm(data[4])
-    original_size = struct.unpack("<I", data[5:9])[0]
-    compressed_data = data[9:]
+    # Parse header (slicing a view doesn't copy the body)
+    view = memoryview(data)
+    algorithm = CompressionAlgorithm(view[4])
+    original_size = struct.unpack_from("<I", view, 5)[0]
+    compressed_data = view[9:]
+
+    if max_size is not None and original_size > max_size:
+        raise CompressionError(
+            f"Decompressed size {original_size:,} bytes exceeds limit of {max_size:,}"
+        )
+    # One byte over the claimed size is enough to catch a header that lies
+    limit = original_size + 1
 
     if algorithm == CompressionAlgorithm.NONE:
-        result = compressed_data
+        # Same type as we were given: a view stays a view
+        result = data[9:]
 
     elif algorithm == CompressionAlgorithm.ZLIB:
         try:
-            result = zlib.decompress(compressed_data)
+            result = zlib.decompressobj().decompress(compressed_data, limit)
         except zlib.error as e:
             raise CompressionError(f"Zlib decompression failed: {e}")
 
@@ -138,7 +256,7 @@ def decompress(data: bytes) -> bytes:
         if not HAS_LZ4:
             raise CompressionError("LZ4 compression used but lz4 package not installed")
         try:
-            result = lz4.frame.decompress(compressed_data)
+            result = lz4.frame.LZ4FrameDecompressor().decompress(compressed_data, max_length=limit)
         except Exception as e:
             raise CompressionError(f"LZ4 decompression failed: {e}")
 
@@ -146,10 +264,15 @@ def decompress(data: bytes) -> bytes:
         if not HAS_ZSTD:
             raise CompressionError("ZSTD compression used but zstandard package not installed")
         try:
+            # stream_reader honours the limit even if the frame claims more
             dctx = zstd.ZstdDecompressor()
-            result = dctx.decompress(compressed_data)
+            with dctx.stream_reader(compressed_data) as reader:
+                result = _read_into_bytearray(reader, limit)
         except Exception as e:
             raise CompressionError(f"ZSTD decompression failed: {e}")
+
+    elif algorithm == CompressionAlgorithm.ZSTD_DICT:
+        result = _decompress_with_dictionary(view, limit)
     else:
         raise CompressionError(f"Unknown compression algorithm: {algorithm}")
 
@@ -160,6 +283,113 @@ def decompress(data: bytes) -> bytes:
     return result
 
 
+def _decompress_with_dictionary(data: memoryview, limit: int) -> bytearray:
+    """Body of a ZSTD_DICT payload, using the installed dictionary it names."""
+    from .dictionaries import load_dictionary
+
+    if not HAS_ZSTD:
+        raise CompressionError("ZSTD compression used but zstandard package not installed")
+    if len(data) < 13:
+        raise CompressionError("Truncated compression header")
+
+    dict_id = struct.unpack_from("<I", data, 9)[0]
+    dictionary = load_dictionary(dict_id)
+    if dictionary is None:
+        raise CompressionError(
+            f"Payload was compressed with dictionary {dict_id:08x}, which isn't installed"
+        )
+
+    try:
+        dctx = zstd.ZstdDecompressor(dict_data=_zstd_dictionary(dictionary))
+        with dctx.stream_reader(data[13:]) as reader:
+            return _read_into_bytearray(reader, limit)
+    except Exception as e:
+        raise CompressionError(f"ZSTD decompression failed: {e}")
+
+
+@lru_cache(maxsize=8)
+def _zstd_dictionary(dictionary: bytes) -> "zstd.ZstdCompressionDict":
+    """
+    Parsed dictionary, built once per dictionary rather than once per message.
+
+    dictionaries.py hands out the same bytes object while the file is
+    unchanged, so the key's hash is computed once too.
+    """
+    return zstd.ZstdCompressionDict(dictionary)
+
+
+def _read_into_bytearray(reader, limit: int) -> bytearray:
+    """
+    Drain a zstd stream_reader (up to limit bytes) into one bytearray.
+
+    The caller wants a mutable buffer anyway (crypto trims the payload
+    prefix off in place), so inflating straight into one saves copying a
+    bytes result over.
+    """
+    result = bytearray(limit)
+    filled = 0
+    with memoryview(result) as view:
+        while filled < limit:
+            count = reader.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+    del result[filled:]
+    return result
+
+
+def _resolve_algorithm(algorithm: CompressionAlgorithm) -> CompressionAlgorithm:
+    """The algorithm compress() will really use (zlib stands in for missing libraries)."""
+    if algorithm == CompressionAlgorithm.LZ4 and not HAS_LZ4:
+        return CompressionAlgorithm.ZLIB
+    if algorithm in (CompressionAlgorithm.ZSTD, CompressionAlgorithm.ZSTD_DICT) and not HAS_ZSTD:
+        return CompressionAlgorithm.ZLIB
+    return algorithm
+
+
+def _compress_raw(data: bytes, algorithm: CompressionAlgorithm, level: int | None) -> bytes:
+    """Bare compressed stream, no header. Algorithm must be available."""
+    if algorithm == CompressionAlgorithm.ZLIB:
+        return zlib.compress(data, level=ZLIB_LEVEL if level is None else level)
+    if algorithm == CompressionAlgorithm.LZ4:
+        compressed: bytes
+        if level is None:
+            compressed = lz4.frame.compress(data)
+        else:
+            compressed = lz4.frame.compress(data, compression_level=level)
+        return compressed
+    cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL if level is None else level)
+    return cctx.compress(data)
+
+
+def _compress_stream(
+    parts: Sequence[bytes | bytearray | memoryview],
+    size: int,
+    algorithm: CompressionAlgorithm,
+    level: int | None,
+) -> list[bytes]:
+    """_compress_raw over several parts, as compressed chunks (never joined up front)."""
+    if algorithm == CompressionAlgorithm.ZLIB:
+        zobj = zlib.compressobj(level=ZLIB_LEVEL if level is None else level)
+        chunks = [zobj.compress(part) for part in parts]
+        chunks.append(zobj.flush())
+        return chunks
+    if algorithm == CompressionAlgorithm.LZ4:
+        if level is None:
+            lobj = lz4.frame.LZ4FrameCompressor()
+        else:
+            lobj = lz4.frame.LZ4FrameCompressor(compression_level=level)
+        chunks = [lobj.begin(source_size=size)]
+        chunks.extend(lobj.compress(part) for part in parts)
+        chunks.append(lobj.flush())
+        return chunks
+    cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL if level is None else level)
+    cobj = cctx.compressobj(size=size)
+    chunks = [cobj.compress(part) for part in parts]
+    chunks.append(cobj.flush())
+    return chunks
+
+
 def _wrap_uncompressed(data: bytes) -> bytes:
     """Wrap uncompressed data with header for consistency."""
     header = COMPRESSION_MAGIC + struct.pack("<BI", CompressionAlgorithm.NONE, len(data))
@@ -178,46 +408,184 @@ def get_compression_ratio(original: bytes, compressed: bytes) -> float:
     return len(compressed) / len(original)
 
 
+# =============================================================================
+# SAMPLING ESTIMATOR (v4.3.0)
+# =============================================================================
+#
+# Compressing a 5 MB payload just to find out how big it would be is silly,
+# and compressing a 5 MB MP4 at all is sillier. Instead:
+#
+#   1. Take COMPRESSION_SAMPLE_BLOCKS blocks spread evenly over the payload
+#      (start, middle, end - file headers compress better than the body, so
+#      sampling only the first 8 KB was optimistic)
+#   2. Shannon entropy of the sample: close to 8 bits/byte means it's already
+#      compressed or encrypted, and we stop right there
+#   3. Compress each block at increasing levels, timing it. The per-block
+#      ratios give a mean and a confidence bound; the timings, scaled up to
+#      the full payload, say which level still fits the time budget
+#
+# The estimator's own cost is the sample compressions - a few hundred KB at
+# most, whatever the payload size.
+
+
+@dataclass
+class CompressionEstimate:
+    """Predicted outcome of compressing a payload (see estimate_compression)."""
+
+    algorithm: CompressionAlgorithm  # NONE = not worth compressing
+    level: int | None  # Level to pass to compress()
+    original_size: int
+    estimated_size: int  # Including the 9-byte header
+    low: int  # Confidence bound on estimated_size
+    high: int
+    entropy: float  # Bits per byte of the sample (8.0 = random)
+    estimated_ms: float  # Predicted time to compress the whole payload
+
+    @property
+    def compressible(self) -> bool:
+        return self.algorithm != CompressionAlgorithm.NONE
+
+    @property
+    def ratio(self) -> float:
+        return self.estimated_size / self.original_size if self.original_size else 1.0
+
+
+def byte_entropy(data: bytes) -> float:
+    """
+    Shannon entropy in bits per byte (0.0 = one repeated byte, 8.0 = random).
+
+    bytes.count runs in C, so 256 passes over a sample beat a Counter.
+    """
+    if not data:
+        return 0.0
+    total = len(data)
+    entropy = 0.0
+    for value in range(256):
+        count = data.count(value)
+        if count:
+            p = count / total
+            entropy -= p * math.log2(p)
+    return entropy
+
+
+def _sample_blocks(data: bytes, block_size: int, count: int) -> list[bytes]:
+    """Evenly spaced blocks covering start to end (the whole thing if it's small)."""
+    if len(data) <= block_size * count:
+        return [bytes(data)]
+    stride = (len(data) - block_size) / (count - 1)
+    return [bytes(data[int(i * stride) : int(i * stride) + block_size]) for i in range(count)]
+
+
+def _uncompressed_estimate(size: int, entropy: float) -> CompressionEstimate:
+    wrapped = size + 9
+    return CompressionEstimate(
+        algorithm=CompressionAlgorithm.NONE,
+        level=None,
+        original_size=size,
+        estimated_size=wrapped,
+        low=wrapped,
+        high=wrapped,
+        entropy=entropy,
+        estimated_ms=0.0,
+    )
+
+
+def estimate_compression(
+    data: bytes,
+    algorithm: CompressionAlgorithm | None = None,
+    time_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+) -> CompressionEstimate:
+    """
+    Predict compressed size and pick a level, from a sample of the payload.
+
+    Args:
+        data: Payload to estimate
+        algorithm: Algorithm to plan for (None = get_best_algorithm())
+        time_budget_ms: How long compressing the whole payload may take.
+            The highest level predicted to fit is chosen; the cheapest level
+            is always allowed. None = no limit (highest level).
+
+    Returns:
+        CompressionEstimate - algorithm NONE when the data looks
+        incompressible or the predicted saving is negligible
+    """
+    size = len(data)
+    if size < MIN_COMPRESS_SIZE:
+        return _uncompressed_estimate(size, 0.0)
+
+    blocks = _sample_blocks(data, COMPRESSION_SAMPLE_BLOCK_SIZE, COMPRESSION_SAMPLE_BLOCKS)
+    sample_size = sum(len(b) for b in blocks)
+    entropy = byte_entropy(b"".join(blocks))
+
+    # Already compressed (or encrypted) - don't burn CPU finding that out
+    if entropy >= COMPRESSION_ENTROPY_THRESHOLD:
+        return _uncompressed_estimate(size, entropy)
+
+    algorithm = _resolve_algorithm(algorithm or get_best_algorithm())
+    if algorithm == CompressionAlgorithm.ZSTD_DICT:
+        # Planned without the dictionary - errs on the large side
+        algorithm = CompressionAlgorithm.ZSTD
+    if algorithm == CompressionAlgorithm.NONE:
+        return _uncompressed_estimate(size, entropy)
+    scale = size / sample_size
+
+    levels = ESTIMATOR_LEVELS[algorithm]
+    if time_budget_ms is None:
+        levels = levels[-1:]
+
+    chosen: tuple[int, list[float], float] | None = None
+    for level in levels:
+        start = time.perf_counter()
+        ratios = [len(_compress_raw(b, algorithm, level)) / len(b) for b in blocks]
+        elapsed_ms = (time.perf_counter() - start) * 1000 * scale
+
+        # Over budget: keep the previous level (or this one, if it's the first)
+        if chosen is not None and time_budget_ms is not None and elapsed_ms > time_budget_ms:
+            break
+        chosen = (level, ratios, elapsed_ms)
+        # Higher levels only get slower - no point timing them
+        if time_budget_ms is not None and elapsed_ms > time_budget_ms:
+            break
+
+    if chosen is None:  # No levels to try
+        return _uncompressed_estimate(size, entropy)
+    level, ratios, elapsed_ms = chosen
+    mean = sum(ratios) / len(ratios)
+    if len(ratios) > 1:
+        variance = sum((r - mean) ** 2 for r in ratios) / (len(ratios) - 1)
+        margin = _CONFIDENCE_Z * math.sqrt(variance / len(ratios))
+    else:
+        margin = 0.0  # Sampled the whole payload - the ratio is exact
+
+    if mean >= COMPRESSION_INCOMPRESSIBLE_RATIO:
+        return _uncompressed_estimate(size, entropy)
+
+    return CompressionEstimate(
+        algorithm=algorithm,
+        level=level,
+        original_size=size,
+        estimated_size=int(size * mean) + 9,
+        low=int(size * max(mean - margin, 0.0)) + 9,
+        high=int(size * (mean + margin)) + 9,
+        entropy=entropy,
+        estimated_ms=elapsed_ms,
+    )
+
+
 def estimate_compressed_size(
     data: bytes, algorithm: CompressionAlgorithm = CompressionAlgorithm.ZLIB
 ) -> int:
     """
     Estimate compressed size without full compression.
-    Uses sampling for large data.
 
     Args:
         data: Data to estimate
         algorithm: Algorithm to estimate for
 
     Returns:
-        Estimated compressed size in bytes
+        Estimated compressed size in bytes (with header)
     """
-    if len(data) < MIN_COMPRESS_SIZE:
-        return len(data) + 9  # Header overhead
-
-    # For small data, just compress it
-    if len(data) < 10000:
-        compressed = compress(data, algorithm)
-        return len(compressed)
-
-    # For large data, sample and extrapolate
-    sample_size = 8192
-    sample = data[:sample_size]
-
-    if algorithm == CompressionAlgorithm.ZLIB:
-        compressed_sample = zlib.compress(sample, level=ZLIB_LEVEL)
-    elif algorithm == CompressionAlgorithm.LZ4 and HAS_LZ4:
-        compressed_sample = lz4.frame.compress(sample)
-    elif algorithm == CompressionAlgorithm.ZSTD and HAS_ZSTD:
-        cctx = zstd.ZstdCompressor(level=19)
-        compressed_sample = cctx.compress(sample)
-    else:
-        compressed_sample = zlib.compress(sample, level=ZLIB_LEVEL)
-
-    ratio = len(compressed_sample) / len(sample)
-    estimated = int(len(data) * ratio) + 9  # Add header
-
-    return estimated
+    return estimate_compression(data, algorithm, time_budget_ms=None).estimated_size
 
 
 def get_available_algorithms() -> list[CompressionAlgorithm]:
@@ -244,5 +612,6 @@ def algorithm_name(algo: CompressionAlgorithm) -> str:
         CompressionAlgorithm.ZLIB: "Zlib (deflate)",
         CompressionAlgorithm.LZ4: "LZ4 (fast)",
         CompressionAlgorithm.ZSTD: "Zstd (best)",
+        CompressionAlgorithm.ZSTD_DICT: "Zstd + dictionary",
     }
     return names.get(algo, "Unknown")
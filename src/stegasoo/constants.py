@@ -4,6 +4,25 @@ Stegasoo Constants and Configuration (v4.2.0 - Performance & Compression)
 Central location for all magic numbers, limits, and crypto parameters.
 All version numbers, limits, and configuration values should be defined here.
 
+CHANGES in v4.3.0:
+- FORMAT_VERSION bumped to 6: header records the KDF algorithm and its cost
+  parameters, so deployments can pick a KDF profile without breaking old images
+- Named KDF profiles (pi-low / default / paranoid / custom)
+- Streamed (segmented AEAD) file payloads up to MAX_STREAM_PAYLOAD_SIZE
+- Trial decode over several channel key candidates (TRIAL_DECODE_MAX_WORKERS)
+- Payloads are compressed before encryption (COMPRESSION_MIN_PAYLOAD_SIZE),
+  at a level chosen to fit COMPRESSION_TIME_BUDGET_MS
+- Optional per-channel zstd dictionaries for short messages (DICTIONARY_*)
+- Capacity APIs share a cache of image header probes (PROBE_CACHE_SIZE)
+- Batch capacity checks run in parallel from headers, cached per file
+  (CAPACITY_CHECK_CACHE_SIZE)
+- Opt-in on-disk cache of carrier pixel planes and block DCTs (ANALYSIS_CACHE_MAX_BYTES)
+- Batch processing can run on a process pool (BATCH_BACKEND_*)
+- Batch items are scheduled most-expensive-first under a memory budget,
+  using per-pixel time estimates (GOVERNOR_*_SECONDS_PER_MPIXEL)
+- One payload can be sharded across several carriers, with optional
+  erasure-coded parity shards (SHARD_MAGIC_HEADER, MAX_SHARDS)
+
 CHANGES in v4.2.0:
 - Added zstd compression for QR codes (better ratio than zlib)
 - RSA key size capped at 3072 bits (4096 too large for QR codes)
@@ -44,7 +63,18 @@ MAGIC_HEADER = b"\x89ST3"
 # Version 1-3: Date-dependent encryption (v3.0.x - v3.1.x)
 # Version 4: Date-independent encryption (v3.2.0)
 # Version 5: Channel key support (v4.0.0) - adds flags byte to header
-FORMAT_VERSION = 5
+# Version 6: Self-describing KDF (v4.3.0) - header records KDF algorithm + cost
+FORMAT_VERSION = 6
+
+# Multi-carrier shards (sharding.py, v4.3.0). Each carrier holds a framed
+# slice of the encrypted payload instead of the payload itself.
+SHARD_MAGIC_HEADER = b"\x89SHD"
+SHARD_FORMAT_VERSION = 1
+MAX_SHARDS = 255  # Index is one byte, and the GF(256) code runs out at 256
+
+# Oldest format version we can still decrypt (v5 images use the fixed
+# ARGON2_* constants below, since their header doesn't say otherwise)
+LEGACY_FORMAT_VERSION = 5
 
 # Payload type markers
 PAYLOAD_TEXT = 0x01
@@ -58,6 +88,12 @@ SALT_SIZE = 32
 IV_SIZE = 12
 TAG_SIZE = 16
 
+# Streamed payloads (v4.3.0): STREAM construction over AES-GCM segments
+STREAM_SEGMENT_SIZE = 64 * 1024  # 64 KB plaintext per segment
+STREAM_NONCE_PREFIX_SIZE = 7  # + 4-byte counter + 1-byte last flag = 12-byte nonce
+STREAM_MIN_SEGMENT_EXPONENT = 12  # 4 KB
+STREAM_MAX_SEGMENT_EXPONENT = 24  # 16 MB
+
 # Argon2 parameters (memory-hard KDF)
 ARGON2_TIME_COST = 4
 ARGON2_MEMORY_COST = 256 * 1024  # 256 MB
@@ -66,6 +102,56 @@ ARGON2_PARALLELISM = 4
 # PBKDF2 fallback parameters
 PBKDF2_ITERATIONS = 600000
 
+# KDF algorithm identifiers (stored in the v6 header)
+KDF_ARGON2ID = 0x01
+KDF_PBKDF2_SHA512 = 0x02
+
+# Serialized KDF parameter block: algorithm(1) + time_cost(4) + memory_cost(4) + parallelism(1)
+KDF_PARAMS_SIZE = 10
+
+# Named KDF profiles (v4.3.0)
+# memory_cost is in KiB, the unit Argon2 itself uses.
+KDF_PROFILE_PI_LOW = "pi-low"
+KDF_PROFILE_DEFAULT = "default"
+KDF_PROFILE_PARANOID = "paranoid"
+KDF_PROFILE_CUSTOM = "custom"
+
+KDF_PROFILES = {
+    # Pi Zero / 512 MB boards: still memory-hard, just not 256 MB worth of it
+    KDF_PROFILE_PI_LOW: {"time_cost": 3, "memory_cost": 32 * 1024, "parallelism": 1},
+    # What every v5 image used - the baseline
+    KDF_PROFILE_DEFAULT: {
+        "time_cost": ARGON2_TIME_COST,
+        "memory_cost": ARGON2_MEMORY_COST,
+        "parallelism": ARGON2_PARALLELISM,
+    },
+    # Servers with RAM to burn
+    KDF_PROFILE_PARANOID: {"time_cost": 8, "memory_cost": 1024 * 1024, "parallelism": 4},
+}
+
+VALID_KDF_PROFILES = (*KDF_PROFILES, KDF_PROFILE_CUSTOM)
+
+# Sanity limits for parameters read from a header. The header is authenticated,
+# but only AFTER the KDF runs - so a hostile image gets to pick how much work
+# we do before the tag check can fail. Memory is capped at the 'paranoid'
+# profile's 1 GB and total work (KDF_MAX_WORK) at its 8 passes x 1 GB, so a
+# crafted header costs one paranoid-strength derivation at most. Passes alone
+# may go to 16: calibrate_kdf trades memory for passes on smaller machines,
+# and 16 x 512 MB is still within the paranoid budget.
+KDF_MIN_TIME_COST = 1
+KDF_MAX_TIME_COST = 16
+KDF_MIN_MEMORY_COST = 8 * 1024  # 8 MB
+KDF_MAX_MEMORY_COST = 1024 * 1024  # 1 GB
+KDF_MAX_PARALLELISM = 16
+# Passes x KiB - Argon2 time is roughly proportional to it. 'paranoid' is
+# exactly at the limit; 16 passes are fine at 512 MB, but not at 1 GB
+KDF_MAX_WORK = 8 * 1024 * 1024
+PBKDF2_MIN_ITERATIONS = 100_000
+PBKDF2_MAX_ITERATIONS = 2_000_000
+
+# Default target for calibrate_kdf()
+KDF_CALIBRATION_TARGET_MS = 1000
+
 # ============================================================================
 # INPUT LIMITS
 # ============================================================================
@@ -83,7 +169,8 @@ MAX_FILENAME_LENGTH = 255  # Max filename length to store
 
 # File size limits
 MAX_FILE_SIZE = 30 * 1024 * 1024  # 30MB total file size
-MAX_FILE_PAYLOAD_SIZE = 2 * 1024 * 1024  # 2MB payload
+MAX_FILE_PAYLOAD_SIZE = 2 * 1024 * 1024  # 2MB payload (single-shot encryption)
+MAX_STREAM_PAYLOAD_SIZE = 64 * 1024 * 1024  # 64MB payload (streamed encryption, v4.3.0)
 MAX_UPLOAD_SIZE = 30 * 1024 * 1024  # 30MB max upload (Flask)
 
 # PIN configuration
@@ -159,6 +246,36 @@ ZLIB_COMPRESSION_LEVEL = 6
 # Compression header magic bytes
 COMPRESSION_MAGIC = b"\x00CMP"
 
+# Encode pipeline (v4.3.0): below this, compression can't pay for itself -
+# the padded ciphertext grows in 256-byte steps anyway
+COMPRESSION_MIN_PAYLOAD_SIZE = 256
+
+# Decode refuses to inflate past this (decompression bomb guard). Payload
+# limit plus room for the file metadata prefix.
+MAX_DECOMPRESSED_PAYLOAD_SIZE = MAX_STREAM_PAYLOAD_SIZE + 64 * 1024
+
+# Sampling estimator (v4.3.0): this many blocks of this size, spread across
+# the payload, stand in for the whole thing
+COMPRESSION_SAMPLE_BLOCK_SIZE = 16 * 1024
+COMPRESSION_SAMPLE_BLOCKS = 8
+
+# Sample entropy (bits/byte) at or above which data counts as already
+# compressed - JPEG, ZIP, MP4 and friends sit around 7.95+
+COMPRESSION_ENTROPY_THRESHOLD = 7.9
+
+# Predicted ratio at or above which compressing isn't worth it
+COMPRESSION_INCOMPRESSIBLE_RATIO = 0.97
+
+# Encode path: compressing the payload may take at most this long. The
+# estimator picks the highest zstd level predicted to fit.
+COMPRESSION_TIME_BUDGET_MS = 200
+
+# Trained zstd dictionaries (v4.3.0, see dictionaries.py). Short messages are
+# where they pay off; past this size plain zstd catches up.
+DICTIONARY_MAX_PAYLOAD_SIZE = 64 * 1024
+DICTIONARY_DEFAULT_SIZE = 16 * 1024
+DICTIONARY_FILE_SUFFIX = ".zdict"
+
 # ============================================================================
 # BATCH PROCESSING
 # ============================================================================
@@ -172,6 +289,53 @@ BATCH_MAX_WORKERS = 16
 # Output filename suffix for batch encode
 BATCH_OUTPUT_SUFFIX = "_encoded"
 
+# Batch executors (v4.3.0). LSB and jpegio are pure-Python loops that hold the
+# GIL, so they only scale across processes; "auto" picks per embed mode.
+BATCH_BACKEND_THREAD = "thread"
+BATCH_BACKEND_PROCESS = "process"
+BATCH_BACKEND_AUTO = "auto"
+BATCH_BACKENDS = {BATCH_BACKEND_THREAD, BATCH_BACKEND_PROCESS, BATCH_BACKEND_AUTO}
+
+# Items submitted to the pool but not finished, per worker (v4.3.0). Keeps
+# memory flat on huge batches while every worker still has a next item ready.
+BATCH_IN_FLIGHT_PER_WORKER = 2
+
+# Items the scheduler looks ahead over when picking the most expensive one to
+# start next (v4.3.0). Each holds its carrier bytes, so keep it modest.
+BATCH_SCHEDULE_WINDOW_PER_WORKER = 4
+
+# ============================================================================
+# RESOURCE GOVERNOR (v4.3.0)
+# ============================================================================
+
+# Share of detected RAM (or cgroup limit) the governor hands out by default
+GOVERNOR_BUDGET_FRACTION = 0.5
+
+# Operations estimated below this just run - not worth the bookkeeping
+GOVERNOR_MIN_RESERVATION = 16 * 1024 * 1024  # 16 MB
+
+# Rough working-set per carrier pixel, measured on the current code paths.
+# LSB keeps the image as a Python list of (r, g, b) tuples (~70 bytes/pixel)
+# plus a copy, the scipy DCT path juggles several float64 planes, and the
+# jpegio path mostly holds int16 coefficients.
+GOVERNOR_LSB_BYTES_PER_PIXEL = 100
+GOVERNOR_DCT_BYTES_PER_PIXEL = 96
+GOVERNOR_JPEGIO_BYTES_PER_PIXEL = 24
+
+# Rough single-core seconds per megapixel for one embed/extract (KDF excluded),
+# per MiB per pass of Argon2, and per PBKDF2-SHA512 iteration (600k iterations
+# is most of a second). Only used to order batch work, so "right to within 2x"
+# is plenty - the batch report shows predicted vs actual.
+GOVERNOR_LSB_SECONDS_PER_MPIXEL = 0.65
+GOVERNOR_DCT_SECONDS_PER_MPIXEL = 0.45
+GOVERNOR_JPEGIO_SECONDS_PER_MPIXEL = 0.95
+GOVERNOR_ARGON2_SECONDS_PER_MIB_PASS = 0.0012
+GOVERNOR_PBKDF2_SECONDS_PER_ITERATION = 0.0000012
+
+# Channel key candidates tried at once by trial decode. Each attempt may run
+# Argon2, so the governor has the final say on how many actually overlap.
+TRIAL_DECODE_MAX_WORKERS = 4
+
 # ============================================================================
 # DATA FILES
 # ============================================================================
@@ -273,6 +437,23 @@ VALID_EMBED_MODES = {EMBED_MODE_LSB, EMBED_MODE_DCT}
 LSB_BYTES_PER_PIXEL = 3 / 8  # 3 bits per pixel (RGB, 1 bit per channel) / 8 bits per byte
 DCT_BYTES_PER_PIXEL = 0.125  # Approximate for DCT mode (varies by implementation)
 
+# Header probes kept by image_context.probe_image (v4.3.0). Entries are a few
+# hundred bytes; the web UI re-checks the same carrier on every keystroke.
+PROBE_CACHE_SIZE = 256
+
+# batch_capacity_check results remembered per (path, mtime, size) (v4.3.0)
+CAPACITY_CHECK_CACHE_SIZE = 4096
+
+# Disk budget for the opt-in carrier analysis cache (analysis_cache.py, v4.3.0).
+# A 12 MP carrier needs ~230 MB (pixels, Y/Cb/Cr planes, luma DCT), so this
+# keeps the last handful of house carriers warm.
+ANALYSIS_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Minimum seconds between progress updates (progress.py, v4.3.0). Progress
+# used to be written every N pixels/blocks, which on a fast machine meant
+# hundreds of file rewrites a second; nobody can see a bar move that fast.
+PROGRESS_MIN_INTERVAL = 0.25
+
 
 def detect_stego_mode(encrypted_data: bytes) -> str:
     """
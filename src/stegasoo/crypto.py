@@ -18,48 +18,60 @@ the actual encryption key. Miss any factor = wrong key = garbage output.
 
 Encryption: AES-256-GCM (authenticated encryption - tamper = detection)
 KDF: Argon2id (256MB RAM, 4 iterations) or PBKDF2 fallback (600K iterations)
+     - cost is now a per-deployment profile, see kdf.py
 
+v4.3.0: Format v6 - KDF algorithm and cost live in the header (v5 still decodes)
+v4.3.0: Segmented STREAM payloads for large files (encrypt_stream/decrypt_stream)
+v4.3.0: Payloads are compressed before encryption (FLAG_COMPRESSED)
+v4.3.0: Short payloads use the channel's trained zstd dictionary, if installed
 v4.0.0: Added channel key for server/group isolation
 v3.2.0: Removed date dependency (was cute but annoying in practice)
 """
 
 import hashlib
-import io
 import secrets
 import struct
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from PIL import Image
-
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .compression import (
+    CompressionAlgorithm,
+    CompressionError,
+    compress_parts,
+    decompress,
+    estimate_compression,
+    get_best_algorithm,
+)
 from .constants import (
-    ARGON2_MEMORY_COST,
-    ARGON2_PARALLELISM,
-    ARGON2_TIME_COST,
+    COMPRESSION_MIN_PAYLOAD_SIZE,
+    COMPRESSION_TIME_BUDGET_MS,
+    DICTIONARY_MAX_PAYLOAD_SIZE,
     FORMAT_VERSION,
     IV_SIZE,
+    KDF_PARAMS_SIZE,
+    LEGACY_FORMAT_VERSION,
     MAGIC_HEADER,
+    MAX_DECOMPRESSED_PAYLOAD_SIZE,
     MAX_FILENAME_LENGTH,
+    MIN_COMPRESS_SIZE,
     PAYLOAD_FILE,
     PAYLOAD_TEXT,
-    PBKDF2_ITERATIONS,
     SALT_SIZE,
+    STREAM_MAX_SEGMENT_EXPONENT,
+    STREAM_MIN_SEGMENT_EXPONENT,
+    STREAM_NONCE_PREFIX_SIZE,
+    STREAM_SEGMENT_SIZE,
     TAG_SIZE,
 )
+from .dictionaries import get_active_dictionary
 from .exceptions import DecryptionError, EncryptionError, InvalidHeaderError, KeyDerivationError
+from .image_context import ImageContext, as_image_context
+from .kdf import HAS_ARGON2, KDFParams, derive_key, legacy_kdf_params, resolve_kdf_params
 from .models import DecodeResult, FilePayload
 
-# Check for Argon2 availability
-try:
-    from argon2.low_level import Type, hash_secret_raw
-
-    HAS_ARGON2 = True
-except ImportError:
-    HAS_ARGON2 = False
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-
-
 # =============================================================================
 # CHANNEL KEY RESOLUTION
 # =============================================================================
@@ -112,7 +124,7 @@ def _resolve_channel_key(channel_key: str | bool | None) -> bytes | None:
 # "something you have" factor - like a hardware token, but it's a cat picture.
 
 
-def hash_photo(image_data: bytes) -> bytes:
+def hash_photo(image_data: bytes | ImageContext) -> bytes:
     """
     Compute deterministic hash of photo pixel content.
 
@@ -126,30 +138,27 @@ def hash_photo(image_data: bytes) -> bytes:
     The double-hash with prefix is belt-and-suspenders mixing. Probably
     overkill, but hey, it's crypto - paranoia is a feature.
 
+    v4.3.0: The work lives in ImageContext.pixel_hash so it's cached - encode
+    needs this hash twice (message key and pixel key), decode three times.
+
     Args:
-        image_data: Raw image file bytes (any format PIL can read)
+        image_data: Raw image file bytes (any format PIL can read) or ImageContext
 
     Returns:
         32-byte SHA-256 hash of pixel content
     """
-    # Convert to RGB to normalize (RGBA, grayscale, etc. all become RGB)
-    img: Image.Image = Image.open(io.BytesIO(image_data)).convert("RGB")
-    pixels = img.tobytes()
-
-    # Double-hash: SHA256(SHA256(pixels) + first 1KB of pixels)
-    # The prefix adds image-specific data to prevent length-extension shenanigans
-    h = hashlib.sha256(pixels).digest()
-    h = hashlib.sha256(h + pixels[:1024]).digest()
-    return h
+    # Pixels are converted to RGB to normalize (RGBA, grayscale, etc. all become RGB)
+    return as_image_context(image_data).pixel_hash
 
 
 def derive_hybrid_key(
-    photo_data: bytes,
+    photo_data: bytes | ImageContext,
     passphrase: str,
     salt: bytes,
     pin: str = "",
     rsa_key_data: bytes | None = None,
     channel_key: str | bool | None = None,
+    kdf_params: KDFParams | str | None = None,
 ) -> bytes:
     """
     Derive encryption key from multiple factors.
@@ -168,7 +177,7 @@ def derive_hybrid_key(
                              ▼
                     ┌─────────────────┐
                     │    Argon2id     │  <- Memory-hard KDF
-                    │   256MB / 4 iter │  <- Makes brute force expensive
+                    │  cost: profile  │  <- Makes brute force expensive
                     └─────────────────┘
                              │
                              ▼
@@ -182,6 +191,10 @@ def derive_hybrid_key(
 
     Fallback: PBKDF2-SHA512 with 600K iterations (for systems without argon2)
 
+    The cost comes from kdf_params - a named profile ('pi-low', 'default',
+    'paranoid', 'custom') or explicit KDFParams. Decryption passes whatever
+    the message header recorded.
+
     Args:
         photo_data: Reference photo bytes
         passphrase: Shared passphrase (recommend 4+ words from BIP-39)
@@ -192,6 +205,7 @@ def derive_hybrid_key(
             - None or "auto": Use configured key
             - str: Use this specific key
             - "" or False: No channel key (public mode)
+        kdf_params: KDF profile name or KDFParams (None = active profile)
 
     Returns:
         32-byte derived key (ready for AES-256)
@@ -217,38 +231,15 @@ def derive_hybrid_key(
         if channel_hash:
             key_material += channel_hash
 
-        # Run it all through the KDF
-        if HAS_ARGON2:
-            # Argon2id: the good stuff
-            key = hash_secret_raw(
-                secret=key_material,
-                salt=salt[:32],
-                time_cost=ARGON2_TIME_COST,      # 4 iterations
-                memory_cost=ARGON2_MEMORY_COST,  # 256 MB RAM
-                parallelism=ARGON2_PARALLELISM,  # 4 threads
-                hash_len=32,
-                type=Type.ID,  # Hybrid mode: resists side-channel AND GPU attacks
-            )
-        else:
-            # PBKDF2 fallback for systems without argon2-cffi
-            # 600K iterations is slow but not memory-hard
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA512(),
-                length=32,
-                salt=salt,
-                iterations=PBKDF2_ITERATIONS,
-                backend=default_backend(),
-            )
-            key = kdf.derive(key_material)
-
-        return key
+        # Run it all through the KDF (Argon2id, or PBKDF2 without argon2-cffi)
+        return derive_key(key_material, salt, resolve_kdf_params(kdf_params))
 
     except Exception as e:
         raise KeyDerivationError(f"Failed to derive key: {e}") from e
 
 
 def derive_pixel_key(
-    photo_data: bytes,
+    photo_data: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
@@ -287,11 +278,11 @@ def derive_pixel_key(
     return hashlib.sha256(material + b"pixel_selection").digest()
 
 
-def _pack_payload(
+def _split_payload(
     content: str | bytes | FilePayload,
-) -> tuple[bytes, int]:
+) -> tuple[bytes, bytes, int]:
     """
-    Pack payload with type marker and metadata.
+    Split payload into its small metadata prefix and its body.
 
     Format for text:
         [type:1][data]
@@ -299,93 +290,114 @@ def _pack_payload(
     Format for file:
         [type:1][filename_len:2][filename][mime_len:2][mime][data]
 
+    The body is returned as-is (no copy) so the caller can write prefix and
+    body straight into the encryption buffer instead of concatenating them.
+
     Args:
         content: Text string, raw bytes, or FilePayload
 
     Returns:
-        Tuple of (packed bytes, payload type)
+        Tuple of (prefix bytes, body bytes, payload type)
     """
     if isinstance(content, str):
         # Text message
-        data = content.encode("utf-8")
-        return bytes([PAYLOAD_TEXT]) + data, PAYLOAD_TEXT
+        return bytes([PAYLOAD_TEXT]), content.encode("utf-8"), PAYLOAD_TEXT
 
     elif isinstance(content, FilePayload):
         # File with metadata
         filename = content.filename[:MAX_FILENAME_LENGTH].encode("utf-8")
         mime = (content.mime_type or "")[:100].encode("utf-8")
 
-        packed = (
+        prefix = (
             bytes([PAYLOAD_FILE])
             + struct.pack(">H", len(filename))
             + filename
             + struct.pack(">H", len(mime))
             + mime
-            + content.data
         )
-        return packed, PAYLOAD_FILE
+        return prefix, content.data, PAYLOAD_FILE
 
     else:
         # Raw bytes - treat as file with no name
-        packed = (
+        prefix = (
             bytes([PAYLOAD_FILE])
             + struct.pack(">H", 0)  # No filename
             + struct.pack(">H", 0)  # No mime
-            + content
         )
-        return packed, PAYLOAD_FILE
+        return prefix, content, PAYLOAD_FILE
+
+
+def _parse_file_prefix(plaintext) -> tuple[DecodeResult, int]:
+    """
+    Read the file metadata prefix (type, filename, mime type).
+
+    Args:
+        plaintext: Buffer starting with a PAYLOAD_FILE prefix
+
+    Returns:
+        Tuple of (DecodeResult without file_data, offset where the data starts)
+    """
+    with memoryview(plaintext) as view:
+        if len(view) < 1 or view[0] != PAYLOAD_FILE:
+            raise DecryptionError("Not a file payload")
+        offset = 1
+
+        # Read filename
+        filename_len = struct.unpack_from(">H", view, offset)[0]
+        offset += 2
+        filename = str(view[offset : offset + filename_len], "utf-8") if filename_len else None
+        offset += filename_len
+
+        # Read mime type
+        mime_len = struct.unpack_from(">H", view, offset)[0]
+        offset += 2
+        mime_type = str(view[offset : offset + mime_len], "utf-8") if mime_len else None
+        offset += mime_len
+
+    return DecodeResult(payload_type="file", filename=filename, mime_type=mime_type), offset
 
 
-def _unpack_payload(data: bytes) -> DecodeResult:
+def _unpack_payload(plaintext: bytearray) -> DecodeResult:
     """
     Unpack payload and extract content with metadata.
 
+    The buffer is consumed: for file payloads the metadata is trimmed off the
+    front in place (O(1) for a bytearray) and the buffer itself becomes
+    file_data, so a 2 MB file isn't copied one more time on the way out.
+
     Args:
-        data: Packed payload bytes
+        plaintext: Packed payload (already stripped of padding)
 
     Returns:
         DecodeResult with appropriate content
     """
-    if len(data) < 1:
+    if len(plaintext) < 1:
         raise DecryptionError("Empty payload")
 
-    payload_type = data[0]
+    payload_type = plaintext[0]
 
     if payload_type == PAYLOAD_TEXT:
         # Text message
-        text = data[1:].decode("utf-8")
+        with memoryview(plaintext) as view:
+            text = str(view[1:], "utf-8")
         return DecodeResult(payload_type="text", message=text)
 
     elif payload_type == PAYLOAD_FILE:
         # File with metadata
-        offset = 1
-
-        # Read filename
-        filename_len = struct.unpack(">H", data[offset : offset + 2])[0]
-        offset += 2
-        filename = data[offset : offset + filename_len].decode("utf-8") if filename_len else None
-        offset += filename_len
-
-        # Read mime type
-        mime_len = struct.unpack(">H", data[offset : offset + 2])[0]
-        offset += 2
-        mime_type = data[offset : offset + mime_len].decode("utf-8") if mime_len else None
-        offset += mime_len
+        result, offset = _parse_file_prefix(plaintext)
 
-        # Rest is file data
-        file_data = data[offset:]
-
-        return DecodeResult(
-            payload_type="file", file_data=file_data, filename=filename, mime_type=mime_type
-        )
+        # Rest is file data (prefix view is released before resizing)
+        del plaintext[:offset]
+        result.file_data = plaintext
+        return result
 
     else:
         # Unknown type - try to decode as text (backward compatibility)
         try:
-            text = data.decode("utf-8")
+            text = plaintext.decode("utf-8")
             return DecodeResult(payload_type="text", message=text)
         except UnicodeDecodeError:
-            return DecodeResult(payload_type="file", file_data=data)
+            return DecodeResult(payload_type="file", file_data=plaintext)
 
 
 # =============================================================================
@@ -393,20 +405,139 @@ def _unpack_payload(data: bytes) -> DecodeResult:
 # =============================================================================
 #
 # The flags byte tells us about the message without decrypting it.
-# Currently just one flag, but the byte gives us room for 8.
+# The byte gives us room for 8.
 
 FLAG_CHANNEL_KEY = 0x01  # Bit 0: Message was encoded with a channel key
-# Future flags could include: compression, file attachment, etc.
+FLAG_STREAM = 0x02  # Bit 1: Segmented STREAM payload (v4.3.0, see encrypt_stream)
+FLAG_COMPRESSED = 0x04  # Bit 2: Packed payload is compressed (v4.3.0)
+
+# Fixed part of the header: magic(4) + version(1) + flags(1)
+HEADER_PREFIX_SIZE = len(MAGIC_HEADER) + 2
+
+# update_into() insists on room for one extra AES block beyond the input
+_UPDATE_INTO_SLACK = 15
+
+
+# =============================================================================
+# COMPRESSION STAGE (v4.3.0)
+# =============================================================================
+#
+# Compress first, then encrypt - ciphertext looks random, so it never
+# compresses afterwards. Fewer bytes means fewer pixels/coefficients to touch
+# and a smaller carrier will do.
+#
+# The packed payload (type marker + file metadata + data) is compressed as a
+# whole and wrapped in compression.py's own header (\x00CMP + algorithm +
+# original size). FLAG_COMPRESSED in the crypto header says it's there, so
+# old uncompressed messages decode exactly as before.
+#
+# Before compressing anything, compression.estimate_compression() samples the
+# payload: already-compressed files are sent as they are, and the level is
+# the highest one predicted to finish within the time budget.
+#
+# Short payloads go a different way when the channel has a trained
+# dictionary installed (see dictionaries.py): ZSTD_DICT, no estimate needed -
+# compressing a few KB is cheaper than sampling it.
+
+
+def _choose_compression(
+    size: int, compression: bool | CompressionAlgorithm, has_dictionary: bool = False
+) -> CompressionAlgorithm:
+    """
+    Pick an algorithm for a packed payload of this size.
+
+    Args:
+        size: Packed payload size in bytes
+        compression: True (automatic), False (never), or a specific algorithm
+        has_dictionary: A trained dictionary is installed
+
+    Returns:
+        The algorithm to try, NONE to skip
+    """
+    if compression is False or compression is None:
+        return CompressionAlgorithm.NONE
+    if compression is True:
+        # With a dictionary even short messages shrink
+        if has_dictionary and MIN_COMPRESS_SIZE <= size <= DICTIONARY_MAX_PAYLOAD_SIZE:
+            return CompressionAlgorithm.ZSTD_DICT
+        # Tiny payloads: padding swallows any saving, don't bother
+        if size < COMPRESSION_MIN_PAYLOAD_SIZE:
+            return CompressionAlgorithm.NONE
+        return get_best_algorithm()
+    return CompressionAlgorithm(compression)
+
+
+def _compress_payload(
+    prefix: bytes,
+    body: bytes,
+    compression: bool | CompressionAlgorithm,
+    time_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+    channel_hash: bytes | None = None,
+) -> bytes | None:
+    """
+    Compress the packed payload, if that's worth doing.
+
+    channel_hash picks whose trained dictionary to use (None = public mode's).
+
+    Returns:
+        Wrapped compressed payload, or None to send it uncompressed (too
+        small, disabled, incompressible, or the data didn't shrink)
+    """
+    wants_dictionary = compression is True or compression == CompressionAlgorithm.ZSTD_DICT
+    dictionary = get_active_dictionary(channel_hash) if wants_dictionary else None
+    algorithm = _choose_compression(
+        len(prefix) + len(body), compression, has_dictionary=dictionary is not None
+    )
+    if algorithm == CompressionAlgorithm.NONE:
+        return None
+
+    # prefix + body would copy the whole body just to compress it - the
+    # compressor takes the two parts in turn instead
+    if algorithm == CompressionAlgorithm.ZSTD_DICT:
+        # Without a dictionary this quietly becomes plain ZSTD
+        return compress_parts((prefix, body), algorithm, dictionary=dictionary)
+
+    # The prefix is a few bytes of type and filename; sampling the body is enough
+    estimate = estimate_compression(body, algorithm, time_budget_ms)
+    if not estimate.compressible:
+        return None
+    # None when it didn't shrink after all
+    return compress_parts((prefix, body), estimate.algorithm, estimate.level)
+
+
+def _decompress_payload(packed: bytearray) -> bytearray:
+    """Reverse _compress_payload, refusing to inflate past the payload limit."""
+    try:
+        # Inflate straight from the decrypted buffer, no bytes() copy of it first
+        with memoryview(packed) as view:
+            result = decompress(view, max_size=MAX_DECOMPRESSED_PAYLOAD_SIZE)
+            # ZSTD inflates into a bytearray already; zlib/LZ4 hand back bytes
+            return result if isinstance(result, bytearray) else bytearray(result)
+    except (CompressionError, ValueError) as e:
+        raise DecryptionError(f"Could not decompress payload: {e}") from e
+
+
+def _build_header(flags: int, kdf_params: KDFParams) -> bytes:
+    """
+    Build the v6 header (which doubles as the AES-GCM AAD).
+
+    Binding the KDF block into the AAD means nobody can quietly downgrade
+    the cost of a stored message - the tag check would fail.
+    """
+    return MAGIC_HEADER + bytes([FORMAT_VERSION, flags]) + kdf_params.pack()
 
 
 def encrypt_message(
     message: str | bytes | FilePayload,
-    photo_data: bytes,
+    photo_data: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
     channel_key: str | bool | None = None,
-) -> bytes:
+    kdf_profile: KDFParams | str | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+) -> bytearray:
     """
     Encrypt message or file using AES-256-GCM.
 
@@ -415,17 +546,24 @@ def encrypt_message(
     - 256-bit key: Enough entropy to survive until the heat death of the universe
     - GCM mode: Authenticated encryption - if anyone tampers, decryption fails
 
-    The output format (v4.0.0):
-    ┌──────────────────────────────────────────────────────────────────────┐
-    │ \x89ST3 │ 05 │ flags │  salt (32B)  │  iv (12B)  │  tag (16B)  │ ··· │
-    │  magic  │ver │       │              │            │             │cipher│
-    └──────────────────────────────────────────────────────────────────────┘
+    The output format (v4.3.0):
+    ┌────────────────────────────────────────────────────────────────────────────┐
+    │ \x89ST3 │ 06 │ flags │ kdf (10B) │ salt (32B) │ iv (12B) │ tag (16B) │ ··· │
+    │  magic  │ver │       │ algo+cost │            │          │           │cipher│
+    └────────────────────────────────────────────────────────────────────────────┘
+
+    The kdf block is algorithm(1) + time_cost(4) + memory_cost(4) +
+    parallelism(1), so the decoder never has to guess the KDF cost.
 
     Why the random padding at the end?
     - Message length can reveal information (traffic analysis)
     - We add 64-319 random bytes and round to 256-byte boundary
     - All messages look roughly the same size
 
+    The whole thing is assembled in ONE preallocated bytearray and encrypted
+    in place - no header + salt + iv + ... concatenation chain, which used to
+    cost about five copies of a 2 MB file payload.
+
     Args:
         message: Message string, raw bytes, or FilePayload to encrypt
         photo_data: Reference photo bytes (your "key photo")
@@ -436,16 +574,27 @@ def encrypt_message(
             - None or "auto": Use server's configured key
             - str: Use this specific key
             - "" or False: No channel key (public mode)
+        kdf_profile: KDF profile name or KDFParams (None = active profile,
+            see kdf.set_kdf_profile / STEGASOO_KDF_PROFILE)
+        compression: True to compress when it helps (best available
+            algorithm, payloads of COMPRESSION_MIN_PAYLOAD_SIZE and up),
+            False to never compress, or a specific CompressionAlgorithm
+        compression_budget_ms: Latency budget for compressing; the level is
+            picked to fit it (None = no limit, strongest level)
 
     Returns:
-        Encrypted message bytes ready for embedding
+        Encrypted message ready for embedding (the assembly bytearray itself,
+        handed over rather than copied into an immutable bytes object)
 
     Raises:
         EncryptionError: If encryption fails (shouldn't happen with valid inputs)
     """
     try:
+        kdf_params = resolve_kdf_params(kdf_profile)
         salt = secrets.token_bytes(SALT_SIZE)
-        key = derive_hybrid_key(photo_data, passphrase, salt, pin, rsa_key_data, channel_key)
+        key = derive_hybrid_key(
+            photo_data, passphrase, salt, pin, rsa_key_data, channel_key, kdf_params
+        )
         iv = secrets.token_bytes(IV_SIZE)
 
         # Determine flags
@@ -454,27 +603,58 @@ def encrypt_message(
         if channel_hash:
             flags |= FLAG_CHANNEL_KEY
 
-        # Pack payload with type marker
-        packed_payload, _ = _pack_payload(message)
+        # Payload with type marker (prefix is tiny, body is not copied)
+        prefix, body, _ = _split_payload(message)
+
+        # Compress before encrypting - see COMPRESSION STAGE above
+        compressed = _compress_payload(
+            prefix, body, compression, compression_budget_ms, channel_hash
+        )
+        if compressed is not None:
+            prefix, body = b"", compressed
+            flags |= FLAG_COMPRESSED
+        packed_len = len(prefix) + len(body)
 
         # Random padding to hide message length
         padding_len = secrets.randbelow(256) + 64
-        padded_len = ((len(packed_payload) + padding_len + 255) // 256) * 256
-        padding_needed = padded_len - len(packed_payload)
-        padding = secrets.token_bytes(padding_needed - 4) + struct.pack(">I", len(packed_payload))
-        padded_message = packed_payload + padding
+        padded_len = ((packed_len + padding_len + 255) // 256) * 256
 
         # Build header for AAD
-        header = MAGIC_HEADER + bytes([FORMAT_VERSION, flags])
-
-        # Encrypt with AES-256-GCM
-        cipher = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend())
-        encryptor = cipher.encryptor()
-        encryptor.authenticate_additional_data(header)
-        ciphertext = encryptor.update(padded_message) + encryptor.finalize()
-
-        # v4.0.0: Header with flags byte
-        return header + salt + iv + encryptor.tag + ciphertext
+        header = _build_header(flags, kdf_params)
+
+        # Lay everything out in one buffer:
+        # [header][salt][iv][tag][prefix][body][random padding][len:4][slack]
+        tag_offset = len(header) + SALT_SIZE + IV_SIZE
+        body_offset = tag_offset + TAG_SIZE
+        end = body_offset + padded_len
+        buffer = bytearray(end + _UPDATE_INTO_SLACK)
+
+        with memoryview(buffer) as view:
+            view[: len(header)] = header
+            view[len(header) : len(header) + SALT_SIZE] = salt
+            view[len(header) + SALT_SIZE : tag_offset] = iv
+
+            cursor = body_offset
+            view[cursor : cursor + len(prefix)] = prefix
+            cursor += len(prefix)
+            view[cursor : cursor + len(body)] = body
+            cursor += len(body)
+            view[cursor : end - 4] = secrets.token_bytes(end - 4 - cursor)
+            struct.pack_into(">I", view, end - 4, packed_len)
+
+            # Encrypt with AES-256-GCM, in place
+            cipher = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend())
+            encryptor = cipher.encryptor()
+            encryptor.authenticate_additional_data(header)
+            encryptor.update_into(view[body_offset:end], view[body_offset:])
+            encryptor.finalize()
+            view[tag_offset:body_offset] = encryptor.tag
+
+        # Drop the slack (shrinking by a few bytes doesn't reallocate)
+        del buffer[end:]
+
+        # v4.3.0: Header with flags byte and KDF parameters
+        return buffer
 
     except Exception as e:
         raise EncryptionError(f"Encryption failed: {e}") from e
@@ -485,49 +665,112 @@ def parse_header(encrypted_data: bytes) -> dict | None:
     Parse the header from encrypted data.
 
     v4.0.0: Includes flags byte for channel key indicator.
+    v4.3.0: Format v6 adds the KDF block. v5 headers still parse, with
+            kdf_params filled in from the legacy constants.
+            FLAG_STREAM messages (v6 only) carry a nonce prefix and segment
+            size instead of iv/tag - see encrypt_stream.
 
     Args:
         encrypted_data: Raw encrypted bytes
 
     Returns:
-        Dict with salt, iv, tag, ciphertext, flags or None if invalid
+        Dict with salt, flags, kdf_params, aad (the header bytes to
+        authenticate) and either iv/tag/ciphertext (stream=False) or
+        nonce_prefix/segment_size/body (stream=True). None if invalid.
     """
-    # Min size: Magic(4) + Version(1) + Flags(1) + Salt(32) + IV(12) + Tag(16) = 66 bytes
-    if len(encrypted_data) < 66 or encrypted_data[:4] != MAGIC_HEADER:
+    if len(encrypted_data) < HEADER_PREFIX_SIZE or encrypted_data[:4] != MAGIC_HEADER:
         return None
 
     try:
         version = encrypted_data[4]
-        if version != FORMAT_VERSION:
+        flags = encrypted_data[5]
+        offset = HEADER_PREFIX_SIZE
+
+        if version == FORMAT_VERSION:
+            kdf_params = KDFParams.unpack(encrypted_data[offset : offset + KDF_PARAMS_SIZE])
+            offset += KDF_PARAMS_SIZE
+        elif version == LEGACY_FORMAT_VERSION:
+            kdf_params = legacy_kdf_params()
+        else:
             return None
 
-        flags = encrypted_data[5]
+        is_stream = bool(flags & FLAG_STREAM)
+        if is_stream and version != FORMAT_VERSION:
+            return None
 
-        offset = 6
-        salt = encrypted_data[offset : offset + SALT_SIZE]
-        offset += SALT_SIZE
-        iv = encrypted_data[offset : offset + IV_SIZE]
-        offset += IV_SIZE
-        tag = encrypted_data[offset : offset + TAG_SIZE]
-        offset += TAG_SIZE
-        ciphertext = encrypted_data[offset:]
+        # Min size (v5 single-shot): Magic(4) + Version(1) + Flags(1) + Salt(32) + IV(12) + Tag(16)
+        # Min size (v6 stream): Magic(4) + Version(1) + Flags(1) + KDF(10) + Salt(32)
+        #                       + Nonce prefix(7) + Segment exponent(1) + one segment tag(16)
+        if is_stream:
+            needed = offset + SALT_SIZE + STREAM_NONCE_PREFIX_SIZE + 1 + TAG_SIZE
+        else:
+            needed = offset + SALT_SIZE + IV_SIZE + TAG_SIZE
+        if len(encrypted_data) < needed:
+            return None
 
-        return {
+        result = {
             "version": version,
             "flags": flags,
             "has_channel_key": bool(flags & FLAG_CHANNEL_KEY),
-            "salt": salt,
-            "iv": iv,
-            "tag": tag,
-            "ciphertext": ciphertext,
+            "compressed": bool(flags & FLAG_COMPRESSED),
+            "stream": is_stream,
+            "kdf_params": kdf_params,
         }
+
+        # Small fields as real bytes (argon2-cffi won't take a bytearray salt)
+        result["salt"] = bytes(encrypted_data[offset : offset + SALT_SIZE])
+        offset += SALT_SIZE
+
+        if is_stream:
+            result["nonce_prefix"] = bytes(
+                encrypted_data[offset : offset + STREAM_NONCE_PREFIX_SIZE]
+            )
+            offset += STREAM_NONCE_PREFIX_SIZE
+            exponent = encrypted_data[offset]
+            if not STREAM_MIN_SEGMENT_EXPONENT <= exponent <= STREAM_MAX_SEGMENT_EXPONENT:
+                return None
+            result["segment_size"] = 1 << exponent
+            offset += 1
+            # The whole stream header is authenticated with every segment
+            result["aad"] = bytes(encrypted_data[:offset])
+            result["body"] = memoryview(encrypted_data)[offset:]
+        else:
+            result["aad"] = bytes(encrypted_data[: offset - SALT_SIZE])
+            result["iv"] = bytes(encrypted_data[offset : offset + IV_SIZE])
+            offset += IV_SIZE
+            result["tag"] = bytes(encrypted_data[offset : offset + TAG_SIZE])
+            offset += TAG_SIZE
+            # Zero-copy view - the ciphertext is most of the data
+            result["ciphertext"] = memoryview(encrypted_data)[offset:]
+
+        return result
     except Exception:
         return None
 
 
+def _decryption_error(message_has_key: bool, has_configured_key: bool) -> DecryptionError:
+    """Build a DecryptionError, with a helpful hint for channel key mismatches."""
+    if message_has_key and not has_configured_key:
+        error = DecryptionError(
+            "Decryption failed. This message was encoded with a channel key, "
+            "but no channel key is configured. Provide the correct channel key."
+        )
+    elif not message_has_key and has_configured_key:
+        error = DecryptionError(
+            "Decryption failed. This message was encoded without a channel key, "
+            "but you have one configured. Try with channel_key='' for public mode."
+        )
+    else:
+        error = DecryptionError(
+            "Decryption failed. Check your passphrase, PIN, RSA key, "
+            "reference photo, and channel key."
+        )
+    return error
+
+
 def decrypt_message(
     encrypted_data: bytes,
-    photo_data: bytes,
+    photo_data: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
@@ -536,6 +779,11 @@ def decrypt_message(
     """
     Decrypt message (v4.0.0 - with channel key support).
 
+    The KDF cost is read from the header (v6), or assumed to be the old
+    fixed constants (v5) - there's nothing for the caller to configure.
+    Streamed (FLAG_STREAM) messages are handled too, decrypted into memory -
+    use decrypt_stream to send them straight to a file instead.
+
     Args:
         encrypted_data: Encrypted message bytes
         photo_data: Reference photo bytes
@@ -562,11 +810,23 @@ def decrypt_message(
 
     try:
         key = derive_hybrid_key(
-            photo_data, passphrase, header["salt"], pin, rsa_key_data, channel_key
+            photo_data,
+            passphrase,
+            header["salt"],
+            pin,
+            rsa_key_data,
+            channel_key,
+            header["kdf_params"],
         )
 
-        # Reconstruct header for AAD verification
-        aad_header = MAGIC_HEADER + bytes([FORMAT_VERSION, header["flags"]])
+        if header["stream"]:
+            plaintext = bytearray()
+            for segment in _decrypt_segments(key, header, _BufferReader(header["body"])):
+                plaintext += segment
+            return _unpack_payload(plaintext)
+
+        # Header bytes exactly as stored (flags + KDF block) for AAD verification
+        aad_header = header["aad"]
 
         cipher = Cipher(
             algorithms.AES(key), modes.GCM(header["iv"], header["tag"]), backend=default_backend()
@@ -574,36 +834,296 @@ def decrypt_message(
         decryptor = cipher.decryptor()
         decryptor.authenticate_additional_data(aad_header)
 
-        padded_plaintext = decryptor.update(header["ciphertext"]) + decryptor.finalize()
-        original_length = struct.unpack(">I", padded_plaintext[-4:])[0]
+        # Decrypt into one buffer, then trim padding and metadata in place.
+        # Peak memory: the ciphertext we were handed + this one buffer.
+        ciphertext = header["ciphertext"]
+        plaintext = bytearray(len(ciphertext) + _UPDATE_INTO_SLACK)
+        written = decryptor.update_into(ciphertext, plaintext)
+        decryptor.finalize()
+        ciphertext.release()
 
-        payload_data = padded_plaintext[:original_length]
-        result = _unpack_payload(payload_data)
-
-        return result
+        original_length = struct.unpack_from(">I", plaintext, written - 4)[0]
+        if original_length > written - 4:
+            raise DecryptionError("Corrupt padding")
+        del plaintext[original_length:]
 
     except Exception as e:
-        # Provide more helpful error message for channel key issues
-        if message_has_key and not has_configured_key:
-            raise DecryptionError(
-                "Decryption failed. This message was encoded with a channel key, "
-                "but no channel key is configured. Provide the correct channel key."
-            ) from e
-        elif not message_has_key and has_configured_key:
-            raise DecryptionError(
-                "Decryption failed. This message was encoded without a channel key, "
-                "but you have one configured. Try with channel_key='' for public mode."
-            ) from e
+        raise _decryption_error(message_has_key, has_configured_key) from e
+
+    # The GCM tag checked out, so the credentials were right - a failure from
+    # here on (a missing dictionary, say) gets its own message, not "check
+    # your passphrase"
+    if header["compressed"]:
+        plaintext = _decompress_payload(plaintext)
+
+    return _unpack_payload(plaintext)
+
+
+# =============================================================================
+# STREAMING AEAD (v4.3.0)
+# =============================================================================
+#
+# Single-shot GCM needs the whole message in memory (several times over, by
+# the time it's been packed, padded and encrypted). For big file payloads we
+# switch to a STREAM-style construction instead: the plaintext is cut into
+# fixed-size segments and each one is sealed on its own.
+#
+# ┌──────────────────────────────────────────────────────────────────────────┐
+# │ \x89ST3 │ 06 │ flags|STREAM │ kdf │ salt │ nonce prefix (7B) │ seg exp │ │
+# ├──────────────────────────────────────────────────────────────────────────┤
+# │ segment 0: ciphertext (2^exp bytes) + tag (16B)                          │
+# │ segment 1: ...                                                           │
+# │ segment N: ciphertext (0..2^exp bytes) + tag (16B)     <- "last" nonce   │
+# └──────────────────────────────────────────────────────────────────────────┘
+#
+# nonce = prefix(7) + counter(4, big-endian) + last_flag(1)
+#
+# The counter stops segments being reordered or duplicated, the last flag
+# stops the stream being truncated at a segment boundary (the real last
+# segment is the only one that authenticates with flag=1), and the whole
+# header is the AAD of every segment. Plaintext is released one segment at a
+# time, and only after its tag checks out.
+#
+# No random length padding here: the segment structure already leaks the
+# size to the nearest few bytes, and these payloads are big files rather
+# than short messages where length is telling.
+
+
+class _BufferReader:
+    """Minimal read(n) over a bytes-like object, without copying it first."""
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self._view) - self._pos
+        chunk = self._view[self._pos : self._pos + size]
+        self._pos += len(chunk)
+        return bytes(chunk)
+
+
+def _as_reader(src):
+    """Accept either a file-like object or bytes-like data."""
+    if hasattr(src, "read"):
+        return src
+    return _BufferReader(src)
+
+
+def _iter_chunks(prefix: bytes, reader, chunk_size: int):
+    """
+    Yield (chunk, is_last) pairs of exactly chunk_size bytes (last may be short).
+
+    Reads one chunk ahead so we know which one is last without needing the
+    total length up front. At most two chunks are buffered at a time.
+    """
+    pending = bytearray(prefix)
+    eof = False
+
+    while True:
+        while not eof and len(pending) <= chunk_size:
+            data = reader.read(chunk_size)
+            if not data:
+                eof = True
+            else:
+                pending += data
+
+        if len(pending) > chunk_size:
+            yield bytes(pending[:chunk_size]), False
+            del pending[:chunk_size]
         else:
+            yield bytes(pending), True
+            return
+
+
+def _stream_nonce(nonce_prefix: bytes, counter: int, last: bool) -> bytes:
+    if counter > 0xFFFFFFFF:
+        raise EncryptionError("Stream too long (segment counter overflow)")
+    return nonce_prefix + struct.pack(">IB", counter, 1 if last else 0)
+
+
+def _decrypt_segments(key: bytes, header: dict, reader):
+    """Yield authenticated plaintext segments from a stream body."""
+    aead = AESGCM(key)
+    sealed_size = header["segment_size"] + TAG_SIZE
+
+    for counter, (sealed, last) in enumerate(_iter_chunks(b"", reader, sealed_size)):
+        nonce = _stream_nonce(header["nonce_prefix"], counter, last)
+        try:
+            yield aead.decrypt(nonce, sealed, header["aad"])
+        except InvalidTag:
             raise DecryptionError(
-                "Decryption failed. Check your passphrase, PIN, RSA key, "
-                "reference photo, and channel key."
-            ) from e
+                f"Stream segment {counter} failed authentication "
+                "(wrong credentials, or the data is truncated or corrupt)"
+            ) from None
+
+
+def encrypt_stream(
+    src,
+    dst,
+    photo_data: bytes | ImageContext,
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    channel_key: str | bool | None = None,
+    filename: str | None = None,
+    mime_type: str | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    segment_size: int = STREAM_SEGMENT_SIZE,
+) -> int:
+    """
+    Encrypt a file payload segment by segment (STREAM construction).
+
+    Memory use is a couple of segments regardless of how big src is, so
+    this is the path for file payloads past MAX_FILE_PAYLOAD_SIZE.
+
+    Args:
+        src: File-like object opened for binary reading (or bytes-like data)
+        dst: File-like object opened for binary writing
+        photo_data: Reference photo bytes
+        passphrase: Shared passphrase
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA key bytes
+        channel_key: Channel key parameter (see encrypt_message)
+        filename: Filename stored with the payload
+        mime_type: MIME type stored with the payload
+        kdf_profile: KDF profile name or KDFParams (see encrypt_message)
+        segment_size: Plaintext bytes per segment (power of two, 4 KB - 16 MB)
+
+    Returns:
+        Number of bytes written to dst
+
+    Raises:
+        EncryptionError: If encryption fails
+    """
+    exponent = segment_size.bit_length() - 1
+    if segment_size != 1 << exponent or not (
+        STREAM_MIN_SEGMENT_EXPONENT <= exponent <= STREAM_MAX_SEGMENT_EXPONENT
+    ):
+        raise EncryptionError(
+            f"Stream segment size must be a power of two between "
+            f"{1 << STREAM_MIN_SEGMENT_EXPONENT} and {1 << STREAM_MAX_SEGMENT_EXPONENT}"
+        )
+
+    try:
+        kdf_params = resolve_kdf_params(kdf_profile)
+        salt = secrets.token_bytes(SALT_SIZE)
+        key = derive_hybrid_key(
+            photo_data, passphrase, salt, pin, rsa_key_data, channel_key, kdf_params
+        )
+        nonce_prefix = secrets.token_bytes(STREAM_NONCE_PREFIX_SIZE)
+
+        flags = FLAG_STREAM
+        if _resolve_channel_key(channel_key):
+            flags |= FLAG_CHANNEL_KEY
+
+        header = _build_header(flags, kdf_params) + salt + nonce_prefix + bytes([exponent])
+        dst.write(header)
+        written = len(header)
+
+        # Same metadata prefix as single-shot file payloads, at the front of segment 0
+        prefix, _, _ = _split_payload(
+            FilePayload(data=b"", filename=filename or "", mime_type=mime_type)
+        )
+
+        aead = AESGCM(key)
+        reader = _as_reader(src)
+        for counter, (chunk, last) in enumerate(_iter_chunks(prefix, reader, segment_size)):
+            sealed = aead.encrypt(_stream_nonce(nonce_prefix, counter, last), chunk, header)
+            dst.write(sealed)
+            written += len(sealed)
+
+        return written
+
+    except Exception as e:
+        raise EncryptionError(f"Encryption failed: {e}") from e
+
+
+def decrypt_stream(
+    src,
+    dst,
+    photo_data: bytes | ImageContext,
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    channel_key: str | bool | None = None,
+) -> DecodeResult:
+    """
+    Decrypt a streamed payload, writing plaintext to dst as segments verify.
+
+    Nothing reaches dst until its segment has authenticated, but a failure
+    part-way through leaves the earlier segments written - callers writing to
+    disk should use a temporary file and only keep it on success (decode_file
+    does this).
+
+    Args:
+        src: Encrypted stream - file-like object or bytes-like data
+        dst: File-like object opened for binary writing
+        photo_data: Reference photo bytes
+        passphrase: Shared passphrase
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA key bytes
+        channel_key: Channel key parameter (see encrypt_message)
+
+    Returns:
+        DecodeResult with filename and mime_type (file_data is None - the
+        data went to dst)
+
+    Raises:
+        InvalidHeaderError: If src isn't a streamed Stegasoo payload
+        DecryptionError: If any segment fails to authenticate
+    """
+    reader = _as_reader(src)
+
+    # Longest possible stream header, then parse_header tells us the real size
+    stream_header_size = (
+        HEADER_PREFIX_SIZE + KDF_PARAMS_SIZE + SALT_SIZE + STREAM_NONCE_PREFIX_SIZE + 1
+    )
+    head = reader.read(stream_header_size)
+    header = parse_header(head + bytes(TAG_SIZE))
+    if not header or not header["stream"]:
+        raise InvalidHeaderError("Not a streamed Stegasoo payload")
+
+    channel_hash = _resolve_channel_key(channel_key)
+    has_configured_key = channel_hash is not None
+    message_has_key = header["has_channel_key"]
+    result = None
+
+    try:
+        key = derive_hybrid_key(
+            photo_data,
+            passphrase,
+            header["salt"],
+            pin,
+            rsa_key_data,
+            channel_key,
+            header["kdf_params"],
+        )
+
+        for segment in _decrypt_segments(key, header, reader):
+            if result is None:
+                # Segment 0 starts with the payload metadata
+                result, offset = _parse_file_prefix(segment)
+                segment = memoryview(segment)[offset:]
+            dst.write(segment)
+
+        if result is None:
+            raise DecryptionError("Stream ended before its first segment")
+        return result
+
+    except Exception as e:
+        # Nothing verified yet - almost certainly the wrong credentials
+        if result is None:
+            raise _decryption_error(message_has_key, has_configured_key) from e
+        if isinstance(e, DecryptionError):
+            raise
+        raise DecryptionError(f"Stream decryption failed: {e}") from e
 
 
 def decrypt_message_text(
     encrypted_data: bytes,
-    photo_data: bytes,
+    photo_data: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
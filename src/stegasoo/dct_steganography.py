@@ -14,6 +14,17 @@ Two approaches depending on what you want:
 1. PNG output: We do our own DCT math via scipy (works on any image)
 2. JPEG output: We use jpeglib to directly tweak the coefficients (chef's kiss)
 
+v4.3.0 - The "stop decoding the same JPEG five times" release:
+- Every entry point takes raw bytes or an ImageContext
+- Capacity checks read the header only; pixels are decoded once per image
+- Rotation candidates keep their decoded context from quick check to extraction
+- No lossy round trips before embedding: EXIF orientation is an array
+  transpose (or a DCT block transpose for JPEG), and PNG -> JPEG carriers
+  are quantized straight from the decoded pixels. One decode, one encode.
+- With the analysis cache on (analysis_cache.py), carrier pixels, Y/Cb/Cr
+  planes and the full block DCT come memory-mapped off disk, so re-using a
+  carrier skips the decode and the forward DCT entirely.
+
 v4.1.0 - The "please stop corrupting my data" release:
 - Reed-Solomon error correction (can fix up to 16 byte errors per chunk)
 - Majority voting on headers (store 3 copies, take the winner)
@@ -31,11 +42,14 @@ import gc
 import hashlib
 import io
 import struct
+import threading
+from collections.abc import Callable
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
 
 import numpy as np
-from PIL import Image, ImageOps
+from PIL import Image
 
 # Check for scipy availability (for PNG/DCT mode)
 # Prefer scipy.fft (newer, more stable) over scipy.fftpack
@@ -66,32 +80,21 @@ except ImportError:
     jpeglib = None
 
 # Import custom exceptions
-from .exceptions import InvalidMagicBytesError
+from .analysis_cache import get_analysis_cache
+from .exceptions import ExtractionError, InvalidMagicBytesError
 from .exceptions import ReedSolomonError as StegasooRSError
+from .image_context import ImageContext, ImageProbe, as_image_context, probe_image
+from .progress import ProgressTarget, as_progress_reporter, report_progress
 
-# Progress reporting interval (write every N blocks)
+# How often the embed loop offers a progress update (every N blocks). The
+# reporter decides by the clock whether it actually goes anywhere.
 PROGRESS_INTERVAL = 50
 
 
-def _write_progress(progress_file: str | None, current: int, total: int, phase: str = "embedding"):
-    """Write progress to file for frontend polling."""
-    if progress_file is None:
-        return
-    try:
-        import json
-
-        with open(progress_file, "w") as f:
-            json.dump(
-                {
-                    "current": current,
-                    "total": total,
-                    "percent": round((current / total) * 100, 1) if total > 0 else 0,
-                    "phase": phase,
-                },
-                f,
-            )
-    except Exception:
-        pass  # Don't let progress writing break encoding
+def _raise_if_cancelled(cancel: threading.Event | None) -> None:
+    """Bail out of an extraction someone else no longer needs (auto-mode race)."""
+    if cancel is not None and cancel.is_set():
+        raise ExtractionError("Extraction cancelled")
 
 
 # ============================================================================
@@ -120,9 +123,9 @@ BLOCK_SIZE = 8
 # Position (0,0) is the DC coefficient - the average brightness of the block.
 # We NEVER touch DC because changing it causes visible brightness shifts.
 EMBED_POSITIONS = [
-    (0, 1),   # 1st AC coefficient
-    (1, 0),   # 2nd AC coefficient
-    (2, 0),   # ... and so on in zig-zag order
+    (0, 1),  # 1st AC coefficient
+    (1, 0),  # 2nd AC coefficient
+    (2, 0),  # ... and so on in zig-zag order
     (1, 1),
     (0, 2),
     (0, 3),
@@ -169,9 +172,9 @@ DEFAULT_EMBED_POSITIONS = EMBED_POSITIONS[4:20]
 QUANT_STEP = 25
 
 # Magic bytes so we can identify our own images
-DCT_MAGIC = b"DCTS"      # scipy DCT mode marker
-JPEGIO_MAGIC = b"JPGS"   # jpegio native JPEG mode marker
-HEADER_SIZE = 10         # Magic (4) + version (1) + flags (1) + length (4)
+DCT_MAGIC = b"DCTS"  # scipy DCT mode marker
+JPEGIO_MAGIC = b"JPGS"  # jpegio native JPEG mode marker
+HEADER_SIZE = 10  # Magic (4) + version (1) + flags (1) + length (4)
 
 OUTPUT_FORMAT_PNG = "png"
 OUTPUT_FORMAT_JPEG = "jpeg"
@@ -186,8 +189,8 @@ JPEGIO_MIN_COEF_MAGNITUDE = 2
 JPEGIO_EMBED_CHANNEL = 0
 
 # Header flags
-FLAG_COLOR_MODE = 0x01      # Set if we preserved color (YCbCr mode)
-FLAG_RS_PROTECTED = 0x02    # Set if Reed-Solomon protected (v4.1.0+)
+FLAG_COLOR_MODE = 0x01  # Set if we preserved color (YCbCr mode)
+FLAG_RS_PROTECTED = 0x02  # Set if Reed-Solomon protected (v4.1.0+)
 
 # Reed-Solomon settings - the "please don't lose my data" system
 # 32 parity symbols per chunk means we can correct up to 16 byte errors
@@ -196,8 +199,8 @@ RS_NSYM = 32
 
 # We store the payload length 3 times and take majority vote
 # Because if the length is wrong, everything is wrong
-RS_LENGTH_HEADER_SIZE = 8   # 4 bytes raw length + 4 bytes RS-encoded length
-RS_LENGTH_COPIES = 3        # Store 3 copies, need 2 to agree
+RS_LENGTH_HEADER_SIZE = 8  # 4 bytes raw length + 4 bytes RS-encoded length
+RS_LENGTH_COPIES = 3  # Store 3 copies, need 2 to agree
 RS_LENGTH_PREFIX_SIZE = RS_LENGTH_HEADER_SIZE * RS_LENGTH_COPIES  # 24 bytes total
 
 # Chunking for large images - scipy's FFT gets memory-corrupty on huge arrays
@@ -209,6 +212,43 @@ MAX_CHUNK_HEIGHT = 512  # Process in strips to keep memory sane
 JPEGIO_NORMALIZE_QUALITY = 95
 JPEGIO_MAX_QUANT_VALUE_THRESHOLD = 1  # All 1s in quant table = bad news
 
+# The standard JPEG quantization tables (ITU-T T.81 Annex K) at quality 50.
+# When a carrier has to *become* a JPEG (PNG input, quality-100 input, or an
+# orientation we can't apply to the coefficients) we quantize it ourselves,
+# scaling these exactly the way libjpeg does for a given quality.
+# fmt: off
+JPEG_LUMA_QUANT_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+JPEG_CHROMA_QUANT_TABLE = (
+    17, 18, 24, 47, 99, 99, 99, 99,
+    18, 21, 26, 66, 99, 99, 99, 99,
+    24, 26, 56, 99, 99, 99, 99, 99,
+    47, 66, 99, 99, 99, 99, 99, 99,
+) + (99,) * 32
+# fmt: on
+
+# EXIF orientation -> (transpose, flip left-right, flip top-bottom), applied
+# in that order. The same recipe works on pixel arrays and on JPEG DCT blocks,
+# which is what lets us rotate a JPEG carrier without re-encoding it.
+EXIF_ORIENTATION_TRANSFORMS = {
+    1: (False, False, False),
+    2: (False, True, False),  # mirrored
+    3: (False, True, True),  # upside down
+    4: (False, False, True),  # mirrored, upside down
+    5: (True, False, False),  # transposed
+    6: (True, True, False),  # rotated 90 CW (the classic portrait phone shot)
+    7: (True, True, True),  # transverse
+    8: (True, False, True),  # rotated 90 CCW
+}
+
 
 # ============================================================================
 # DATA CLASSES
@@ -287,6 +327,7 @@ def has_jpegio_support() -> bool:
 
 try:
     from reedsolo import ReedSolomonError, RSCodec
+
     HAS_REEDSOLO = True
 except ImportError:
     HAS_REEDSOLO = False
@@ -406,60 +447,146 @@ def _safe_idct2(block: np.ndarray) -> np.ndarray:
 # ============================================================================
 
 
-def _apply_exif_orientation(image_data: bytes) -> bytes:
+def _orientation_transform(orientation: int) -> tuple[bool, bool, bool]:
+    """(transpose, flip_lr, flip_tb) for an EXIF orientation. Unknown = upright."""
+    return EXIF_ORIENTATION_TRANSFORMS.get(orientation, (False, False, False))
+
+
+def _orient_pixels(array: np.ndarray, orientation: int) -> np.ndarray:
     """
-    Apply EXIF orientation to image and return corrected bytes.
+    Apply EXIF orientation to a decoded pixel array (H x W or H x W x C).
 
     Portrait photos from cameras often have EXIF orientation metadata that
     tells viewers to rotate the image for display. However, the raw pixel
-    data is stored in landscape orientation. This function applies that
-    rotation to the pixel data so the output matches what users expect.
+    data is stored in landscape orientation. We bake the rotation into the
+    pixels so the output matches what users expect.
 
     Without this, a portrait photo encoded with DCT would come out rotated
     90 degrees because we'd embed in the raw (landscape) orientation.
+
+    Pure array shuffling - no decode, no encode, nothing lost. Returns views
+    where it can, so treat the result as read-only.
     """
-    img = Image.open(io.BytesIO(image_data))
-    original_format = img.format or "JPEG"
+    transpose, flip_lr, flip_tb = _orientation_transform(orientation)
+    if transpose:
+        array = array.swapaxes(0, 1)
+    if flip_lr:
+        array = array[:, ::-1]
+    if flip_tb:
+        array = array[::-1]
+    return array
 
-    # Apply EXIF orientation (rotates/flips pixels to match EXIF tag)
-    # This also removes the EXIF orientation tag since it's now baked in
-    corrected = ImageOps.exif_transpose(img)
 
-    # If no change was needed, return original data unchanged
-    if corrected is img:
-        img.close()
-        return image_data
+def _orient_dct_blocks(blocks: np.ndarray, orientation: int) -> np.ndarray:
+    """
+    Apply EXIF orientation to a (blocks_y, blocks_x, 8, 8) coefficient array.
 
-    # Save corrected image back to bytes
-    output = io.BytesIO()
-    if original_format == "JPEG":
-        if corrected.mode in ("RGBA", "P"):
-            corrected = corrected.convert("RGB")
-        corrected.save(output, format="JPEG", quality=95)
-    else:
-        corrected.save(output, format="PNG")
+    This is the jpegtran trick. Rearrange the blocks like pixels, then fix up
+    each block's coefficients: a transpose swaps horizontal and vertical
+    frequencies, and a flip negates every odd frequency along that axis
+    (cos terms with odd index change sign when mirrored). Integers in,
+    integers out - the JPEG stays bit-exact, just rotated.
+    """
+    transpose, flip_lr, flip_tb = _orientation_transform(orientation)
+    if transpose:
+        blocks = blocks.transpose(1, 0, 3, 2)
+    if flip_lr:
+        blocks = blocks[:, ::-1].copy()
+        blocks[:, :, :, 1::2] *= -1
+    if flip_tb:
+        blocks = blocks[::-1].copy()
+        blocks[:, :, 1::2, :] *= -1
+    return np.ascontiguousarray(blocks)
+
+
+def _orient_jpeg_coefficients(jpeg, orientation: int) -> bool:
+    """
+    Losslessly apply EXIF orientation to a jpeglib DCTJPEG, in place.
 
-    img.close()
-    corrected.close()
-    output.seek(0)
-    return output.getvalue()
+    Only works when the image is a whole number of MCUs in each direction -
+    otherwise a flip would drag the padding blocks from the right/bottom
+    edge into view. (jpegtran calls this "-perfect".)
 
+    Returns:
+        True if applied, False if the image isn't MCU-aligned (caller falls
+        back to the pixel path)
+    """
+    transpose, _, _ = _orientation_transform(orientation)
+    mcu_size = BLOCK_SIZE * int(np.max(jpeg.samp_factor))
+    if jpeg.width % mcu_size or jpeg.height % mcu_size:
+        return False
 
-def _to_grayscale(image_data: bytes) -> np.ndarray:
-    img = Image.open(io.BytesIO(image_data))
-    gray = img.convert("L")
-    return np.array(gray, dtype=np.float32, copy=True, order="C")
+    jpeg.Y = _orient_dct_blocks(jpeg.Y, orientation)
+    if jpeg.has_chrominance:
+        jpeg.Cb = _orient_dct_blocks(jpeg.Cb, orientation)
+        jpeg.Cr = _orient_dct_blocks(jpeg.Cr, orientation)
+
+    if transpose:
+        # Quantization steps follow their frequencies; 4:2:2 becomes 4:4:0
+        jpeg.qt = np.ascontiguousarray(jpeg.qt.transpose(0, 2, 1))
+        jpeg.height, jpeg.width = jpeg.width, jpeg.height
+        jpeg.samp_factor = np.ascontiguousarray(jpeg.samp_factor[:, ::-1])
+        jpeg.block_dims = np.ascontiguousarray(jpeg.block_dims[:, ::-1])
+
+    # Write from our arrays rather than the original file's parameters, and
+    # drop EXIF (APP1) so viewers don't rotate it a second time
+    jpeg.content = None
+    jpeg.markers = [m for m in (jpeg.markers or []) if m.type != jpeglib.JPEG_APP1]
+    return True
+
+
+def _jpeg_quant_tables(quality: int) -> np.ndarray:
+    """Luma and chroma quantization tables for a quality, scaled like libjpeg."""
+    quality = min(max(quality, 1), 100)
+    scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+    tables = []
+    for base in (JPEG_LUMA_QUANT_TABLE, JPEG_CHROMA_QUANT_TABLE):
+        table = (np.array(base, dtype=np.int32).reshape(8, 8) * scale + 50) // 100
+        tables.append(np.clip(table, 1, 255))
+    return np.stack(tables).astype(np.uint16)
+
+
+def _pixels_to_jpeg_coefficients(rgb: np.ndarray, quality: int):
+    """
+    Quantized 4:4:4 JPEG coefficients straight from a uint8 RGB array.
 
+    Does the lossy half of a JPEG encode (color convert, level shift, DCT,
+    quantize) in numpy, so the carrier goes from decoded pixels to the final
+    file in one step - jpeglib only does the lossless entropy coding on
+    write. Previously this was a PIL save followed by a jpeglib read.
 
-def _extract_y_channel(image_data: bytes) -> np.ndarray:
-    """Extract Y (luminance) channel - float32 for memory efficiency."""
-    img = Image.open(io.BytesIO(image_data))
-    if img.mode != "RGB":
-        img = img.convert("RGB")
+    Returns:
+        jpeglib DCTJPEG ready for to_jpegio()
+    """
+    height, width = rgb.shape[:2]
+    qt = _jpeg_quant_tables(quality)
+
+    components = []
+    for idx, channel in enumerate(_rgb_to_ycbcr(rgb)):
+        padded, _ = _pad_to_blocks(channel)
+        padded -= 128  # JPEG level shift
+        blocks_y = padded.shape[0] // BLOCK_SIZE
+        blocks_x = padded.shape[1] // BLOCK_SIZE
+        blocks = padded.reshape(blocks_y, BLOCK_SIZE, blocks_x, BLOCK_SIZE).swapaxes(1, 2)
+        coeffs = dctn(blocks, axes=(2, 3), norm="ortho")
+        del padded, blocks
+        components.append(np.round(coeffs / qt[min(idx, 1)]).astype(np.int16))
+        del coeffs
 
-    rgb = np.array(img, dtype=np.float32, copy=True, order="C")
-    Y = 0.299 * rgb[:, :, 0] + 0.587 * rgb[:, :, 1] + 0.114 * rgb[:, :, 2]
-    return np.array(Y, dtype=np.float32, copy=True, order="C")
+    jpeg = jpeglib.from_dct(*components, qt=qt)
+    # from_dct assumes the image fills its blocks exactly - it may not
+    jpeg.height, jpeg.width = height, width
+    return jpeg
+
+
+def _to_grayscale(image_data: bytes | ImageContext) -> np.ndarray:
+    """Grayscale float32 pixels. Shared with the context - read-only, copy to modify."""
+    return as_image_context(image_data).gray_array
+
+
+def _extract_y_channel(image_data: bytes | ImageContext) -> np.ndarray:
+    """Extract Y (luminance) channel - float32, read-only (cached on the context)."""
+    return as_image_context(image_data).y_channel
 
 
 def _pad_to_blocks(image: np.ndarray) -> tuple[np.ndarray, tuple[int, int]]:
@@ -629,6 +756,95 @@ def _ycbcr_to_rgb(Y: np.ndarray, Cb: np.ndarray, Cr: np.ndarray) -> np.ndarray:
     return rgb
 
 
+# =============================================================================
+# CARRIER ANALYSIS
+# =============================================================================
+# Everything an embed computes before it touches the message. Plain in-memory
+# arrays by default; memory-mapped from the analysis cache when it's enabled.
+
+
+def _analysis(ctx: ImageContext, name: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    """compute(), or the cached copy from the analysis cache if one is active."""
+    cache = get_analysis_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(ctx.content_hash, name, compute)
+
+
+def _carrier_rgb(ctx: ImageContext) -> np.ndarray:
+    """H x W x 3 uint8 pixels, EXIF orientation not applied (read-only)."""
+    return _analysis(ctx, "rgb", lambda: ctx.rgb_array)
+
+
+def _carrier_gray(ctx: ImageContext) -> np.ndarray:
+    """Grayscale float32 pixels, EXIF orientation not applied (read-only)."""
+    return _analysis(ctx, "gray", lambda: ctx.gray_array)
+
+
+def _carrier_ycbcr(ctx: ImageContext) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Y, Cb, Cr planes of the unoriented pixels.
+
+    Colour conversion is per-pixel, so orienting the planes afterwards gives
+    exactly what orienting the pixels first would have.
+    """
+    if get_analysis_cache() is None:
+        return _rgb_to_ycbcr(ctx.rgb_array)
+
+    computed: dict[int, np.ndarray] = {}
+
+    def plane(index: int) -> np.ndarray:
+        if not computed:
+            computed.update(enumerate(_rgb_to_ycbcr(_carrier_rgb(ctx))))
+        return computed[index]
+
+    y, cb, cr = (
+        _analysis(ctx, name, partial(plane, i)) for i, name in enumerate(("y", "cb", "cr"))
+    )
+    return y, cb, cr
+
+
+def _blocked_dct(padded: np.ndarray) -> np.ndarray:
+    """
+    DCT of every 8x8 block of a padded plane: (blocks_y, blocks_x, 8, 8) float32.
+
+    Done a band of block rows at a time - scipy and giant arrays have history.
+    """
+    h, w = padded.shape
+    blocks_y, blocks_x = h // BLOCK_SIZE, w // BLOCK_SIZE
+    blocks = padded.reshape(blocks_y, BLOCK_SIZE, blocks_x, BLOCK_SIZE).swapaxes(1, 2)
+
+    result = np.empty((blocks_y, blocks_x, BLOCK_SIZE, BLOCK_SIZE), dtype=np.float32)
+    band = 64
+    for start in range(0, blocks_y, band):
+        chunk = np.ascontiguousarray(blocks[start : start + band], dtype=np.float32)
+        result[start : start + band] = dctn(chunk, axes=(2, 3), norm="ortho")
+    return result
+
+
+def _cached_block_dct(ctx: ImageContext, plane: str, orientation: int, padded) -> np.ndarray | None:
+    """
+    Full block DCT of a plane from the analysis cache, or None when it's off.
+
+    Without a cache it's cheaper to transform just the blocks a message
+    touches, which is what the embed/extract loops do on their own.
+
+    Args:
+        ctx: Image the plane came from
+        plane: 'y' or 'gray'
+        orientation: EXIF orientation applied to the plane before padding
+        padded: The padded plane, or a callable returning it (only called on
+            a cache miss)
+    """
+    if get_analysis_cache() is None:
+        return None
+    return _analysis(
+        ctx,
+        f"dct-{plane}-o{orientation}",
+        lambda: _blocked_dct(padded() if callable(padded) else padded),
+    )
+
+
 def _create_header(data_length: int, flags: int = 0) -> bytes:
     return struct.pack(">4sBBI", DCT_MAGIC, 1, flags, data_length)
 
@@ -707,14 +923,12 @@ def _jpegio_parse_header(header_bytes: bytes) -> tuple[int, int, int]:
 # ============================================================================
 
 
-def calculate_dct_capacity(image_data: bytes) -> DCTCapacityInfo:
+def calculate_dct_capacity(image_data: bytes | ImageContext | ImageProbe) -> DCTCapacityInfo:
     """Calculate DCT embedding capacity of an image."""
     _check_scipy()
 
-    # Just get dimensions, don't process anything
-    img = Image.open(io.BytesIO(image_data))
-    width, height = img.size
-    img.close()  # Explicitly close
+    # Just get dimensions, don't process anything (cached header probe)
+    width, height = probe_image(image_data).size
 
     blocks_x = width // BLOCK_SIZE
     blocks_y = height // BLOCK_SIZE
@@ -748,16 +962,50 @@ def calculate_dct_capacity(image_data: bytes) -> DCTCapacityInfo:
     )
 
 
-def will_fit_dct(data_length: int, image_data: bytes) -> bool:
+def _max_payload_for_bytes(total_bytes: int) -> int:
+    """Largest payload whose framed form (RS prefix + header + RS parity) fits."""
+    if not HAS_REEDSOLO:
+        return max(0, total_bytes - HEADER_SIZE)
+    # RS adds RS_NSYM parity bytes per (255 - RS_NSYM)-byte chunk
+    chunk = 255 - RS_NSYM
+    room = total_bytes - RS_LENGTH_PREFIX_SIZE
+    if room <= RS_NSYM:
+        return 0
+    full_chunks, rest = divmod(room, 255)
+    raw = full_chunks * chunk + max(0, rest - RS_NSYM)
+    return max(0, raw - HEADER_SIZE)
+
+
+def calculate_jpegio_capacity(image_data: bytes | ImageContext) -> int:
+    """
+    Exact payload capacity (bytes) of the native JPEG path (dct + jpeg output).
+
+    Unlike calculate_dct_capacity this depends on the picture, not just its
+    size: only AC coefficients with magnitude >= JPEGIO_MIN_COEF_MAGNITUDE
+    can carry a bit. So it has to load the coefficients - expensive, which is
+    why the carrier library works it out once at index time.
+    """
+    if not HAS_JPEGIO:
+        raise ImportError("jpeglib required for native JPEG capacity. Install: pip install jpeglib")
+
+    ctx = as_image_context(image_data)
+    dct_jpeg = _load_jpeg_coefficients(ctx, ctx.exif_orientation)
+    coef_array = jpeglib.to_jpegio(dct_jpeg).coef_arrays[JPEGIO_EMBED_CHANNEL]
+
+    # Same rule as _jpegio_get_usable_positions, minus the Python loop
+    usable = np.abs(coef_array) >= JPEGIO_MIN_COEF_MAGNITUDE
+    usable[::BLOCK_SIZE, ::BLOCK_SIZE] = False  # DC coefficients
+    return _max_payload_for_bytes(int(np.count_nonzero(usable)) // 8)
+
+
+def will_fit_dct(data_length: int, image_data: bytes | ImageContext) -> bool:
     capacity = calculate_dct_capacity(image_data)
     return data_length <= capacity.usable_capacity_bytes
 
 
-def estimate_capacity_comparison(image_data: bytes) -> dict:
+def estimate_capacity_comparison(image_data: bytes | ImageContext) -> dict:
     """Compare LSB and DCT capacity (no actual DCT operations)."""
-    img = Image.open(io.BytesIO(image_data))
-    width, height = img.size
-    img.close()
+    width, height = probe_image(image_data).size
 
     pixels = width * height
     lsb_bytes = (pixels * 3) // 8
@@ -789,45 +1037,52 @@ def estimate_capacity_comparison(image_data: bytes) -> dict:
 
 def embed_in_dct(
     data: bytes,
-    carrier_image: bytes,
+    carrier_image: bytes | ImageContext,
     seed: bytes,
     output_format: str = OUTPUT_FORMAT_PNG,
     color_mode: str = "color",
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
 ) -> tuple[bytes, DCTEmbedStats]:
     """Embed data using DCT coefficient modification."""
+    progress_file = as_progress_reporter(progress_file)
     if output_format not in (OUTPUT_FORMAT_PNG, OUTPUT_FORMAT_JPEG):
         raise ValueError(f"Invalid output format: {output_format}")
 
     if color_mode not in ("color", "grayscale"):
         color_mode = "color"
 
-    # Apply EXIF orientation to carrier image before embedding
-    # This ensures portrait photos are embedded in their correct visual orientation
-    carrier_image = _apply_exif_orientation(carrier_image)
+    # EXIF orientation gets baked into the output so portrait photos come out
+    # the right way up. Both paths apply it to data they've already decoded
+    # (pixels or JPEG coefficients) - the carrier is never re-encoded first.
+    carrier_image = as_image_context(carrier_image)
+    orientation = carrier_image.exif_orientation
 
     if output_format == OUTPUT_FORMAT_JPEG and HAS_JPEGIO:
-        return _embed_jpegio(data, carrier_image, seed, color_mode, progress_file)
+        return _embed_jpegio(data, carrier_image, seed, color_mode, progress_file, orientation)
 
     _check_scipy()
     return _embed_scipy_dct_safe(
-        data, carrier_image, seed, output_format, color_mode, progress_file
+        data, carrier_image, seed, output_format, color_mode, progress_file, orientation
     )
 
 
 def _embed_scipy_dct_safe(
     data: bytes,
-    carrier_image: bytes,
+    carrier_image: ImageContext,
     seed: bytes,
     output_format: str,
     color_mode: str = "color",
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    orientation: int = 1,
 ) -> tuple[bytes, DCTEmbedStats]:
     """
     Embed using scipy DCT with safe memory handling.
 
     Uses row-by-row 1D DCT operations instead of 2D arrays to avoid
     scipy memory corruption issues with large images.
+
+    The carrier is decoded once (via its context), oriented as an array,
+    and encoded once into the output format.
     """
     capacity_info = calculate_dct_capacity(carrier_image)
 
@@ -837,9 +1092,9 @@ def _embed_scipy_dct_safe(
             f"(capacity: {capacity_info.usable_capacity_bytes} bytes)"
         )
 
-    # Load image
-    img = Image.open(io.BytesIO(carrier_image))
-    width, height = img.size
+    width, height = carrier_image.size
+    if _orientation_transform(orientation)[0]:
+        width, height = height, width
 
     flags = FLAG_COLOR_MODE if color_mode == "color" else 0
 
@@ -867,24 +1122,23 @@ def _embed_scipy_dct_safe(
     block_order = _generate_block_order(num_blocks, seed)
     blocks_x = width // BLOCK_SIZE
 
-    if color_mode == "color" and img.mode in ("RGB", "RGBA"):
-        if img.mode == "RGBA":
-            img = img.convert("RGB")
-
+    if color_mode == "color" and carrier_image.mode in ("RGB", "RGBA"):
         # Process color image (float32 for memory efficiency)
-        rgb = np.array(img, dtype=np.float32, copy=True, order="C")
-        img.close()
-
-        Y, Cb, Cr = _rgb_to_ycbcr(rgb)
-        del rgb
-        gc.collect()
+        Y, Cb, Cr = (_orient_pixels(p, orientation) for p in _carrier_ycbcr(carrier_image))
 
         Y_padded, original_size = _pad_to_blocks(Y)
         del Y
         gc.collect()
 
         # Embed in Y channel
-        Y_embedded = _embed_in_channel_safe(Y_padded, bits, block_order, blocks_x, progress_file)
+        Y_embedded = _embed_in_channel_safe(
+            Y_padded,
+            bits,
+            block_order,
+            blocks_x,
+            progress_file,
+            _cached_block_dct(carrier_image, "y", orientation, Y_padded),
+        )
         del Y_padded
         gc.collect()
 
@@ -901,14 +1155,20 @@ def _embed_scipy_dct_safe(
         gc.collect()
     else:
         # Grayscale mode
-        image = _to_grayscale(carrier_image)
-        img.close()
+        image = _orient_pixels(_carrier_gray(carrier_image), orientation)
 
         padded, original_size = _pad_to_blocks(image)
         del image
         gc.collect()
 
-        embedded = _embed_in_channel_safe(padded, bits, block_order, blocks_x, progress_file)
+        embedded = _embed_in_channel_safe(
+            padded,
+            bits,
+            block_order,
+            blocks_x,
+            progress_file,
+            _cached_block_dct(carrier_image, "gray", orientation, padded),
+        )
         del padded
         gc.collect()
 
@@ -941,12 +1201,15 @@ def _embed_in_channel_safe(
     bits: list,
     block_order: list,
     blocks_x: int,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    dct_coefficients: np.ndarray | None = None,
 ) -> np.ndarray:
     """
     Embed bits in channel using vectorized DCT operations.
 
     Processes blocks in batches for ~10x speedup over sequential processing.
+    With dct_coefficients (the channel's full block DCT, from the analysis
+    cache) the forward transform is a lookup instead.
     """
     h, w = channel.shape
 
@@ -965,7 +1228,7 @@ def _embed_in_channel_safe(
 
     # Initial progress write - signals Argon2/prep is done, embedding starting
     if progress_file:
-        _write_progress(progress_file, 5, 100, "embedding")
+        report_progress(progress_file, 5, 100, "embedding")
 
     # Vectorized embedding: process blocks in batches
     BATCH_SIZE = 500
@@ -978,17 +1241,26 @@ def _embed_in_channel_safe(
         batch_order = block_order[block_idx:batch_end]
         batch_count = len(batch_order)
 
-        # Extract blocks into 3D array (float32 for memory efficiency)
-        blocks = np.zeros((batch_count, BLOCK_SIZE, BLOCK_SIZE), dtype=np.float32)
-        block_positions = []
-        for i, block_num in enumerate(batch_order):
-            by = (block_num // blocks_x) * BLOCK_SIZE
-            bx = (block_num % blocks_x) * BLOCK_SIZE
-            blocks[i] = result[by : by + BLOCK_SIZE, bx : bx + BLOCK_SIZE]
-            block_positions.append((by, bx))
+        block_positions = [
+            ((block_num // blocks_x) * BLOCK_SIZE, (block_num % blocks_x) * BLOCK_SIZE)
+            for block_num in batch_order
+        ]
 
-        # Vectorized 2D DCT on all blocks at once
-        dct_blocks = dctn(blocks, axes=(1, 2), norm="ortho")
+        if dct_coefficients is not None:
+            # Precomputed - just gather this batch's blocks
+            batch = np.asarray(batch_order)
+            dct_blocks = np.array(
+                dct_coefficients[batch // blocks_x, batch % blocks_x], dtype=np.float32
+            )
+        else:
+            # Extract blocks into 3D array (float32 for memory efficiency)
+            blocks = np.zeros((batch_count, BLOCK_SIZE, BLOCK_SIZE), dtype=np.float32)
+            for i, (by, bx) in enumerate(block_positions):
+                blocks[i] = result[by : by + BLOCK_SIZE, bx : bx + BLOCK_SIZE]
+
+            # Vectorized 2D DCT on all blocks at once
+            dct_blocks = dctn(blocks, axes=(1, 2), norm="ortho")
+            del blocks
 
         # Embed bits in each block (vectorized where possible)
         for i in range(batch_count):
@@ -1009,7 +1281,8 @@ def _embed_in_channel_safe(
                 needs_adjust = (quantized % 2) != bit_array
                 # Determine direction to nudge
                 dct_blocks[i, embed_rows[needs_adjust], embed_cols[needs_adjust]] = (
-                    (quantized[needs_adjust] + (1 - 2 * (quantized[needs_adjust] % 2 == 1))) * QUANT_STEP
+                    (quantized[needs_adjust] + (1 - 2 * (quantized[needs_adjust] % 2 == 1)))
+                    * QUANT_STEP
                 ).astype(np.float64)
                 # For bits that already match, just quantize
                 dct_blocks[i, embed_rows[~needs_adjust], embed_cols[~needs_adjust]] = (
@@ -1033,16 +1306,16 @@ def _embed_in_channel_safe(
             result[by : by + BLOCK_SIZE, bx : bx + BLOCK_SIZE] = modified_blocks[i]
 
         # Cleanup
-        del blocks, dct_blocks, modified_blocks
+        del dct_blocks, modified_blocks
         block_idx = batch_end
 
         # Report progress periodically
         if progress_file and block_idx % PROGRESS_INTERVAL == 0:
-            _write_progress(progress_file, block_idx, blocks_to_process, "embedding")
+            report_progress(progress_file, block_idx, blocks_to_process, "embedding")
 
     # Final progress update
     if progress_file:
-        _write_progress(progress_file, blocks_to_process, blocks_to_process, "finalizing")
+        report_progress(progress_file, blocks_to_process, blocks_to_process, "finalizing")
 
     # Force garbage collection
     gc.collect()
@@ -1050,7 +1323,16 @@ def _embed_in_channel_safe(
     return result
 
 
-def _normalize_jpeg_for_jpegio(image_data: bytes) -> bytes:
+def _needs_jpegio_normalization(ctx: ImageContext) -> bool:
+    """Does this JPEG have the quality-100 quantization tables that crash jpegio?"""
+    if ctx.format != "JPEG" or not ctx.quantization:
+        return False
+    return any(
+        max(table) <= JPEGIO_MAX_QUANT_VALUE_THRESHOLD for table in ctx.quantization.values()
+    )
+
+
+def _normalize_jpeg_for_jpegio(image_data: bytes | ImageContext) -> ImageContext:
     """
     Normalize a JPEG image to ensure jpegio can process it safely.
 
@@ -1059,74 +1341,81 @@ def _normalize_jpeg_for_jpegio(image_data: bytes) -> bytes:
     This function detects such images and re-saves them at a safe quality level.
 
     Args:
-        image_data: Raw JPEG bytes
+        image_data: Raw JPEG bytes or their ImageContext
 
     Returns:
-        Normalized JPEG bytes (may be unchanged if already safe)
+        Context for the normalized JPEG (the same context if already safe)
     """
-    img = Image.open(io.BytesIO(image_data))
-
-    # Only process JPEGs
-    if img.format != "JPEG":
-        img.close()
-        return image_data
-
-    # Check quantization tables
-    needs_normalization = False
-    if hasattr(img, "quantization") and img.quantization:
-        for table_id, table in img.quantization.items():
-            # If all values in any table are <= threshold, normalize
-            if max(table) <= JPEGIO_MAX_QUANT_VALUE_THRESHOLD:
-                needs_normalization = True
-                break
+    ctx = as_image_context(image_data)
 
-    if not needs_normalization:
-        img.close()
-        return image_data
+    # Only JPEGs, and only the bad ones (header only - no pixel decode)
+    if not _needs_jpegio_normalization(ctx):
+        return ctx
 
     # Re-save at safe quality level
-    if img.mode != "RGB":
-        img = img.convert("RGB")
-
     buffer = io.BytesIO()
-    img.save(buffer, format="JPEG", quality=JPEGIO_NORMALIZE_QUALITY, subsampling=0)
-    img.close()
+    ctx.rgb_image.save(buffer, format="JPEG", quality=JPEGIO_NORMALIZE_QUALITY, subsampling=0)
 
-    return buffer.getvalue()
+    return ImageContext(buffer.getvalue())
+
+
+def _load_jpeg_coefficients(ctx: ImageContext, orientation: int = 1):
+    """
+    Get the carrier's JPEG coefficients, oriented, with as little codec work
+    as possible.
+
+    - Upright JPEG: read the coefficients as they are (entropy decode only)
+    - Rotated JPEG: same, then rotate the coefficient blocks (lossless)
+    - Anything else (PNG, quality-100 JPEG, rotated JPEG that isn't
+      MCU-aligned): decode once, orient the array, quantize once
+
+    Returns:
+        jpeglib DCTJPEG
+    """
+    import os
+
+    if ctx.format == "JPEG" and not _needs_jpegio_normalization(ctx):
+        input_path = _jpegio_bytes_to_file(ctx.data, suffix=".jpg")
+        try:
+            jpeg = jpeglib.read_dct(input_path)
+            jpeg.load()  # jpeglib reads lazily - do it before the file goes
+            if orientation == 1:
+                return jpeg
+            if _orient_jpeg_coefficients(jpeg, orientation):
+                return jpeg
+        finally:
+            try:
+                os.unlink(input_path)
+            except OSError:
+                pass
+
+    # Quality-100 JPEGs get the normalize quality, everything else our usual
+    quality = JPEGIO_NORMALIZE_QUALITY if ctx.format == "JPEG" else JPEG_OUTPUT_QUALITY
+    _check_scipy()
+    return _pixels_to_jpeg_coefficients(_orient_pixels(_carrier_rgb(ctx), orientation), quality)
 
 
 def _embed_jpegio(
     data: bytes,
-    carrier_image: bytes,
+    carrier_image: bytes | ImageContext,
     seed: bytes,
     color_mode: str = "color",
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    orientation: int = 1,
 ) -> tuple[bytes, DCTEmbedStats]:
     """Embed using jpegio for proper JPEG coefficient modification."""
     import os
     import tempfile
 
-    # Normalize JPEG to avoid crashes with quality=100 images
-    carrier_image = _normalize_jpeg_for_jpegio(carrier_image)
-
-    img = Image.open(io.BytesIO(carrier_image))
-    width, height = img.size
-
-    if img.format != "JPEG":
-        buffer = io.BytesIO()
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        img.save(buffer, format="JPEG", quality=95, subsampling=0)
-        carrier_image = buffer.getvalue()
-    img.close()
+    dct_jpeg = _load_jpeg_coefficients(as_image_context(carrier_image), orientation)
+    width, height = dct_jpeg.width, dct_jpeg.height
 
-    input_path = _jpegio_bytes_to_file(carrier_image, suffix=".jpg")
     output_path = tempfile.mktemp(suffix=".jpg")
 
     flags = FLAG_COLOR_MODE if color_mode == "color" else 0
 
     try:
-        jpeg = jpeglib.to_jpegio(jpeglib.read_dct(input_path))
+        jpeg = jpeglib.to_jpegio(dct_jpeg)
         coef_array = jpeg.coef_arrays[JPEGIO_EMBED_CHANNEL]
 
         all_positions = _jpegio_get_usable_positions(coef_array)
@@ -1163,7 +1452,7 @@ def _embed_jpegio(
 
         # Initial progress write - signals prep is done, embedding starting
         if progress_file:
-            _write_progress(progress_file, 5, 100, "embedding")
+            report_progress(progress_file, 5, 100, "embedding")
 
         for bit_idx, pos_idx in enumerate(order):
             if bit_idx >= len(bits):
@@ -1182,11 +1471,11 @@ def _embed_jpegio(
 
             # Report progress periodically
             if progress_file and bit_idx % progress_interval == 0:
-                _write_progress(progress_file, bit_idx, total_bits, "embedding")
+                report_progress(progress_file, bit_idx, total_bits, "embedding")
 
         # Final progress before save
         if progress_file:
-            _write_progress(progress_file, total_bits, total_bits, "saving")
+            report_progress(progress_file, total_bits, total_bits, "saving")
 
         jpeg.write(output_path)
 
@@ -1209,16 +1498,16 @@ def _embed_jpegio(
         return stego_bytes, stats
 
     finally:
-        for path in [input_path, output_path]:
-            try:
-                os.unlink(path)
-            except OSError:
-                pass
+        try:
+            os.unlink(output_path)
+        except OSError:
+            pass
 
 
 def _jpegtran_available() -> bool:
     """Check if jpegtran is available on the system."""
     import shutil
+
     return shutil.which("jpegtran") is not None
 
 
@@ -1257,10 +1546,18 @@ def _jpegtran_rotate(image_data: bytes, rotation: int) -> bytes:
         # NOTE: Don't use -trim as it drops edge blocks and destroys stego data
         # NOTE: Don't use -perfect as it fails on images with non-MCU-aligned edges
         result = subprocess.run(
-            ["jpegtran", "-rotate", str(rotation), "-copy", "all",
-             "-outfile", output_path, input_path],
+            [
+                "jpegtran",
+                "-rotate",
+                str(rotation),
+                "-copy",
+                "all",
+                "-outfile",
+                output_path,
+                input_path,
+            ],
             capture_output=True,
-            timeout=30
+            timeout=30,
         )
 
         if result.returncode != 0:
@@ -1313,38 +1610,45 @@ def _rotate_image_bytes(image_data: bytes, rotation: int, lossless: bool = True)
     return output.getvalue()
 
 
-def _quick_validate_dct_header(image_data: bytes, seed: bytes) -> bool:
+def _quick_validate_dct_header(image_data: bytes | ImageContext, seed: bytes) -> bool:
     """
     Quick validation that only extracts enough DCT data to check magic bytes.
     Returns True if header looks valid, False otherwise.
 
-    This is much faster than full extraction - only processes first ~8 blocks.
+    This is much faster than full extraction - only processes first ~12 blocks.
     """
     try:
-        # Convert to grayscale for quick check
-        gray = _to_grayscale(image_data)
-        height, width = gray.shape
-        padded, _ = _pad_to_blocks(gray)
-        padded_h, padded_w = padded.shape
-        blocks_x = padded_w // BLOCK_SIZE
-        num_blocks = (padded_h // BLOCK_SIZE) * blocks_x
+        # Same channel and block grid as _extract_scipy_dct_safe, or the
+        # block order (seeded by the block count) won't line up
+        ctx = as_image_context(image_data)
+        width, height = ctx.size
+        if ctx.mode in ("RGB", "RGBA"):
+            channel = _extract_y_channel(ctx)
+        else:
+            channel = _to_grayscale(ctx)
+        blocks_x = width // BLOCK_SIZE
+        num_blocks = (height // BLOCK_SIZE) * blocks_x
 
         # Generate block order
         block_order = _generate_block_order(num_blocks, seed)
 
-        # Only extract first 8 blocks (enough for RS length prefix + header)
-        # 8 blocks * 16 bits/block = 128 bits = 16 bytes (covers RS prefix)
-        blocks_needed = min(8, len(block_order))
+        # Only extract enough blocks for the RS length prefix (24 bytes at
+        # 16 bits/block = 12 blocks), which also covers a legacy header
+        bits_per_block = len(DEFAULT_EMBED_POSITIONS)
+        blocks_needed = min(
+            (RS_LENGTH_PREFIX_SIZE * 8 + bits_per_block - 1) // bits_per_block,
+            len(block_order),
+        )
 
         all_bits = []
         for block_num in block_order[:blocks_needed]:
             by = (block_num // blocks_x) * BLOCK_SIZE
             bx = (block_num % blocks_x) * BLOCK_SIZE
-            block = padded[by : by + BLOCK_SIZE, bx : bx + BLOCK_SIZE].astype(np.float32)
+            block = np.array(channel[by : by + BLOCK_SIZE, bx : bx + BLOCK_SIZE], dtype=np.float32)
 
             dct_block = dctn(block, norm="ortho")
 
-            for row, col in EMBED_POSITIONS:
+            for row, col in DEFAULT_EMBED_POSITIONS:
                 coef = dct_block[row, col]
                 bit = _extract_bit_from_coeff(coef)
                 all_bits.append(bit)
@@ -1367,6 +1671,7 @@ def _quick_validate_dct_header(image_data: bytes, seed: bytes) -> bool:
                 copies.append(length_prefix_bytes[start:end])
 
             from collections import Counter
+
             counter = Counter(copies)
             _, count = counter.most_common(1)[0]
 
@@ -1387,9 +1692,10 @@ def _quick_validate_dct_header(image_data: bytes, seed: bytes) -> bool:
 
 
 def extract_from_dct(
-    stego_image: bytes,
+    stego_image: bytes | ImageContext,
     seed: bytes,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
 ) -> bytes:
     """
     Extract data from DCT stego image.
@@ -1398,18 +1704,26 @@ def extract_from_dct(
     90°, 180°, and 270° rotations to handle images that were rotated after
     encoding (e.g., by external tools or EXIF orientation changes).
 
-    Uses quick header validation to skip obviously invalid rotations.
+    Uses quick header validation to skip obviously invalid rotations. Each
+    candidate is decoded once - the context from the quick check is reused
+    for the full extraction.
+
+    Setting cancel makes it give up (ExtractionError) at the next batch of
+    blocks or rotation - how auto mode stops the loser of a race.
     """
+    progress_file = as_progress_reporter(progress_file)
+    stego_image = as_image_context(stego_image)
     rotations_to_try = [0, 90, 180, 270]
     last_error = None
     valid_rotations = []
 
     # Phase 1: Quick validation to find candidate rotations
     for rotation in rotations_to_try:
+        _raise_if_cancelled(cancel)
         if rotation == 0:
             image_to_check = stego_image
         else:
-            image_to_check = _rotate_image_bytes(stego_image, rotation)
+            image_to_check = ImageContext(_rotate_image_bytes(stego_image.data, rotation))
 
         if _quick_validate_dct_header(image_to_check, seed):
             valid_rotations.append((rotation, image_to_check))
@@ -1422,21 +1736,20 @@ def extract_from_dct(
             if rotation == 0:
                 valid_rotations.append((0, stego_image))
             else:
-                valid_rotations.append((rotation, _rotate_image_bytes(stego_image, rotation)))
+                rotated = _rotate_image_bytes(stego_image.data, rotation)
+                valid_rotations.append((rotation, ImageContext(rotated)))
 
     # Phase 2: Full extraction on valid candidates
     for rotation, image_to_decode in valid_rotations:
+        _raise_if_cancelled(cancel)
         try:
-            img = Image.open(io.BytesIO(image_to_decode))
-            fmt = img.format
-            img.close()
-
-            if fmt == "JPEG" and HAS_JPEGIO:
+            if image_to_decode.format == "JPEG" and HAS_JPEGIO:
                 try:
-                    result = _extract_jpegio(image_to_decode, seed, progress_file)
+                    result = _extract_jpegio(image_to_decode, seed, progress_file, cancel)
                     if rotation != 0:
                         try:
                             from . import debug
+
                             debug.print(f"DCT decode succeeded after {rotation}° rotation")
                         except Exception:
                             pass  # Don't let debug logging break extraction
@@ -1446,10 +1759,11 @@ def extract_from_dct(
                     continue
 
             _check_scipy()
-            result = _extract_scipy_dct_safe(image_to_decode, seed, progress_file)
+            result = _extract_scipy_dct_safe(image_to_decode, seed, progress_file, cancel)
             if rotation != 0:
                 try:
                     from . import debug
+
                     debug.print(f"DCT decode succeeded after {rotation}° rotation")
                 except Exception:
                     pass  # Don't let debug logging break extraction
@@ -1464,30 +1778,29 @@ def extract_from_dct(
 
 
 def _extract_scipy_dct_safe(
-    stego_image: bytes,
+    stego_image: bytes | ImageContext,
     seed: bytes,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
 ) -> bytes:
     """Extract using safe DCT operations with vectorized processing."""
     # Progress starts at 25% (decode.py writes 20% for Argon2, 25% before extraction)
 
-    img = Image.open(io.BytesIO(stego_image))
-    width, height = img.size
-    mode = img.mode
+    stego_image = as_image_context(stego_image)
+    width, height = stego_image.size
 
-    if mode in ("RGB", "RGBA"):
+    # No analysis cache on this side. Every stego image is new, so caching
+    # its planes and block DCT would never be hit again - it would only
+    # push out the house carriers the cache exists for
+    if stego_image.mode in ("RGB", "RGBA"):
         channel = _extract_y_channel(stego_image)
     else:
         channel = _to_grayscale(stego_image)
-    img.close()
-
-    padded, _ = _pad_to_blocks(channel)
-    del channel
+    padded = _pad_to_blocks(channel)[0]
     gc.collect()
 
     # Use ORIGINAL image dimensions for block calculations (must match embed)
     # Embed uses width // BLOCK_SIZE, not padded width
-    h, w = padded.shape  # Padded dimensions for bounds checking
     blocks_x = width // BLOCK_SIZE
     blocks_y = height // BLOCK_SIZE
     num_blocks = blocks_y * blocks_x
@@ -1508,6 +1821,8 @@ def _extract_scipy_dct_safe(
 
     block_idx = 0
     while block_idx < len(block_order):
+        _raise_if_cancelled(cancel)
+
         # Determine batch size (may be smaller at end)
         batch_end = min(block_idx + BATCH_SIZE, len(block_order))
         batch_order = block_order[block_idx:batch_end]
@@ -1522,6 +1837,7 @@ def _extract_scipy_dct_safe(
 
         # Vectorized 2D DCT on all blocks at once (~10-15x faster than sequential)
         dct_blocks = dctn(blocks, axes=(1, 2), norm="ortho")
+        del blocks
 
         # Extract bits from embed positions (vectorized)
         # Shape: (batch_count, num_positions)
@@ -1532,14 +1848,14 @@ def _extract_scipy_dct_safe(
         bits = (quantized % 2).flatten().tolist()
         all_bits.extend(bits)
 
-        del blocks, dct_blocks, coeffs, quantized
+        del dct_blocks, coeffs, quantized
         block_idx = batch_end
 
         # Report progress (scale to 25-70% range, RS decode gets 70-100%)
         # Starts at 25% because decode.py writes 25% before calling extraction
         if progress_file and block_idx % PROGRESS_INTERVAL < BATCH_SIZE:
             extract_pct = 25 + int(45 * block_idx / num_blocks)
-            _write_progress(progress_file, extract_pct, 100, "extracting")
+            report_progress(progress_file, extract_pct, 100, "extracting")
 
         # Check if we have enough bits (early exit)
         if len(all_bits) >= HEADER_SIZE * 8:
@@ -1554,8 +1870,10 @@ def _extract_scipy_dct_safe(
     del padded
     gc.collect()
 
+    _raise_if_cancelled(cancel)
+
     # Extraction done, RS decode starts at 70%
-    _write_progress(progress_file, 70, 100, "decoding")
+    report_progress(progress_file, 70, 100, "decoding")
 
     # Try RS-protected format first (has 24-byte length prefix: 3 copies of 8-byte header)
     if HAS_REEDSOLO and len(all_bits) >= RS_LENGTH_PREFIX_SIZE * 8:
@@ -1610,14 +1928,14 @@ def _extract_scipy_dct_safe(
                 )
 
                 # 75% - bits converted, starting RS decode (slow part)
-                _write_progress(progress_file, 75, 100, "decoding")
+                report_progress(progress_file, 75, 100, "decoding")
 
                 try:
                     # RS decode to get header + data
                     raw_payload = _rs_decode(rs_encoded)
 
                     # 95% - RS decode done
-                    _write_progress(progress_file, 95, 100, "decoding")
+                    report_progress(progress_file, 95, 100, "decoding")
 
                     # Parse header from decoded payload
                     _, flags, data_length = _parse_header(
@@ -1626,7 +1944,7 @@ def _extract_scipy_dct_safe(
 
                     # Extract data
                     data = raw_payload[HEADER_SIZE : HEADER_SIZE + data_length]
-                    _write_progress(progress_file, 100, 100, "complete")
+                    report_progress(progress_file, 100, 100, "complete")
                     return data
                 except (ValueError, struct.error):
                     pass  # Fall through to legacy format
@@ -1642,14 +1960,15 @@ def _extract_scipy_dct_safe(
         ]
     )
 
-    _write_progress(progress_file, 100, 100, "complete")
+    report_progress(progress_file, 100, 100, "complete")
     return data
 
 
 def _extract_jpegio(
-    stego_image: bytes,
+    stego_image: bytes | ImageContext,
     seed: bytes,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
 ) -> bytes:
     """Extract using jpegio for JPEG images."""
     import os
@@ -1660,7 +1979,7 @@ def _extract_jpegio(
     # (shouldn't happen with stego images, but be defensive)
     stego_image = _normalize_jpeg_for_jpegio(stego_image)
 
-    temp_path = _jpegio_bytes_to_file(stego_image, suffix=".jpg")
+    temp_path = _jpegio_bytes_to_file(stego_image.data, suffix=".jpg")
 
     try:
         jpeg = jpeglib.to_jpegio(jpeglib.read_dct(temp_path))
@@ -1668,8 +1987,9 @@ def _extract_jpegio(
 
         all_positions = _jpegio_get_usable_positions(coef_array)
         order = _jpegio_generate_order(len(all_positions), seed)
+        _raise_if_cancelled(cancel)
 
-        _write_progress(progress_file, 30, 100, "extracting")
+        report_progress(progress_file, 30, 100, "extracting")
 
         # Try RS-protected format first (has 24-byte length prefix: 3 copies for majority voting)
         if HAS_REEDSOLO and len(all_positions) >= RS_LENGTH_PREFIX_SIZE * 8:
@@ -1733,13 +2053,14 @@ def _extract_jpegio(
                         ]
                     )
 
+                    _raise_if_cancelled(cancel)
                     try:
-                        _write_progress(progress_file, 75, 100, "decoding")
+                        report_progress(progress_file, 75, 100, "decoding")
                         raw_payload = _rs_decode(rs_encoded)
-                        _write_progress(progress_file, 95, 100, "decoding")
+                        report_progress(progress_file, 95, 100, "decoding")
                         _, flags, data_length = _jpegio_parse_header(raw_payload[:HEADER_SIZE])
                         data = raw_payload[HEADER_SIZE : HEADER_SIZE + data_length]
-                        _write_progress(progress_file, 100, 100, "complete")
+                        report_progress(progress_file, 100, 100, "complete")
                         return data
                     except (ValueError, struct.error):
                         pass  # Fall through to legacy format
@@ -1777,7 +2098,7 @@ def _extract_jpegio(
             ]
         )
 
-        _write_progress(progress_file, 100, 100, "complete")
+        report_progress(progress_file, 100, 100, "complete")
         return data
 
     finally:
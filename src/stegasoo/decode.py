@@ -3,20 +3,51 @@ Stegasoo Decode Module (v4.0.0)
 
 High-level decoding functions for extracting messages and files from images.
 
+Changes in v4.3.0:
+- decode_file streams segmented (large file) payloads straight to disk
+- channel_key may be a list of candidates, tried concurrently (trial decode)
+- Stego image and reference photo are each decoded once (shared ImageContext)
+- decode_many() rebuilds a payload sharded across several carriers,
+  extracting them concurrently (see sharding.py)
+
 Changes in v4.0.0:
 - Added channel_key parameter for deployment/group isolation
 - Improved error messages for channel key mismatches
 """
 
-import json
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-
-from .constants import EMBED_MODE_AUTO
-from .crypto import decrypt_message
+from typing import TypeVar
+
+from .constants import BATCH_BACKEND_AUTO, EMBED_MODE_AUTO, TRIAL_DECODE_MAX_WORKERS
+from .crypto import (
+    CHANNEL_KEY_AUTO,
+    _resolve_channel_key,
+    decrypt_message,
+    decrypt_stream,
+    derive_pixel_key,
+    parse_header,
+)
 from .debug import debug
-from .exceptions import DecryptionError, ExtractionError
+from .exceptions import DecryptionError, ExtractionError, ShardError, ValidationError
+from .governor import ResourceGovernor, estimate_kdf_cost
+from .image_context import ImageContext, as_image_context
 from .models import DecodeResult
-from .steganography import extract_from_image
+from .progress import ProgressReporter, ProgressTarget, as_progress_reporter, report_progress
+from .sharding import ShardCollector, is_shard, parse_shard, shard_executor
+from .steganography import _carrier_cost, extract_from_image
 from .validation import (
     require_security_factors,
     require_valid_image,
@@ -25,49 +56,110 @@ from .validation import (
 )
 
 
-def _write_progress(progress_file: str | None, current: int, total: int, phase: str) -> None:
-    """Write progress to file for UI polling."""
-    if progress_file is None:
-        return
-    try:
-        with open(progress_file, "w") as f:
-            json.dump({
-                "current": current,
-                "total": total,
-                "percent": (current / total * 100) if total > 0 else 0,
-                "phase": phase,
-            }, f)
-    except OSError:
-        pass
+def _validate_decode_inputs(
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
+    pin: str,
+    rsa_key_data: bytes | None,
+    rsa_password: str | None,
+) -> None:
+    """Validate everything decode needs before touching the image."""
+    require_valid_image(stego_image, "Stego image")
+    require_valid_image(reference_photo, "Reference photo")
+    require_security_factors(pin, rsa_key_data)
+
+    if pin:
+        require_valid_pin(pin)
+    if rsa_key_data:
+        require_valid_rsa_key(rsa_key_data, rsa_password)
+
+
+def _extract_encrypted(
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str,
+    rsa_key_data: bytes | None,
+    rsa_password: str | None,
+    embed_mode: str,
+    channel_key: str | bool | None,
+    progress_file: ProgressTarget | None,
+) -> bytes:
+    """Validate inputs and pull the encrypted payload out of the image."""
+    debug.print(
+        f"decode: passphrase length={len(passphrase.split())} words, "
+        f"mode={embed_mode}, "
+        f"channel_key={'explicit' if isinstance(channel_key, str) and channel_key else 'auto' if channel_key is None else 'none'}"
+    )
+
+    _validate_decode_inputs(stego_image, reference_photo, pin, rsa_key_data, rsa_password)
+
+    # Progress: starting key derivation (Argon2 - slow on Pi)
+    report_progress(progress_file, 20, 100, "initializing")
+
+    # Derive pixel/coefficient selection key (with channel key)
+    pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
+
+    # Progress: key derivation done, starting extraction
+    report_progress(progress_file, 25, 100, "extracting")
+
+    # Extract encrypted data
+    encrypted: bytes | None = extract_from_image(
+        stego_image,
+        pixel_key,
+        embed_mode=embed_mode,
+        progress_file=progress_file,
+    )
+
+    if not encrypted:
+        debug.print("No data extracted from image")
+        raise ExtractionError("Could not extract data. Check your credentials and image.")
+
+    if is_shard(encrypted):
+        shard = parse_shard(encrypted)
+        which = f"shard {shard.index + 1} of {shard.total_shards}" if shard else "a shard"
+        raise ShardError(
+            f"This image holds {which} of a multi-carrier payload - decode it "
+            "together with the other carriers (decode_many)"
+        )
+
+    debug.print(f"Extracted {len(encrypted)} bytes from image")
+    return encrypted
 
 
 def decode(
-    stego_image: bytes,
-    reference_photo: bytes,
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
     rsa_password: str | None = None,
     embed_mode: str = EMBED_MODE_AUTO,
-    channel_key: str | bool | None = None,
-    progress_file: str | None = None,
+    channel_key: str | bool | None | list | tuple = None,
+    progress_file: ProgressTarget | None = None,
+    max_parallel: int | None = None,
+    memory_cap_mb: float | None = None,
 ) -> DecodeResult:
     """
     Decode a message or file from a stego image.
 
     Args:
-        stego_image: Stego image bytes
-        reference_photo: Shared reference photo bytes
+        stego_image: Stego image bytes or ImageContext
+        reference_photo: Shared reference photo bytes or ImageContext
         passphrase: Shared passphrase used during encoding
         pin: Optional static PIN (if used during encoding)
         rsa_key_data: Optional RSA key bytes (if used during encoding)
         rsa_password: Optional RSA key password
         embed_mode: 'auto' (default), 'lsb', or 'dct'
-        progress_file: Optional path to write progress JSON for UI polling
+        progress_file: Optional progress JSON path or callback (see progress.py)
         channel_key: Channel key for deployment/group isolation:
             - None or "auto": Use server's configured key
             - str: Use this specific channel key
             - "" or False: No channel key (public mode)
+            - list/tuple of the above: try each one (see trial_decode)
+        max_parallel: Candidates tried at once (list channel_key only)
+        memory_cap_mb: Memory cap for the candidate attempts (list
+            channel_key only; the process-wide governor still applies)
 
     Returns:
         DecodeResult with message or file data
@@ -93,48 +185,41 @@ def decode(
         ...     pin="123456",
         ...     channel_key="ABCD-1234-EFGH-5678-IJKL-9012-MNOP-3456"
         ... )
-    """
-    debug.print(
-        f"decode: passphrase length={len(passphrase.split())} words, "
-        f"mode={embed_mode}, "
-        f"channel_key={'explicit' if isinstance(channel_key, str) and channel_key else 'auto' if channel_key is None else 'none'}"
-    )
-
-    # Validate inputs
-    require_valid_image(stego_image, "Stego image")
-    require_valid_image(reference_photo, "Reference photo")
-    require_security_factors(pin, rsa_key_data)
-
-    if pin:
-        require_valid_pin(pin)
-    if rsa_key_data:
-        require_valid_rsa_key(rsa_key_data, rsa_password)
-
-    # Progress: starting key derivation (Argon2 - slow on Pi)
-    _write_progress(progress_file, 20, 100, "initializing")
-
-    # Derive pixel/coefficient selection key (with channel key)
-    from .crypto import derive_pixel_key
-
-    pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
 
-    # Progress: key derivation done, starting extraction
-    _write_progress(progress_file, 25, 100, "extracting")
-
-    # Extract encrypted data
-    encrypted = extract_from_image(
+    Example when you don't know if it was sent public or private:
+        >>> result = decode(..., channel_key=["auto", ""])
+    """
+    progress_file = as_progress_reporter(progress_file)
+    stego_image = as_image_context(stego_image)
+    reference_photo = as_image_context(reference_photo)
+
+    if isinstance(channel_key, (list, tuple)):
+        return trial_decode(
+            stego_image,
+            reference_photo,
+            passphrase,
+            pin,
+            rsa_key_data,
+            rsa_password,
+            embed_mode,
+            channel_key,
+            progress_file,
+            max_parallel,
+            memory_cap_mb,
+        )
+
+    encrypted = _extract_encrypted(
         stego_image,
-        pixel_key,
-        embed_mode=embed_mode,
-        progress_file=progress_file,
+        reference_photo,
+        passphrase,
+        pin,
+        rsa_key_data,
+        rsa_password,
+        embed_mode,
+        channel_key,
+        progress_file,
     )
 
-    if not encrypted:
-        debug.print("No data extracted from image")
-        raise ExtractionError("Could not extract data. Check your credentials and image.")
-
-    debug.print(f"Extracted {len(encrypted)} bytes from image")
-
     # Decrypt (with channel key)
     result = decrypt_message(encrypted, reference_photo, passphrase, pin, rsa_key_data, channel_key)
 
@@ -143,23 +228,23 @@ def decode(
 
 
 def decode_file(
-    stego_image: bytes,
-    reference_photo: bytes,
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
     passphrase: str,
     output_path: Path | None = None,
     pin: str = "",
     rsa_key_data: bytes | None = None,
     rsa_password: str | None = None,
     embed_mode: str = EMBED_MODE_AUTO,
-    channel_key: str | bool | None = None,
-    progress_file: str | None = None,
+    channel_key: str | bool | None | list | tuple = None,
+    progress_file: ProgressTarget | None = None,
 ) -> Path:
     """
     Decode a file from a stego image and save it.
 
     Args:
-        stego_image: Stego image bytes
-        reference_photo: Shared reference photo bytes
+        stego_image: Stego image bytes or ImageContext
+        reference_photo: Shared reference photo bytes or ImageContext
         passphrase: Shared passphrase
         output_path: Optional output path (defaults to original filename)
         pin: Optional static PIN
@@ -167,7 +252,7 @@ def decode_file(
         rsa_password: Optional RSA key password
         embed_mode: 'auto', 'lsb', or 'dct'
         channel_key: Channel key parameter (see decode())
-        progress_file: Optional path to write progress JSON for UI polling
+        progress_file: Optional progress JSON path or callback (see progress.py)
 
     Returns:
         Path where file was saved
@@ -175,27 +260,58 @@ def decode_file(
     Raises:
         DecryptionError: If payload is text, not a file
     """
-    result = decode(
-        stego_image,
-        reference_photo,
-        passphrase,
-        pin,
-        rsa_key_data,
-        rsa_password,
-        embed_mode,
-        channel_key,
-        progress_file,
-    )
+    progress_file = as_progress_reporter(progress_file)
+    stego_image = as_image_context(stego_image)
+    reference_photo = as_image_context(reference_photo)
+
+    def finish(encrypted, reference_photo, channel_key) -> DecodeResult | Path:
+        # Streamed payloads go straight to disk; the rest decrypt in memory
+        header = parse_header(encrypted)
+        if header and header["stream"]:
+            return _decode_stream_to_file(
+                encrypted, reference_photo, passphrase, output_path, pin, rsa_key_data, channel_key
+            )
+        return decrypt_message(
+            encrypted, reference_photo, passphrase, pin, rsa_key_data, channel_key
+        )
+
+    if isinstance(channel_key, (list, tuple)):
+        outcome = _run_trial(
+            stego_image,
+            reference_photo,
+            passphrase,
+            pin,
+            rsa_key_data,
+            rsa_password,
+            embed_mode,
+            channel_key,
+            progress_file,
+            None,
+            None,
+            finish,
+        )
+    else:
+        encrypted = _extract_encrypted(
+            stego_image,
+            reference_photo,
+            passphrase,
+            pin,
+            rsa_key_data,
+            rsa_password,
+            embed_mode,
+            channel_key,
+            progress_file,
+        )
+        outcome = finish(encrypted, reference_photo, channel_key)
+
+    if isinstance(outcome, Path):
+        return outcome
+    result = outcome
 
     if not result.is_file:
         raise DecryptionError("Payload is a text message, not a file")
 
-    if output_path is None:
-        output_path = Path(result.filename or "extracted_file")
-    else:
-        output_path = Path(output_path)
-        if output_path.is_dir():
-            output_path = output_path / (result.filename or "extracted_file")
+    output_path = _resolve_output_path(output_path, result.filename)
 
     # Write file
     output_path.write_bytes(result.file_data or b"")
@@ -204,16 +320,68 @@ def decode_file(
     return output_path
 
 
+def _resolve_output_path(output_path: Path | None, filename: str | None) -> Path:
+    """Work out where a decoded file goes (explicit path, directory, or its own name)."""
+    if output_path is None:
+        return Path(filename or "extracted_file")
+
+    output_path = Path(output_path)
+    if output_path.is_dir():
+        return output_path / (filename or "extracted_file")
+    return output_path
+
+
+def _decode_stream_to_file(
+    encrypted: bytes,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    output_path: Path | None,
+    pin: str,
+    rsa_key_data: bytes | None,
+    channel_key: str | bool | None,
+) -> Path:
+    """
+    Decrypt a streamed payload to disk, one authenticated segment at a time.
+
+    The plaintext goes to a temp file next to the destination (the final name
+    is only known once the first segment has been read) and is renamed into
+    place on success, so a tampered tail never leaves half a file behind.
+    """
+    if output_path is not None and not Path(output_path).is_dir():
+        target_dir = Path(output_path).parent
+    else:
+        target_dir = Path(output_path) if output_path is not None else Path.cwd()
+
+    fd, temp_name = tempfile.mkstemp(prefix=".stegasoo-", suffix=".part", dir=target_dir)
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            result = decrypt_stream(
+                encrypted, dst, reference_photo, passphrase, pin, rsa_key_data, channel_key
+            )
+
+        final_path = _resolve_output_path(output_path, result.filename)
+        os.replace(temp_name, final_path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+    debug.print(f"Streamed file saved to: {final_path}")
+    return final_path
+
+
 def decode_text(
-    stego_image: bytes,
-    reference_photo: bytes,
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
     rsa_password: str | None = None,
     embed_mode: str = EMBED_MODE_AUTO,
-    channel_key: str | bool | None = None,
-    progress_file: str | None = None,
+    channel_key: str | bool | None | list | tuple = None,
+    progress_file: ProgressTarget | None = None,
 ) -> str:
     """
     Decode a text message from a stego image.
@@ -221,15 +389,15 @@ def decode_text(
     Convenience function that returns just the message string.
 
     Args:
-        stego_image: Stego image bytes
-        reference_photo: Shared reference photo bytes
+        stego_image: Stego image bytes or ImageContext
+        reference_photo: Shared reference photo bytes or ImageContext
         passphrase: Shared passphrase
         pin: Optional static PIN
         rsa_key_data: Optional RSA key bytes
         rsa_password: Optional RSA key password
         embed_mode: 'auto', 'lsb', or 'dct'
         channel_key: Channel key parameter (see decode())
-        progress_file: Optional path to write progress JSON for UI polling
+        progress_file: Optional progress JSON path or callback (see progress.py)
 
     Returns:
         Decoded message string
@@ -237,6 +405,7 @@ def decode_text(
     Raises:
         DecryptionError: If payload is a file, not text
     """
+    progress_file = as_progress_reporter(progress_file)
     result = decode(
         stego_image,
         reference_photo,
@@ -261,3 +430,397 @@ def decode_text(
         return ""
 
     return result.message or ""
+
+
+# =============================================================================
+# TRIAL DECODE (v4.3.0)
+# =============================================================================
+#
+# "Was this sent public or private?" Until now the answer was: guess, wait for
+# Argon2, read the hint in the error, resubmit, wait for Argon2 again.
+#
+# With a list of channel key candidates we do it in one go:
+#
+#   1. Each distinct channel key means a distinct pixel key, so each distinct
+#      key has to extract (duplicates - e.g. "auto" with no key configured
+#      and "" - collapse to one attempt). There's no cheaper way to tell:
+#      the header saying which kind of key was used is itself only readable
+#      with the right pixel key.
+#   2. Once extracted, the header's FLAG_CHANNEL_KEY says whether the sender
+#      used a channel key at all. A public candidate can't open a keyed
+#      message and vice versa, so those are dropped before spending anything
+#      on Argon2 - that's the saving, not the extraction.
+#   3. What's left runs concurrently, under a memory cap, and the first one
+#      to decrypt wins. Attempts that haven't started are cancelled.
+
+
+@dataclass
+class TrialAttempt:
+    """One channel key candidate and what happened to it."""
+
+    label: str  # 'configured', 'public' or 'explicit'
+    channel_key: str | bool | None
+    has_key: bool  # Does this candidate carry a channel key at all?
+    outcome: str = "pending"  # 'decrypted', 'no-data', 'pruned', 'failed', 'cancelled'
+    detail: str | None = None
+
+
+def _candidate_label(channel_key: str | bool | None) -> str:
+    if channel_key == "" or channel_key is False:
+        return "public"
+    if channel_key is None or channel_key == CHANNEL_KEY_AUTO:
+        return "configured"
+    return "explicit"
+
+
+def resolve_channel_candidates(channel_keys) -> list[TrialAttempt]:
+    """
+    Turn channel key candidates into distinct attempts.
+
+    Candidates that resolve to the same key (or to no key) are merged, so
+    ["auto", ""] on a server without a configured key is a single attempt.
+
+    Args:
+        channel_keys: Iterable of channel_key values (see decode())
+
+    Returns:
+        List of TrialAttempt, in the order given
+    """
+    attempts = []
+    seen = set()
+
+    for channel_key in channel_keys:
+        channel_hash = _resolve_channel_key(channel_key)
+        if channel_hash in seen:
+            continue
+        seen.add(channel_hash)
+        attempts.append(
+            TrialAttempt(
+                label=_candidate_label(channel_key),
+                channel_key=channel_key,
+                has_key=channel_hash is not None,
+            )
+        )
+
+    return attempts
+
+
+def trial_decode(
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    rsa_password: str | None = None,
+    embed_mode: str = EMBED_MODE_AUTO,
+    channel_keys=("auto", ""),
+    progress_file: ProgressTarget | None = None,
+    max_parallel: int | None = None,
+    memory_cap_mb: float | None = None,
+) -> DecodeResult:
+    """
+    Decode by trying several channel key candidates at once.
+
+    Args:
+        stego_image: Stego image bytes or ImageContext
+        reference_photo: Shared reference photo bytes or ImageContext
+        passphrase: Shared passphrase
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA key bytes
+        rsa_password: Optional RSA key password
+        embed_mode: 'auto', 'lsb', or 'dct'
+        channel_keys: Candidates, in order of preference (default: the
+            configured key, then public)
+        progress_file: Optional progress JSON path or callback (see progress.py)
+        max_parallel: Attempts running at once (default TRIAL_DECODE_MAX_WORKERS)
+        memory_cap_mb: Memory the attempts may use between them. None leaves
+            it to the process-wide governor alone.
+
+    Returns:
+        DecodeResult from the first candidate that decrypts
+
+    Raises:
+        ExtractionError: If no candidate found any data in the image
+        DecryptionError: If data was found but no candidate could decrypt it
+    """
+    progress_file = as_progress_reporter(progress_file)
+
+    def finish(encrypted, reference_photo, channel_key) -> DecodeResult:
+        return decrypt_message(
+            encrypted, reference_photo, passphrase, pin, rsa_key_data, channel_key
+        )
+
+    return _run_trial(
+        stego_image,
+        reference_photo,
+        passphrase,
+        pin,
+        rsa_key_data,
+        rsa_password,
+        embed_mode,
+        channel_keys,
+        progress_file,
+        max_parallel,
+        memory_cap_mb,
+        finish,
+    )
+
+
+_T = TypeVar("_T")
+
+
+def _run_trial(
+    stego_image: bytes | ImageContext,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str,
+    rsa_key_data: bytes | None,
+    rsa_password: str | None,
+    embed_mode: str,
+    channel_keys,
+    progress_file: ProgressReporter | None,
+    max_parallel: int | None,
+    memory_cap_mb: float | None,
+    finish: Callable[..., _T],
+) -> _T:
+    """
+    trial_decode's engine. finish(encrypted, reference_photo, channel_key)
+    turns a candidate's extracted bytes into the result, raising
+    DecryptionError if the candidate is wrong - decode_file uses that to
+    stream a STREAM payload to disk from the winning attempt.
+    """
+    # Every attempt shares one decode of each image
+    stego_image = as_image_context(stego_image)
+    reference_photo = as_image_context(reference_photo)
+    _validate_decode_inputs(stego_image, reference_photo, pin, rsa_key_data, rsa_password)
+
+    attempts = resolve_channel_candidates(channel_keys)
+    if not attempts:
+        raise ValueError("No channel key candidates given")
+
+    debug.print(
+        f"trial_decode: {len(attempts)} candidate(s): {', '.join(a.label for a in attempts)}"
+    )
+    report_progress(progress_file, 20, 100, "initializing")
+
+    # Per-call cap on top of the process-wide governor (whose own
+    # reservations inside extract/derive_key still apply)
+    limiter = ResourceGovernor(int(memory_cap_mb * 1024 * 1024)) if memory_cap_mb else None
+    image_cost = _carrier_cost(stego_image, embed_mode) if limiter else 0
+    stop = threading.Event()
+
+    def reserve(cost: int, label: str):
+        return limiter.reserve(cost, label) if limiter else nullcontext()
+
+    # Attempts share the progress bar, which only ever moves forward -
+    # concurrent extractions would otherwise make it jump back and forth
+    furthest = 0.0
+    progress_lock = threading.Lock()
+
+    def forward(update: dict) -> None:
+        nonlocal furthest
+        with progress_lock:
+            if update["percent"] < furthest:
+                return
+            furthest = update["percent"]
+        report_progress(progress_file, update["current"], update["total"], update["phase"])
+
+    shared_progress = ProgressReporter(forward, min_interval=0) if progress_file else None
+
+    def run(attempt: TrialAttempt) -> _T | None:
+        if stop.is_set():
+            attempt.outcome = "cancelled"
+            return None
+
+        pixel_key = derive_pixel_key(
+            reference_photo, passphrase, pin, rsa_key_data, attempt.channel_key
+        )
+        try:
+            with reserve(image_cost, "trial-extract"):
+                encrypted = extract_from_image(
+                    stego_image,
+                    pixel_key,
+                    embed_mode=embed_mode,
+                    progress_file=shared_progress,
+                    cancel=stop,
+                )
+        except Exception as e:
+            debug.print(f"trial_decode: {attempt.label} extraction failed: {e}")
+            encrypted = None
+
+        if not encrypted and stop.is_set():
+            attempt.outcome = "cancelled"
+            return None
+
+        header = parse_header(encrypted) if encrypted else None
+        if not header:
+            attempt.outcome = "no-data"
+            return None
+
+        # Cheap check before the expensive one
+        if header["has_channel_key"] != attempt.has_key:
+            attempt.outcome = "pruned"
+            attempt.detail = (
+                "message uses a channel key" if header["has_channel_key"] else "message is public"
+            )
+            return None
+
+        if stop.is_set():
+            attempt.outcome = "cancelled"
+            return None
+
+        try:
+            with reserve(estimate_kdf_cost(header["kdf_params"]), "trial-kdf"):
+                result = finish(encrypted, reference_photo, attempt.channel_key)
+        except DecryptionError as e:
+            attempt.outcome = "failed"
+            attempt.detail = str(e)
+            return None
+
+        attempt.outcome = "decrypted"
+        return result
+
+    report_progress(progress_file, 25, 100, "extracting")
+
+    workers = min(len(attempts), max_parallel or TRIAL_DECODE_MAX_WORKERS)
+    result: _T | None = None
+
+    if workers <= 1:
+        for attempt in attempts:
+            result = run(attempt)
+            if result is not None:
+                break
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stegasoo-trial")
+        try:
+            pending = {executor.submit(run, attempt) for attempt in attempts}
+            while pending and result is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.result() is not None:
+                        result = future.result()
+                        break
+        finally:
+            # First success wins: queued attempts are dropped, running ones
+            # see the stop flag between extraction batches or before their KDF
+            # and bail out without deriving anything
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    for attempt in attempts:
+        debug.print(f"  {attempt.label}: {attempt.outcome} {attempt.detail or ''}")
+
+    if result is not None:
+        report_progress(progress_file, 100, 100, "complete")
+        winner = next(a for a in attempts if a.outcome == "decrypted")
+        debug.print(f"Decryption successful with {winner.label} channel key")
+        return result
+
+    if all(a.outcome == "no-data" for a in attempts):
+        raise ExtractionError("Could not extract data. Check your credentials and image.")
+
+    summary = "; ".join(
+        f"{a.label}: {a.outcome}" + (f" ({a.detail})" if a.outcome == "pruned" else "")
+        for a in attempts
+    )
+    raise DecryptionError(
+        "Decryption failed with every channel key candidate. Check your passphrase, "
+        f"PIN, RSA key and reference photo. [{summary}]"
+    )
+
+
+# =============================================================================
+# MULTI-CARRIER (v4.3.0)
+# =============================================================================
+
+
+def _extract_shard(
+    stego_image: bytes | ImageContext, pixel_key: bytes, embed_mode: str
+) -> bytes | None:
+    """Pull one carrier's shard frame. Module-level so a process pool can run it."""
+    try:
+        data = extract_from_image(stego_image, pixel_key, embed_mode=embed_mode)
+    except Exception as e:  # One bad carrier is just a missing shard
+        debug.print(f"Shard extraction failed: {e}")
+        return None
+    return bytes(data) if data else None
+
+
+def decode_many(
+    stego_images: list[bytes | ImageContext],
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    rsa_password: str | None = None,
+    embed_mode: str = EMBED_MODE_AUTO,
+    channel_key: str | bool | None = None,
+    max_workers: int | None = None,
+    backend: str = BATCH_BACKEND_AUTO,
+) -> DecodeResult:
+    """
+    Decode a payload sharded across several carriers (see encode_many).
+
+    The carriers are extracted concurrently, in any order, and decoding
+    stops as soon as enough shards are in - with parity, that's before the
+    slowest carrier (or a missing or damaged one) is needed at all. Images
+    that aren't shards of this payload are ignored.
+
+    Args:
+        stego_images: Stego image bytes or ImageContexts, any order, any subset of k or more
+        reference_photo: Shared reference photo bytes or ImageContext
+        passphrase: Shared passphrase used during encoding
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA key bytes
+        rsa_password: Optional RSA key password
+        embed_mode: 'auto' (default), 'lsb', or 'dct'
+        channel_key: Channel key parameter (see decode(); no candidate lists)
+        max_workers: Carriers extracted at once (default: up to the CPU count)
+        backend: 'thread', 'process' or 'auto' (see BatchProcessor)
+
+    Returns:
+        DecodeResult with message or file data
+
+    Raises:
+        ShardError: Too few valid shards to rebuild the payload
+    """
+    if not stego_images:
+        raise ValidationError("No stego images given")
+
+    reference_photo = as_image_context(reference_photo)
+    require_valid_image(reference_photo, "Reference photo")
+    require_security_factors(pin, rsa_key_data)
+    if pin:
+        require_valid_pin(pin)
+    if rsa_key_data:
+        require_valid_rsa_key(rsa_key_data, rsa_password)
+
+    # One key derivation for all the carriers
+    pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
+
+    collector = ShardCollector()
+    executor = shard_executor(len(stego_images), backend, max_workers, embed_mode)
+    try:
+        to_process = isinstance(executor, ProcessPoolExecutor)
+        futures = [
+            executor.submit(
+                _extract_shard,
+                image.data if to_process and isinstance(image, ImageContext) else image,
+                pixel_key,
+                embed_mode,
+            )
+            for image in stego_images
+        ]
+        for future in as_completed(futures):
+            if collector.add(future.result()):
+                break
+    finally:
+        # Enough shards - don't wait for the stragglers
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    encrypted = collector.payload()
+    debug.print(f"Rebuilt {len(encrypted)} bytes from {len(stego_images)} carrier(s)")
+
+    result = decrypt_message(encrypted, reference_photo, passphrase, pin, rsa_key_data, channel_key)
+    debug.print(f"Decryption successful: {result.payload_type}")
+    return result
@@ -0,0 +1,331 @@
+"""
+Stegasoo Compression Dictionaries (v4.3.0)
+
+Most messages are short - a few hundred bytes of text. zstd and zlib can't do
+much with that: compression works by pointing back at things it has already
+seen, and in 200 bytes it hasn't seen anything yet.
+
+A trained dictionary fixes that. It's a blob of "things this channel tends to
+say" (common words, phrasing, file-metadata prefixes) that both sides load
+before compressing, so even the first word of a message can point somewhere.
+Short texts typically shrink to half or a third, which means fewer embedding
+slots and a smaller carrier.
+
+Workflow:
+
+    stegasoo channel train-dictionary old-messages/*.txt --save
+
+writes ./config/dictionaries/<channel>/<id>.zdict, next to the channel key.
+<channel> is "public" without a channel key, otherwise a hash of the key
+(never the key itself), so each channel gets its own dictionary - what one
+group says trains nothing useful for another, and the other group wouldn't
+have the file to decode with anyway. Share the file the same way you share
+the channel key. From then on:
+
+    - encode uses the channel's newest dictionary for payloads up to
+      DICTIONARY_MAX_PAYLOAD_SIZE (CompressionAlgorithm.ZSTD_DICT)
+    - the compression header records the dictionary ID
+    - decode looks the ID up in every channel's directory, so older
+      dictionaries can stay installed for older messages
+
+Dictionaries saved straight into a dictionary directory (the layout before
+channels had their own) still decode, and encode falls back to them for a
+channel that has none of its own.
+
+Dictionary directories (searched in order):
+    1. STEGASOO_DICTIONARY_DIR environment variable
+    2. ./config/dictionaries
+    3. ~/.stegasoo/dictionaries
+
+Encode asks for the active dictionary every time, so the lookup is cached:
+a few directory stats decide whether anything changed, and each file is
+read (and its ID parsed) once per modification time.
+
+Requires the zstandard package; without it nothing here is used.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from .constants import DICTIONARY_DEFAULT_SIZE, DICTIONARY_FILE_SUFFIX
+from .debug import debug
+
+# Optional ZSTD support (dictionaries are a zstd feature)
+try:
+    import zstandard as zstd
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# Environment variable naming an extra dictionary directory
+DICTIONARY_DIR_ENV_VAR = "STEGASOO_DICTIONARY_DIR"
+
+# Dictionary locations, next to the channel key config (see channel.py)
+DICTIONARY_LOCATIONS = [
+    Path("./config/dictionaries"),  # Project config
+    Path.home() / ".stegasoo" / "dictionaries",  # User config
+]
+
+
+# Scope directory for messages sent without a channel key
+PUBLIC_SCOPE = "public"
+
+
+def get_dictionary_dirs() -> list[Path]:
+    """Directories searched for dictionaries, in priority order."""
+    dirs = []
+    env_dir = os.environ.get(DICTIONARY_DIR_ENV_VAR, "").strip()
+    if env_dir:
+        dirs.append(Path(env_dir))
+    dirs.extend(DICTIONARY_LOCATIONS)
+    return dirs
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    """
+    The 32-bit ID zstd stores inside a trained dictionary.
+
+    Raises:
+        ValueError: If the bytes aren't a zstd dictionary
+    """
+    if not HAS_ZSTD:
+        raise ValueError("zstandard package not installed")
+    dict_id = zstd.ZstdCompressionDict(dictionary).dict_id()
+    if not dict_id:
+        raise ValueError("Not a trained zstd dictionary")
+    return dict_id
+
+
+def dictionary_scope(channel_hash: bytes | None) -> str:
+    """
+    Name of the subdirectory holding one channel's dictionaries.
+
+    Args:
+        channel_hash: Resolved channel key hash (see crypto._resolve_channel_key),
+            None for public mode
+
+    Returns:
+        "public", or "channel-" + 16 hex digits. Derived from the key hash
+        with its own prefix, so it's safe to show in a directory listing.
+    """
+    if channel_hash is None:
+        return PUBLIC_SCOPE
+    digest = hashlib.sha256(b"stegasoo-dictionary-scope:" + channel_hash).hexdigest()
+    return f"channel-{digest[:16]}"
+
+
+# =============================================================================
+# TRAINING
+# =============================================================================
+
+
+def train_dictionary(samples: list[bytes], size: int = DICTIONARY_DEFAULT_SIZE) -> bytes:
+    """
+    Train a dictionary from sample messages.
+
+    Feed it what the channel actually sends - one sample per message. A few
+    hundred samples is plenty; zstd refuses if there are too few.
+
+    Args:
+        samples: Example payloads
+        size: Maximum dictionary size in bytes
+
+    Returns:
+        Dictionary bytes (save with save_dictionary)
+
+    Raises:
+        ValueError: zstandard missing, or not enough sample data
+    """
+    if not HAS_ZSTD:
+        raise ValueError("Dictionary training requires the zstandard package")
+
+    usable: list[bytes | bytearray | memoryview] = [s for s in samples if s]
+    if not usable:
+        raise ValueError("No sample data to train on")
+
+    try:
+        trained = zstd.train_dictionary(size, usable)
+    except zstd.ZstdError as e:
+        raise ValueError(
+            f"Dictionary training failed ({e}) - try more samples or a smaller size"
+        ) from e
+
+    debug.print(f"Trained dictionary {trained.dict_id():08x} from {len(usable)} samples")
+    return trained.as_bytes()
+
+
+def save_dictionary(
+    dictionary: bytes,
+    location: str | Path = "project",
+    channel_key: str | bool | None = None,
+) -> Path:
+    """
+    Install a dictionary so encode/decode can find it.
+
+    Args:
+        dictionary: Dictionary bytes from train_dictionary
+        location: 'project' for ./config/dictionaries, 'user' for
+            ~/.stegasoo/dictionaries, or a directory path
+        channel_key: Channel it's for, as for encode(): None or "auto" for
+            the configured key, a key, or "" for public mode
+
+    Returns:
+        Path of the written file (<location>/<channel>/<id>.zdict)
+    """
+    from .crypto import _resolve_channel_key
+
+    dict_id = dictionary_id(dictionary)
+
+    if location == "project":
+        directory = DICTIONARY_LOCATIONS[0]
+    elif location == "user":
+        directory = DICTIONARY_LOCATIONS[1]
+    else:
+        directory = Path(location)
+    directory = directory / dictionary_scope(_resolve_channel_key(channel_key))
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{dict_id:08x}{DICTIONARY_FILE_SUFFIX}"
+    path.write_bytes(dictionary)
+
+    debug.print(f"Dictionary saved to {path}")
+    return path
+
+
+# =============================================================================
+# LOOKUP
+# =============================================================================
+
+
+@lru_cache(maxsize=16)
+def _read_dictionary(path: str, mtime_ns: int) -> tuple[bytes, int]:
+    """File contents and dictionary ID (mtime is part of the key, so a replaced file is re-read)."""
+    data = Path(path).read_bytes()
+    return data, dictionary_id(data)
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _list_directory(directory: str, mtime_ns: int | None) -> tuple[tuple[str, int, float], ...]:
+    """
+    Dictionary files directly in one directory: (path, size, mtime), by name.
+
+    Adding, removing or renaming a file changes the directory's mtime, and
+    that's part of the key - so this re-globs only when something changed.
+    """
+    if mtime_ns is None:
+        return ()
+    entries = []
+    for path in sorted(Path(directory).glob(f"*{DICTIONARY_FILE_SUFFIX}")):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((str(path), stat.st_size, stat.st_mtime))
+    return tuple(entries)
+
+
+def _files_in(directory: Path) -> tuple[tuple[str, int, float], ...]:
+    return _list_directory(str(directory), _mtime_ns(directory))
+
+
+def _dictionary_files() -> list[tuple[str, int, float]]:
+    """Every installed dictionary file: loose ones first, then each channel's."""
+    files: list[tuple[str, int, float]] = []
+    for directory in get_dictionary_dirs():
+        files.extend(_files_in(directory))
+        try:
+            scopes = sorted(p for p in directory.iterdir() if p.is_dir())
+        except OSError:
+            continue
+        for scope in scopes:
+            files.extend(_files_in(scope))
+    return files
+
+
+def _load(path: str) -> tuple[bytes, int] | None:
+    mtime_ns = _mtime_ns(Path(path))
+    if mtime_ns is None:
+        return None
+    try:
+        return _read_dictionary(path, mtime_ns)
+    except (OSError, ValueError) as e:
+        debug.print(f"Skipping dictionary {path}: {e}")
+        return None
+
+
+def list_dictionaries() -> list[dict]:
+    """Installed dictionaries: id, channel scope, path, size and modification time."""
+    result = []
+    for path, size, modified in _dictionary_files():
+        loaded = _load(path)
+        if loaded is None:
+            continue
+        parent = Path(path).parent
+        in_scope = parent.name == PUBLIC_SCOPE or parent.name.startswith("channel-")
+        result.append(
+            {
+                "id": loaded[1],
+                "scope": parent.name if in_scope else None,
+                "path": path,
+                "size": size,
+                "modified": modified,
+            }
+        )
+    return result
+
+
+def load_dictionary(dict_id: int) -> bytes | None:
+    """
+    Find an installed dictionary by ID, whichever channel it was saved for.
+
+    File names are a hint only - the ID inside the file is what counts.
+
+    Returns:
+        Dictionary bytes, or None if no installed dictionary has that ID
+    """
+    if not HAS_ZSTD:
+        return None
+    for path, _, _ in _dictionary_files():
+        loaded = _load(path)
+        if loaded is not None and loaded[1] == dict_id:
+            return loaded[0]
+    return None
+
+
+def get_active_dictionary(channel_hash: bytes | None = None) -> bytes | None:
+    """
+    The dictionary encode should use for a channel.
+
+    The newest one saved for the channel, from the first dictionary
+    directory that has any; failing that, the newest loose (pre-channel)
+    one the same way. Costs a few directory stats when nothing changed.
+
+    Args:
+        channel_hash: Resolved channel key hash, None for public mode
+
+    Returns:
+        Dictionary bytes (the same object while the file is unchanged), or
+        None if nothing is installed (or zstandard is missing)
+    """
+    if not HAS_ZSTD:
+        return None
+
+    scope = dictionary_scope(channel_hash)
+    for subdirectory in (scope, None):
+        for directory in get_dictionary_dirs():
+            files = _files_in(directory / subdirectory if subdirectory else directory)
+            for path, _, _ in sorted(files, key=lambda f: f[2], reverse=True):
+                loaded = _load(path)
+                if loaded is not None:
+                    return loaded[0]
+    return None
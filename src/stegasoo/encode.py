@@ -3,16 +3,41 @@ Stegasoo Encode Module (v4.0.0)
 
 High-level encoding functions for hiding messages and files in images.
 
+Changes in v4.3.0:
+- Added kdf_profile parameter (cost is recorded in the header, see kdf.py)
+- Large file payloads use segmented (streamed) encryption - see stream param
+- Reference photo and carrier are each decoded once (shared ImageContext)
+- Payloads are compressed before encryption when it helps - see compression
+  (level picked to fit compression_budget_ms)
+- prepare_encode() + encode_prepared(): encrypt once, embed in many carriers
+- encode_many(): one payload sharded across several carriers, embedded in
+  parallel, optionally with parity shards (see sharding.py)
+
 Changes in v4.0.0:
 - Added channel_key parameter for deployment/group isolation
 """
 
+import io
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from .constants import EMBED_MODE_LSB
-from .crypto import derive_pixel_key, encrypt_message
+from .compression import CompressionAlgorithm
+from .constants import (
+    BATCH_BACKEND_AUTO,
+    COMPRESSION_TIME_BUDGET_MS,
+    EMBED_MODE_LSB,
+    MAX_FILE_PAYLOAD_SIZE,
+    MAX_STREAM_PAYLOAD_SIZE,
+)
+from .crypto import derive_pixel_key, encrypt_message, encrypt_stream
 from .debug import debug
-from .models import EncodeResult, FilePayload
+from .exceptions import ValidationError
+from .image_context import ImageContext, as_image_context
+from .kdf import KDFParams
+from .models import EncodeResult, FilePayload, PreparedPayload
+from .progress import ProgressTarget, as_progress_reporter
+from .sharding import shard_executor, split_payload
 from .steganography import embed_in_image
 from .utils import generate_filename
 from .validation import (
@@ -26,8 +51,8 @@ from .validation import (
 
 def encode(
     message: str | bytes | FilePayload,
-    reference_photo: bytes,
-    carrier_image: bytes,
+    reference_photo: bytes | ImageContext,
+    carrier_image: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
@@ -37,15 +62,19 @@ def encode(
     dct_output_format: str = "png",
     dct_color_mode: str = "color",
     channel_key: str | bool | None = None,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    stream: bool | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
 ) -> EncodeResult:
     """
     Encode a message or file into an image.
 
     Args:
         message: Text message, raw bytes, or FilePayload to hide
-        reference_photo: Shared reference photo bytes
-        carrier_image: Carrier image bytes
+        reference_photo: Shared reference photo bytes or ImageContext
+        carrier_image: Carrier image bytes or ImageContext
         passphrase: Shared passphrase (recommend 4+ words)
         pin: Optional static PIN
         rsa_key_data: Optional RSA private key PEM bytes
@@ -58,6 +87,22 @@ def encode(
             - None or "auto": Use server's configured key
             - str: Use this specific channel key
             - "" or False: No channel key (public mode)
+        kdf_profile: KDF cost profile ('pi-low', 'default', 'paranoid',
+            'custom') or KDFParams. None uses the active profile. The
+            decoder reads it back from the header, so it needs no setting.
+        stream: Use segmented (streamed) encryption for file payloads.
+            None (default) streams only when the payload is larger than
+            MAX_FILE_PAYLOAD_SIZE. Text messages are never streamed.
+        compression: Compress the payload before encrypting it. True
+            (default) picks the best available algorithm for payloads big
+            enough to benefit and keeps the result only if it's smaller;
+            False disables it; a CompressionAlgorithm forces one. Streamed
+            payloads aren't compressed. The decoder needs no setting.
+        compression_budget_ms: How long compression may take. A sample of
+            the payload is timed and the strongest level predicted to fit
+            is used; already-compressed data is skipped. None = no limit.
+        progress_file: Progress JSON path, or a callback that receives
+            progress dicts; updates are throttled by time (see progress.py)
 
     Returns:
         EncodeResult with stego image and metadata
@@ -83,16 +128,57 @@ def encode(
         ...     channel_key="ABCD-1234-EFGH-5678-IJKL-9012-MNOP-3456"
         ... )
     """
+    progress_file = as_progress_reporter(progress_file)
     debug.print(
         f"encode: passphrase length={len(passphrase.split())} words, "
         f"pin={'set' if pin else 'none'}, mode={embed_mode}, "
         f"channel_key={'explicit' if isinstance(channel_key, str) and channel_key else 'auto' if channel_key is None else 'none'}"
     )
 
-    # Validate inputs
-    require_valid_payload(message)
-    require_valid_image(reference_photo, "Reference photo")
+    # One context per input: validation, hashing, capacity and embedding all
+    # share the same decode
+    reference_photo = as_image_context(reference_photo)
+    carrier_image = as_image_context(carrier_image)
+
+    # A bad carrier should fail before Argon2, not after it
     require_valid_image(carrier_image, "Carrier image")
+
+    # encode() is prepare + embed for a single carrier
+    prepared = prepare_encode(
+        message,
+        reference_photo,
+        passphrase,
+        pin=pin,
+        rsa_key_data=rsa_key_data,
+        rsa_password=rsa_password,
+        channel_key=channel_key,
+        kdf_profile=kdf_profile,
+        stream=stream,
+        compression=compression,
+        compression_budget_ms=compression_budget_ms,
+    )
+    return encode_prepared(
+        prepared,
+        carrier_image,
+        output_format=output_format,
+        embed_mode=embed_mode,
+        dct_output_format=dct_output_format,
+        dct_color_mode=dct_color_mode,
+        progress_file=progress_file,
+    )
+
+
+def _validate_encode_inputs(
+    reference_photo: bytes | ImageContext,
+    carrier_image: bytes | ImageContext | None,
+    pin: str,
+    rsa_key_data: bytes | None,
+    rsa_password: str | None,
+) -> None:
+    """Everything encode checks apart from the payload (carrier_image=None skips it)."""
+    require_valid_image(reference_photo, "Reference photo")
+    if carrier_image is not None:
+        require_valid_image(carrier_image, "Carrier image")
     require_security_factors(pin, rsa_key_data)
 
     if pin:
@@ -100,15 +186,66 @@ def encode(
     if rsa_key_data:
         require_valid_rsa_key(rsa_key_data, rsa_password)
 
-    # Encrypt message (with channel key)
-    encrypted = encrypt_message(
-        message, reference_photo, passphrase, pin, rsa_key_data, channel_key
+
+def _should_stream(message: str | bytes | FilePayload, stream: bool | None) -> bool:
+    """Decide between single-shot and segmented encryption."""
+    if isinstance(message, str):
+        if stream:
+            raise ValidationError("Text messages can't be streamed - use a file payload")
+        return False
+
+    if stream is not None:
+        return stream
+
+    if isinstance(message, FilePayload):
+        return len(message.data) > MAX_FILE_PAYLOAD_SIZE
+    return isinstance(message, bytes) and len(message) > MAX_FILE_PAYLOAD_SIZE
+
+
+def _encrypt_streamed(
+    src,
+    filename: str | None,
+    mime_type: str | None,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str,
+    rsa_key_data: bytes | None,
+    channel_key: str | bool | None,
+    kdf_profile: KDFParams | str | None,
+) -> bytes:
+    """Run encrypt_stream into memory (the carrier has to hold it all anyway)."""
+    output = io.BytesIO()
+    encrypt_stream(
+        src,
+        output,
+        reference_photo,
+        passphrase,
+        pin,
+        rsa_key_data,
+        channel_key,
+        filename=filename,
+        mime_type=mime_type,
+        kdf_profile=kdf_profile,
     )
+    # Nothing else holds the buffer, so getvalue() hands over BytesIO's own
+    # bytes object (trimmed in place) rather than copying it out
+    encrypted = output.getvalue()
+    debug.print(f"Streamed encryption: {len(encrypted)} bytes")
+    return encrypted
 
-    debug.print(f"Encrypted payload: {len(encrypted)} bytes")
 
-    # Derive pixel/coefficient selection key (with channel key)
-    pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
+def _embed_with_key(
+    encrypted: bytes | bytearray | memoryview,
+    pixel_key: bytes,
+    carrier_image: bytes | ImageContext,
+    output_format: str | None,
+    embed_mode: str,
+    dct_output_format: str,
+    dct_color_mode: str,
+    progress_file: ProgressTarget | None,
+) -> EncodeResult:
+    """Embed with a pixel key that's already been derived."""
+    debug.print(f"Encrypted payload: {len(encrypted)} bytes")
 
     # Embed in image
     stego_data, stats, extension = embed_in_image(
@@ -148,10 +285,281 @@ def encode(
         )
 
 
+# =============================================================================
+# ENCRYPT ONCE, EMBED MANY (v4.3.0)
+# =============================================================================
+# Same message, same credentials, hundreds of carriers: the expensive part of
+# encode() is Argon2 and the reference photo hash, and neither depends on the
+# carrier. prepare_encode() does them once; encode_prepared() only embeds.
+
+
+def prepare_encode(
+    message: str | bytes | FilePayload,
+    reference_photo: bytes | ImageContext,
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    rsa_password: str | None = None,
+    channel_key: str | bool | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    stream: bool | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+) -> PreparedPayload:
+    """
+    Encrypt a payload and derive the pixel key, ready for encode_prepared().
+
+    Every image made from the result carries the same salt and ciphertext,
+    so anyone holding two of them can tell they hide the same message. Only
+    use this when that's acceptable - encode() gives each image its own.
+
+    Args:
+        message: Text message, raw bytes, or FilePayload to hide
+        reference_photo: Shared reference photo bytes or ImageContext
+        passphrase: Shared passphrase
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA private key PEM bytes
+        rsa_password: Optional password for encrypted RSA key
+        channel_key: Channel key parameter (see encode())
+        kdf_profile: KDF cost profile (see encode())
+        stream: Segmented encryption (see encode())
+        compression: Payload compression (see encode())
+        compression_budget_ms: Compression latency budget (see encode())
+
+    Returns:
+        PreparedPayload
+
+    Example:
+        >>> prepared = prepare_encode("Meet at noon", ref_bytes, passphrase, pin="123456")
+        >>> for carrier in carriers:
+        ...     result = encode_prepared(prepared, carrier)
+    """
+    reference_photo = as_image_context(reference_photo)
+
+    # Validate inputs (streamed payloads get the bigger size limit)
+    streaming = _should_stream(message, stream)
+    require_valid_payload(message, stream=streaming)
+    _validate_encode_inputs(reference_photo, None, pin, rsa_key_data, rsa_password)
+
+    encrypted: bytes | bytearray
+    if streaming:
+        data: str | bytes  # Only ever bytes - _should_stream turns text away
+        if isinstance(message, FilePayload):
+            data, name, mime = message.data, message.filename, message.mime_type
+        else:
+            data, name, mime = message, None, None
+
+        encrypted = _encrypt_streamed(
+            data,
+            name,
+            mime,
+            reference_photo,
+            passphrase,
+            pin,
+            rsa_key_data,
+            channel_key,
+            kdf_profile,
+        )
+    else:
+        # Encrypt message (with channel key)
+        encrypted = encrypt_message(
+            message,
+            reference_photo,
+            passphrase,
+            pin,
+            rsa_key_data,
+            channel_key,
+            kdf_profile,
+            compression,
+            compression_budget_ms,
+        )
+
+    pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
+    return PreparedPayload(encrypted=encrypted, pixel_key=pixel_key)
+
+
+def encode_prepared(
+    prepared: PreparedPayload,
+    carrier_image: bytes | ImageContext,
+    output_format: str | None = None,
+    embed_mode: str = EMBED_MODE_LSB,
+    dct_output_format: str = "png",
+    dct_color_mode: str = "color",
+    progress_file: ProgressTarget | None = None,
+) -> EncodeResult:
+    """
+    Embed a prepared payload in one carrier. No key derivation happens here.
+
+    Args:
+        prepared: Output of prepare_encode()
+        carrier_image: Carrier image bytes or ImageContext
+        output_format: Force output format ('PNG', 'BMP') - LSB mode only
+        embed_mode: 'lsb' (default) or 'dct'
+        dct_output_format: For DCT mode - 'png' or 'jpeg'
+        dct_color_mode: For DCT mode - 'grayscale' or 'color'
+        progress_file: Optional progress JSON path or callback (see progress.py)
+
+    Returns:
+        EncodeResult with stego image and metadata
+    """
+    progress_file = as_progress_reporter(progress_file)
+    carrier_image = as_image_context(carrier_image)
+    require_valid_image(carrier_image, "Carrier image")
+
+    return _embed_with_key(
+        prepared.encrypted,
+        prepared.pixel_key,
+        carrier_image,
+        output_format,
+        embed_mode,
+        dct_output_format,
+        dct_color_mode,
+        progress_file,
+    )
+
+
+# =============================================================================
+# MULTI-CARRIER (v4.3.0)
+# =============================================================================
+
+
+def _embed_shard(
+    frame: bytes,
+    pixel_key: bytes,
+    carrier_image: bytes | ImageContext,
+    output_format: str | None,
+    embed_mode: str,
+    dct_output_format: str,
+    dct_color_mode: str,
+) -> EncodeResult:
+    """Embed one shard frame. Module-level so a process pool can run it."""
+    return _embed_with_key(
+        frame,
+        pixel_key,
+        carrier_image,
+        output_format,
+        embed_mode,
+        dct_output_format,
+        dct_color_mode,
+        None,
+    )
+
+
+def encode_many(
+    message: str | bytes | FilePayload,
+    reference_photo: bytes | ImageContext,
+    carriers: list[bytes | ImageContext],
+    passphrase: str,
+    pin: str = "",
+    rsa_key_data: bytes | None = None,
+    rsa_password: str | None = None,
+    parity_shards: int = 0,
+    output_format: str | None = None,
+    embed_mode: str = EMBED_MODE_LSB,
+    dct_output_format: str = "png",
+    dct_color_mode: str = "color",
+    channel_key: str | bool | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    stream: bool | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+    max_workers: int | None = None,
+    backend: str = BATCH_BACKEND_AUTO,
+) -> list[EncodeResult]:
+    """
+    Shard one payload across several carriers.
+
+    The payload is encrypted once and split into len(carriers) -
+    parity_shards equal data shards plus parity_shards parity shards; any
+    len(carriers) - parity_shards of the outputs are enough for
+    decode_many(). Every carrier only has to hold its shard, and the
+    embeds run in parallel.
+
+    Args:
+        message: Text message, raw bytes, or FilePayload to hide
+        reference_photo: Shared reference photo bytes or ImageContext
+        carriers: Carrier image bytes or ImageContexts, one shard each
+        passphrase: Shared passphrase
+        pin: Optional static PIN
+        rsa_key_data: Optional RSA private key PEM bytes
+        rsa_password: Optional password for encrypted RSA key
+        parity_shards: How many carriers may go missing (default 0)
+        output_format: Force output format ('PNG', 'BMP') - LSB mode only
+        embed_mode: 'lsb' (default) or 'dct'
+        dct_output_format: For DCT mode - 'png' or 'jpeg'
+        dct_color_mode: For DCT mode - 'grayscale' or 'color'
+        channel_key: Channel key parameter (see encode())
+        kdf_profile: KDF cost profile (see encode())
+        stream: Segmented encryption (see encode())
+        compression: Payload compression (see encode())
+        compression_budget_ms: Compression latency budget (see encode())
+        max_workers: Carriers embedded at once (default: up to the CPU count)
+        backend: 'thread', 'process' or 'auto' (see BatchProcessor)
+
+    Returns:
+        One EncodeResult per carrier, in carrier order
+
+    Raises:
+        ValidationError: Fewer carriers than parity_shards + 1, or bad inputs
+        CapacityError: A carrier can't hold its shard
+
+    Example:
+        >>> results = encode_many(big_file, ref_bytes, carriers, passphrase,
+        ...                       pin="123456", parity_shards=1)
+        >>> for i, result in enumerate(results):
+        ...     Path(f"part{i}.png").write_bytes(result.stego_image)
+    """
+    data_shards = len(carriers) - parity_shards
+    if data_shards < 1:
+        raise ValidationError(
+            f"Need more carriers than parity shards ({len(carriers)} carriers, "
+            f"{parity_shards} parity)"
+        )
+
+    contexts = [as_image_context(carrier) for carrier in carriers]
+    for context in contexts:
+        require_valid_image(context, "Carrier image")
+
+    prepared = prepare_encode(
+        message,
+        reference_photo,
+        passphrase,
+        pin=pin,
+        rsa_key_data=rsa_key_data,
+        rsa_password=rsa_password,
+        channel_key=channel_key,
+        kdf_profile=kdf_profile,
+        stream=stream,
+        compression=compression,
+        compression_budget_ms=compression_budget_ms,
+    )
+    frames = split_payload(prepared.encrypted, data_shards, parity_shards)
+
+    with shard_executor(
+        len(frames), backend, max_workers, embed_mode, dct_output_format
+    ) as executor:
+        # Worker processes get plain bytes; threads share the decoded contexts
+        to_process = isinstance(executor, ProcessPoolExecutor)
+        futures = [
+            executor.submit(
+                _embed_shard,
+                frame,
+                prepared.pixel_key,
+                context.data if to_process else context,
+                output_format,
+                embed_mode,
+                dct_output_format,
+                dct_color_mode,
+            )
+            for frame, context in zip(frames, contexts)
+        ]
+        return [future.result() for future in futures]
+
+
 def encode_file(
     filepath: str | Path,
-    reference_photo: bytes,
-    carrier_image: bytes,
+    reference_photo: bytes | ImageContext,
+    carrier_image: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
@@ -162,16 +570,23 @@ def encode_file(
     dct_output_format: str = "png",
     dct_color_mode: str = "color",
     channel_key: str | bool | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    stream: bool | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
+    progress_file: ProgressTarget | None = None,
 ) -> EncodeResult:
     """
     Encode a file into an image.
 
-    Convenience wrapper that loads a file and encodes it.
+    Convenience wrapper that loads a file and encodes it. Files too big for
+    single-shot encryption are streamed from disk instead of being read into
+    memory first.
 
     Args:
         filepath: Path to file to embed
-        reference_photo: Shared reference photo bytes
-        carrier_image: Carrier image bytes
+        reference_photo: Shared reference photo bytes or ImageContext
+        carrier_image: Carrier image bytes or ImageContext
         passphrase: Shared passphrase
         pin: Optional static PIN
         rsa_key_data: Optional RSA key bytes
@@ -182,10 +597,58 @@ def encode_file(
         dct_output_format: 'png' or 'jpeg'
         dct_color_mode: 'grayscale' or 'color'
         channel_key: Channel key parameter (see encode())
+        kdf_profile: KDF cost profile (see encode())
+        stream: Segmented encryption (see encode())
+        compression: Payload compression (see encode())
+        compression_budget_ms: Compression latency budget (see encode())
+        progress_file: Progress path or callback (see encode())
 
     Returns:
         EncodeResult
     """
+    progress_file = as_progress_reporter(progress_file)
+    path = Path(filepath)
+    size = path.stat().st_size
+
+    if stream or (stream is None and size > MAX_FILE_PAYLOAD_SIZE):
+        if not size:
+            raise ValidationError("File is empty")
+        if size > MAX_STREAM_PAYLOAD_SIZE:
+            raise ValidationError(
+                f"File too large ({size:,} bytes). "
+                f"Maximum: {MAX_STREAM_PAYLOAD_SIZE:,} bytes "
+                f"({MAX_STREAM_PAYLOAD_SIZE // (1024 * 1024)} MB)"
+            )
+        reference_photo = as_image_context(reference_photo)
+        carrier_image = as_image_context(carrier_image)
+        _validate_encode_inputs(reference_photo, carrier_image, pin, rsa_key_data, rsa_password)
+
+        name = filename_override or path.name
+        mime, _ = mimetypes.guess_type(name)
+        with open(path, "rb") as src:
+            encrypted = _encrypt_streamed(
+                src,
+                name,
+                mime,
+                reference_photo,
+                passphrase,
+                pin,
+                rsa_key_data,
+                channel_key,
+                kdf_profile,
+            )
+
+        pixel_key = derive_pixel_key(reference_photo, passphrase, pin, rsa_key_data, channel_key)
+        return encode_prepared(
+            PreparedPayload(encrypted=encrypted, pixel_key=pixel_key),
+            carrier_image,
+            output_format=output_format,
+            embed_mode=embed_mode,
+            dct_output_format=dct_output_format,
+            dct_color_mode=dct_color_mode,
+            progress_file=progress_file,
+        )
+
     payload = FilePayload.from_file(str(filepath), filename_override)
 
     return encode(
@@ -201,14 +664,19 @@ def encode_file(
         dct_output_format=dct_output_format,
         dct_color_mode=dct_color_mode,
         channel_key=channel_key,
+        kdf_profile=kdf_profile,
+        stream=stream,
+        compression=compression,
+        compression_budget_ms=compression_budget_ms,
+        progress_file=progress_file,
     )
 
 
 def encode_bytes(
     data: bytes,
     filename: str,
-    reference_photo: bytes,
-    carrier_image: bytes,
+    reference_photo: bytes | ImageContext,
+    carrier_image: bytes | ImageContext,
     passphrase: str,
     pin: str = "",
     rsa_key_data: bytes | None = None,
@@ -219,6 +687,10 @@ def encode_bytes(
     dct_output_format: str = "png",
     dct_color_mode: str = "color",
     channel_key: str | bool | None = None,
+    kdf_profile: KDFParams | str | None = None,
+    stream: bool | None = None,
+    compression: bool | CompressionAlgorithm = True,
+    compression_budget_ms: float | None = COMPRESSION_TIME_BUDGET_MS,
 ) -> EncodeResult:
     """
     Encode raw bytes with metadata into an image.
@@ -226,8 +698,8 @@ def encode_bytes(
     Args:
         data: Raw bytes to embed
         filename: Filename to associate with data
-        reference_photo: Shared reference photo bytes
-        carrier_image: Carrier image bytes
+        reference_photo: Shared reference photo bytes or ImageContext
+        carrier_image: Carrier image bytes or ImageContext
         passphrase: Shared passphrase
         pin: Optional static PIN
         rsa_key_data: Optional RSA key bytes
@@ -238,6 +710,10 @@ def encode_bytes(
         dct_output_format: 'png' or 'jpeg'
         dct_color_mode: 'grayscale' or 'color'
         channel_key: Channel key parameter (see encode())
+        kdf_profile: KDF cost profile (see encode())
+        stream: Segmented encryption (see encode())
+        compression: Payload compression (see encode())
+        compression_budget_ms: Compression latency budget (see encode())
 
     Returns:
         EncodeResult
@@ -257,4 +733,8 @@ def encode_bytes(
         dct_output_format=dct_output_format,
         dct_color_mode=dct_color_mode,
         channel_key=channel_key,
+        kdf_profile=kdf_profile,
+        stream=stream,
+        compression=compression,
+        compression_budget_ms=compression_budget_ms,
     )
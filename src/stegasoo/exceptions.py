@@ -157,6 +157,23 @@ class ModeMismatchError(SteganographyError):
     pass
 
 
+class ShardError(ExtractionError):
+    """Multi-carrier payload can't be rebuilt (too few valid shards, or a lone shard)."""
+
+    pass
+
+
+# ============================================================================
+# RESOURCE ERRORS
+# ============================================================================
+
+
+class ResourceLimitError(StegasooError):
+    """Timed out waiting for the memory budget (see governor.py)."""
+
+    pass
+
+
 # ============================================================================
 # FILE ERRORS
 # ============================================================================
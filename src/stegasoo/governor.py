@@ -0,0 +1,380 @@
+"""
+Stegasoo Resource Governor (v4.3.0)
+
+Every Argon2 call wants 256 MB (with the default profile), and a big carrier
+drags several hundred MB of pixel lists and float arrays behind it. The batch
+processor, the web executor and the API's to_thread calls all start work
+without knowing about each other - four of those at once on a 2 GB box and
+the OOM killer picks a winner for you.
+
+The governor is a process-wide memory budget. Before anything expensive
+happens, the caller estimates what it's about to allocate and reserves that
+much:
+
+    with reserve(estimate_kdf_cost(params), "kdf"):
+        key = hash_secret_raw(...)
+
+If the budget is exhausted the caller waits (FIFO, so big jobs don't starve
+behind a stream of small ones) instead of pushing the box into swap.
+
+Configuration:
+    STEGASOO_MEMORY_BUDGET_MB=1024   explicit budget
+    STEGASOO_MEMORY_BUDGET_MB=0      disable (no waiting, still counts)
+    configure_governor(budget_mb=..) same thing from code
+    (default)                        half of RAM, or of the cgroup limit
+
+get_governor().stats() reports how often and how long callers had to wait.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from .constants import (
+    EMBED_MODE_DCT,
+    GOVERNOR_ARGON2_SECONDS_PER_MIB_PASS,
+    GOVERNOR_BUDGET_FRACTION,
+    GOVERNOR_DCT_BYTES_PER_PIXEL,
+    GOVERNOR_DCT_SECONDS_PER_MPIXEL,
+    GOVERNOR_JPEGIO_BYTES_PER_PIXEL,
+    GOVERNOR_JPEGIO_SECONDS_PER_MPIXEL,
+    GOVERNOR_LSB_BYTES_PER_PIXEL,
+    GOVERNOR_LSB_SECONDS_PER_MPIXEL,
+    GOVERNOR_MIN_RESERVATION,
+    GOVERNOR_PBKDF2_SECONDS_PER_ITERATION,
+    KDF_PBKDF2_SHA512,
+)
+from .debug import debug
+from .exceptions import ResourceLimitError
+
+if TYPE_CHECKING:
+    from .kdf import KDFParams
+
+MEMORY_BUDGET_ENV_VAR = "STEGASOO_MEMORY_BUDGET_MB"
+
+# Fallback when we can't work out how much RAM there is
+_DEFAULT_BUDGET_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+# =============================================================================
+# MEMORY DETECTION
+# =============================================================================
+
+
+def _detect_memory_limit() -> int | None:
+    """
+    Best guess at how much memory this process may use.
+
+    Containers are the trap here: sysconf happily reports the host's 64 GB
+    while the cgroup caps us at 1 GB. Take the smaller of the two.
+    """
+    limits = []
+
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (ValueError, OSError, AttributeError):
+        pass
+
+    for cgroup_file in (
+        "/sys/fs/cgroup/memory.max",  # cgroup v2
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",  # cgroup v1
+    ):
+        try:
+            with open(cgroup_file) as f:
+                value = f.read().strip()
+            # "max" (v2) or a huge sentinel (v1) both mean "no limit"
+            if value.isdigit() and int(value) < (1 << 60):
+                limits.append(int(value))
+        except OSError:
+            continue
+
+    return min(limits) if limits else None
+
+
+def _default_budget() -> int:
+    """Budget from the environment, or a fraction of detected memory. 0 = unlimited."""
+    env_value = os.environ.get(MEMORY_BUDGET_ENV_VAR)
+    if env_value:
+        try:
+            return max(int(float(env_value) * 1024 * 1024), 0)
+        except ValueError:
+            debug.print(f"Ignoring invalid {MEMORY_BUDGET_ENV_VAR}={env_value!r}")
+
+    detected = _detect_memory_limit()
+    if detected is None:
+        return _DEFAULT_BUDGET_BYTES
+    return int(detected * GOVERNOR_BUDGET_FRACTION)
+
+
+# =============================================================================
+# GOVERNOR
+# =============================================================================
+
+
+@dataclass
+class GovernorStats:
+    """Snapshot of governor state and wait-time metrics."""
+
+    budget_bytes: int  # 0 = unlimited
+    in_use_bytes: int
+    peak_in_use_bytes: int
+    active: int  # Reservations currently held
+    waiting: int  # Callers currently queued
+    reservations: int  # Total granted so far
+    waits: int  # How many of those had to queue
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    @property
+    def avg_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.waits if self.waits else 0.0
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["avg_wait_seconds"] = self.avg_wait_seconds
+        return result
+
+
+class ResourceGovernor:
+    """
+    Memory-budget semaphore.
+
+    Unlike a plain counting semaphore, each reservation has a size. A request
+    larger than the whole budget is clamped to the budget - it simply gets
+    the machine to itself rather than deadlocking forever.
+
+    Nested reservations from a thread that already holds one are admitted
+    straight away (but still counted). Otherwise a decode that reserves its
+    carrier and then runs Argon2 could wait on itself.
+    """
+
+    def __init__(self, budget_bytes: int | None = None):
+        self._cond = threading.Condition()
+        self._queue: deque[object] = deque()
+        self._local = threading.local()
+        self._budget = _default_budget() if budget_bytes is None else max(budget_bytes, 0)
+
+        self._in_use = 0
+        self._peak = 0
+        self._active = 0
+        self._reservations = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def budget_bytes(self) -> int:
+        return self._budget
+
+    def set_budget(self, budget_bytes: int) -> None:
+        """Change the budget. Waiters are re-checked immediately."""
+        with self._cond:
+            self._budget = max(budget_bytes, 0)
+            self._cond.notify_all()
+
+    def _fits(self, cost: int) -> bool:
+        return self._budget == 0 or self._in_use + cost <= self._budget
+
+    @contextmanager
+    def reserve(
+        self, cost_bytes: int, label: str = "", timeout: float | None = None
+    ) -> Iterator[None]:
+        """
+        Hold cost_bytes of the budget for the duration of the block.
+
+        Args:
+            cost_bytes: Estimated peak allocation
+            label: Name for debug output ('kdf', 'embed', ...)
+            timeout: Seconds to wait before giving up (None = forever)
+
+        Raises:
+            ResourceLimitError: If timeout expires before the budget frees up
+        """
+        if cost_bytes < GOVERNOR_MIN_RESERVATION:
+            yield
+            return
+
+        if self._budget:
+            cost_bytes = min(cost_bytes, self._budget)
+
+        nested = getattr(self._local, "depth", 0) > 0
+        waited = 0.0
+
+        with self._cond:
+            if not nested:
+                ticket = object()
+                self._queue.append(ticket)
+                start = time.monotonic()
+                deadline = None if timeout is None else start + timeout
+
+                # FIFO: only the head of the queue may take budget
+                while self._queue[0] is not ticket or not self._fits(cost_bytes):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._queue.remove(ticket)
+                        self._cond.notify_all()
+                        raise ResourceLimitError(
+                            f"Timed out after {timeout}s waiting for "
+                            f"{cost_bytes // (1024 * 1024)} MB of memory budget ({label})"
+                        )
+                    self._cond.wait(remaining)
+
+                self._queue.popleft()
+                waited = time.monotonic() - start
+
+            self._in_use += cost_bytes
+            self._peak = max(self._peak, self._in_use)
+            self._active += 1
+            self._reservations += 1
+            if waited > 0.001:
+                self._waits += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            # Let the next in line see if it fits too
+            self._cond.notify_all()
+
+        if waited > 0.001:
+            debug.print(
+                f"governor: {label or 'operation'} waited {waited:.2f}s "
+                f"for {cost_bytes // (1024 * 1024)} MB"
+            )
+
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            with self._cond:
+                self._in_use -= cost_bytes
+                self._active -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> GovernorStats:
+        with self._cond:
+            return GovernorStats(
+                budget_bytes=self._budget,
+                in_use_bytes=self._in_use,
+                peak_in_use_bytes=self._peak,
+                active=self._active,
+                waiting=len(self._queue),
+                reservations=self._reservations,
+                waits=self._waits,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+
+# Process-wide instance, created on first use so the env var can be set late
+_governor: ResourceGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> ResourceGovernor:
+    """Get the process-wide governor."""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = ResourceGovernor()
+    return _governor
+
+
+def configure_governor(budget_mb: float | None = None) -> ResourceGovernor:
+    """
+    Set the process-wide memory budget.
+
+    Args:
+        budget_mb: Budget in MB, 0 for unlimited, None to re-read the
+                   environment / detected memory
+
+    Returns:
+        The process-wide governor
+    """
+    governor = get_governor()
+    if budget_mb is None:
+        governor.set_budget(_default_budget())
+    else:
+        governor.set_budget(int(budget_mb * 1024 * 1024))
+    return governor
+
+
+def reserve(cost_bytes: int, label: str = "", timeout: float | None = None):
+    """Shortcut for get_governor().reserve(...)."""
+    return get_governor().reserve(cost_bytes, label, timeout)
+
+
+# =============================================================================
+# COST ESTIMATES
+# =============================================================================
+
+
+def estimate_kdf_cost(kdf_params: "KDFParams") -> int:
+    """Bytes a single key derivation will allocate (Argon2 memory, 0 for PBKDF2)."""
+    return kdf_params.memory_bytes
+
+
+def estimate_image_cost(
+    width: int, height: int, embed_mode: str, dct_output_format: str | None = None
+) -> int:
+    """
+    Rough peak working set for embedding into / extracting from a carrier.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        embed_mode: 'lsb', 'dct' or 'auto' (auto takes the worse of the two)
+        dct_output_format: 'jpeg' selects the lighter jpegio path for DCT
+
+    Returns:
+        Estimated bytes
+    """
+    pixels = width * height
+
+    if embed_mode == EMBED_MODE_DCT:
+        if dct_output_format == "jpeg":
+            return pixels * GOVERNOR_JPEGIO_BYTES_PER_PIXEL
+        return pixels * GOVERNOR_DCT_BYTES_PER_PIXEL
+
+    if embed_mode == "auto":
+        return pixels * max(GOVERNOR_LSB_BYTES_PER_PIXEL, GOVERNOR_DCT_BYTES_PER_PIXEL)
+
+    return pixels * GOVERNOR_LSB_BYTES_PER_PIXEL
+
+
+def estimate_kdf_seconds(kdf_params: "KDFParams") -> float:
+    """Rough single-core seconds for one key derivation (Argon2 or PBKDF2)."""
+    if kdf_params.algorithm == KDF_PBKDF2_SHA512:
+        # PBKDF2 keeps its iteration count in time_cost and needs no memory
+        return float(kdf_params.time_cost) * GOVERNOR_PBKDF2_SECONDS_PER_ITERATION
+    if not kdf_params.memory_bytes:
+        return 0.0
+    mib = kdf_params.memory_bytes / (1024 * 1024)
+    return mib * kdf_params.time_cost * GOVERNOR_ARGON2_SECONDS_PER_MIB_PASS
+
+
+def estimate_image_seconds(
+    width: int, height: int, embed_mode: str, dct_output_format: str | None = None
+) -> float:
+    """
+    Rough single-core seconds to embed into / extract from a carrier.
+
+    Same arguments as estimate_image_cost. Good enough to sort work by, not
+    to promise anyone a finish time.
+    """
+    mpixels = width * height / 1_000_000
+
+    if embed_mode == EMBED_MODE_DCT:
+        if dct_output_format == "jpeg":
+            return mpixels * GOVERNOR_JPEGIO_SECONDS_PER_MPIXEL
+        return mpixels * GOVERNOR_DCT_SECONDS_PER_MPIXEL
+
+    if embed_mode == "auto":
+        # Decode tries LSB, then DCT
+        return mpixels * (GOVERNOR_LSB_SECONDS_PER_MPIXEL + GOVERNOR_DCT_SECONDS_PER_MPIXEL)
+
+    return mpixels * GOVERNOR_LSB_SECONDS_PER_MPIXEL
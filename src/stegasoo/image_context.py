@@ -0,0 +1,386 @@
+"""
+Stegasoo Image Context (v4.3.0)
+
+One encode() used to decode the same carrier over and over: validation
+opened it, the capacity check opened it, EXIF orientation decoded it, the
+DCT embed decoded it again (twice in grayscale mode), and the jpegio path
+had another go. The reference photo got decoded once for validation and
+once more for each of the two key derivations.
+
+An ImageContext wraps the raw bytes of one input and decodes things the
+first time somebody asks for them:
+
+    ctx = ImageContext(carrier_bytes)
+    ctx.size            # header only - no pixel decode
+    ctx.rgb_array       # decoded once, cached as uint8
+    ctx.y_channel       # luminance, cached as float32
+    ctx.pixel_hash      # the reference-photo hash used by the KDF
+
+The public API still takes plain bytes. Anything that accepts image bytes
+internally also accepts an ImageContext (see as_image_context), and
+encode()/decode() create one per input and pass it all the way down.
+
+Cached arrays are shared - they're flagged read-only, so copy before
+modifying. Trial decode and the auto-mode race hand one context to several
+threads, so each decoded property is computed under its own lock: a thread
+that asks while another is decoding waits for that result instead of
+decoding (and holding) a second copy.
+
+Header probes are shared across contexts too. The capacity APIs only need
+dimensions, mode and format, and the web UI asks for them over and over for
+the same carrier while the user types. probe_image() parses just the
+container header and remembers the answer in a small LRU keyed by a BLAKE2b
+hash of the bytes - hashing a 5 MB JPEG is a few milliseconds, opening it
+with PIL is a lot more. get_probe_cache_stats() reports hits and misses.
+
+probe_image_file() does the same straight from disk, reading only the first
+few KB - for walking a folder of carriers without loading any of them. And
+the capacity functions take an ImageProbe wherever they take bytes.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, overload
+
+from PIL import Image
+
+from .constants import PROBE_CACHE_SIZE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_T = TypeVar("_T")
+
+# EXIF tag holding the camera orientation (1 = upright)
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+# =============================================================================
+# HEADER PROBE
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class ImageProbe:
+    """What the container header says about an image (no pixels decoded)."""
+
+    format: str | None
+    mode: str
+    width: int
+    height: int
+    file_size: int
+    exif_orientation: int = 1
+    quantization: dict | None = None  # JPEG only - shared, don't modify
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return (self.width, self.height)
+
+    @property
+    def num_pixels(self) -> int:
+        return self.width * self.height
+
+
+def _read_probe(data: bytes) -> ImageProbe:
+    """Parse the header. PIL's open() reads just enough to know the size."""
+    return _parse_header(io.BytesIO(data), len(data))
+
+
+def _parse_header(source, file_size: int) -> ImageProbe:
+    img = Image.open(source)
+    try:
+        try:
+            orientation = int(img.getexif().get(EXIF_ORIENTATION_TAG, 1))
+        except Exception:
+            orientation = 1
+        return ImageProbe(
+            format=img.format,
+            mode=img.mode,
+            width=img.size[0],
+            height=img.size[1],
+            file_size=file_size,
+            exif_orientation=orientation,
+            quantization=getattr(img, "quantization", None),
+        )
+    finally:
+        img.close()
+
+
+class ProbeCache:
+    """Bounded LRU of header probes, keyed by a BLAKE2b digest of the bytes."""
+
+    def __init__(self, maxsize: int = PROBE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, ImageProbe] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, data: bytes) -> ImageProbe:
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Parse outside the lock; two threads racing on the same new image
+        # just both do the work once
+        probe = _read_probe(data)
+        with self._lock:
+            self._entries[key] = probe
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return probe
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_probe_cache = ProbeCache()
+
+
+def probe_image(image: "bytes | ImageContext | ImageProbe") -> ImageProbe:
+    """
+    Header-only facts about an image, cached by content.
+
+    Args:
+        image: Image bytes or ImageContext (an ImageProbe is returned as is)
+
+    Returns:
+        ImageProbe (format, mode, dimensions, EXIF orientation, JPEG tables)
+
+    Raises:
+        PIL.UnidentifiedImageError: If the bytes aren't a readable image
+    """
+    if isinstance(image, ImageProbe):
+        return image
+    if isinstance(image, ImageContext):
+        return image.probe
+    return _probe_cache.probe(image)
+
+
+def probe_image_file(path: str | Path) -> ImageProbe:
+    """
+    Header-only probe of an image on disk, without reading the whole file.
+
+    Not cached - there are no bytes to key on. Callers that re-check the
+    same files key on (path, mtime, size) themselves.
+
+    Raises:
+        OSError: If the file can't be read
+        PIL.UnidentifiedImageError: If it isn't a readable image
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        return _parse_header(f, os.fstat(f.fileno()).st_size)
+
+
+def get_probe_cache_stats() -> dict:
+    """Hit/miss counters and size of the probe cache."""
+    return _probe_cache.stats()
+
+
+def clear_probe_cache() -> None:
+    """Empty the probe cache and reset its counters."""
+    _probe_cache.clear()
+
+
+class _CachedOnce(Generic[_T]):
+    """
+    Like functools.cached_property, but computed at most once per instance.
+
+    cached_property stopped locking in Python 3.12, so two threads reading a
+    fresh property both compute it. For a decoded carrier that's twice the
+    CPU and, briefly, twice the memory. Each property gets its own lock (per
+    instance), so rgb_array and pixel_hash can still be computed side by side.
+    Once computed the value sits in the instance dict and reads skip this
+    entirely.
+    """
+
+    def __init__(self, func: Callable[[Any], _T]):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(self, instance: None, owner=None) -> "_CachedOnce[_T]": ...
+
+    @overload
+    def __get__(self, instance: object, owner=None) -> _T: ...
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        with instance._property_lock(self.name):
+            if self.name not in cache:
+                cache[self.name] = self.func(instance)
+        return cache[self.name]
+
+
+class ImageContext:
+    """Lazily decoded view of one image input, shared across a pipeline."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        # Trial decode shares contexts between threads - see _CachedOnce
+        self._lock = threading.Lock()
+        self._locks: dict[str, threading.Lock] = {}
+
+    def _property_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __bool__(self) -> bool:
+        return bool(self.data)
+
+    # -------------------------------------------------------------------------
+    # Header-only properties (from the shared probe cache, no pixel decode)
+    # -------------------------------------------------------------------------
+
+    @cached_property
+    def probe(self) -> ImageProbe:
+        return _probe_cache.probe(self.data)
+
+    @property
+    def format(self) -> str | None:
+        return self.probe.format
+
+    @property
+    def mode(self) -> str:
+        return self.probe.mode
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.probe.size
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def num_pixels(self) -> int:
+        return self.size[0] * self.size[1]
+
+    @property
+    def quantization(self) -> dict | None:
+        """JPEG quantization tables, or None for other formats."""
+        return self.probe.quantization
+
+    @property
+    def exif_orientation(self) -> int:
+        return self.probe.exif_orientation
+
+    # -------------------------------------------------------------------------
+    # Decoded pixels (each computed at most once)
+    # -------------------------------------------------------------------------
+
+    @_CachedOnce
+    def image(self) -> Image.Image:
+        """The fully decoded image, in its original mode."""
+        img = Image.open(io.BytesIO(self.data))
+        img.load()
+        return img
+
+    @_CachedOnce
+    def rgb_image(self) -> Image.Image:
+        img = self.image
+        return img if img.mode == "RGB" else img.convert("RGB")
+
+    @_CachedOnce
+    def gray_image(self) -> Image.Image:
+        img = self.image
+        return img if img.mode == "L" else img.convert("L")
+
+    @_CachedOnce
+    def rgb_array(self) -> "np.ndarray":
+        """H x W x 3 uint8 array (read-only)."""
+        import numpy as np
+
+        array = np.asarray(self.rgb_image, dtype=np.uint8)
+        array.flags.writeable = False
+        return array
+
+    @_CachedOnce
+    def gray_array(self) -> "np.ndarray":
+        """H x W float32 array of PIL's 'L' conversion (read-only)."""
+        import numpy as np
+
+        array = np.array(self.gray_image, dtype=np.float32, order="C")
+        array.flags.writeable = False
+        return array
+
+    @_CachedOnce
+    def y_channel(self) -> "np.ndarray":
+        """H x W float32 luminance (BT.601, same weights as the DCT code)."""
+        import numpy as np
+
+        rgb = self.rgb_array.astype(np.float32)
+        y = 0.299 * rgb[:, :, 0] + 0.587 * rgb[:, :, 1] + 0.114 * rgb[:, :, 2]
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        y.flags.writeable = False
+        return y
+
+    @_CachedOnce
+    def pixel_hash(self) -> bytes:
+        """
+        Hash of the RGB pixel content (see crypto.hash_photo).
+
+        Double-hash: SHA256(SHA256(pixels) + first 1KB of pixels).
+        """
+        pixels = self.rgb_image.tobytes()
+        h = hashlib.sha256(pixels).digest()
+        return hashlib.sha256(h + pixels[:1024]).digest()
+
+    @cached_property
+    def content_hash(self) -> bytes:
+        """SHA-256 of the raw file bytes."""
+        return hashlib.sha256(self.data).digest()
+
+
+def as_image_context(image: "bytes | ImageContext") -> ImageContext:
+    """Wrap image bytes in a context (an existing context is returned as-is)."""
+    if isinstance(image, ImageContext):
+        return image
+    return ImageContext(image)
+
+
+def image_bytes(image: "bytes | ImageContext") -> bytes:
+    """The raw file bytes behind an image argument."""
+    if isinstance(image, ImageContext):
+        return image.data
+    return image
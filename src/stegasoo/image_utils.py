@@ -2,19 +2,20 @@
 Stegasoo Image Utilities (v3.2.0)
 
 Functions for analyzing images and comparing capacity.
-"""
-
-import io
 
-from PIL import Image
+Changes in v4.3.0:
+- Dimensions/format come from the cached header probe (image_context), so
+  asking about the same carrier again doesn't reopen it
+"""
 
 from .constants import EMBED_MODE_LSB
 from .debug import debug
+from .image_context import ImageContext, as_image_context
 from .models import CapacityComparison, ImageInfo
 from .steganography import calculate_capacity, has_dct_support
 
 
-def get_image_info(image_data: bytes) -> ImageInfo:
+def get_image_info(image_data: bytes | ImageContext) -> ImageInfo:
     """
     Get detailed information about an image.
 
@@ -28,12 +29,14 @@ def get_image_info(image_data: bytes) -> ImageInfo:
         >>> info = get_image_info(carrier_bytes)
         >>> print(f"{info.width}x{info.height}, {info.lsb_capacity_kb} KB capacity")
     """
-    img = Image.open(io.BytesIO(image_data))
+    # One context (one hash, one probe) shared by all the capacity calls below
+    image_data = as_image_context(image_data)
+    probe = image_data.probe
 
-    width, height = img.size
-    pixels = width * height
-    format_str = img.format or "Unknown"
-    mode = img.mode
+    width, height = probe.size
+    pixels = probe.num_pixels
+    format_str = probe.format or "Unknown"
+    mode = probe.mode
 
     # Calculate LSB capacity
     lsb_capacity = calculate_capacity(image_data, bits_per_channel=1)
@@ -71,7 +74,7 @@ def get_image_info(image_data: bytes) -> ImageInfo:
 
 
 def compare_capacity(
-    carrier_image: bytes,
+    carrier_image: bytes | ImageContext,
     reference_photo: bytes | None = None,
 ) -> CapacityComparison:
     """
@@ -89,8 +92,8 @@ def compare_capacity(
         >>> print(f"LSB: {comparison.lsb_kb:.1f} KB")
         >>> print(f"DCT: {comparison.dct_kb:.1f} KB")
     """
-    img = Image.open(io.BytesIO(carrier_image))
-    width, height = img.size
+    carrier_image = as_image_context(carrier_image)
+    width, height = carrier_image.size
 
     # LSB capacity
     lsb_bytes = calculate_capacity(carrier_image, bits_per_channel=1)
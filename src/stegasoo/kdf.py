@@ -0,0 +1,433 @@
+"""
+Stegasoo KDF Profiles (v4.3.0)
+
+Up to v4.2 the Argon2 cost was baked in: 256 MB, 4 passes, 4 lanes, for
+everyone. That's a fine default for a laptop, too heavy for a Pi Zero with
+512 MB of RAM, and arguably too light for a beefy server. The catch was that
+changing it broke every existing image, because nothing in the header said
+which parameters had been used.
+
+Format version 6 fixes that by writing the KDF algorithm and its cost into
+the header (which is also the AES-GCM AAD, so it can't be tampered with
+undetected). The decoder simply reads them back. That makes the cost a
+deployment choice rather than a compile-time one:
+
+    pi-low    Argon2id,  32 MB, 3 passes, 1 lane   (Pi Zero / small boards)
+    default   Argon2id, 256 MB, 4 passes, 4 lanes  (same as v5 images)
+    paranoid  Argon2id,   1 GB, 8 passes, 4 lanes  (servers)
+    custom    whatever you set (env vars or calibrate_kdf())
+
+Selecting a profile (first match wins):
+    1. set_kdf_profile("pi-low")             - process-wide override
+    2. STEGASOO_KDF_PROFILE=pi-low           - environment variable
+    3. "default"
+
+A custom profile is read from STEGASOO_KDF_TIME_COST, STEGASOO_KDF_MEMORY_MB
+and STEGASOO_KDF_PARALLELISM, or produced by calibrate_kdf(), which measures
+this machine and picks parameters that land near a target latency.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from .constants import (
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    KDF_ARGON2ID,
+    KDF_CALIBRATION_TARGET_MS,
+    KDF_MAX_MEMORY_COST,
+    KDF_MAX_PARALLELISM,
+    KDF_MAX_TIME_COST,
+    KDF_MAX_WORK,
+    KDF_MIN_MEMORY_COST,
+    KDF_MIN_TIME_COST,
+    KDF_PARAMS_SIZE,
+    KDF_PBKDF2_SHA512,
+    KDF_PROFILE_CUSTOM,
+    KDF_PROFILE_DEFAULT,
+    KDF_PROFILES,
+    PBKDF2_ITERATIONS,
+    PBKDF2_MAX_ITERATIONS,
+    PBKDF2_MIN_ITERATIONS,
+    VALID_KDF_PROFILES,
+)
+from .exceptions import KeyDerivationError
+from .governor import estimate_kdf_cost, reserve
+
+# Check for Argon2 availability
+try:
+    from argon2.low_level import Type, hash_secret_raw
+
+    HAS_ARGON2 = True
+except ImportError:
+    HAS_ARGON2 = False
+
+# Environment variables
+KDF_PROFILE_ENV_VAR = "STEGASOO_KDF_PROFILE"
+KDF_TIME_COST_ENV_VAR = "STEGASOO_KDF_TIME_COST"
+KDF_MEMORY_MB_ENV_VAR = "STEGASOO_KDF_MEMORY_MB"
+KDF_PARALLELISM_ENV_VAR = "STEGASOO_KDF_PARALLELISM"
+
+KDF_ALGORITHM_NAMES = {
+    KDF_ARGON2ID: "Argon2id",
+    KDF_PBKDF2_SHA512: "PBKDF2-SHA512",
+}
+
+
+# =============================================================================
+# PARAMETERS
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class KDFParams:
+    """
+    KDF algorithm and cost, exactly as recorded in a v6 header.
+
+    For Argon2id, memory_cost is in KiB. For PBKDF2, time_cost holds the
+    iteration count and the other two fields are unused (0 and 1).
+    """
+
+    algorithm: int = KDF_ARGON2ID
+    time_cost: int = ARGON2_TIME_COST
+    memory_cost: int = ARGON2_MEMORY_COST
+    parallelism: int = ARGON2_PARALLELISM
+    # Profile name is a label for humans - it's not written to the header
+    name: str = field(default=KDF_PROFILE_CUSTOM, compare=False)
+
+    @property
+    def algorithm_name(self) -> str:
+        return KDF_ALGORITHM_NAMES.get(self.algorithm, f"unknown ({self.algorithm})")
+
+    @property
+    def memory_bytes(self) -> int:
+        """Peak memory the KDF will allocate (0 for PBKDF2)."""
+        if self.algorithm == KDF_ARGON2ID:
+            return self.memory_cost * 1024
+        return 0
+
+    def validate(self) -> "KDFParams":
+        """
+        Check parameters are within sane bounds.
+
+        Returns:
+            self, so it can be chained
+
+        Raises:
+            KeyDerivationError: If the algorithm is unknown or a cost is out of range
+        """
+        if self.algorithm == KDF_ARGON2ID:
+            if not KDF_MIN_TIME_COST <= self.time_cost <= KDF_MAX_TIME_COST:
+                raise KeyDerivationError(f"Argon2 time cost out of range: {self.time_cost}")
+            if not KDF_MIN_MEMORY_COST <= self.memory_cost <= KDF_MAX_MEMORY_COST:
+                raise KeyDerivationError(
+                    f"Argon2 memory cost out of range: {self.memory_cost // 1024} MB"
+                )
+            if not 1 <= self.parallelism <= KDF_MAX_PARALLELISM:
+                raise KeyDerivationError(f"Argon2 parallelism out of range: {self.parallelism}")
+            if self.time_cost * self.memory_cost > KDF_MAX_WORK:
+                raise KeyDerivationError(
+                    f"Argon2 cost out of range: {self.time_cost} passes over "
+                    f"{self.memory_cost // 1024} MB"
+                )
+        elif self.algorithm == KDF_PBKDF2_SHA512:
+            if not PBKDF2_MIN_ITERATIONS <= self.time_cost <= PBKDF2_MAX_ITERATIONS:
+                raise KeyDerivationError(f"PBKDF2 iterations out of range: {self.time_cost}")
+        else:
+            raise KeyDerivationError(f"Unknown KDF algorithm: {self.algorithm}")
+        return self
+
+    def pack(self) -> bytes:
+        """Serialize to the 10-byte header block."""
+        return (
+            bytes([self.algorithm])
+            + self.time_cost.to_bytes(4, "big")
+            + self.memory_cost.to_bytes(4, "big")
+            + bytes([self.parallelism])
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "KDFParams":
+        """
+        Parse a 10-byte header block.
+
+        Raises:
+            KeyDerivationError: If the block is short or the parameters are out of range
+        """
+        if len(data) < KDF_PARAMS_SIZE:
+            raise KeyDerivationError("Truncated KDF parameter block")
+        params = cls(
+            algorithm=data[0],
+            time_cost=int.from_bytes(data[1:5], "big"),
+            memory_cost=int.from_bytes(data[5:9], "big"),
+            parallelism=data[9],
+        )
+        return params.validate()
+
+    def describe(self) -> str:
+        """One-line human summary, e.g. 'Argon2id 256 MB, t=4, p=4'."""
+        if self.algorithm == KDF_ARGON2ID:
+            return (
+                f"{self.algorithm_name} {self.memory_cost // 1024} MB, "
+                f"t={self.time_cost}, p={self.parallelism}"
+            )
+        return f"{self.algorithm_name} {self.time_cost:,} iterations"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "algorithm": self.algorithm_name,
+            "time_cost": self.time_cost,
+            "memory_mb": self.memory_cost // 1024,
+            "parallelism": self.parallelism,
+        }
+
+
+def pbkdf2_params(iterations: int = PBKDF2_ITERATIONS) -> KDFParams:
+    """PBKDF2 fallback parameters (used when argon2-cffi isn't installed)."""
+    return KDFParams(
+        algorithm=KDF_PBKDF2_SHA512,
+        time_cost=iterations,
+        memory_cost=0,
+        parallelism=1,
+        name="pbkdf2",
+    )
+
+
+def legacy_kdf_params() -> KDFParams:
+    """
+    Parameters for format v5 images, whose header doesn't record them.
+
+    v5 used the fixed ARGON2_* constants, or PBKDF2 if argon2 wasn't installed
+    on the encoding machine - we can only guess the same way it did.
+    """
+    if HAS_ARGON2:
+        return KDFParams(name=KDF_PROFILE_DEFAULT)
+    return pbkdf2_params()
+
+
+# =============================================================================
+# PROFILE SELECTION
+# =============================================================================
+
+# Process-wide override set via set_kdf_profile()
+_active_override: KDFParams | None = None
+
+
+def _custom_params_from_env() -> KDFParams:
+    """Build the 'custom' profile from STEGASOO_KDF_* environment variables."""
+    try:
+        time_cost = int(os.environ.get(KDF_TIME_COST_ENV_VAR, ARGON2_TIME_COST))
+        memory_mb = int(os.environ.get(KDF_MEMORY_MB_ENV_VAR, ARGON2_MEMORY_COST // 1024))
+        parallelism = int(os.environ.get(KDF_PARALLELISM_ENV_VAR, ARGON2_PARALLELISM))
+    except ValueError as e:
+        raise KeyDerivationError(f"Invalid custom KDF setting: {e}") from e
+
+    return KDFParams(
+        time_cost=time_cost,
+        memory_cost=memory_mb * 1024,
+        parallelism=parallelism,
+        name=KDF_PROFILE_CUSTOM,
+    ).validate()
+
+
+def get_kdf_profile(name: str) -> KDFParams:
+    """
+    Get the parameters for a named profile.
+
+    Args:
+        name: One of 'pi-low', 'default', 'paranoid' or 'custom'
+
+    Returns:
+        KDFParams for that profile
+
+    Raises:
+        KeyDerivationError: If the name is unknown or custom settings are invalid
+    """
+    name = name.strip().lower()
+
+    if name == KDF_PROFILE_CUSTOM:
+        return _custom_params_from_env()
+
+    if name not in KDF_PROFILES:
+        raise KeyDerivationError(
+            f"Unknown KDF profile: {name!r} (valid: {', '.join(VALID_KDF_PROFILES)})"
+        )
+
+    return KDFParams(name=name, **KDF_PROFILES[name])
+
+
+def resolve_kdf_params(profile: "str | KDFParams | None" = None) -> KDFParams:
+    """
+    Turn a profile argument into concrete parameters.
+
+    Args:
+        profile: Profile name, explicit KDFParams, or None for the active profile
+
+    Returns:
+        Validated KDFParams. Without argon2-cffi every Argon2 profile
+        degrades to the PBKDF2 fallback, same as v5 did.
+    """
+    if isinstance(profile, KDFParams):
+        params = profile.validate()
+    elif profile:
+        params = get_kdf_profile(profile)
+    elif _active_override is not None:
+        params = _active_override
+    else:
+        params = get_kdf_profile(os.environ.get(KDF_PROFILE_ENV_VAR) or KDF_PROFILE_DEFAULT)
+
+    if params.algorithm == KDF_ARGON2ID and not HAS_ARGON2:
+        return pbkdf2_params()
+
+    return params
+
+
+def get_active_kdf_params() -> KDFParams:
+    """Parameters new messages will be encrypted with."""
+    return resolve_kdf_params(None)
+
+
+def set_kdf_profile(profile: "str | KDFParams | None") -> None:
+    """
+    Set the process-wide KDF profile for encoding.
+
+    Decoding is unaffected - it always uses whatever the header says.
+
+    Args:
+        profile: Profile name, explicit KDFParams, or None to go back to the
+                 environment / default selection
+    """
+    global _active_override
+
+    if profile is None:
+        _active_override = None
+    elif isinstance(profile, KDFParams):
+        _active_override = profile.validate()
+    else:
+        _active_override = get_kdf_profile(profile)
+
+
+# =============================================================================
+# DERIVATION
+# =============================================================================
+
+
+def derive_key(key_material: bytes, salt: bytes, params: KDFParams) -> bytes:
+    """
+    Run the KDF described by params.
+
+    Args:
+        key_material: Concatenated secret factors
+        salt: 32-byte salt
+        params: Algorithm and cost
+
+    Returns:
+        32-byte key
+
+    Raises:
+        KeyDerivationError: If the algorithm isn't available here
+    """
+    if params.algorithm == KDF_ARGON2ID:
+        if not HAS_ARGON2:
+            raise KeyDerivationError(
+                "This message uses Argon2id - install argon2-cffi to decode it"
+            )
+        # Argon2 allocates the full memory_cost up front - wait for budget first
+        with reserve(estimate_kdf_cost(params), "kdf"):
+            return hash_secret_raw(
+                secret=key_material,
+                salt=salt[:32],
+                time_cost=params.time_cost,
+                memory_cost=params.memory_cost,
+                parallelism=params.parallelism,
+                hash_len=32,
+                type=Type.ID,  # Hybrid mode: resists side-channel AND GPU attacks
+            )
+
+    if params.algorithm == KDF_PBKDF2_SHA512:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA512(),
+            length=32,
+            salt=salt,
+            iterations=params.time_cost,
+            backend=default_backend(),
+        )
+        return kdf.derive(key_material)
+
+    raise KeyDerivationError(f"Unknown KDF algorithm: {params.algorithm}")
+
+
+# =============================================================================
+# CALIBRATION
+# =============================================================================
+
+
+def _time_kdf(params: KDFParams) -> float:
+    """Seconds for one derivation with throwaway inputs."""
+    start = time.perf_counter()
+    derive_key(b"stegasoo-calibration", b"\x00" * 32, params)
+    return time.perf_counter() - start
+
+
+def calibrate_kdf(
+    target_ms: int = KDF_CALIBRATION_TARGET_MS,
+    max_memory_mb: int | None = None,
+    parallelism: int | None = None,
+) -> KDFParams:
+    """
+    Pick KDF parameters that take about target_ms on this machine.
+
+    Memory is the expensive resource for an attacker, so we keep it as high
+    as allowed and only shrink it if a single pass already blows the budget.
+    Then we add passes (Argon2 time scales roughly linearly with them) to
+    use up whatever budget is left.
+
+    Args:
+        target_ms: Desired derivation time in milliseconds
+        max_memory_mb: Memory ceiling (default: 256 MB, same as 'default')
+        parallelism: Lanes (default: CPU count, capped at 4)
+
+    Returns:
+        KDFParams named 'custom'. Pass it to set_kdf_profile() or encode(),
+        or export it via the STEGASOO_KDF_* environment variables.
+    """
+    target = max(target_ms, 1) / 1000
+
+    if not HAS_ARGON2:
+        # PBKDF2 is purely CPU-bound - scale iterations off a short probe
+        probe = pbkdf2_params(PBKDF2_MIN_ITERATIONS)
+        elapsed = _time_kdf(probe)
+        iterations = int(PBKDF2_MIN_ITERATIONS * target / max(elapsed, 1e-6))
+        iterations = min(max(iterations, PBKDF2_MIN_ITERATIONS), PBKDF2_MAX_ITERATIONS)
+        return pbkdf2_params(iterations)
+
+    if parallelism is None:
+        parallelism = min(os.cpu_count() or 1, ARGON2_PARALLELISM)
+    parallelism = min(max(parallelism, 1), KDF_MAX_PARALLELISM)
+
+    memory = (max_memory_mb * 1024) if max_memory_mb else ARGON2_MEMORY_COST
+    memory = min(max(memory, KDF_MIN_MEMORY_COST), KDF_MAX_MEMORY_COST)
+
+    # Shrink memory until one pass fits in the budget
+    while True:
+        elapsed = _time_kdf(KDFParams(time_cost=1, memory_cost=memory, parallelism=parallelism))
+        if elapsed <= target or memory <= KDF_MIN_MEMORY_COST:
+            break
+        memory = max(memory // 2, KDF_MIN_MEMORY_COST)
+
+    time_cost = int(target / max(elapsed, 1e-6))
+    time_cost = min(max(time_cost, KDF_MIN_TIME_COST), KDF_MAX_TIME_COST, KDF_MAX_WORK // memory)
+
+    return KDFParams(
+        time_cost=time_cost,
+        memory_cost=memory,
+        parallelism=parallelism,
+        name=KDF_PROFILE_CUSTOM,
+    )
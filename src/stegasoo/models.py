@@ -126,6 +126,24 @@ class EncodeResult:
         return self.capacity_used * 100
 
 
+@dataclass
+class PreparedPayload:
+    """
+    An encrypted payload plus its pixel key, ready to embed (v4.3.0).
+
+    Made by prepare_encode() for encode_prepared(). Every image embedded
+    from the same PreparedPayload shares its salt and ciphertext.
+    """
+
+    encrypted: bytes | bytearray = field(repr=False)
+    pixel_key: bytes = field(repr=False)
+
+    @property
+    def size(self) -> int:
+        """Encrypted payload size in bytes."""
+        return len(self.encrypted)
+
+
 @dataclass
 class DecodeInput:
     """
@@ -152,7 +170,7 @@ class DecodeResult:
 
     payload_type: str  # 'text' or 'file'
     message: str | None = None  # For text payloads
-    file_data: bytes | None = None  # For file payloads
+    file_data: bytes | bytearray | None = None  # For file payloads (bytearray - no extra copy)
     filename: str | None = None  # Original filename for file payloads
     mime_type: str | None = None  # MIME type hint
     date_encoded: str | None = None  # Always None in v3.2.0 (kept for compatibility)
@@ -165,7 +183,7 @@ class DecodeResult:
     def is_text(self) -> bool:
         return self.payload_type == "text"
 
-    def get_content(self) -> str | bytes:
+    def get_content(self) -> str | bytes | bytearray:
         """Get the decoded content (text or bytes)."""
         if self.is_text:
             return self.message or ""
@@ -0,0 +1,109 @@
+"""
+Stegasoo Progress Reporting (v4.3.0)
+
+Long embeds and extracts report how far along they are through the
+progress_file argument. It used to be a path and nothing else: the hot
+loops opened, truncated and JSON-dumped that file every N pixels or blocks,
+however fast or slow N pixels happened to be, and the web UI polled it.
+
+progress_file now takes any of:
+
+    "/tmp/job.json"         a path - rewritten atomically (temp + rename)
+    callback                called with {"current", "total", "percent", "phase"}
+    ProgressReporter(...)   an existing reporter, passed through
+
+Whatever it is gets wrapped in a ProgressReporter by the public entry points
+(encode, decode, embed_in_image, ...), which throttles by wall-clock time:
+at most one update per PROGRESS_MIN_INTERVAL, except that a phase change or
+reaching the total always goes through - so the bar never misses "saving"
+or stops short of 100%.
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from .constants import PROGRESS_MIN_INTERVAL
+
+ProgressCallback = Callable[[dict], None]
+
+
+class ProgressReporter:
+    """Time-throttled progress sink. Truthy, so `if progress_file:` still works."""
+
+    def __init__(self, sink: ProgressCallback, min_interval: float = PROGRESS_MIN_INTERVAL):
+        """
+        Args:
+            sink: Called with each progress dict that makes it through
+            min_interval: Minimum seconds between updates within a phase
+        """
+        self.sink = sink
+        self.min_interval = min_interval
+        self._last_time = float("-inf")
+        self._last_phase: str | None = None
+
+    def __call__(self, current: int, total: int, phase: str) -> None:
+        now = time.monotonic()
+        if (
+            phase == self._last_phase
+            and current < total
+            and now - self._last_time < self.min_interval
+        ):
+            return
+        self._last_time = now
+        self._last_phase = phase
+        try:
+            self.sink(
+                {
+                    "current": current,
+                    "total": total,
+                    "percent": round((current / total) * 100, 1) if total > 0 else 0,
+                    "phase": phase,
+                }
+            )
+        except Exception:
+            pass  # Progress is best effort - never fail an embed over it
+
+
+def _file_sink(path: str | os.PathLike) -> ProgressCallback:
+    """Write each update to path via temp file + rename, so readers never see half."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+    def write(progress: dict) -> None:
+        try:
+            tmp.write_text(json.dumps(progress))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    return write
+
+
+ProgressTarget = str | os.PathLike | ProgressCallback | ProgressReporter
+
+
+def as_progress_reporter(target: ProgressTarget | None) -> ProgressReporter | None:
+    """
+    Wrap a progress_file argument in a ProgressReporter (None stays None).
+
+    Idempotent, so every public entry point can call it on the way in.
+    """
+    if target is None or isinstance(target, ProgressReporter):
+        return target
+    if isinstance(target, (str, os.PathLike)):
+        return ProgressReporter(_file_sink(target))
+    if callable(target):
+        return ProgressReporter(target)
+    raise TypeError(f"progress_file must be a path or callable, not {type(target).__name__}")
+
+
+def report_progress(
+    target: ProgressTarget | None, current: int, total: int, phase: str = "embedding"
+) -> None:
+    """Send one update to target, whatever form it takes."""
+    reporter = as_progress_reporter(target)
+    if reporter is not None:
+        reporter(current, total, phase)
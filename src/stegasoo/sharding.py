@@ -0,0 +1,407 @@
+"""
+Stegasoo Payload Sharding (v4.3.0)
+
+One carrier has to hold the whole encrypted payload, so a big file needs a
+big image - right up to MAX_IMAGE_PIXELS - and embedding into a 24 MP
+carrier is the slowest thing Stegasoo does. Sharding spreads one payload
+over several carriers instead:
+
+    results = encode_many(data, ref, [c1, c2, c3, c4, c5], passphrase,
+                          pin=pin, parity_shards=1)
+    decoded = decode_many([s1, s2, s4, s5], ref, passphrase, pin=pin)  # s3 lost
+
+The payload is encrypted once, cut into k equal data shards and, if asked,
+m parity shards. The parity is a Reed-Solomon erasure code over GF(256)
+(a systematic Cauchy matrix), so ANY k of the k + m carriers rebuild the
+payload. Shards are embedded in parallel - the wait is one small embed
+instead of one huge one - and decode_many extracts them concurrently,
+stopping as soon as it has k good ones.
+
+Each shard starts with a frame header:
+
+    magic (4) | version (1) | index (1) | data shards k (1) | total n (1) |
+    payload length (4) | payload SHA-256 (32) | shard CRC-32 (4)
+
+The CRC turns a damaged shard into a missing one (which parity can cover).
+The SHA-256 ties the shards of one payload together and checks the rebuilt
+ciphertext before anyone tries to decrypt it.
+
+No numpy needed: multiplying a whole shard by a constant is a single
+bytes.translate() with a 256-entry table, and adding two shards is an XOR
+of two big ints. Both run at C speed.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .constants import (
+    BATCH_BACKEND_AUTO,
+    BATCH_BACKEND_PROCESS,
+    BATCH_BACKEND_THREAD,
+    BATCH_BACKENDS,
+    EMBED_MODE_DCT,
+    MAX_SHARDS,
+    SHARD_FORMAT_VERSION,
+    SHARD_MAGIC_HEADER,
+)
+from .debug import debug
+from .exceptions import ShardError, ValidationError
+
+# magic, version, index, k, n, payload length, payload SHA-256, shard CRC-32
+_FRAME = struct.Struct(">4sBBBBI32sI")
+SHARD_HEADER_SIZE = _FRAME.size
+
+
+# =============================================================================
+# GF(256) ARITHMETIC
+# =============================================================================
+# The field of bytes: addition is XOR, multiplication goes through log/exp
+# tables for the generator 2 of x^8 + x^4 + x^3 + x^2 + 1 (0x11d, the same
+# field QR codes and most RS codecs use).
+
+_GF_POLY = 0x11D
+_GF_EXP = [0] * 512
+_GF_LOG = [0] * 256
+
+_x = 1
+for _i in range(255):
+    _GF_EXP[_i] = _x
+    _GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= _GF_POLY
+for _i in range(255, 512):
+    _GF_EXP[_i] = _GF_EXP[_i - 255]
+del _x, _i
+
+
+def _gf_mul(a: int, b: int) -> int:
+    if not a or not b:
+        return 0
+    return _GF_EXP[_GF_LOG[a] + _GF_LOG[b]]
+
+
+def _gf_inv(a: int) -> int:
+    return _GF_EXP[255 - _GF_LOG[a]]
+
+
+@lru_cache(maxsize=256)
+def _mul_table(c: int) -> bytes:
+    """translate() table that multiplies every byte by c."""
+    return bytes(_gf_mul(c, v) for v in range(256))
+
+
+def _combine(coefficients: list[int], shards: list[bytes], size: int) -> bytes:
+    """sum(c * shard) over GF(256), a whole shard at a time."""
+    acc = 0
+    for c, shard in zip(coefficients, shards):
+        if not c:
+            continue
+        term = shard if c == 1 else shard.translate(_mul_table(c))
+        acc ^= int.from_bytes(term, "little")
+    return acc.to_bytes(size, "little")
+
+
+def _coding_row(index: int, data_shards: int) -> list[int]:
+    """
+    How shard `index` is made from the data shards.
+
+    Data shards are themselves (an identity row); parity shard j is the
+    Cauchy row 1 / (x_j + y_i) with x_j = k + j and y_i = i. The x's and
+    y's never collide, and every square submatrix of a Cauchy matrix is
+    invertible - that's what makes any k shards enough.
+    """
+    if index < data_shards:
+        return [int(i == index) for i in range(data_shards)]
+    return [_gf_inv(index ^ i) for i in range(data_shards)]
+
+
+def _invert(matrix: list[list[int]]) -> list[list[int]]:
+    """Gauss-Jordan inverse of a square GF(256) matrix."""
+    size = len(matrix)
+    rows = [row[:] + [int(i == r) for i in range(size)] for r, row in enumerate(matrix)]
+
+    for col in range(size):
+        pivot = next((r for r in range(col, size) if rows[r][col]), None)
+        if pivot is None:
+            raise ShardError("Shard set is not decodable (singular matrix)")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+
+        scale = _gf_inv(rows[col][col])
+        rows[col] = [_gf_mul(scale, v) for v in rows[col]]
+
+        for r in range(size):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = [v ^ _gf_mul(factor, p) for v, p in zip(rows[r], rows[col])]
+
+    return [row[size:] for row in rows]
+
+
+# =============================================================================
+# SHARD FRAMES
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One parsed shard frame."""
+
+    index: int
+    data_shards: int
+    total_shards: int
+    payload_length: int
+    payload_hash: bytes
+    data: bytes
+
+    @property
+    def is_parity(self) -> bool:
+        return self.index >= self.data_shards
+
+
+def is_shard(data: bytes | None) -> bool:
+    """Does this extracted payload look like a shard frame?"""
+    return data is not None and bytes(data[: len(SHARD_MAGIC_HEADER)]) == SHARD_MAGIC_HEADER
+
+
+def parse_shard(data: bytes) -> Shard | None:
+    """
+    Parse a shard frame.
+
+    Returns:
+        The Shard, or None if it isn't one, is from a newer format, or is
+        damaged (CRC mismatch) - all of which decoding treats as missing
+    """
+    if not is_shard(data) or len(data) < SHARD_HEADER_SIZE:
+        return None
+
+    magic, version, index, k, n, length, digest, crc = _FRAME.unpack_from(data)
+    if version != SHARD_FORMAT_VERSION or not 0 < k <= n or index >= n:
+        debug.print(f"Ignoring shard frame (version {version}, {index}/{k}/{n})")
+        return None
+
+    body = bytes(data[SHARD_HEADER_SIZE:])
+    if zlib.crc32(body) != crc:
+        debug.print(f"Shard {index} failed its CRC - treating it as missing")
+        return None
+    if len(body) != max(1, -(-length // k)):
+        # split_payload always cuts this size - anything else won't combine
+        debug.print(f"Shard {index} is {len(body)} bytes, not the size its header implies")
+        return None
+
+    return Shard(index, k, n, length, digest, body)
+
+
+def split_payload(
+    payload: bytes | bytearray, data_shards: int, parity_shards: int = 0
+) -> list[bytes]:
+    """
+    Cut a payload into framed shards.
+
+    Args:
+        payload: Bytes to split (the encrypted payload)
+        data_shards: k - shards that carry the payload itself
+        parity_shards: m - extra shards; any k of the k + m rebuild it
+
+    Returns:
+        k + m shard frames, data shards first
+
+    Raises:
+        ValidationError: Bad shard counts
+    """
+    if data_shards < 1 or parity_shards < 0:
+        raise ValidationError("Need at least one data shard and no negative parity")
+    total = data_shards + parity_shards
+    if total > MAX_SHARDS:
+        raise ValidationError(f"Too many shards ({total}). Maximum: {MAX_SHARDS}")
+
+    payload = bytes(payload)
+    size = max(1, -(-len(payload) // data_shards))
+    padded = payload.ljust(size * data_shards, b"\x00")
+    shards = [padded[i * size : (i + 1) * size] for i in range(data_shards)]
+    for index in range(data_shards, total):
+        shards.append(_combine(_coding_row(index, data_shards), shards[:data_shards], size))
+
+    digest = hashlib.sha256(payload).digest()
+    frames = []
+    for index, body in enumerate(shards):
+        header = _FRAME.pack(
+            SHARD_MAGIC_HEADER,
+            SHARD_FORMAT_VERSION,
+            index,
+            data_shards,
+            total,
+            len(payload),
+            digest,
+            zlib.crc32(body),
+        )
+        frames.append(header + body)
+
+    debug.print(f"Split {len(payload)} bytes into {data_shards}+{parity_shards} shards of {size}")
+    return frames
+
+
+class ShardCollector:
+    """
+    Gathers shard frames until one payload can be rebuilt.
+
+    Frames can arrive in any order, with gaps, duplicates, damage or frames
+    from an unrelated payload mixed in. add() says when enough are in, and
+    rejects a frame whose shard counts or length disagree with its set.
+    """
+
+    def __init__(self):
+        self._sets: dict[bytes, dict[int, Shard]] = {}
+        self.rejected = 0
+
+    def add(self, frame: bytes | None) -> bool:
+        """Add one extracted payload (None for a failed extraction). True once complete."""
+        shard = parse_shard(frame) if frame else None
+        if shard is None:
+            self.rejected += 1
+            return self.complete
+
+        shards = self._sets.setdefault(shard.payload_hash, {})
+        if shards:
+            first = next(iter(shards.values()))
+            if (shard.data_shards, shard.total_shards, shard.payload_length) != (
+                first.data_shards,
+                first.total_shards,
+                first.payload_length,
+            ):
+                debug.print(f"Shard {shard.index} disagrees with its set's layout")
+                self.rejected += 1
+                return self.complete
+
+        shards.setdefault(shard.index, shard)
+        return self.complete
+
+    def _best(self) -> dict[int, Shard] | None:
+        if not self._sets:
+            return None
+        return max(self._sets.values(), key=len)
+
+    @property
+    def complete(self) -> bool:
+        best = self._best()
+        if not best:
+            return False
+        return len(best) >= next(iter(best.values())).data_shards
+
+    def status(self) -> str:
+        best = self._best()
+        if not best:
+            return "no valid shards found"
+        needed = next(iter(best.values())).data_shards
+        return f"{len(best)} of the {needed} shards needed"
+
+    def payload(self) -> bytes:
+        """
+        Rebuild the payload.
+
+        Raises:
+            ShardError: Not enough shards, or the result fails its hash
+        """
+        shards = self._best()
+        if shards is None or not self.complete:
+            raise ShardError(f"Can't rebuild the payload: {self.status()}")
+
+        first = next(iter(shards.values()))
+        k, length = first.data_shards, first.payload_length
+        size = len(first.data)
+
+        data = {i: shards[i].data for i in range(k) if i in shards}
+        missing = [i for i in range(k) if i not in data]
+        if missing:
+            # Any k shards will do; use every data shard we have, then parity
+            chosen = sorted(shards, key=lambda i: (shards[i].is_parity, i))[:k]
+            inverse = _invert([_coding_row(i, k) for i in chosen])
+            available = [shards[i].data for i in chosen]
+            for i in missing:
+                data[i] = _combine(inverse[i], available, size)
+            debug.print(f"Rebuilt {len(missing)} missing data shard(s) from parity")
+
+        payload = b"".join(data[i] for i in range(k))[:length]
+        if hashlib.sha256(payload).digest() != first.payload_hash:
+            raise ShardError("Rebuilt payload failed its integrity check")
+        return payload
+
+
+def join_shards(frames: Iterable[bytes | None]) -> bytes:
+    """
+    Rebuild a payload from shard frames (any k of n, in any order).
+
+    Raises:
+        ShardError: Not enough valid shards
+    """
+    collector = ShardCollector()
+    for frame in frames:
+        collector.add(frame)
+    return collector.payload()
+
+
+# =============================================================================
+# PARALLEL EXECUTION
+# =============================================================================
+# The same thread-or-process call as BatchProcessor: LSB and jpegio are
+# Python loops that hold the GIL, scipy's DCT doesn't.
+
+
+def _init_shard_worker(budget_bytes: int) -> None:
+    from .governor import get_governor
+
+    # The parent's memory budget is split between the workers, not multiplied
+    get_governor().set_budget(budget_bytes)
+
+
+def shard_executor(
+    count: int,
+    backend: str = BATCH_BACKEND_AUTO,
+    max_workers: int | None = None,
+    embed_mode: str | None = None,
+    dct_output_format: str | None = None,
+):
+    """
+    Executor for working on `count` carriers at once.
+
+    Args:
+        count: Number of carriers
+        backend: 'thread', 'process' or 'auto'
+        max_workers: Worker cap (default: one per carrier, up to the CPU count)
+        embed_mode: Embedding mode, if known ('auto' picks processes for
+            LSB and DCT/JPEG, threads for DCT/PNG)
+        dct_output_format: DCT output format, if known
+
+    Raises:
+        ValueError: Unknown backend
+    """
+    if backend not in BATCH_BACKENDS:
+        raise ValueError(
+            f"Invalid backend: {backend}. Choose from {', '.join(sorted(BATCH_BACKENDS))}"
+        )
+    workers = max(1, min(count, max_workers or os.cpu_count() or 1))
+
+    if backend == BATCH_BACKEND_AUTO:
+        scipy_only = embed_mode == EMBED_MODE_DCT and dct_output_format != "jpeg"
+        if workers <= 1 or scipy_only:
+            backend = BATCH_BACKEND_THREAD
+        else:
+            backend = BATCH_BACKEND_PROCESS
+
+    if backend == BATCH_BACKEND_THREAD:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stegasoo-shard")
+
+    from .governor import get_governor
+
+    budget = get_governor().budget_bytes
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_shard_worker,
+        initargs=(budget // workers if budget else 0,),
+    )
@@ -22,10 +22,19 @@ PLUS actual encryption of the payload.
 v3.0: Added DCT mode with scipy
 v3.0.1: DCT output format options (PNG/JPEG, grayscale/color)
 v3.2.0: Fixed overhead calculations after removing date field
+v4.3.0: Embed/extract reserve their estimated memory with the resource governor
+v4.3.0: Auto mode probes the image and skips/orders/races LSB vs DCT
+v4.3.0: Carriers may be passed as an ImageContext (decoded once per operation)
+v4.3.0: will_fit estimates compression from a sample instead of a full zlib pass
+v4.3.0: Capacity functions read dimensions from the cached header probe
 """
 
 import io
+import os
 import struct
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import TYPE_CHECKING, Union
 
 from cryptography.hazmat.backends import default_backend
@@ -35,39 +44,25 @@ from PIL import Image
 if TYPE_CHECKING:
     from .dct_steganography import DCTEmbedStats
 
+from .compression import estimate_compression
 from .constants import (
     EMBED_MODE_AUTO,
     EMBED_MODE_DCT,
     EMBED_MODE_LSB,
+    MAGIC_HEADER,
+    SHARD_MAGIC_HEADER,
     VALID_EMBED_MODES,
 )
 from .debug import debug
 from .exceptions import CapacityError, EmbeddingError
+from .governor import estimate_image_cost, get_governor, reserve
+from .image_context import ImageContext, ImageProbe, as_image_context, probe_image
 from .models import EmbedStats, FilePayload
+from .progress import ProgressReporter, ProgressTarget, as_progress_reporter, report_progress
 
-# Progress reporting interval
-PROGRESS_INTERVAL = 1000  # Write every N pixels for LSB
-
-
-def _write_progress(progress_file: str | None, current: int, total: int, phase: str = "embedding"):
-    """Write progress to file for frontend polling."""
-    if progress_file is None:
-        return
-    try:
-        import json
-
-        with open(progress_file, "w") as f:
-            json.dump(
-                {
-                    "current": current,
-                    "total": total,
-                    "percent": round((current / total) * 100, 1) if total > 0 else 0,
-                    "phase": phase,
-                },
-                f,
-            )
-    except Exception:
-        pass  # Don't let progress writing break encoding
+# How often the LSB loop offers a progress update (every N pixels). The
+# reporter decides by the clock whether it actually goes anywhere.
+PROGRESS_INTERVAL = 1000
 
 
 # Lossless formats that preserve LSB data
@@ -94,12 +89,12 @@ EXT_TO_FORMAT = {
 #
 # Every stego image has some overhead before the actual payload:
 #
-# The encrypted message format (v4.0.0):
-# ┌─────────────────────────────────────────────────────────────────┐
-# │ \x89ST3 │ v5 │ flags │  salt (32)  │  iv (12)  │  tag (16)  │ ... │
-# │ magic  │ ver│       │             │           │            │ data│
-# └─────────────────────────────────────────────────────────────────┘
-#   4 bytes  1    1         32            12           16         var
+# The encrypted message format (v4.3.0):
+# ┌───────────────────────────────────────────────────────────────────────────┐
+# │ \x89ST3 │ v6 │ flags │  kdf (10)  │  salt (32)  │  iv (12)  │  tag (16)  │ ... │
+# │ magic  │ ver│       │ algo+cost  │             │           │            │ data│
+# └───────────────────────────────────────────────────────────────────────────┘
+#   4 bytes  1    1          10            32            12           16         var
 #
 # Plus LSB embedding adds a 4-byte length prefix so we know where to stop.
 #
@@ -107,13 +102,14 @@ EXT_TO_FORMAT = {
 # - v3.1.0: 76 bytes (had date field - 10+1 bytes)
 # - v3.2.0: 65 bytes (removed date, simpler)
 # - v4.0.0: 66 bytes (added flags byte for channel key)
+# - v4.3.0: 76 bytes (added KDF parameter block)
 
-HEADER_OVERHEAD = 66  # What the crypto layer adds to any message
-LENGTH_PREFIX = 4     # We prepend the payload length for LSB extraction
-ENCRYPTION_OVERHEAD = HEADER_OVERHEAD + LENGTH_PREFIX  # Total: 70 bytes
+HEADER_OVERHEAD = 76  # What the crypto layer adds to any message
+LENGTH_PREFIX = 4  # We prepend the payload length for LSB extraction
+ENCRYPTION_OVERHEAD = HEADER_OVERHEAD + LENGTH_PREFIX  # Total: 80 bytes
 
-# That 70 bytes is your minimum image capacity requirement.
-# A tiny 100x100 image gives you ~3750 bytes capacity, minus 70 = ~3680 usable.
+# That 80 bytes is your minimum image capacity requirement.
+# A tiny 100x100 image gives you ~3750 bytes capacity, minus 80 = ~3670 usable.
 
 # DCT output format options (v3.0.1)
 DCT_OUTPUT_PNG = "png"
@@ -141,6 +137,23 @@ def _get_dct_module():
     return _dct_module
 
 
+def _carrier_cost(
+    image_data: bytes | ImageContext, embed_mode: str, dct_output_format: str | None = None
+) -> int:
+    """
+    Estimated working set for embedding into / extracting from this image.
+
+    Only reads the image header (PIL opens lazily), so it's cheap enough to
+    call before we commit to decoding the whole thing.
+    """
+    try:
+        width, height = as_image_context(image_data).size
+    except Exception:
+        # Let the real code path produce the real error
+        return 0
+    return estimate_image_cost(width, height, embed_mode, dct_output_format)
+
+
 def has_dct_support() -> bool:
     """
     Check if DCT steganography mode is available.
@@ -197,7 +210,7 @@ def get_output_format(input_format: str | None) -> tuple[str, str]:
 
 def will_fit(
     payload: str | bytes | FilePayload | int,
-    carrier_image: bytes,
+    carrier_image: bytes | ImageContext,
     bits_per_channel: int = 1,
     include_compression_estimate: bool = True,
 ) -> dict:
@@ -239,16 +252,13 @@ def will_fit(
 
     compressed_estimate = None
     if include_compression_estimate and payload_data is not None and len(payload_data) >= 64:
-        try:
-            import zlib
-
-            compressed = zlib.compress(payload_data, level=6)
-            compressed_size = len(compressed) + 9  # Compression header
-            if compressed_size < payload_size:
-                compressed_estimate = compressed_size
-                estimated_encrypted_size = compressed_size + estimated_padding + ENCRYPTION_OVERHEAD
-        except Exception:
-            pass
+        # Sampled, not a full compression pass - see compression.estimate_compression
+        estimate = estimate_compression(payload_data)
+        if estimate.compressible and estimate.estimated_size < payload_size:
+            compressed_estimate = estimate.estimated_size
+            estimated_encrypted_size = (
+                estimate.estimated_size + estimated_padding + ENCRYPTION_OVERHEAD
+            )
 
     headroom = capacity - estimated_encrypted_size
     fits = headroom >= 0
@@ -266,12 +276,14 @@ def will_fit(
     }
 
 
-def calculate_capacity(image_data: bytes, bits_per_channel: int = 1) -> int:
+def calculate_capacity(
+    image_data: bytes | ImageContext | ImageProbe, bits_per_channel: int = 1
+) -> int:
     """
     Calculate the maximum message capacity of an image (LSB mode).
 
     Args:
-        image_data: Image bytes
+        image_data: Image bytes, ImageContext, or a header ImageProbe
         bits_per_channel: Bits to use per color channel
 
     Returns:
@@ -281,21 +293,17 @@ def calculate_capacity(image_data: bytes, bits_per_channel: int = 1) -> int:
         bits_per_channel in (1, 2), f"bits_per_channel must be 1 or 2, got {bits_per_channel}"
     )
 
-    img_file = Image.open(io.BytesIO(image_data))
-    try:
-        num_pixels = img_file.size[0] * img_file.size[1]
-        bits_per_pixel = 3 * bits_per_channel
-        max_bytes = (num_pixels * bits_per_pixel) // 8
+    num_pixels = probe_image(image_data).num_pixels
+    bits_per_pixel = 3 * bits_per_channel
+    max_bytes = (num_pixels * bits_per_pixel) // 8
 
-        capacity = max(0, max_bytes - ENCRYPTION_OVERHEAD)
-        debug.print(f"LSB capacity: {capacity} bytes at {bits_per_channel} bit(s)/channel")
-        return capacity
-    finally:
-        img_file.close()
+    capacity = max(0, max_bytes - ENCRYPTION_OVERHEAD)
+    debug.print(f"LSB capacity: {capacity} bytes at {bits_per_channel} bit(s)/channel")
+    return capacity
 
 
 def calculate_capacity_by_mode(
-    image_data: bytes,
+    image_data: bytes | ImageContext,
     embed_mode: str = EMBED_MODE_LSB,
     bits_per_channel: int = 1,
 ) -> dict:
@@ -303,13 +311,15 @@ def calculate_capacity_by_mode(
     Calculate capacity for specified embedding mode.
 
     Args:
-        image_data: Carrier image bytes
+        image_data: Carrier image bytes or ImageContext
         embed_mode: 'lsb' or 'dct'
         bits_per_channel: Bits per channel for LSB mode
 
     Returns:
         Dict with capacity information
     """
+    image_data = as_image_context(image_data)
+
     if embed_mode == EMBED_MODE_DCT:
         if not has_dct_support():
             raise ImportError("scipy required for DCT mode. Install: pip install scipy")
@@ -327,11 +337,7 @@ def calculate_capacity_by_mode(
         }
     else:
         capacity = calculate_capacity(image_data, bits_per_channel)
-        img = Image.open(io.BytesIO(image_data))
-        try:
-            width, height = img.size
-        finally:
-            img.close()
+        width, height = image_data.size
 
         return {
             "mode": EMBED_MODE_LSB,
@@ -345,7 +351,7 @@ def calculate_capacity_by_mode(
 
 def will_fit_by_mode(
     payload: str | bytes | FilePayload | int,
-    carrier_image: bytes,
+    carrier_image: bytes | ImageContext,
     embed_mode: str = EMBED_MODE_LSB,
     bits_per_channel: int = 1,
 ) -> dict:
@@ -377,9 +383,9 @@ def will_fit_by_mode(
         estimated_size = payload_size + ENCRYPTION_OVERHEAD + 190  # padding estimate
 
         dct_mod = _get_dct_module()
-        fits = dct_mod.will_fit_dct(estimated_size, carrier_image)
         capacity_info = dct_mod.calculate_dct_capacity(carrier_image)
         capacity = capacity_info.usable_capacity_bytes
+        fits = estimated_size <= capacity
 
         usage_percent = (estimated_size / capacity * 100) if capacity > 0 else 100.0
 
@@ -419,21 +425,18 @@ def get_available_modes() -> dict:
     }
 
 
-def compare_modes(image_data: bytes) -> dict:
+def compare_modes(image_data: bytes | ImageContext) -> dict:
     """
     Compare embedding modes for a carrier image.
 
     Args:
-        image_data: Carrier image bytes
+        image_data: Carrier image bytes or ImageContext
 
     Returns:
         Dict with comparison of LSB vs DCT modes
     """
-    img = Image.open(io.BytesIO(image_data))
-    try:
-        width, height = img.size
-    finally:
-        img.close()
+    image_data = as_image_context(image_data)
+    width, height = image_data.size
 
     lsb_bytes = calculate_capacity(image_data, 1)
 
@@ -601,21 +604,21 @@ def generate_pixel_indices(key: bytes, num_pixels: int, num_needed: int) -> list
 @debug.time
 def embed_in_image(
     data: bytes,
-    image_data: bytes,
+    image_data: bytes | ImageContext,
     pixel_key: bytes,
     bits_per_channel: int = 1,
     output_format: str | None = None,
     embed_mode: str = EMBED_MODE_LSB,
     dct_output_format: str = DCT_OUTPUT_PNG,
     dct_color_mode: str = "color",
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
 ) -> tuple[bytes, Union[EmbedStats, "DCTEmbedStats"], str]:
     """
     Embed data into an image using specified mode.
 
     Args:
         data: Data to embed (encrypted payload)
-        image_data: Carrier image bytes
+        image_data: Carrier image bytes or ImageContext
         pixel_key: Key for pixel/coefficient selection
         bits_per_channel: Bits per channel (LSB mode only)
         output_format: Force output format (LSB mode only)
@@ -631,10 +634,12 @@ def embed_in_image(
         EmbeddingError: If embedding fails
         ImportError: If DCT mode requested but scipy unavailable
     """
+    progress_file = as_progress_reporter(progress_file)
     debug.print(f"embed_in_image: mode={embed_mode}, data={len(data)} bytes")
     debug.validate(
         embed_mode in VALID_EMBED_MODES, f"Invalid embed_mode: {embed_mode}. Use 'lsb' or 'dct'"
     )
+    image_data = as_image_context(image_data)
 
     # DCT MODE
     if embed_mode == EMBED_MODE_DCT:
@@ -656,14 +661,15 @@ def embed_in_image(
         dct_mod = _get_dct_module()
 
         # Pass output_format and color_mode to DCT module (v3.0.1)
-        stego_bytes, dct_stats = dct_mod.embed_in_dct(
-            data,
-            image_data,
-            pixel_key,
-            output_format=dct_output_format,
-            color_mode=dct_color_mode,
-            progress_file=progress_file,
-        )
+        with reserve(_carrier_cost(image_data, embed_mode, dct_output_format), "embed"):
+            stego_bytes, dct_stats = dct_mod.embed_in_dct(
+                data,
+                image_data,
+                pixel_key,
+                output_format=dct_output_format,
+                color_mode=dct_color_mode,
+                progress_file=progress_file,
+            )
 
         # Determine extension based on output format
         if dct_output_format == DCT_OUTPUT_JPEG:
@@ -678,16 +684,19 @@ def embed_in_image(
         return stego_bytes, dct_stats, ext
 
     # LSB MODE
-    return _embed_lsb(data, image_data, pixel_key, bits_per_channel, output_format, progress_file)
+    with reserve(_carrier_cost(image_data, EMBED_MODE_LSB), "embed"):
+        return _embed_lsb(
+            data, image_data, pixel_key, bits_per_channel, output_format, progress_file
+        )
 
 
 def _embed_lsb(
     data: bytes,
-    image_data: bytes,
+    image_data: bytes | ImageContext,
     pixel_key: bytes,
     bits_per_channel: int = 1,
     output_format: str | None = None,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
 ) -> tuple[bytes, EmbedStats, str]:
     """
     Embed data using LSB steganography (internal implementation).
@@ -699,19 +708,17 @@ def _embed_lsb(
     )
     debug.validate(len(pixel_key) == 32, f"Pixel key must be 32 bytes, got {len(pixel_key)}")
 
-    img_file = None
-    img = None
     stego_img = None
 
     try:
-        img_file = Image.open(io.BytesIO(image_data))
-        input_format = img_file.format
+        ctx = as_image_context(image_data)
+        input_format = ctx.format
 
-        debug.print(f"Carrier image: {img_file.size[0]}x{img_file.size[1]}, format: {input_format}")
+        debug.print(f"Carrier image: {ctx.width}x{ctx.height}, format: {input_format}")
 
-        img = img_file.convert("RGB") if img_file.mode != "RGB" else img_file.copy()
-        if img_file.mode != "RGB":
-            debug.print(f"Converting image from {img_file.mode} to RGB")
+        if ctx.mode != "RGB":
+            debug.print(f"Converting image from {ctx.mode} to RGB")
+        img = ctx.rgb_image
 
         pixels = list(img.getdata())
         num_pixels = len(pixels)
@@ -721,26 +728,32 @@ def _embed_lsb(
 
         debug.print(f"Image capacity: {max_bytes} bytes at {bits_per_channel} bit(s)/channel")
 
-        data_with_len = struct.pack(">I", len(data)) + data
+        # The length prefix is addressed alongside the data rather than
+        # concatenated onto it (and we don't expand everything into a
+        # "0101..." string either - that was 8 bytes of str per payload byte)
+        length_prefix = struct.pack(">I", len(data))
+        total_bytes = LENGTH_PREFIX + len(data)
+        total_bits = total_bytes * 8
 
-        if len(data_with_len) > max_bytes:
-            debug.print(f"Capacity error: need {len(data_with_len)}, have {max_bytes}")
-            raise CapacityError(len(data_with_len), max_bytes)
+        if total_bytes > max_bytes:
+            debug.print(f"Capacity error: need {total_bytes}, have {max_bytes}")
+            raise CapacityError(total_bytes, max_bytes)
 
         debug.print(
-            f"Total data to embed: {len(data_with_len)} bytes "
-            f"({len(data_with_len)/max_bytes*100:.1f}% of capacity)"
+            f"Total data to embed: {total_bytes} bytes "
+            f"({total_bytes/max_bytes*100:.1f}% of capacity)"
         )
 
-        binary_data = "".join(format(b, "08b") for b in data_with_len)
-        pixels_needed = (len(binary_data) + bits_per_pixel - 1) // bits_per_pixel
+        pixels_needed = (total_bits + bits_per_pixel - 1) // bits_per_pixel
 
-        debug.print(f"Need {pixels_needed} pixels to embed {len(binary_data)} bits")
+        debug.print(f"Need {pixels_needed} pixels to embed {total_bits} bits")
 
         selected_indices = generate_pixel_indices(pixel_key, num_pixels, pixels_needed)
 
-        new_pixels = list(pixels)
-        clear_mask = 0xFF ^ ((1 << bits_per_channel) - 1)
+        # Modify the pixel list in place - nothing else needs the original
+        new_pixels = pixels
+        value_mask = (1 << bits_per_channel) - 1
+        clear_mask = 0xFF ^ value_mask
 
         bit_idx = 0
         modified_pixels = 0
@@ -748,45 +761,48 @@ def _embed_lsb(
 
         # Initial progress write - signals prep is done, embedding starting
         if progress_file:
-            _write_progress(progress_file, 5, 100, "embedding")
+            report_progress(progress_file, 5, 100, "embedding")
 
         for progress_idx, pixel_idx in enumerate(selected_indices):
-            if bit_idx >= len(binary_data):
+            if bit_idx >= total_bits:
                 break
 
-            r, g, b = new_pixels[pixel_idx]
+            channels = list(new_pixels[pixel_idx])
             modified = False
 
-            for channel_idx, channel_val in enumerate([r, g, b]):
-                if bit_idx >= len(binary_data):
+            for channel_idx in range(3):
+                if bit_idx >= total_bits:
                     break
-                bits = binary_data[bit_idx : bit_idx + bits_per_channel].ljust(
-                    bits_per_channel, "0"
-                )
-                new_val = (channel_val & clear_mask) | int(bits, 2)
+
+                # Bits come out MSB-first; bits_per_channel (1 or 2) divides 8,
+                # so a chunk never straddles two bytes
+                byte_idx = bit_idx >> 3
+                if byte_idx < LENGTH_PREFIX:
+                    byte = length_prefix[byte_idx]
+                else:
+                    byte = data[byte_idx - LENGTH_PREFIX]
+                bits = (byte >> (8 - bits_per_channel - (bit_idx & 7))) & value_mask
+
+                channel_val = channels[channel_idx]
+                new_val = (channel_val & clear_mask) | bits
 
                 if channel_val != new_val:
                     modified = True
-                    if channel_idx == 0:
-                        r = new_val
-                    elif channel_idx == 1:
-                        g = new_val
-                    else:
-                        b = new_val
+                    channels[channel_idx] = new_val
 
                 bit_idx += bits_per_channel
 
             if modified:
-                new_pixels[pixel_idx] = (r, g, b)
+                new_pixels[pixel_idx] = tuple(channels)
                 modified_pixels += 1
 
             # Report progress periodically
             if progress_file and progress_idx % PROGRESS_INTERVAL == 0:
-                _write_progress(progress_file, progress_idx, total_pixels_to_process, "embedding")
+                report_progress(progress_file, progress_idx, total_pixels_to_process, "embedding")
 
         # Final progress before save
         if progress_file:
-            _write_progress(
+            report_progress(
                 progress_file, total_pixels_to_process, total_pixels_to_process, "saving"
             )
 
@@ -810,8 +826,8 @@ def _embed_lsb(
         stats = EmbedStats(
             pixels_modified=modified_pixels,
             total_pixels=num_pixels,
-            capacity_used=len(data_with_len) / max_bytes,
-            bytes_embedded=len(data_with_len),
+            capacity_used=total_bytes / max_bytes,
+            bytes_embedded=total_bytes,
         )
 
         debug.print(f"LSB embedding complete: {out_fmt} image, {len(output.getvalue())} bytes")
@@ -823,13 +839,9 @@ def _embed_lsb(
         debug.exception(e, "embed_lsb")
         raise EmbeddingError(f"Failed to embed data: {e}") from e
     finally:
-        # Properly close all PIL Images to prevent memory leaks
+        # The carrier's images belong to its ImageContext; only ours gets closed
         if stego_img is not None:
             stego_img.close()
-        if img is not None and img is not img_file:
-            img.close()
-        if img_file is not None:
-            img_file.close()
 
 
 # =============================================================================
@@ -839,72 +851,101 @@ def _embed_lsb(
 
 @debug.time
 def extract_from_image(
-    image_data: bytes,
+    image_data: bytes | ImageContext,
     pixel_key: bytes,
     bits_per_channel: int = 1,
     embed_mode: str = EMBED_MODE_AUTO,
-    progress_file: str | None = None,
-) -> bytes | None:
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
+) -> bytes | bytearray | None:
     """
     Extract hidden data from a stego image.
 
     Args:
-        image_data: Stego image bytes
+        image_data: Stego image bytes or ImageContext
         pixel_key: Key for pixel/coefficient selection (must match encoding)
         bits_per_channel: Bits per channel (LSB mode only)
-        embed_mode: 'auto' (try both), 'lsb', or 'dct'
-        progress_file: Optional path to write progress JSON for UI polling
+        embed_mode: 'auto' (probe, then try the likely mode(s)), 'lsb', or 'dct'
+        progress_file: Optional progress JSON path or callback (see progress.py)
+        cancel: Optional event; once set, extraction gives up at its next checkpoint
 
     Returns:
-        Extracted data bytes, or None if extraction fails
+        Extracted data bytes, or None if extraction fails (or was cancelled)
     """
+    progress_file = as_progress_reporter(progress_file)
     debug.print(f"extract_from_image: mode={embed_mode}")
+    image_data = as_image_context(image_data)
 
-    # AUTO MODE: Try LSB first, then DCT
+    # AUTO MODE: Let cheap probes decide what to try (v4.3.0)
     if embed_mode == EMBED_MODE_AUTO:
-        result = _extract_lsb(image_data, pixel_key, bits_per_channel)
-        if result is not None:
-            debug.print("Auto-detect: LSB extraction succeeded")
-            return result
-
-        if has_dct_support():
-            debug.print("Auto-detect: LSB failed, trying DCT")
-            result = _extract_dct(image_data, pixel_key, progress_file)
-            if result is not None:
-                debug.print("Auto-detect: DCT extraction succeeded")
-                return result
-
-        debug.print("Auto-detect: All modes failed")
-        return None
+        return _extract_auto(image_data, pixel_key, bits_per_channel, progress_file, cancel)
 
     # EXPLICIT DCT MODE
-    elif embed_mode == EMBED_MODE_DCT:
+    if embed_mode == EMBED_MODE_DCT:
         if not has_dct_support():
             raise ImportError("scipy required for DCT mode")
-        return _extract_dct(image_data, pixel_key, progress_file)
+        with reserve(_carrier_cost(image_data, EMBED_MODE_DCT), "extract"):
+            return _extract_dct(image_data, pixel_key, progress_file, cancel)
 
     # EXPLICIT LSB MODE
     else:
-        return _extract_lsb(image_data, pixel_key, bits_per_channel)
+        with reserve(_carrier_cost(image_data, EMBED_MODE_LSB), "extract"):
+            return _extract_lsb(image_data, pixel_key, bits_per_channel, cancel)
 
 
 def _extract_dct(
-    image_data: bytes,
+    image_data: bytes | ImageContext,
     pixel_key: bytes,
-    progress_file: str | None = None,
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
 ) -> bytes | None:
     """Extract using DCT mode."""
     try:
         dct_mod = _get_dct_module()
-        return dct_mod.extract_from_dct(image_data, pixel_key, progress_file)
+        return dct_mod.extract_from_dct(image_data, pixel_key, progress_file, cancel)
     except Exception as e:
         debug.print(f"DCT extraction failed: {e}")
         return None
 
 
-def _extract_lsb(image_data: bytes, pixel_key: bytes, bits_per_channel: int = 1) -> bytes | None:
+def _read_lsb_bytes(
+    pixels: list, indices: Sequence[int], bits_per_channel: int, num_bytes: int
+) -> bytearray | None:
+    """
+    Collect num_bytes of LSB data from the given pixels, MSB-first.
+
+    Bits are OR'd straight into a preallocated bytearray instead of being
+    built up as a "0101..." string and parsed back.
+
+    Returns:
+        The bytes, or None if the pixels run out first
+    """
+    result = bytearray(num_bytes)
+    total_bits = num_bytes * 8
+    bit_idx = 0
+
+    for pixel_idx in indices:
+        for channel in pixels[pixel_idx]:
+            for bit_pos in range(bits_per_channel - 1, -1, -1):
+                if bit_idx >= total_bits:
+                    return result
+                if (channel >> bit_pos) & 1:
+                    result[bit_idx >> 3] |= 0x80 >> (bit_idx & 7)
+                bit_idx += 1
+
+    return result if bit_idx >= total_bits else None
+
+
+def _extract_lsb(
+    image_data: bytes | ImageContext,
+    pixel_key: bytes,
+    bits_per_channel: int = 1,
+    cancel: threading.Event | None = None,
+) -> bytes | bytearray | None:
     """
     Extract using LSB mode (internal implementation).
+
+    Setting cancel makes it return None between its expensive steps.
     """
     debug.print(f"LSB extracting from {len(image_data)} byte image")
     debug.data(pixel_key, "Pixel key for extraction")
@@ -912,18 +953,14 @@ def _extract_lsb(image_data: bytes, pixel_key: bytes, bits_per_channel: int = 1)
         bits_per_channel in (1, 2), f"bits_per_channel must be 1 or 2, got {bits_per_channel}"
     )
 
-    img_file = None
-    img = None
-
     try:
-        img_file = Image.open(io.BytesIO(image_data))
-        debug.print(f"Image: {img_file.size[0]}x{img_file.size[1]}, format: {img_file.format}")
+        ctx = as_image_context(image_data)
+        debug.print(f"Image: {ctx.width}x{ctx.height}, format: {ctx.format}")
 
-        img = img_file.convert("RGB") if img_file.mode != "RGB" else img_file.copy()
-        if img_file.mode != "RGB":
-            debug.print(f"Converting image from {img_file.mode} to RGB")
+        if ctx.mode != "RGB":
+            debug.print(f"Converting image from {ctx.mode} to RGB")
 
-        pixels = list(img.getdata())
+        pixels = list(ctx.rgb_image.getdata())
         num_pixels = len(pixels)
         bits_per_pixel = 3 * bits_per_channel
 
@@ -934,25 +971,14 @@ def _extract_lsb(image_data: bytes, pixel_key: bytes, bits_per_channel: int = 1)
 
         initial_indices = generate_pixel_indices(pixel_key, num_pixels, initial_pixels)
 
-        binary_data = ""
-        for pixel_idx in initial_indices:
-            r, g, b = pixels[pixel_idx]
-            for channel in [r, g, b]:
-                for bit_pos in range(bits_per_channel - 1, -1, -1):
-                    binary_data += str((channel >> bit_pos) & 1)
-
-        try:
-            length_bits = binary_data[:32]
-            if len(length_bits) < 32:
-                debug.print(f"Not enough bits for length: {len(length_bits)}/32")
-                return None
-
-            data_length = struct.unpack(">I", int(length_bits, 2).to_bytes(4, "big"))[0]
-            debug.print(f"Extracted length: {data_length} bytes")
-        except Exception as e:
-            debug.print(f"Failed to parse length: {e}")
+        length_bytes = _read_lsb_bytes(pixels, initial_indices, bits_per_channel, LENGTH_PREFIX)
+        if length_bytes is None:
+            debug.print("Not enough bits for length")
             return None
 
+        data_length = struct.unpack(">I", length_bytes)[0]
+        debug.print(f"Extracted length: {data_length} bytes")
+
         max_possible = (num_pixels * bits_per_pixel) // 8 - 4
         if data_length > max_possible or data_length < 10:
             debug.print(f"Invalid data length: {data_length} (max possible: {max_possible})")
@@ -963,68 +989,299 @@ def _extract_lsb(image_data: bytes, pixel_key: bytes, bits_per_channel: int = 1)
 
         debug.print(f"Need {pixels_needed} pixels to extract {data_length} bytes")
 
+        if cancel is not None and cancel.is_set():
+            return None
         selected_indices = generate_pixel_indices(pixel_key, num_pixels, pixels_needed)
+        if cancel is not None and cancel.is_set():
+            return None
 
-        binary_data = ""
-        for pixel_idx in selected_indices:
-            r, g, b = pixels[pixel_idx]
-            for channel in [r, g, b]:
-                for bit_pos in range(bits_per_channel - 1, -1, -1):
-                    binary_data += str((channel >> bit_pos) & 1)
-
-        data_bits = binary_data[32 : 32 + (data_length * 8)]
-
-        if len(data_bits) < data_length * 8:
-            debug.print(f"Insufficient bits: {len(data_bits)} < {data_length * 8}")
+        data_bytes = _read_lsb_bytes(
+            pixels, selected_indices, bits_per_channel, LENGTH_PREFIX + data_length
+        )
+        if data_bytes is None:
+            debug.print(f"Insufficient bits for {data_length} bytes")
             return None
 
-        data_bytes = bytearray()
-        for i in range(0, len(data_bits), 8):
-            byte_bits = data_bits[i : i + 8]
-            if len(byte_bits) == 8:
-                data_bytes.append(int(byte_bits, 2))
+        # Drop the length prefix in place (O(1) for a bytearray)
+        del data_bytes[:LENGTH_PREFIX]
 
         debug.print(f"LSB successfully extracted {len(data_bytes)} bytes")
-        return bytes(data_bytes)
+        return data_bytes
 
     except Exception as e:
         debug.exception(e, "extract_lsb")
         return None
-    finally:
-        # Properly close all PIL Images to prevent memory leaks
-        if img is not None and img is not img_file:
-            img.close()
-        if img_file is not None:
-            img_file.close()
 
 
 # =============================================================================
-# UTILITY FUNCTIONS
+# AUTO MODE DISPATCH (v4.3.0)
 # =============================================================================
+#
+# Auto used to mean "run a full LSB extraction, and if that comes back empty
+# run a full DCT extraction (up to four rotations of it)". On a JPEG, the
+# LSB pass is pure waste - JPEG compression wipes LSB data, and we never
+# write LSB output as JPEG.
+#
+# Now we look before we leap. The probes are each a tiny fraction of a real
+# extraction:
+#
+#   container   JPEG can't hold LSB data            -> DCT only
+#   LSB probe   first ~22 selected pixels: is the 32-bit length plausible,
+#               and is it followed by the \x89ST3 magic?
+#   DCT probe   first 8 blocks: do 2 of the 3 RS length copies agree, or
+#               is there a legacy DCTS header?
+#
+# A positive LSB magic or DCT probe is decisive - that mode goes first and
+# the other is only a fallback. If nothing is decisive (a plausible-looking
+# LSB length, say, or a rotated DCT image the probe can't see) and there
+# are cores to spare, both run at once and the first to return data wins.
+# The loser is cancelled through a shared flag its extract loop checks.
 
+LSB_PROBE_NONE = 0  # Length prefix impossible - _extract_lsb would give up too
+LSB_PROBE_PLAUSIBLE = 1  # Length is in range, but no magic behind it
+LSB_PROBE_MAGIC = 2  # Length in range and followed by the Stegasoo (or shard) magic
 
-def get_image_dimensions(image_data: bytes) -> tuple[int, int]:
-    """Get image dimensions without loading full image."""
-    debug.validate(len(image_data) > 0, "Image data cannot be empty")
-    img = Image.open(io.BytesIO(image_data))
+
+def _probe_lsb(
+    image_data: bytes | ImageContext, pixel_key: bytes, bits_per_channel: int = 1
+) -> int:
+    """
+    Read just the length prefix and magic from the LSB pixel sequence.
+
+    Uses the same initial pixel selection as _extract_lsb, reading pixels
+    one at a time instead of materialising the whole image as a list. The
+    decode itself is kept in the ImageContext, so a real LSB extraction
+    afterwards doesn't pay for it again.
+
+    Returns:
+        LSB_PROBE_NONE, LSB_PROBE_PLAUSIBLE or LSB_PROBE_MAGIC
+    """
     try:
-        dimensions = img.size
-        debug.print(f"Image dimensions: {dimensions[0]}x{dimensions[1]}")
-        return dimensions
-    finally:
-        img.close()
+        ctx = as_image_context(image_data)
+        img = ctx.rgb_image
+        width, height = img.size
+        num_pixels = width * height
+        bits_per_pixel = 3 * bits_per_channel
 
+        probe_bytes = LENGTH_PREFIX + len(MAGIC_HEADER)
+        initial_pixels = (32 + bits_per_pixel - 1) // bits_per_pixel + 10
+        magic_pixels = (probe_bytes * 8 + bits_per_pixel - 1) // bits_per_pixel
+        probe_pixels = min(max(initial_pixels, magic_pixels), num_pixels)
 
-def get_image_format(image_data: bytes) -> str | None:
-    """Get image format (PIL format string like 'PNG', 'JPEG')."""
+        indices = generate_pixel_indices(pixel_key, num_pixels, probe_pixels)
+        pixels = [img.getpixel((idx % width, idx // width)) for idx in indices]
+
+        probe = _read_lsb_bytes(pixels, range(len(pixels)), bits_per_channel, probe_bytes)
+        if probe is None:
+            return LSB_PROBE_NONE
+
+        data_length = struct.unpack_from(">I", probe)[0]
+        max_possible = (num_pixels * bits_per_pixel) // 8 - 4
+        if data_length > max_possible or data_length < 10:
+            return LSB_PROBE_NONE
+
+        if bytes(probe[LENGTH_PREFIX:]) in (MAGIC_HEADER, SHARD_MAGIC_HEADER):
+            return LSB_PROBE_MAGIC
+        return LSB_PROBE_PLAUSIBLE
+
+    except Exception as e:
+        debug.print(f"LSB probe failed: {e}")
+        return LSB_PROBE_NONE
+
+
+def _probe_dct(image_data: bytes | ImageContext, pixel_key: bytes) -> bool:
+    """Check the first few DCT blocks for a Stegasoo length prefix or header."""
     try:
-        img = Image.open(io.BytesIO(image_data))
+        return bool(_get_dct_module()._quick_validate_dct_header(image_data, pixel_key))
+    except Exception as e:
+        debug.print(f"DCT probe failed: {e}")
+        return False
+
+
+def _plan_auto_extraction(
+    image_data: bytes | ImageContext, pixel_key: bytes, bits_per_channel: int = 1
+) -> tuple[list[str], bool]:
+    """
+    Decide which modes to try for auto extraction, and whether it's clear-cut.
+
+    Returns:
+        (modes in the order to try them, decisive) - when not decisive the
+        modes are worth racing
+    """
+    dct_available = has_dct_support()
+    image_data = as_image_context(image_data)
+
+    try:
+        image_format = image_data.format
+    except Exception:
+        image_format = None
+
+    if image_format == "JPEG":
+        debug.print("Auto-detect: JPEG container, LSB impossible")
+        return ([EMBED_MODE_DCT] if dct_available else []), True
+
+    lsb = _probe_lsb(image_data, pixel_key, bits_per_channel)
+    if lsb == LSB_PROBE_MAGIC:
+        debug.print("Auto-detect: LSB magic found")
+        return [EMBED_MODE_LSB] + ([EMBED_MODE_DCT] if dct_available else []), True
+
+    if not dct_available:
+        return ([EMBED_MODE_LSB] if lsb else []), True
+
+    if _probe_dct(image_data, pixel_key):
+        debug.print("Auto-detect: DCT length prefix found")
+        return [EMBED_MODE_DCT] + ([EMBED_MODE_LSB] if lsb else []), True
+
+    if lsb == LSB_PROBE_PLAUSIBLE:
+        # Could be LSB without a Stegasoo payload, could be a rotated DCT image
+        debug.print("Auto-detect: ambiguous (plausible LSB length, no DCT signal)")
+        return [EMBED_MODE_LSB, EMBED_MODE_DCT], False
+
+    # No LSB length: DCT is all that's left (its rotation fallback may still find it)
+    debug.print("Auto-detect: no LSB length, DCT only")
+    return [EMBED_MODE_DCT], True
+
+
+def _has_payload_magic(data: bytes | bytearray | None) -> bool:
+    """Does an extracted payload start with the Stegasoo (or shard) magic?"""
+    return data is not None and bytes(data[: len(MAGIC_HEADER)]) in (
+        MAGIC_HEADER,
+        SHARD_MAGIC_HEADER,
+    )
+
+
+def _cores_free() -> bool:
+    """Is there room to run two extractions side by side?"""
+    if (os.cpu_count() or 1) < 2:
+        return False
+    return get_governor().stats().waiting == 0
+
+
+def _extract_mode(
+    mode: str,
+    image_data: ImageContext,
+    pixel_key: bytes,
+    bits_per_channel: int,
+    progress_file: ProgressTarget | None,
+    cancel: threading.Event | None = None,
+) -> bytes | bytearray | None:
+    with reserve(_carrier_cost(image_data, mode), "extract"):
+        if cancel is not None and cancel.is_set():
+            return None
+        if mode == EMBED_MODE_DCT:
+            return _extract_dct(image_data, pixel_key, progress_file, cancel)
+        return _extract_lsb(image_data, pixel_key, bits_per_channel, cancel)
+
+
+def _until_cancelled(
+    progress_file: ProgressTarget | None, cancel: threading.Event
+) -> ProgressReporter | None:
+    """Progress for a racing extract - silenced once the race is decided."""
+    reporter = as_progress_reporter(progress_file)
+    if reporter is None:
+        return None
+
+    def sink(update: dict) -> None:
+        # The loser may run on for a batch; its updates describe nothing the
+        # caller is waiting for (and may arrive after the winner's reply)
+        if not cancel.is_set():
+            reporter.sink(update)
+
+    return ProgressReporter(sink, reporter.min_interval)
+
+
+class _LinkedEvent(threading.Event):
+    """An Event that also reads as set once its parent is."""
+
+    def __init__(self, parent: threading.Event | None):
+        super().__init__()
+        self._parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or (self._parent is not None and self._parent.is_set())
+
+
+def _extract_auto(
+    image_data: ImageContext,
+    pixel_key: bytes,
+    bits_per_channel: int = 1,
+    progress_file: ProgressTarget | None = None,
+    cancel: threading.Event | None = None,
+) -> bytes | bytearray | None:
+    """Auto-mode extraction: probe, then run the candidates in order or race them."""
+    modes, decisive = _plan_auto_extraction(image_data, pixel_key, bits_per_channel)
+
+    if not decisive and len(modes) > 1 and _cores_free():
+        debug.print(f"Auto-detect: racing {', '.join(modes)}")
+        executor = ThreadPoolExecutor(max_workers=len(modes), thread_name_prefix="stegasoo-auto")
+        # The race gets its own flag (setting the caller's would stop more than
+        # this extract), which still trips when the caller cancels
+        race = _LinkedEvent(cancel)
         try:
-            format_str = img.format
-            debug.print(f"Image format: {format_str}")
-            return format_str
+            futures = {
+                executor.submit(
+                    _extract_mode,
+                    mode,
+                    image_data,
+                    pixel_key,
+                    bits_per_channel,
+                    _until_cancelled(progress_file, race) if mode == EMBED_MODE_DCT else None,
+                    race,
+                ): mode
+                for mode in modes
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                # Every payload starts with a magic, and _extract_lsb doesn't
+                # check for one. A fast LSB pass over a rotated DCT image would
+                # otherwise "win" with junk and cancel the extract that works
+                if _has_payload_magic(result):
+                    debug.print(f"Auto-detect: {futures[future].upper()} won the race")
+                    return result
+                if result is not None:
+                    debug.print(f"Auto-detect: {futures[future].upper()} found no magic")
         finally:
-            img.close()
+            # Don't wait for the loser, but tell it to stop: both extract loops
+            # check the flag, so it gives up (and frees its reservation) at the
+            # next batch instead of grinding through the whole image
+            race.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for mode in modes:
+            result = _extract_mode(
+                mode, image_data, pixel_key, bits_per_channel, progress_file, cancel
+            )
+            # Same rule as the race: junk without a magic must not stop us
+            # trying the next mode
+            if _has_payload_magic(result):
+                debug.print(f"Auto-detect: {mode.upper()} extraction succeeded")
+                return result
+            if result is not None:
+                debug.print(f"Auto-detect: {mode.upper()} found no magic")
+
+    debug.print("Auto-detect: All modes failed")
+    return None
+
+
+# =============================================================================
+# UTILITY FUNCTIONS
+# =============================================================================
+
+
+def get_image_dimensions(image_data: bytes | ImageContext) -> tuple[int, int]:
+    """Get image dimensions without loading full image (cached header probe)."""
+    debug.validate(len(image_data) > 0, "Image data cannot be empty")
+    dimensions = probe_image(image_data).size
+    debug.print(f"Image dimensions: {dimensions[0]}x{dimensions[1]}")
+    return dimensions
+
+
+def get_image_format(image_data: bytes | ImageContext) -> str | None:
+    """Get image format (PIL format string like 'PNG', 'JPEG')."""
+    try:
+        format_str = probe_image(image_data).format
+        debug.print(f"Image format: {format_str}")
+        return format_str
     except Exception as e:
         debug.print(f"Failed to get image format: {e}")
         return None
@@ -3,16 +3,15 @@ Stegasoo Input Validation (v3.2.0)
 
 Validators for all user inputs with clear error messages.
 
+Changes in v4.3.0:
+- validate_image() accepts an ImageContext (header is read once per input)
+
 Changes in v3.2.0:
 - Renamed validate_phrase() → validate_passphrase()
 - Added word count validation with warnings for passphrases
 - Added validators for embed modes and DCT parameters
 """
 
-import io
-
-from PIL import Image
-
 from .constants import (
     ALLOWED_IMAGE_EXTENSIONS,
     ALLOWED_KEY_EXTENSIONS,
@@ -24,6 +23,7 @@ from .constants import (
     MAX_IMAGE_PIXELS,
     MAX_MESSAGE_SIZE,
     MAX_PIN_LENGTH,
+    MAX_STREAM_PAYLOAD_SIZE,
     MIN_KEY_PASSWORD_LENGTH,
     MIN_PASSPHRASE_WORDS,
     MIN_PIN_LENGTH,
@@ -37,6 +37,7 @@ from .exceptions import (
     PinValidationError,
     SecurityFactorError,
 )
+from .image_context import ImageContext, as_image_context
 from .keygen import load_rsa_key
 from .models import FilePayload, ValidationResult
 
@@ -95,12 +96,14 @@ def validate_message(message: str) -> ValidationResult:
     return ValidationResult.ok(length=len(message))
 
 
-def validate_payload(payload: str | bytes | FilePayload) -> ValidationResult:
+def validate_payload(payload: str | bytes | FilePayload, stream: bool = False) -> ValidationResult:
     """
     Validate a payload (text message, bytes, or file).
 
     Args:
         payload: Text string, raw bytes, or FilePayload
+        stream: The payload will be streamed (segmented encryption), so it
+            may be up to MAX_STREAM_PAYLOAD_SIZE instead of MAX_FILE_PAYLOAD_SIZE
 
     Returns:
         ValidationResult
@@ -108,14 +111,17 @@ def validate_payload(payload: str | bytes | FilePayload) -> ValidationResult:
     if isinstance(payload, str):
         return validate_message(payload)
 
-    elif isinstance(payload, FilePayload):
+    # Single-shot payloads are encrypted in one piece in memory; only streamed
+    # ones get the bigger limit (v4.3.0)
+    limit = MAX_STREAM_PAYLOAD_SIZE if stream else MAX_FILE_PAYLOAD_SIZE
+
+    if isinstance(payload, FilePayload):
         if not payload.data:
             return ValidationResult.error("File is empty")
 
-        if len(payload.data) > MAX_FILE_PAYLOAD_SIZE:
+        if len(payload.data) > limit:
             return ValidationResult.error(
-                f"File too large ({len(payload.data):,} bytes). "
-                f"Maximum: {MAX_FILE_PAYLOAD_SIZE:,} bytes ({MAX_FILE_PAYLOAD_SIZE // 1024} KB)"
+                f"File too large ({len(payload.data):,} bytes). {_size_limit_text(limit)}"
             )
 
         return ValidationResult.ok(
@@ -126,10 +132,9 @@ def validate_payload(payload: str | bytes | FilePayload) -> ValidationResult:
         if not payload:
             return ValidationResult.error("Payload is empty")
 
-        if len(payload) > MAX_FILE_PAYLOAD_SIZE:
+        if len(payload) > limit:
             return ValidationResult.error(
-                f"Payload too large ({len(payload):,} bytes). "
-                f"Maximum: {MAX_FILE_PAYLOAD_SIZE:,} bytes ({MAX_FILE_PAYLOAD_SIZE // 1024} KB)"
+                f"Payload too large ({len(payload):,} bytes). {_size_limit_text(limit)}"
             )
 
         return ValidationResult.ok(size=len(payload))
@@ -138,6 +143,12 @@ def validate_payload(payload: str | bytes | FilePayload) -> ValidationResult:
         return ValidationResult.error(f"Invalid payload type: {type(payload)}")
 
 
+def _size_limit_text(limit: int) -> str:
+    if limit >= 1024 * 1024:
+        return f"Maximum: {limit:,} bytes ({limit // (1024 * 1024)} MB)"
+    return f"Maximum: {limit:,} bytes ({limit // 1024} KB)"
+
+
 def validate_file_payload(
     file_data: bytes, filename: str = "", max_size: int = MAX_FILE_PAYLOAD_SIZE
 ) -> ValidationResult:
@@ -167,13 +178,16 @@ def validate_file_payload(
 
 
 def validate_image(
-    image_data: bytes, name: str = "Image", check_size: bool = True
+    image_data: bytes | ImageContext, name: str = "Image", check_size: bool = True
 ) -> ValidationResult:
     """
     Validate image data and dimensions.
 
+    Only the image header is read. Pass an ImageContext to share that work
+    (and any later decoding) with the rest of the pipeline.
+
     Args:
-        image_data: Raw image bytes
+        image_data: Raw image bytes or ImageContext
         name: Name for error messages
         check_size: Whether to check pixel dimensions
 
@@ -189,7 +203,7 @@ def validate_image(
         )
 
     try:
-        img = Image.open(io.BytesIO(image_data))
+        img = as_image_context(image_data)
         width, height = img.size
         num_pixels = width * height
 
@@ -447,14 +461,14 @@ def require_valid_message(message: str) -> None:
         raise MessageValidationError(result.error_message)
 
 
-def require_valid_payload(payload: str | bytes | FilePayload) -> None:
+def require_valid_payload(payload: str | bytes | FilePayload, stream: bool = False) -> None:
     """Validate payload (text, bytes, or file), raising exception on failure."""
-    result = validate_payload(payload)
+    result = validate_payload(payload, stream)
     if not result.is_valid:
         raise MessageValidationError(result.error_message)
 
 
-def require_valid_image(image_data: bytes, name: str = "Image") -> None:
+def require_valid_image(image_data: bytes | ImageContext, name: str = "Image") -> None:
     """Validate image, raising exception on failure."""
     result = validate_image(image_data, name)
     if not result.is_valid:
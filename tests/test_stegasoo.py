@@ -5,6 +5,7 @@ Tests core functionality: encode/decode, LSB/DCT modes, channel keys, validation
 """
 
 import io
+import os
 from pathlib import Path
 
 import pytest
@@ -30,11 +31,26 @@ TEST_DATA = Path(__file__).parent.parent / "test_data"
 CARRIER_PATH = TEST_DATA / "carrier.jpg"
 REF_PATH = TEST_DATA / "ref.jpg"
 
+# The web frontend's modules import each other by bare name
+WEB_FRONTEND = Path(__file__).parent.parent / "frontends" / "web"
+
 # Test credentials
 TEST_PASSPHRASE = "tower booty sunny windy toasty spicy"
 TEST_PIN = "727643678"
 TEST_MESSAGE = "Hello, Stegasoo!"
 
+# Cheap KDF so the suite isn't dominated by 256 MB Argon2 runs.
+# Images record their own KDF cost, so decode picks this up automatically.
+TEST_KDF = stegasoo.KDFParams(time_cost=1, memory_cost=8 * 1024, parallelism=1, name="test")
+
+
+@pytest.fixture(autouse=True)
+def cheap_kdf():
+    """Encode with cheap KDF parameters for the duration of each test."""
+    stegasoo.set_kdf_profile(TEST_KDF)
+    yield
+    stegasoo.set_kdf_profile(None)
+
 
 @pytest.fixture
 def carrier_bytes():
@@ -57,6 +73,62 @@ def small_image():
     return buf.getvalue()
 
 
+@pytest.fixture
+def web_frontend(monkeypatch):
+    """Make frontends/web importable (job_queue, temp_storage, ...)."""
+    monkeypatch.syspath_prepend(str(WEB_FRONTEND))
+
+
+@pytest.fixture
+def batch_images(tmp_path):
+    """Three small PNGs in tmp_path, for batch runs."""
+    for i, color in enumerate(("blue", "green", "red")):
+        Image.new("RGB", (200, 200), color=color).save(tmp_path / f"img{i}.png")
+    return tmp_path
+
+
+@pytest.fixture
+def batch_creds(ref_bytes):
+    """Batch credentials matching the test passphrase and PIN."""
+    from stegasoo.batch import BatchCredentials
+
+    return BatchCredentials(reference_photo=ref_bytes, passphrase=TEST_PASSPHRASE, pin=TEST_PIN)
+
+
+@pytest.fixture
+def pool_worker(tmp_path):
+    """The real --serve worker, plus operations that misbehave on request."""
+    script = tmp_path / "pool_worker.py"
+    script.write_text(f"""
+import os
+import sys
+import time
+
+sys.path.insert(0, {str(WEB_FRONTEND)!r})
+import stego_worker
+
+
+def noisy(params):
+    print("chatter from a library")
+    os.write(1, b"native chatter\\n")
+    return {{"success": True, "pid": os.getpid()}}
+
+
+def sleep(params):
+    time.sleep(params["seconds"])
+    return {{"success": True}}
+
+
+def crash(params):
+    os._exit(3)
+
+
+stego_worker.OPERATIONS.update(noisy=noisy, sleep=sleep, crash=crash)
+stego_worker.serve()
+""")
+    return script
+
+
 class TestVersion:
     """Test version info."""
 
@@ -297,6 +369,75 @@ class TestDCTMode:
         # Verify it's JPEG by checking magic bytes
         assert result.stego_image[:2] == b"\xff\xd8"
 
+    @pytest.mark.parametrize("output_format", ["png", "jpeg"])
+    def test_exif_orientation_applied(self, carrier_bytes, ref_bytes, output_format):
+        """Portrait (EXIF 6) carriers come out upright and still decode."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 CW to display
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(carrier_bytes)).convert("RGB").resize((320, 240)).save(
+            buf, format="JPEG", quality=90, exif=exif.tobytes()
+        )
+
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=buf.getvalue(),
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="dct",
+            dct_output_format=output_format,
+        )
+
+        stego = Image.open(io.BytesIO(result.stego_image))
+        assert stego.size == (240, 320)
+        assert stego.getexif().get(0x0112, 1) == 1
+
+        decoded = decode(
+            stego_image=result.stego_image,
+            reference_photo=ref_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        assert decoded.message == TEST_MESSAGE
+
+    @pytest.mark.parametrize("output_format", ["png", "jpeg"])
+    @pytest.mark.parametrize(
+        "carrier_format,orientation",
+        [("JPEG", 1), ("JPEG", 6), ("PNG", 1), ("PNG", 8)],
+    )
+    def test_odd_size_carriers(
+        self, carrier_bytes, ref_bytes, carrier_format, orientation, output_format
+    ):
+        """Sizes that aren't a multiple of the 8x8 block (or a 16x16 MCU) still round-trip."""
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(carrier_bytes)).convert("RGB").resize((323, 245)).save(
+            buf, format=carrier_format, exif=exif.tobytes()
+        )
+
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=buf.getvalue(),
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="dct",
+            dct_output_format=output_format,
+        )
+
+        stego = Image.open(io.BytesIO(result.stego_image))
+        assert stego.size == ((323, 245) if orientation == 1 else (245, 323))
+
+        decoded = decode(
+            stego_image=result.stego_image,
+            reference_photo=ref_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        assert decoded.message == TEST_MESSAGE
+
 
 class TestChannelKey:
     """Test channel key functionality."""
@@ -451,3 +592,1513 @@ class TestEdgeCases:
         )
 
         assert decoded.message == special_msg
+
+
+class TestKDFProfiles:
+    """Test self-describing KDF parameters (format v6)."""
+
+    def test_header_records_kdf_params(self, ref_bytes):
+        from stegasoo.crypto import encrypt_message, parse_header
+
+        encrypted = encrypt_message(TEST_MESSAGE, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        header = parse_header(encrypted)
+
+        assert header["version"] == stegasoo.FORMAT_VERSION
+        assert header["kdf_params"] == TEST_KDF
+
+    def test_decode_ignores_local_profile(self, carrier_bytes, ref_bytes):
+        """Decoder uses the header's parameters, not its own profile."""
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            kdf_profile=stegasoo.KDFParams(time_cost=2, memory_cost=16 * 1024, parallelism=2),
+        )
+
+        decoded = decode(
+            stego_image=result.stego_image,
+            reference_photo=ref_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="lsb",
+        )
+
+        assert decoded.message == TEST_MESSAGE
+
+    def test_hostile_kdf_params_rejected(self):
+        """A crafted header can't ask for more work than the paranoid profile."""
+        from stegasoo.kdf import KDFParams
+
+        paranoid = stegasoo.get_kdf_profile("paranoid")
+        assert KDFParams.unpack(paranoid.pack()) == paranoid
+
+        for hostile in (
+            KDFParams(time_cost=64, memory_cost=64 * 1024, parallelism=1),
+            KDFParams(time_cost=4, memory_cost=2 * 1024 * 1024, parallelism=4),
+            KDFParams(time_cost=16, memory_cost=1024 * 1024, parallelism=4),
+        ):
+            with pytest.raises(stegasoo.KeyDerivationError):
+                KDFParams.unpack(hostile.pack())
+
+    def test_tampered_kdf_block_fails(self, ref_bytes):
+        """KDF block is part of the AAD - a downgrade must not decrypt."""
+        from stegasoo.crypto import decrypt_message, encrypt_message
+
+        encrypted = bytearray(encrypt_message(TEST_MESSAGE, ref_bytes, TEST_PASSPHRASE, TEST_PIN))
+        encrypted[7:11] = (2).to_bytes(4, "big")  # time_cost 1 -> 2
+
+        with pytest.raises(stegasoo.DecryptionError):
+            decrypt_message(bytes(encrypted), ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+
+    def test_legacy_v5_message_decrypts(self, ref_bytes):
+        """v5 headers have no KDF block and use the old fixed constants."""
+        import secrets
+        import struct
+
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        from stegasoo.crypto import decrypt_message, derive_hybrid_key
+        from stegasoo.kdf import legacy_kdf_params
+
+        salt = secrets.token_bytes(32)
+        iv = secrets.token_bytes(12)
+        key = derive_hybrid_key(
+            ref_bytes,
+            TEST_PASSPHRASE,
+            salt,
+            TEST_PIN,
+            channel_key="",
+            kdf_params=legacy_kdf_params(),
+        )
+        packed = b"\x01" + TEST_MESSAGE.encode()
+        padded = packed + bytes(256 - len(packed) - 4) + struct.pack(">I", len(packed))
+        header = b"\x89ST3" + bytes([5, 0])
+        sealed = AESGCM(key).encrypt(iv, padded, header)
+        v5_message = header + salt + iv + sealed[-16:] + sealed[:-16]
+
+        result = decrypt_message(v5_message, ref_bytes, TEST_PASSPHRASE, TEST_PIN, channel_key="")
+        assert result.message == TEST_MESSAGE
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(stegasoo.KeyDerivationError):
+            stegasoo.get_kdf_profile("turbo")
+
+    def test_calibrate_without_argon2(self, monkeypatch):
+        """PBKDF2 calibration must not suggest Argon2 custom-profile exports."""
+        from click.testing import CliRunner
+
+        from stegasoo import kdf
+        from stegasoo.cli import cli
+
+        monkeypatch.setattr(kdf, "HAS_ARGON2", False)
+        result = CliRunner().invoke(cli, ["tools", "kdf", "--calibrate", "--target-ms", "50"])
+
+        assert result.exit_code == 0, result.output
+        assert "PBKDF2" in result.output
+        assert "export" not in result.output
+
+
+class TestResourceGovernor:
+    """Test the process-wide memory budget."""
+
+    MB = 1024 * 1024
+
+    def test_waits_for_budget(self):
+        import threading
+
+        from stegasoo.governor import ResourceGovernor
+
+        governor = ResourceGovernor(budget_bytes=100 * self.MB)
+        released = threading.Event()
+
+        def holder():
+            with governor.reserve(80 * self.MB, "holder"):
+                released.wait(5)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        while governor.stats().active == 0:
+            pass
+
+        with pytest.raises(stegasoo.ResourceLimitError):
+            with governor.reserve(80 * self.MB, "blocked", timeout=0.05):
+                pass
+
+        released.set()
+        with governor.reserve(80 * self.MB, "after"):
+            pass
+        thread.join()
+
+        stats = governor.stats()
+        assert stats.in_use_bytes == 0
+        assert stats.peak_in_use_bytes == 80 * self.MB
+
+    def test_oversized_request_runs_alone(self):
+        from stegasoo.governor import ResourceGovernor
+
+        governor = ResourceGovernor(budget_bytes=64 * self.MB)
+        with governor.reserve(1024 * self.MB, "huge", timeout=0.1):
+            assert governor.stats().in_use_bytes == 64 * self.MB
+
+    def test_kdf_time_estimates(self):
+        from stegasoo.governor import estimate_kdf_seconds
+        from stegasoo.kdf import pbkdf2_params
+
+        # PBKDF2 has no memory cost, but its iterations still take time
+        assert estimate_kdf_seconds(pbkdf2_params(1_000_000)) > 2 * estimate_kdf_seconds(
+            pbkdf2_params(400_000)
+        )
+        assert estimate_kdf_seconds(pbkdf2_params()) > 0.1
+        assert estimate_kdf_seconds(TEST_KDF) > 0
+
+
+class TestPayloadAssembly:
+    """Test in-place payload assembly and LSB bit packing."""
+
+    def test_file_payload_roundtrip(self, ref_bytes):
+        import os
+
+        from stegasoo.crypto import decrypt_message, encrypt_message
+
+        payload = stegasoo.FilePayload(
+            data=os.urandom(100_000), filename="blob.bin", mime_type="application/octet-stream"
+        )
+        encrypted = encrypt_message(payload, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        result = decrypt_message(encrypted, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+
+        assert result.file_data == payload.data
+        assert result.filename == "blob.bin"
+        assert result.mime_type == "application/octet-stream"
+
+    @pytest.mark.parametrize("bits_per_channel", [1, 2])
+    def test_lsb_bit_packing(self, small_image, bits_per_channel):
+        import os
+
+        from stegasoo.steganography import embed_in_image, extract_from_image
+
+        data = os.urandom(500)
+        pixel_key = os.urandom(32)
+        stego, _, _ = embed_in_image(data, small_image, pixel_key, bits_per_channel)
+
+        extracted = extract_from_image(
+            stego, pixel_key, bits_per_channel=bits_per_channel, embed_mode="lsb"
+        )
+        assert extracted == data
+
+
+class TestStreamingPayload:
+    """Test segmented (STREAM) encryption for large file payloads."""
+
+    def _encrypt(self, ref_bytes, data, **kwargs):
+        from stegasoo.crypto import encrypt_stream
+
+        out = io.BytesIO()
+        encrypt_stream(
+            io.BytesIO(data),
+            out,
+            ref_bytes,
+            TEST_PASSPHRASE,
+            TEST_PIN,
+            filename="big.bin",
+            segment_size=4096,
+            **kwargs,
+        )
+        return out.getvalue()
+
+    @pytest.mark.parametrize("size", [0, 100, 4096 - 12, 20_000])
+    def test_stream_roundtrip(self, ref_bytes, size):
+        import os
+
+        from stegasoo.crypto import decrypt_message, decrypt_stream
+
+        data = os.urandom(size)
+        encrypted = self._encrypt(ref_bytes, data)
+
+        out = io.BytesIO()
+        result = decrypt_stream(io.BytesIO(encrypted), out, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        assert out.getvalue() == data
+        assert result.filename == "big.bin"
+
+        # The in-memory path understands the stream format too
+        assert decrypt_message(encrypted, ref_bytes, TEST_PASSPHRASE, TEST_PIN).file_data == data
+
+    def test_truncated_stream_rejected(self, ref_bytes):
+        import os
+
+        from stegasoo.crypto import decrypt_message
+
+        encrypted = self._encrypt(ref_bytes, os.urandom(20_000))
+        # Cut exactly at a segment boundary - only the "last" flag catches this
+        header_size = 56
+        truncated = encrypted[: header_size + 2 * (4096 + 16)]
+
+        with pytest.raises(stegasoo.DecryptionError):
+            decrypt_message(truncated, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+
+    def test_decode_file_streams_to_disk(self, carrier_bytes, ref_bytes, tmp_path):
+        import os
+
+        from stegasoo.encode import encode_file
+
+        data = os.urandom(3000)
+        source = tmp_path / "report.pdf"
+        source.write_bytes(data)
+
+        result = encode_file(
+            source, ref_bytes, carrier_bytes, TEST_PASSPHRASE, pin=TEST_PIN, stream=True
+        )
+
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+        saved = stegasoo.decode_file(
+            result.stego_image, ref_bytes, TEST_PASSPHRASE, output_path=out_dir, pin=TEST_PIN
+        )
+        assert saved == out_dir / "report.pdf"
+        assert saved.read_bytes() == data
+        assert list(out_dir.iterdir()) == [saved]
+
+    def test_size_limit_depends_on_streaming(self):
+        from stegasoo.constants import MAX_FILE_PAYLOAD_SIZE
+        from stegasoo.models import FilePayload
+        from stegasoo.validation import validate_payload
+
+        payload = FilePayload(data=bytes(MAX_FILE_PAYLOAD_SIZE + 1), filename="big.bin")
+        assert not validate_payload(payload).is_valid
+        assert validate_payload(payload, stream=True).is_valid
+
+
+class TestTrialDecode:
+    """Test decoding with several channel key candidates."""
+
+    def test_finds_the_right_candidate(self, carrier_bytes, ref_bytes):
+        key = generate_channel_key()
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            channel_key=key,
+        )
+
+        decoded = decode(
+            stego_image=result.stego_image,
+            reference_photo=ref_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            channel_key=["", generate_channel_key(), key],
+        )
+        assert decoded.message == TEST_MESSAGE
+
+    @pytest.mark.skipif(not has_dct_support(), reason="DCT support not available")
+    def test_decode_file_streams_winning_candidate(self, carrier_bytes, ref_bytes, tmp_path):
+        from stegasoo.encode import encode_file
+
+        key = generate_channel_key()
+        data = os.urandom(3000)
+        source = tmp_path / "notes.bin"
+        source.write_bytes(data)
+        result = encode_file(
+            source,
+            ref_bytes,
+            carrier_bytes,
+            TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="dct",
+            channel_key="",
+            stream=True,
+        )
+
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+        updates = []
+        saved = stegasoo.decode_file(
+            result.stego_image,
+            ref_bytes,
+            TEST_PASSPHRASE,
+            output_path=out_dir,
+            pin=TEST_PIN,
+            channel_key=[key, ""],
+            progress_file=updates.append,
+        )
+        assert saved.read_bytes() == data
+        assert list(out_dir.iterdir()) == [saved]
+        assert any(u["phase"] != "initializing" and 25 < u["percent"] < 100 for u in updates)
+
+    def test_candidates_deduplicated(self):
+        from stegasoo.decode import resolve_channel_candidates
+
+        key = generate_channel_key()
+        attempts = resolve_channel_candidates(["", False, key, key])
+        assert [a.label for a in attempts] == ["public", "explicit"]
+        assert [a.has_key for a in attempts] == [False, True]
+
+    def test_all_candidates_fail(self, carrier_bytes, ref_bytes):
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            channel_key="",
+        )
+
+        with pytest.raises((stegasoo.DecryptionError, stegasoo.ExtractionError)):
+            decode(
+                stego_image=result.stego_image,
+                reference_photo=ref_bytes,
+                passphrase=TEST_PASSPHRASE,
+                pin="111111",
+                channel_key=["", generate_channel_key()],
+            )
+
+
+class TestAutoDispatch:
+    """Test the auto-mode probes that pick LSB vs DCT."""
+
+    def test_lsb_image_detected(self, carrier_bytes, ref_bytes):
+        from stegasoo.crypto import derive_pixel_key
+        from stegasoo.steganography import _plan_auto_extraction
+
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        pixel_key = derive_pixel_key(ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+
+        modes, decisive = _plan_auto_extraction(result.stego_image, pixel_key)
+        assert modes[0] == "lsb"
+        assert decisive
+
+    def test_jpeg_skips_lsb(self, carrier_bytes):
+        import os
+
+        from stegasoo.steganography import _plan_auto_extraction
+
+        modes, _ = _plan_auto_extraction(carrier_bytes, os.urandom(32))
+        assert "lsb" not in modes
+
+    @pytest.mark.skipif(not has_dct_support(), reason="scipy not available")
+    def test_dct_probe_matches_extraction_grid(self, carrier_bytes, ref_bytes):
+        from stegasoo.crypto import derive_pixel_key
+        from stegasoo.steganography import _probe_dct
+
+        # Not a multiple of 8 - padding mustn't change the block order
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(carrier_bytes)).resize((403, 299)).save(buf, format="PNG")
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=buf.getvalue(),
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="dct",
+            dct_color_mode="grayscale",
+        )
+        pixel_key = derive_pixel_key(ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        assert _probe_dct(result.stego_image, pixel_key)
+
+    @pytest.mark.skipif(not has_dct_support(), reason="scipy not available")
+    @pytest.mark.parametrize("cores_free", [True, False], ids=["raced", "sequential"])
+    def test_auto_ignores_lsb_junk(self, carrier_bytes, ref_bytes, monkeypatch, cores_free):
+        """A rotated DCT image with a plausible LSB length decodes, raced or not."""
+        import struct
+
+        from stegasoo import steganography
+        from stegasoo.crypto import derive_pixel_key
+        from stegasoo.steganography import _plan_auto_extraction, generate_pixel_indices
+
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="dct",
+        )
+        img = Image.open(io.BytesIO(result.stego_image)).convert("RGB").rotate(90, expand=True)
+
+        # Plant a plausible 32-bit length in the LSB prefix, no magic behind it
+        pixel_key = derive_pixel_key(ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        width, height = img.size
+        bits = "".join(f"{byte:08b}" for byte in struct.pack(">I", 100))
+        indices = generate_pixel_indices(pixel_key, width * height, 11)
+        for n, idx in enumerate(indices):
+            xy = (idx % width, idx // width)
+            pixel = list(img.getpixel(xy))
+            for c in range(3):
+                if 3 * n + c < len(bits):
+                    pixel[c] = (pixel[c] & ~1) | int(bits[3 * n + c])
+            img.putpixel(xy, tuple(pixel))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        stego = buf.getvalue()
+
+        modes, decisive = _plan_auto_extraction(stego, pixel_key)
+        assert modes == ["lsb", "dct"]
+        assert not decisive
+
+        monkeypatch.setattr(steganography, "_cores_free", lambda: cores_free)
+        decoded = decode(
+            stego_image=stego,
+            reference_photo=ref_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        assert decoded.message == TEST_MESSAGE
+
+    @pytest.mark.skipif(not has_dct_support(), reason="scipy not available")
+    def test_cancelled_extraction_gives_up(self, carrier_bytes, ref_bytes):
+        import threading
+
+        from stegasoo.crypto import derive_pixel_key
+        from stegasoo.image_context import ImageContext
+        from stegasoo.steganography import _extract_mode, extract_from_image
+
+        pixel_key = derive_pixel_key(ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        cancel = threading.Event()
+        cancel.set()
+        for mode in ("lsb", "dct"):
+            result = encode(
+                message=TEST_MESSAGE,
+                reference_photo=ref_bytes,
+                carrier_image=carrier_bytes,
+                passphrase=TEST_PASSPHRASE,
+                pin=TEST_PIN,
+                embed_mode=mode,
+            )
+            stego = ImageContext(result.stego_image)
+            assert _extract_mode(mode, stego, pixel_key, 1, None) is not None
+            assert _extract_mode(mode, stego, pixel_key, 1, None, cancel) is None
+            # The public entry point passes it down too, explicit mode or auto
+            for embed_mode in (mode, "auto"):
+                assert (
+                    extract_from_image(stego, pixel_key, embed_mode=embed_mode, cancel=cancel)
+                    is None
+                )
+
+
+class TestImageContext:
+    """Test the shared decoded-image context."""
+
+    def test_decoded_once_and_cached(self, carrier_bytes):
+        from stegasoo.crypto import hash_photo
+        from stegasoo.image_context import ImageContext
+
+        ctx = ImageContext(carrier_bytes)
+        assert ctx.rgb_array is ctx.rgb_array
+        assert not ctx.rgb_array.flags.writeable
+        assert ctx.size == Image.open(io.BytesIO(carrier_bytes)).size
+        assert hash_photo(ctx) == hash_photo(carrier_bytes)
+
+    def test_racing_threads_share_one_decode(self, carrier_bytes):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from stegasoo.image_context import ImageContext
+
+        ctx = ImageContext(carrier_bytes)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            arrays = list(pool.map(lambda _: ctx.y_channel, range(8)))
+        assert all(a is arrays[0] for a in arrays)
+
+    def test_roundtrip_with_contexts(self, carrier_bytes, ref_bytes):
+        from stegasoo.image_context import ImageContext
+
+        ref_ctx = ImageContext(ref_bytes)
+        result = encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_ctx,
+            carrier_image=ImageContext(carrier_bytes),
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        decoded = decode(
+            stego_image=ImageContext(result.stego_image),
+            reference_photo=ref_ctx,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+        )
+        assert decoded.message == TEST_MESSAGE
+
+    def test_capacity_apis_share_probe_cache(self, carrier_bytes):
+        from stegasoo import compare_capacity, get_image_info
+        from stegasoo.image_context import clear_probe_cache, get_probe_cache_stats
+        from stegasoo.steganography import calculate_capacity, compare_modes, will_fit_by_mode
+
+        clear_probe_cache()
+        calculate_capacity(carrier_bytes)
+        assert get_probe_cache_stats()["misses"] == 1
+
+        compare_modes(carrier_bytes)
+        will_fit_by_mode(100, carrier_bytes)
+        info = get_image_info(carrier_bytes)
+        compare_capacity(carrier_bytes)
+
+        stats = get_probe_cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] >= 4
+        assert (info.width, info.height) == Image.open(io.BytesIO(carrier_bytes)).size
+
+
+class TestCarrierLibrary:
+    """Test the carrier index and best-fit selection."""
+
+    def test_scan_is_incremental(self, tmp_path, carrier_bytes, small_image):
+        from stegasoo.carriers import CarrierLibrary
+
+        photos = tmp_path / "photos"
+        photos.mkdir()
+        (photos / "big.png").write_bytes(carrier_bytes)
+        (photos / "small.png").write_bytes(small_image)
+        (photos / "copy.png").write_bytes(small_image)
+
+        with CarrierLibrary(tmp_path / "carriers.db") as library:
+            first = library.scan([photos])
+            assert first.added == 3 and not first.failed
+            assert first.reused <= 1  # copy.png may reuse small.png's numbers
+
+            (photos / "copy.png").unlink()
+            second = library.scan([photos])
+            assert (second.unchanged, second.removed, second.added) == (2, 1, 0)
+            assert len(library) == 2
+
+    def test_pick_smallest_that_fits(self, tmp_path, carrier_bytes, small_image):
+        from stegasoo.carriers import CarrierLibrary, worst_case_encrypted_size
+        from stegasoo.steganography import calculate_capacity
+
+        (tmp_path / "big.png").write_bytes(carrier_bytes)
+        (tmp_path / "small.png").write_bytes(small_image)
+
+        with CarrierLibrary(tmp_path / "carriers.db") as library:
+            library.scan([tmp_path])
+
+            assert library.pick(100)[0].path.endswith("small.png")
+
+            too_big = calculate_capacity(small_image) + 1
+            assert worst_case_encrypted_size(too_big) <= calculate_capacity(carrier_bytes)
+            assert library.pick(too_big)[0].path.endswith("big.png")
+            assert library.pick(10**9) == []
+            with pytest.raises(ValueError):
+                library.pick(100, dct_output_format="webp")
+
+    def test_worst_case_size_counts_the_type_prefix(self, monkeypatch, ref_bytes):
+        from stegasoo.carriers import worst_case_encrypted_size
+        from stegasoo.crypto import encrypt_message
+
+        # Always the most padding (randbelow(256) + 64 = 319)
+        monkeypatch.setattr("stegasoo.crypto.secrets.randbelow", lambda n: n - 1)
+
+        def encrypted_size(message):
+            return len(
+                encrypt_message(
+                    message,
+                    ref_bytes,
+                    TEST_PASSPHRASE,
+                    TEST_PIN,
+                    kdf_profile=TEST_KDF,
+                    compression=False,
+                )
+            )
+
+        # 192 + 1 type byte + 319 padding lands exactly on 512; one more byte
+        # spills into the next 256-byte block
+        assert encrypted_size("x" * 192) == worst_case_encrypted_size(192)
+        assert encrypted_size("x" * 193) == worst_case_encrypted_size(193)
+        assert worst_case_encrypted_size(193) == worst_case_encrypted_size(192) + 256
+
+        # Files carry [type][name_len][name][mime_len][mime] instead
+        payload = stegasoo.FilePayload(data=b"x" * 180, filename="a.bin", mime_type="text/plain")
+        prefix_size = 5 + len("a.bin") + len("text/plain")
+        assert encrypted_size(payload) == worst_case_encrypted_size(180, prefix_size)
+        assert worst_case_encrypted_size(180, prefix_size) > worst_case_encrypted_size(180)
+
+
+class TestBatchBackends:
+    """Test the batch processor's thread and process executors."""
+
+    def test_process_backend_round_trip(self, batch_images, batch_creds):
+        from stegasoo.batch import BatchProcessor
+
+        tmp_path, creds = batch_images, batch_creds
+        processor = BatchProcessor(max_workers=2, backend="process")
+        seen = []
+        encoded = processor.batch_encode(
+            [tmp_path],
+            message=TEST_MESSAGE,
+            output_dir=tmp_path / "out",
+            credentials=creds,
+            progress_callback=lambda done, total, item: seen.append(done),
+        )
+        assert encoded.succeeded == 3, [item.error for item in encoded.items]
+        assert seen == [1, 2, 3]
+
+        decoded = processor.batch_decode([tmp_path / "out"], credentials=creds)
+        assert [item.message for item in decoded.items] == [TEST_MESSAGE] * 3
+
+    def test_worker_error_fails_only_its_item(self, batch_images, batch_creds, monkeypatch):
+        from stegasoo.batch import BatchProcessor, BatchStatus
+
+        original = BatchProcessor._process_item
+
+        def flaky(self, operation, item, creds, options):
+            if item.input_path.name == "img0.png":
+                raise RuntimeError("unpicklable result")
+            return original(self, operation, item, creds, options)
+
+        monkeypatch.setattr(BatchProcessor, "_process_item", flaky)
+        result = BatchProcessor(max_workers=2, backend="thread").batch_encode(
+            [batch_images],
+            message=TEST_MESSAGE,
+            output_dir=batch_images / "out",
+            credentials=batch_creds,
+        )
+
+        assert (result.succeeded, result.failed) == (2, 1)
+        failed = [item for item in result.items if item.status == BatchStatus.FAILED]
+        assert "unpicklable result" in failed[0].error
+
+    def test_broken_pool_is_rebuilt(self, batch_images, batch_creds, monkeypatch):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+
+        from stegasoo.batch import BatchProcessor
+
+        class BrokenPool:
+            """A pool whose worker died: every submit fails."""
+
+            def submit(self, *args, **kwargs):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker killed"))
+                return future
+
+            def shutdown(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.shutdown()
+
+        original = BatchProcessor._make_executor
+
+        def make(self, backend, creds, options, respawn=False):
+            if not respawn:
+                return BrokenPool()
+            return original(self, backend, creds, options, respawn=True)
+
+        monkeypatch.setattr(BatchProcessor, "_make_executor", make)
+        result = BatchProcessor(max_workers=2, backend="process").batch_encode(
+            [batch_images],
+            message=TEST_MESSAGE,
+            output_dir=batch_images / "out",
+            credentials=batch_creds,
+        )
+
+        assert result.succeeded == 3, [item.error for item in result.items]
+
+    def test_auto_backend_by_mode(self):
+        from stegasoo.batch import BatchProcessor
+
+        processor = BatchProcessor(max_workers=4)
+        lsb = {"embed_mode": "lsb", "dct_output_format": "png"}
+        dct_png = {"embed_mode": "dct", "dct_output_format": "png"}
+        dct_jpeg = {"embed_mode": "dct", "dct_output_format": "jpeg"}
+
+        assert processor._resolve_backend(10, lsb) == "process"
+        assert processor._resolve_backend(10, dct_jpeg) == "process"
+        assert processor._resolve_backend(10, dct_png) == "thread"
+        assert processor._resolve_backend(1, lsb) == "thread"
+        assert processor._resolve_backend(10, {**lsb, "encode_func": print}) == "thread"
+        with pytest.raises(ValueError):
+            BatchProcessor(backend="gpu")
+
+
+class TestBatchManifest:
+    """Test streamed batch results and resume."""
+
+    def test_manifest_and_resume(self, batch_images, batch_creds):
+        import json
+
+        from stegasoo.batch import BatchProcessor
+
+        tmp_path, creds = batch_images, batch_creds
+        manifest = tmp_path / "run" / "manifest.jsonl"
+        processor = BatchProcessor(max_workers=2, backend="thread", max_in_flight=1)
+
+        def run(**kwargs):
+            return processor.batch_encode(
+                [tmp_path],
+                message=TEST_MESSAGE,
+                output_dir=tmp_path / "out",
+                credentials=creds,
+                manifest=manifest,
+                keep_items=False,
+                **kwargs,
+            )
+
+        first = run()
+        records = [json.loads(line) for line in manifest.read_text().splitlines()]
+        assert first.succeeded == 3 and first.items == []
+        assert {r["status"] for r in records} == {"success"}
+
+        # Pretend the run died after two images, mid-write of the third
+        manifest.write_text("".join(json.dumps(r) + "\n" for r in records[:2]) + '{"input_pa')
+        resumed = run(resume=True)
+        assert (resumed.total, resumed.skipped, resumed.succeeded) == (3, 2, 1)
+        assert json.loads(manifest.read_text().splitlines()[-1])["status"] == "success"
+
+    def test_resume_from_another_directory(self, batch_images, batch_creds, monkeypatch):
+        import json
+
+        from stegasoo.batch import BatchProcessor
+
+        tmp_path, creds = batch_images, batch_creds
+        (tmp_path / "elsewhere").mkdir()
+        processor = BatchProcessor(max_workers=2, backend="thread")
+
+        def run(inputs, manifest, **kwargs):
+            return processor.batch_encode(
+                inputs,
+                message=TEST_MESSAGE,
+                output_dir=tmp_path / "out",
+                credentials=creds,
+                manifest=manifest,
+                **kwargs,
+            )
+
+        # Relative inputs, relative manifest
+        monkeypatch.chdir(tmp_path)
+        run(["img0.png", "img1.png"], "run/manifest.jsonl")
+        records = [json.loads(line) for line in Path("run/manifest.jsonl").open()]
+        assert sorted(r["key"] for r in records) == ["../img0.png", "../img1.png"]
+
+        # Same files, named from a different working directory
+        monkeypatch.chdir(tmp_path / "elsewhere")
+        inputs = ["../img0.png", "../img1.png", "../img2.png"]
+        resumed = run(inputs, "../run/manifest.jsonl", resume=True)
+        assert (resumed.total, resumed.skipped, resumed.succeeded) == (3, 2, 1)
+
+
+class TestBatchScheduling:
+    """Test cost-aware, largest-first batch scheduling."""
+
+    def test_largest_first_under_memory_budget(self, tmp_path, batch_creds):
+        from stegasoo.batch import BatchProcessor
+
+        for side in (120, 400, 240):
+            Image.new("RGB", (side, side), color="blue").save(tmp_path / f"img{side}.png")
+        # A 1-byte budget still runs everything - one item at a time
+        processor = BatchProcessor(max_workers=2, backend="thread", memory_budget=1)
+
+        result = processor.batch_encode(
+            [tmp_path], message=TEST_MESSAGE, output_dir=tmp_path / "out", credentials=batch_creds
+        )
+
+        assert result.succeeded == 3
+        assert [item.input_path.name for item in result.items] == [
+            "img400.png",
+            "img240.png",
+            "img120.png",
+        ]
+        assert all(item.predicted_seconds and item.predicted_bytes for item in result.items)
+        assert result.prediction_ratio > 0
+
+
+class TestBatchCapacityCheck:
+    """Test the parallel, header-only capacity check."""
+
+    def test_results_in_order_and_cached_per_file_version(self, tmp_path):
+        import os
+
+        from stegasoo.batch import batch_capacity_check
+
+        paths = []
+        for i, side in enumerate((64, 128, 96)):
+            paths.append(tmp_path / f"img{i}.png")
+            Image.new("RGB", (side, side), color="blue").save(paths[-1])
+
+        first = batch_capacity_check(paths, max_workers=3)
+        assert [r["dimensions"] for r in first] == ["64x64", "128x128", "96x96"]
+        assert first[1]["capacity_bytes"] > first[0]["capacity_bytes"]
+        assert all(r["valid"] and r["jpegio_capacity_bytes"] is None for r in first)
+
+        # Same path, new content: the (path, mtime, size) key misses
+        Image.new("RGB", (200, 100), color="red").save(paths[0])
+        os.utime(paths[0], ns=(1, 1))
+        again = batch_capacity_check(paths[:1])
+        assert again[0]["dimensions"] == "200x100"
+
+
+class TestSharedPayload:
+    """Test encrypt-once, embed-many."""
+
+    def test_prepared_payload_embeds_in_many_carriers(self, ref_bytes, carrier_bytes, small_image):
+        prepared = stegasoo.prepare_encode(TEST_MESSAGE, ref_bytes, TEST_PASSPHRASE, pin=TEST_PIN)
+
+        for carrier in (carrier_bytes, small_image):
+            result = stegasoo.encode_prepared(prepared, carrier)
+            decoded = stegasoo.decode(
+                stego_image=result.stego_image,
+                reference_photo=ref_bytes,
+                passphrase=TEST_PASSPHRASE,
+                pin=TEST_PIN,
+            )
+            assert decoded.message == TEST_MESSAGE
+
+    def test_batch_shared_payload_rejects_bad_credentials_up_front(self, tmp_path, ref_bytes):
+        from stegasoo.batch import BatchCredentials, BatchProcessor
+
+        Image.new("RGB", (200, 200), color="blue").save(tmp_path / "img.png")
+        creds = BatchCredentials(reference_photo=ref_bytes, passphrase=TEST_PASSPHRASE, pin="1")
+
+        with pytest.raises(stegasoo.StegasooError):
+            BatchProcessor().batch_encode(
+                [tmp_path], message=TEST_MESSAGE, credentials=creds, shared_payload=True
+            )
+
+        # Nothing to embed in, so nothing is encrypted (and nothing can fail)
+        (tmp_path / "empty").mkdir()
+        result = BatchProcessor().batch_encode(
+            [tmp_path / "empty"], message=TEST_MESSAGE, credentials=creds, shared_payload=True
+        )
+        assert result.total == 0
+
+
+class TestSharding:
+    """Test payloads sharded across several carriers."""
+
+    def test_any_k_of_n_shards_rebuild_the_payload(self):
+        from stegasoo.sharding import join_shards, split_payload
+
+        payload = os.urandom(1000)
+        frames = split_payload(payload, data_shards=3, parity_shards=2)
+
+        assert join_shards(frames) == payload
+        assert join_shards([frames[4], frames[1], frames[3]]) == payload
+
+        damaged = bytearray(frames[0])
+        damaged[-1] ^= 1  # Fails its CRC, so parity covers for it
+        assert join_shards([bytes(damaged), frames[2], frames[3], frames[4]]) == payload
+
+        with pytest.raises(stegasoo.ShardError):
+            join_shards(frames[:2])
+
+    def test_inconsistent_frames_rejected(self):
+        import zlib
+
+        from stegasoo.sharding import _FRAME, ShardCollector, parse_shard, split_payload
+
+        payload = os.urandom(1000)
+        three = split_payload(payload, data_shards=3, parity_shards=1)
+        two = split_payload(payload, data_shards=2)  # Same payload hash, other layout
+
+        collector = ShardCollector()
+        collector.add(three[0])
+        collector.add(two[1])
+        assert collector.rejected == 1
+        collector.add(three[1])
+        assert collector.add(three[3])
+        assert collector.payload() == payload
+
+        # A body whose size doesn't match its header is treated as missing
+        fields = list(_FRAME.unpack_from(three[0]))
+        body = three[0][_FRAME.size :][:-1]
+        fields[-1] = zlib.crc32(body)
+        assert parse_shard(_FRAME.pack(*fields) + body) is None
+
+    def test_encode_many_decode_many(self, ref_bytes):
+        carriers = []
+        for color in ("red", "green", "blue"):
+            buf = io.BytesIO()
+            Image.new("RGB", (200, 200), color=color).save(buf, format="PNG")
+            carriers.append(buf.getvalue())
+
+        results = stegasoo.encode_many(
+            TEST_MESSAGE * 20,
+            ref_bytes,
+            carriers,
+            TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            parity_shards=1,
+            backend="thread",
+        )
+        stego = [r.stego_image for r in results]
+
+        decoded = stegasoo.decode_many(
+            [stego[2], stego[0]], ref_bytes, TEST_PASSPHRASE, pin=TEST_PIN, backend="thread"
+        )
+        assert decoded.message == TEST_MESSAGE * 20
+
+        # A single shard on its own says what it is
+        with pytest.raises(stegasoo.ShardError):
+            decode(
+                stego_image=stego[1],
+                reference_photo=ref_bytes,
+                passphrase=TEST_PASSPHRASE,
+                pin=TEST_PIN,
+            )
+
+
+class TestAnalysisCache:
+    """Test the on-disk carrier analysis cache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from stegasoo.analysis_cache import configure_analysis_cache
+
+        yield configure_analysis_cache(tmp_path / "analysis")
+        configure_analysis_cache(None)
+
+    def test_warm_embed_matches_cold(self, cache, carrier_bytes):
+        from stegasoo.analysis_cache import configure_analysis_cache
+        from stegasoo.dct_steganography import embed_in_dct, extract_from_dct
+
+        seed = b"\x01" * 32
+        cold, _ = embed_in_dct(TEST_MESSAGE.encode(), carrier_bytes, seed)
+        warm, _ = embed_in_dct(TEST_MESSAGE.encode(), carrier_bytes, seed)
+        assert cache.stats()["hits"] >= 4  # Y/Cb/Cr planes and the block DCT
+
+        configure_analysis_cache(None)
+        uncached, _ = embed_in_dct(TEST_MESSAGE.encode(), carrier_bytes, seed)
+        assert cold == warm == uncached
+        assert extract_from_dct(warm, seed) == TEST_MESSAGE.encode()
+
+    def test_extract_leaves_cache_alone(self, cache, carrier_bytes):
+        from stegasoo.analysis_cache import configure_analysis_cache
+        from stegasoo.dct_steganography import embed_in_dct, extract_from_dct
+
+        seed = b"\x02" * 32
+        configure_analysis_cache(None)
+        stego, _ = embed_in_dct(TEST_MESSAGE.encode(), carrier_bytes, seed)
+        cache = configure_analysis_cache(cache.directory)
+
+        assert extract_from_dct(stego, seed) == TEST_MESSAGE.encode()
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self, cache):
+        import numpy as np
+
+        cache.max_bytes = 3000
+        for key in (b"a", b"b", b"c"):
+            cache.store(key, "plane", np.zeros(1000, dtype=np.uint8))
+
+        assert cache.load(b"a", "plane") is None
+        assert cache.load(b"c", "plane") is not None
+        assert cache.stats()["evictions"] >= 1
+
+
+class TestPayloadCompression:
+    """Test compression as an encode pipeline stage."""
+
+    def test_compressible_payload_flagged_and_smaller(self, ref_bytes):
+        from stegasoo.crypto import decrypt_message, encrypt_message, parse_header
+
+        message = "All work and no play makes Jack a dull boy. " * 200
+        packed = encrypt_message(message, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        raw = encrypt_message(message, ref_bytes, TEST_PASSPHRASE, TEST_PIN, compression=False)
+
+        assert parse_header(packed)["compressed"]
+        assert not parse_header(raw)["compressed"]
+        assert len(packed) < len(raw) // 4
+
+        for data in (packed, raw):
+            result = decrypt_message(data, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+            assert result.message == message
+
+    def test_small_payload_not_compressed(self, ref_bytes):
+        from stegasoo.crypto import encrypt_message, parse_header
+
+        packed = encrypt_message(TEST_MESSAGE, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        assert not parse_header(packed)["compressed"]
+
+    def test_decompression_limit(self):
+        from stegasoo.compression import CompressionError, compress, decompress
+
+        packed = compress(b"\0" * 100_000)
+        with pytest.raises(CompressionError):
+            decompress(packed, max_size=10_000)
+
+    @pytest.mark.parametrize("algorithm", ["ZLIB", "LZ4", "ZSTD"])
+    def test_parts_compress_like_joined_data(self, algorithm):
+        from stegasoo.compression import CompressionAlgorithm, compress_parts, decompress
+
+        prefix, body = b"\x02\x00\x05notes", b"line of text\n" * 5000
+        packed = compress_parts((prefix, body), CompressionAlgorithm[algorithm])
+        assert packed is not None and len(packed) < len(body)
+
+        # Read from a view of a mutable buffer, like decrypt hands it over
+        buffer = bytearray(packed)
+        with memoryview(buffer) as view:
+            assert bytes(decompress(view)) == prefix + body
+
+        assert compress_parts((prefix, os.urandom(4096)), CompressionAlgorithm[algorithm]) is None
+
+
+class TestCompressionEstimator:
+    """Test the sampling compression estimator."""
+
+    def test_incompressible_data_skipped(self, ref_bytes):
+        from stegasoo.compression import estimate_compression
+        from stegasoo.crypto import encrypt_message, parse_header
+
+        noise = os.urandom(300_000)
+        estimate = estimate_compression(noise)
+        assert not estimate.compressible
+        assert estimate.entropy > 7.9
+
+        packed = encrypt_message(noise, ref_bytes, TEST_PASSPHRASE, TEST_PIN)
+        assert not parse_header(packed)["compressed"]
+
+    def test_estimate_brackets_actual_size(self):
+        from stegasoo.compression import compress, estimate_compression
+
+        # Varied text, so the sampled blocks aren't all the same
+        data = "".join(f"line {i}: {i * i} {hex(i * 7919)}\n" for i in range(40_000)).encode()
+        estimate = estimate_compression(data, time_budget_ms=None)
+        actual = len(compress(data, estimate.algorithm, estimate.level))
+
+        assert estimate.compressible
+        assert estimate.low <= estimate.estimated_size <= estimate.high
+        assert 0.5 * actual < estimate.estimated_size < 2 * actual
+
+    def test_budget_lowers_level(self):
+        from stegasoo.compression import ESTIMATOR_LEVELS, estimate_compression
+
+        data = b"".join(str(i).encode() * 3 for i in range(200_000))
+        unlimited = estimate_compression(data, time_budget_ms=None)
+        rushed = estimate_compression(data, unlimited.algorithm, time_budget_ms=0)
+
+        levels = ESTIMATOR_LEVELS[unlimited.algorithm]
+        assert unlimited.level == levels[-1]
+        assert rushed.level == levels[0]
+
+
+class TestCompressionDictionaries:
+    """Test trained zstd dictionaries for short messages."""
+
+    @pytest.fixture
+    def dictionary_dir(self, tmp_path, monkeypatch):
+        import random
+
+        from stegasoo import dictionaries
+
+        pytest.importorskip("zstandard")
+        monkeypatch.setattr(dictionaries, "DICTIONARY_LOCATIONS", [])
+        monkeypatch.setenv(dictionaries.DICTIONARY_DIR_ENV_VAR, str(tmp_path))
+
+        rng = random.Random(7)
+        words = "meet the courier at north gate tomorrow noon bring package confirm".split()
+        samples = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(20, 80))).encode()
+            for _ in range(400)
+        ]
+        dictionaries.save_dictionary(dictionaries.train_dictionary(samples), tmp_path, "")
+        return tmp_path
+
+    @pytest.fixture
+    def keyed_dictionary(self, dictionary_dir, monkeypatch):
+        from stegasoo import dictionaries
+
+        words = "ledger invoice remittance quarterly audit reconcile balance".split()
+        samples = [" ".join(words[i % 7 :] + words[: i % 7]).encode() * 3 for i in range(400)]
+        key = generate_channel_key()
+        user_dir = dictionary_dir / "user"
+        monkeypatch.setattr(dictionaries, "DICTIONARY_LOCATIONS", [user_dir])
+        path = dictionaries.save_dictionary(dictionaries.train_dictionary(samples), user_dir, key)
+        return key, path
+
+    def test_short_message_uses_dictionary(self, dictionary_dir, ref_bytes):
+        from stegasoo.compression import CompressionAlgorithm
+        from stegasoo.crypto import (
+            _compress_payload,
+            decrypt_message,
+            encrypt_message,
+            parse_header,
+        )
+
+        message = "meet the courier at north gate tomorrow noon, confirm the package " * 5
+        packed = _compress_payload(b"\x01", message.encode(), True)
+        assert packed[4] == CompressionAlgorithm.ZSTD_DICT
+        assert len(packed) < len(message) // 3
+
+        encrypted = encrypt_message(message, ref_bytes, TEST_PASSPHRASE, TEST_PIN, channel_key="")
+        assert parse_header(encrypted)["compressed"]
+        result = decrypt_message(encrypted, ref_bytes, TEST_PASSPHRASE, TEST_PIN, channel_key="")
+        assert result.message == message
+
+    def test_missing_dictionary_reported(self, dictionary_dir, ref_bytes):
+        from stegasoo.crypto import decrypt_message, encrypt_message
+
+        message = "bring the package to the north gate at noon " * 4
+        encrypted = encrypt_message(message, ref_bytes, TEST_PASSPHRASE, TEST_PIN, channel_key="")
+        for path in dictionary_dir.rglob("*.zdict"):
+            path.unlink()
+
+        with pytest.raises(stegasoo.DecryptionError, match="isn't installed"):
+            decrypt_message(encrypted, ref_bytes, TEST_PASSPHRASE, TEST_PIN, channel_key="")
+
+    def test_dictionaries_are_per_channel(self, keyed_dictionary):
+        from stegasoo import dictionaries
+        from stegasoo.crypto import _resolve_channel_key
+
+        key, path = keyed_dictionary
+        keyed = dictionaries.get_active_dictionary(_resolve_channel_key(key))
+        public = dictionaries.get_active_dictionary(None)
+
+        assert keyed == path.read_bytes()
+        assert public is not None and public != keyed
+        # Unchanged files come back from the cache, not re-read
+        assert dictionaries.get_active_dictionary(None) is public
+
+        # A channel with no dictionary of its own falls back to loose files only
+        path.parent.parent.joinpath(path.name).write_bytes(keyed)
+        other = _resolve_channel_key(generate_channel_key())
+        assert dictionaries.get_active_dictionary(other) == keyed
+
+
+class TestProgressReporting:
+    """Test time-throttled progress reporting (v4.3.0)."""
+
+    def test_throttles_within_phase(self):
+        updates = []
+        reporter = stegasoo.ProgressReporter(updates.append, min_interval=60)
+
+        for i in range(100):
+            reporter(i, 100, "embedding")
+        reporter(0, 10, "saving")
+        reporter(10, 10, "saving")
+
+        assert [(u["phase"], u["percent"]) for u in updates] == [
+            ("embedding", 0),
+            ("saving", 0),
+            ("saving", 100.0),
+        ]
+
+    def test_encode_accepts_callback(self, carrier_bytes, ref_bytes):
+        updates = []
+        encode(
+            message=TEST_MESSAGE,
+            reference_photo=ref_bytes,
+            carrier_image=carrier_bytes,
+            passphrase=TEST_PASSPHRASE,
+            pin=TEST_PIN,
+            embed_mode="lsb",
+            progress_file=updates.append,
+        )
+
+        assert updates
+        assert updates[-1]["percent"] == 100
+
+
+class TestJobQueue:
+    """Test the web frontend's shared SQLite job queue."""
+
+    def test_concurrency_holds_across_consumers(self, tmp_path, web_frontend):
+        import threading
+        import time
+
+        from job_queue import JobConsumer, JobQueue
+
+        lock = threading.Lock()
+        running = []
+        most = 0
+
+        def handler(job_id, inputs):
+            nonlocal most
+            with lock:
+                running.append(job_id)
+                most = max(most, len(running))
+            time.sleep(0.2)
+            with lock:
+                running.remove(job_id)
+            return {"n": inputs["n"]}
+
+        # Two queues on one file stand in for two web processes
+        queues = [JobQueue(tmp_path / "jobs.db", concurrency=1) for _ in range(2)]
+        ids = [queues[0].submit("work", {"n": n}) for n in range(3)]
+        consumers = [JobConsumer(q, {"work": handler}).start() for q in queues]
+        try:
+            deadline = time.monotonic() + 10
+            while queues[1].stats()["complete"] < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            for consumer in consumers:
+                consumer.stop(timeout=5)
+
+        assert most == 1
+        assert [queues[1].get(job_id)["n"] for job_id in ids] == [0, 1, 2]
+
+    def test_expired_lease_is_retried_then_lost(self, tmp_path, web_frontend):
+        import time
+
+        from job_queue import MAX_ATTEMPTS, JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0.05)
+        job_id = queue.submit("work", {"data": b"secret"})
+
+        for attempt in range(MAX_ATTEMPTS):
+            assert queue.claim(f"consumer-{attempt}") == (job_id, "work", {"data": b"secret"})
+            time.sleep(0.1)  # The consumer dies without heartbeating
+
+        assert queue.claim("last") is None
+        job = queue.get(job_id)
+        assert (job["status"], job["error_type"]) == ("error", "WorkerLost")
+
+    def test_stale_owner_cannot_finish(self, tmp_path, web_frontend):
+        import time
+
+        from job_queue import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0.05)
+        job_id = queue.submit("work", {})
+        queue.claim("a")
+        time.sleep(0.1)
+        queue.claim("b")
+
+        # "a" wakes up late: its heartbeat and result no longer count
+        assert not queue.heartbeat(job_id, "a")
+        queue.complete(job_id, "a", {"message": "stale"})
+        assert queue.get(job_id)["status"] == "running"
+
+        queue.complete(job_id, "b", {"message": "fresh"})
+        assert queue.get(job_id)["message"] == "fresh"
+
+    def test_taken_result_is_wiped(self, tmp_path, web_frontend):
+        from job_queue import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_id = queue.submit("decode", {})
+        queue.claim("a")
+        queue.complete(job_id, "a", {"is_file": False, "message": TEST_MESSAGE})
+
+        assert queue.take_result(job_id, ("message",))["message"] == TEST_MESSAGE
+        again = queue.take_result(job_id, ("message",))
+        assert again["status"] == "complete" and "message" not in again
+
+
+class TestTempStorage:
+    """Test the web frontend's indexed temp file store."""
+
+    @pytest.fixture
+    def store(self, tmp_path, web_frontend):
+        import temp_storage
+
+        temp_storage.init(tmp_path / "temp", ttl=600, quota_bytes=100)
+        return temp_storage
+
+    def test_quota_per_owner(self, store):
+        store.save_temp_file("a", b"x" * 60, {}, owner="alice")
+
+        with pytest.raises(store.QuotaExceededError):
+            store.save_temp_file("b", b"x" * 60, {}, owner="alice")
+        assert not store.data_path("b").exists()
+
+        store.save_temp_file("c", b"x" * 60, {}, owner="bob")
+        store.save_temp_file("d", b"x" * 40, {}, owner="alice")  # Exactly full
+        with pytest.raises(store.QuotaExceededError):
+            store.reserve("e", owner="alice")
+
+        # Decodes reserve without an owner, so a full owner can still run them
+        store.reserve("f").write_bytes(b"x" * 10)
+        with pytest.raises(store.QuotaExceededError):
+            store.save_temp_metadata("f", {}, owner="alice")  # ...but can't keep a file
+        assert not store.data_path("f").exists()
+        assert store._db().execute("SELECT COUNT(*) FROM files").fetchone()[0] == 3
+
+    def test_expiry(self, store):
+        import time
+
+        store.init(ttl=0.05)
+        store.save_temp_file("a", b"data", {"filename": "a.bin"}, owner="alice")
+        assert store.get_temp_file("a")["data"] == b"data"
+
+        time.sleep(0.1)
+        assert store.get_temp_file_info("a") is None
+        assert store.cleanup_expired() == 1
+        assert not store.data_path("a").exists()
+
+        # Expired files no longer count against the quota
+        store.save_temp_file("b", b"x" * 100, {}, owner="alice")
+
+    def test_unregistered_reservation_expires(self, store):
+        import time
+
+        store.init(ttl=0.05)
+        path = store.reserve("r", owner="alice")
+        path.write_bytes(b"orphan")  # The worker wrote it; nobody registered it
+        assert not store.has_temp_file("r")
+
+        time.sleep(0.1)
+        assert store.cleanup_expired() == 1
+        assert not path.exists()
+
+    def test_legacy_sidecars_swept_on_first_index(self, tmp_path, web_frontend):
+        import temp_storage
+
+        legacy = tmp_path / "legacy"
+        legacy.mkdir()
+        (legacy / "old.json").write_text('{"filename": "old.png"}')
+        (legacy / "old.data").write_bytes(b"old")
+        (legacy / "keep.thumb").write_bytes(b"thumb")
+
+        temp_storage.init(legacy)
+        temp_storage.get_stats()
+        assert sorted(p.name for p in legacy.iterdir() if not p.name.startswith("index.db")) == [
+            "keep.thumb"
+        ]
+
+
+class TestWorkerPool:
+    """Test the web frontend's persistent worker pool."""
+
+    @pytest.fixture
+    def make_pool(self, pool_worker, web_frontend):
+        from subprocess_stego import WorkerPool
+
+        pools = []
+
+        def make(**kwargs):
+            kwargs.setdefault("max_rss_mb", None)
+            pool = WorkerPool(1, worker_path=pool_worker, **kwargs)
+            pools.append(pool)
+            return pool
+
+        yield make
+        for pool in pools:
+            pool.shutdown()
+
+    def ping(self, pool) -> int:
+        reply = pool.run({"operation": "ping"}, timeout=60)
+        assert reply["success"], reply
+        return reply["pid"]
+
+    def test_worker_is_reused(self, make_pool):
+        pool = make_pool()
+        first = self.ping(pool)
+        assert self.ping(pool) == first
+        assert pool.stats()["restarts"] == 0
+
+    def test_restart_after_crash(self, make_pool):
+        import os
+        import signal
+
+        pool = make_pool()
+        first = self.ping(pool)
+
+        # Mid-job: the job fails, the next one gets a fresh worker
+        reply = pool.run({"operation": "crash"}, timeout=60)
+        assert not reply["success"] and "crashed" in reply["error"]
+        second = self.ping(pool)
+        assert second != first
+
+        # Between jobs (the OOM killer, say)
+        os.kill(second, signal.SIGKILL)
+        (worker,) = pool._workers
+        worker.proc.wait(timeout=10)
+        assert self.ping(pool) not in (first, second)
+        assert pool.stats()["restarts"] == 2
+
+    def test_recycled_after_max_jobs(self, make_pool):
+        pool = make_pool(max_jobs=2)
+        pids = [self.ping(pool) for _ in range(4)]
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+        assert pool.stats()["restarts"] == 2
+
+    def test_recycled_over_rss_limit(self, make_pool):
+        # Any interpreter with stegasoo loaded is well past 1 MB
+        pool = make_pool(max_rss_mb=1)
+        first = self.ping(pool)
+        assert self.ping(pool) != first
+
+    def test_timeout_kills_worker(self, make_pool):
+        import time
+
+        pool = make_pool()
+        first = self.ping(pool)
+
+        start = time.monotonic()
+        reply = pool.run({"operation": "sleep", "seconds": 60}, timeout=0.5)
+        assert reply["error_type"] == "TimeoutError"
+        assert time.monotonic() - start < 10
+
+        assert self.ping(pool) != first
+
+    def test_stdout_chatter_goes_to_stderr(self, make_pool, capfd):
+        pool = make_pool()
+        reply = pool.run({"operation": "noisy"}, timeout=60)
+        assert reply["success"], reply
+        assert self.ping(pool) == reply["pid"]  # The pipe is still in step
+
+        err = capfd.readouterr().err
+        assert "chatter from a library" in err
+        assert "native chatter" in err
+
+
+class TestWorkerProtocol:
+    """Test the frame format between the web app and its workers."""
+
+    def frames(self, *messages) -> bytes:
+        from worker_protocol import pack_frame
+
+        return b"".join(bytes(piece) for m in messages for piece in pack_frame(m))
+
+    def test_round_trip(self, web_frontend):
+        import io
+
+        from worker_protocol import file_reader, read_frame
+
+        request = {
+            "operation": "encode",
+            "options": {"embed_mode": "dct", "strength": [1, 2]},
+            "carrier": os.urandom(70_000),
+            "reference": bytearray(b"ref" * 1000),
+            "view": memoryview(b"viewed"),
+            "empty": b"",
+        }
+        reply = {"success": True, "stego_image": b"\x00" * 10}
+        stream = io.BytesIO(self.frames(request, reply))
+        read_into = file_reader(stream)
+
+        decoded = read_frame(read_into)
+        assert decoded == {**request, "view": b"viewed"}
+        assert all(isinstance(decoded[k], bytearray) for k in ("carrier", "view", "empty"))
+        assert read_frame(read_into) == reply
+
+        with pytest.raises(EOFError):
+            read_frame(read_into)  # Clean end of stream
+
+    def test_bad_frames_raise(self, web_frontend):
+        import io
+        import json
+        import struct
+
+        from worker_protocol import MAGIC, ProtocolError, file_reader, read_frame
+
+        def read(data: bytes):
+            return read_frame(file_reader(io.BytesIO(data)))
+
+        frame = self.frames({"operation": "encode", "carrier": b"x" * 100})
+
+        with pytest.raises(ProtocolError):
+            read(b"JUNK" + frame[4:])
+        with pytest.raises(ProtocolError):
+            read(struct.pack(">4sI", MAGIC, 2**31))  # Refused before allocating
+        with pytest.raises(ProtocolError):
+            read(struct.pack(">4sI", MAGIC, 5) + b"{nope")
+        for header in ({"segments": "abc"}, {"segments": [["a", -1]]}, {}, ["segments"]):
+            encoded = json.dumps(header).encode()
+            with pytest.raises(ProtocolError):
+                read(struct.pack(">4sI", MAGIC, len(encoded)) + encoded)
+
+        # Cut anywhere - prefix, header or segment - is an error, never a
+        # short message
+        header_end = frame.index(b"]]}") + 3
+        for cut in (3, 10, header_end - 1, header_end, header_end + 50, len(frame) - 1):
+            with pytest.raises(EOFError):
+                read(frame[:cut])